@@ -0,0 +1,4 @@
+from .service import (
+    TimelineEntry as TimelineEntry,
+    analyze as analyze,
+)
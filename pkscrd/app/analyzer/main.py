@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Optional, Sequence, TextIO
+
+import pnlib
+from loguru import logger
+
+from pkscrd.app.reader.controller.image import ImageController
+from pkscrd.app.reader.factory.controller import (
+    create_image_controller,
+    create_use_cases,
+)
+from pkscrd.app.reader.factory.core.ocr import create_ocr_engine
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import OcrSettings, Settings
+from pkscrd.app.settings.service import load_settings
+from pkscrd.core.notification.service import notification_to_dict
+from pkscrd.core.screen.infra.replay import RecordingReader, open_recording
+from pkscrd.usecase.screenshot import ScreenshotUseCase
+from .service import analyze, initialize_worker
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    記録された対戦を解析し, 通知の時系列を JSON Lines で書き出す.
+    """
+    args = _parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "INFO")
+
+    if not pnlib.is_successfully_loaded():
+        print("起動に必要な情報の読み込みが失敗しました.", file=sys.stderr)
+        return 1
+
+    try:
+        settings = load_settings(args.settings) if args.settings else Settings()
+        if args.ocr:
+            settings.ocr = OcrSettings(engine=args.ocr)
+        reader = open_recording(args.recording)
+    except SettingsError as error:
+        print(error, file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as error:
+        print(f"記録を開けませんでした: {error}", file=sys.stderr)
+        return 1
+
+    with reader, contextlib.ExitStack() as stack:
+        output = (
+            stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            if args.output
+            else sys.stdout
+        )
+        executor = stack.enter_context(
+            concurrent.futures.ProcessPoolExecutor(
+                args.workers,
+                initializer=initialize_worker,
+                initargs=(args.recording,),
+            )
+        )
+        try:
+            asyncio.run(_run(reader, settings, executor, output))
+        except SettingsError as error:
+            print(error, file=sys.stderr)
+            return 1
+    return 0
+
+
+async def _run(
+    reader: RecordingReader,
+    settings: Settings,
+    executor: concurrent.futures.Executor,
+    output: TextIO,
+) -> None:
+    controller = await _create_controller(settings, executor)
+    timestamps = reader.timestamps
+
+    began_at = time.perf_counter()
+    async for entry in analyze(reader, controller, executor):
+        record = {
+            "index": entry.index,
+            "timestamp": entry.timestamp,
+            "notification": notification_to_dict(entry.notification),
+        }
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    elapsed = time.perf_counter() - began_at
+
+    duration = timestamps[-1] - timestamps[0] if timestamps else 0.0
+    logger.info(
+        "Analyzed {} frames ({:.1f}s) in {:.1f}s: x{:.1f}",
+        len(timestamps),
+        duration,
+        elapsed,
+        duration / elapsed if elapsed else 0.0,
+    )
+
+
+async def _create_controller(
+    settings: Settings,
+    executor: concurrent.futures.Executor,
+) -> ImageController:
+    ocr = await create_ocr_engine(settings.ocr)
+    # スクリーンショットは要求されないため, 保持する画像は最小限とする.
+    use_cases = create_use_cases(settings.routine, ocr, ScreenshotUseCase(1))
+    return create_image_controller(settings.routine, use_cases, executor, ocr)
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="pkscrd-analyze",
+        description="記録された対戦を最高速で解析し, 通知の時系列を JSON Lines で書き出す.",
+    )
+    parser.add_argument(
+        "recording",
+        help="動画ファイル, スクリーンショットのディレクトリ, またはフレームアーカイブ.",
+    )
+    parser.add_argument("-o", "--output", help="出力先. 省略時は標準出力.")
+    parser.add_argument(
+        "-s", "--settings", help="設定ファイル. 処理内容と OCR に用いる."
+    )
+    parser.add_argument(
+        "--ocr",
+        choices=["winocr", "tesseract", "none"],
+        help="OCR エンジン. 設定ファイルより優先する.",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="認識に用いるプロセス数.",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
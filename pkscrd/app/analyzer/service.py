@@ -0,0 +1,118 @@
+import asyncio
+import concurrent.futures
+import dataclasses
+import itertools
+from collections import deque
+from typing import AsyncIterator, NamedTuple, Optional
+
+from cv2.typing import MatLike
+
+from pkscrd.app.reader.controller.image import (
+    ImageController,
+    ImageRecognition,
+    recognize_image,
+)
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.screen.infra.replay import RecordingReader, open_recording
+
+
+@dataclasses.dataclass(frozen=True)
+class TimelineEntry:
+    """解析結果の 1 項目. 通知と, 通知のもとになったフレームを表す."""
+
+    index: int
+    timestamp: float
+    notification: Notification
+
+
+class _PendingBatch(NamedTuple):
+    indices: range
+    recognitions: asyncio.Future[list[Optional[ImageRecognition]]]
+
+
+async def analyze(
+    reader: RecordingReader,
+    controller: ImageController,
+    executor: concurrent.futures.Executor,
+    *,
+    batch_size: int = 8,
+    prefetch_batches: int = 4,
+) -> AsyncIterator[TimelineEntry]:
+    """
+    記録を先頭から最高速で処理し, 通知を順に返す.
+
+    前後のフレームに依存しない認識は executor で先行して並列に行い,
+    状態を持つ処理は記録順にコントローラで行う.
+    executor のワーカは initialize_worker で記録を開いておくこと.
+
+    Args:
+        reader: 記録. コントローラに渡すフレームの読み込みに用いる.
+        controller: 状態を持つ処理を行うコントローラ.
+        executor: 並列に認識を行う Executor.
+        batch_size: 1 回の依頼で認識する連続したフレーム数.
+        prefetch_batches: 先行して依頼しておく数.
+    """
+    loop = asyncio.get_running_loop()
+    timestamps = reader.timestamps
+    batches = [
+        range(start, min(start + batch_size, len(timestamps)))
+        for start in range(0, len(timestamps), batch_size)
+    ]
+
+    # 読み込みの順序を保つため, フレームの読み込みは 1 スレッドで行う.
+    # 読み込んだフレームは大きいので, 次のバッチの分だけ先読みする.
+    with concurrent.futures.ThreadPoolExecutor(1) as read_executor:
+
+        def recognize(indices: range) -> _PendingBatch:
+            return _PendingBatch(
+                indices,
+                loop.run_in_executor(executor, recognize_recorded_frames, indices),
+            )
+
+        def read(indices: range) -> list[asyncio.Future[Optional[MatLike]]]:
+            return [
+                loop.run_in_executor(read_executor, reader.read, index)
+                for index in indices
+            ]
+
+        requests = map(recognize, batches)
+        pending = deque(itertools.islice(requests, prefetch_batches))
+        images = read(pending[0].indices) if pending else []
+        while pending:
+            current = pending.popleft()
+            pending.extend(itertools.islice(requests, 1))
+            current_images, images = images, read(
+                pending[0].indices if pending else range(0)
+            )
+
+            recognitions = await current.recognitions
+            for index, recognition, image_future in zip(
+                current.indices, recognitions, current_images
+            ):
+                image = await image_future
+                if image is None or recognition is None:
+                    continue
+                async for notification in controller.handle(image, recognition):
+                    yield TimelineEntry(index, timestamps[index], notification)
+
+
+def initialize_worker(path: str) -> None:
+    """ワーカプロセスで記録を開く. Executor の initializer に指定する."""
+    global _worker_reader
+    _worker_reader = open_recording(path)
+
+
+def recognize_recorded_frames(indices: range) -> list[Optional[ImageRecognition]]:
+    """ワーカプロセスで記録中のフレームを認識する. 読み込めないフレームは None."""
+    assert _worker_reader, "initialize_worker() is not called."
+    return [
+        (
+            None
+            if (image := _worker_reader.read(index)) is None
+            else recognize_image(image)
+        )
+        for index in indices
+    ]
+
+
+_worker_reader: Optional[RecordingReader] = None
@@ -1,3 +1,4 @@
+import functools
 from typing import Optional
 
 from PySide6.QtWidgets import QWidget
@@ -29,7 +30,9 @@ def run_configuration(parent: Optional[QWidget] = None) -> bool:
 
     # HACK デフォルト値がある値は初期値を任せたい.
     value = settings_to_conf(settings)
-    widget = ConfigurationDialog(parent=parent, value=value, save=save)
+    widget = ConfigurationDialog(
+        parent=parent, value=value, save=functools.partial(save, shown=value)
+    )
     widget.exec_()
     return widget.is_saved
 
@@ -1,10 +1,13 @@
-from typing import Any, MutableMapping, Optional
+from typing import TYPE_CHECKING, Any, MutableMapping, Optional
 
 from loguru import logger
-from tomlkit.toml_file import TOMLFile, TOMLDocument
 
 from pkscrd.app.settings.model import Settings
 from pkscrd.app.settings.service import select_path
+
+if TYPE_CHECKING:
+    from tomlkit import TOMLDocument
+
 from .model import (
     AudioConfiguration,
     BouyomichanConfiguration,
@@ -24,7 +27,11 @@ from .model import (
 def settings_to_conf(settings: Settings) -> Configuration:
     return Configuration(
         screen=ScreenConfiguration(
-            engine=settings.screen.engine,
+            # 記録の再生は開発用のため設定画面では扱わず, OBS Studio として表示する.
+            # 変更しなければ保存時に残す (save の shown).
+            engine=(
+                settings.screen.engine if settings.screen.engine != "replay" else "obs"
+            ),
             obs=ObsConfiguration(
                 web_socket_server=ObsWebSocketServerConfiguration(
                     port=settings.obs.port if settings.obs else 4445,
@@ -61,7 +68,21 @@ def settings_to_conf(settings: Settings) -> Configuration:
     )
 
 
-def save(output: Configuration, path: Optional[str] = None) -> None:
+def save(
+    output: Configuration,
+    path: Optional[str] = None,
+    *,
+    shown: Optional[Configuration] = None,
+) -> None:
+    """
+    設定画面の値を設定ファイルに書き込む.
+
+    Args:
+        shown: 設定画面に表示した値. 記録の再生を OBS Studio として表示したとき,
+            映像の取得方法を変えていなければ記録の再生のまま残す.
+    """
+    from tomlkit.toml_file import TOMLFile, TOMLDocument
+
     path = path or select_path()
     settings_file = TOMLFile(path)
     try:
@@ -75,7 +96,12 @@ def save(output: Configuration, path: Optional[str] = None) -> None:
     logger.debug("{}", output)
 
     screen = _ensure_mapping(settings, "screen")
-    screen["engine"] = output.screen.engine
+    if not (
+        screen.get("engine") == "replay"
+        and shown is not None
+        and output.screen.engine == shown.screen.engine
+    ):
+        screen["engine"] = output.screen.engine
 
     obs = _ensure_mapping(settings, "obs")
     obs["port"] = output.screen.obs.web_socket_server.port
@@ -120,7 +146,7 @@ def save(output: Configuration, path: Optional[str] = None) -> None:
         raise RuntimeError("設定ファイルへの書き込みが失敗しました.")
 
 
-def _ensure_mapping(mapping: TOMLDocument, key: str) -> MutableMapping[str, Any]:
+def _ensure_mapping(mapping: "TOMLDocument", key: str) -> MutableMapping[str, Any]:
     if (
         key not in mapping
         or not hasattr((value := mapping[key]), "__getitem__")
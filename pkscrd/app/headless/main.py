@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from typing import Callable, Optional, Sequence, TextIO
+
+import pnlib
+from loguru import logger
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.service import load_settings, select_path
+from pkscrd.core.notification.service import notification_to_dict
+from pkscrd.core.tolerance.model import FatalError
+from .service import HeadlessReader
+
+_COMMANDS: dict[str, Callable[[HeadlessReader], None]] = {
+    "opponent_team": lambda r: r.request_opponent_team(),
+    "opponent_team_types": lambda r: r.request_opponent_team(with_types=True),
+    "opponent_hp": lambda r: r.request_opponent_hp(),
+    "ally": lambda r: r.request_ally_hp(),
+    "move": lambda r: r.request_move(),
+    "cursor": lambda r: r.request_cursor(),
+    "screenshot": lambda r: r.request_screenshot(),
+}
+"""標準入力から受け付ける命令. 読み上げアプリのキー操作に対応する."""
+
+_QUIT = "quit"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    画面を用いずに読み上げの処理を行う.
+    標準入力から 1 行 1 命令を受け付け, 通知を JSON Lines で標準出力に書き出す.
+    """
+    args = _parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "WARNING")
+
+    if not pnlib.is_successfully_loaded():
+        print("起動に必要な情報の読み込みが失敗しました.", file=sys.stderr)
+        return 1
+
+    try:
+        path = args.settings or select_path()
+        settings = load_settings(path)
+        return asyncio.run(
+            _run(HeadlessReader(settings, dir_path=os.path.dirname(path) or None))
+        )
+    except SettingsError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+
+async def _run(reader: HeadlessReader, output: TextIO = sys.stdout) -> int:
+    async with reader:
+        # 入力を待つ間も止められるよう, 終了を待たないスレッドで読む.
+        threading.Thread(
+            target=_receive,
+            args=(reader, sys.stdin),
+            name="commands",
+            daemon=True,
+        ).start()
+        try:
+            async for notification in reader.notifications():
+                record = notification_to_dict(notification)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+        except FatalError:
+            pass  # 利用者に示すメッセージは errors に積まれている.
+
+    if errors := reader.errors:
+        for message in errors:
+            print(message, file=sys.stderr)
+        return 1
+    return 0
+
+
+def _receive(reader: HeadlessReader, input_: TextIO) -> None:
+    """命令を読み, 終わりに達するか quit を受け取ったら処理を止める."""
+    for line in input_:
+        if (name := line.strip()) == _QUIT:
+            break
+        if not name:
+            continue
+        if command := _COMMANDS.get(name):
+            command(reader)
+        else:
+            logger.warning("Unknown command: {}", name)
+    reader.stop()
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="pkscrd-headless",
+        description=(
+            "画面を用いずに読み上げの処理を行う."
+            f" 標準入力から 1 行 1 命令 ({', '.join(_COMMANDS)}, {_QUIT}) を受け付け,"
+            " 通知を JSON Lines で標準出力に書き出す."
+        ),
+    )
+    parser.add_argument(
+        "-s",
+        "--settings",
+        help="設定ファイル. 省略時は読み上げアプリと同じく選ぶ.",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import types
+from typing import AsyncIterator, Optional, Type
+
+from cv2.typing import MatLike
+from loguru import logger
+
+from pkscrd.app.reader.agent import ImageProcessAgent
+from pkscrd.app.reader.controller.command import Command
+from pkscrd.app.reader.pipeline import ReaderPipeline
+from pkscrd.app.reader.startup import StartupCallback
+from pkscrd.app.settings.model import RoutineSettings, Settings
+from pkscrd.core.metrics.trace import Trace
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.notification.service import Notifier
+from pkscrd.core.screen.service.impl.push import PushScreenFetcher, fit_to_screen
+
+
+class _ChannelNotifier(Notifier):
+    """通知を読み上げずに, 受け取る側へ渡す."""
+
+    def __init__(self, notifications: asyncio.Queue[Optional[Notification]]) -> None:
+        self._notifications = notifications
+
+    def notify(
+        self,
+        notification: Notification,
+        trace: Optional[Trace] = None,
+    ) -> None:
+        self._notifications.put_nowait(notification)
+
+
+class HeadlessReader:
+    """
+    画面を用いずに読み上げの処理を行う. PySide6 を読み込まない.
+
+    映像は設定に従って取得するか, pushes_frames のときは push_frame() で与える.
+    要求はメソッドで送り, 通知は読み上げずに notifications() から受け取る.
+    利用者に示して終了すべきエラーが起きたときは, 通知を打ち切り errors に積む.
+
+    ```python
+    async with HeadlessReader(load_settings(path)) as reader:
+        reader.request_opponent_team()
+        async for notification in reader.notifications():
+            ...
+    ```
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        dir_path: Optional[str] = None,
+        pushes_frames: bool = False,
+        startup_callback: Optional[StartupCallback] = None,
+        max_workers: int = 3,
+        recognition_threads: int = 4,
+    ):
+        """
+        Args:
+            dir_path: スクリーンショットや記録などの書き出し先の既定値.
+                未指定時はカレントディレクトリとする.
+            pushes_frames: 映像を設定に従って取得せず, push_frame() で与える.
+            max_workers: チームの認識に用いるワーカープロセス数.
+            recognition_threads: 画像認識を並行して行うスレッド数.
+        """
+        self._notifications: asyncio.Queue[Optional[Notification]] = asyncio.Queue()
+        self._frames = PushScreenFetcher() if pushes_frames else None
+        self._pipeline = ReaderPipeline(
+            settings,
+            _ChannelNotifier(self._notifications),
+            dir_path=dir_path or os.getcwd(),
+            screen_fetcher=self._frames,
+            startup_callback=startup_callback,
+            max_workers=max_workers,
+            recognition_threads=recognition_threads,
+        )
+        self._agent: Optional[ImageProcessAgent] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def __aenter__(self) -> "HeadlessReader":
+        self._agent = agent = await self._pipeline.__aenter__()
+        self._task = task = asyncio.create_task(agent())
+        # 処理が止まったら通知を打ち切る.
+        task.add_done_callback(lambda _: self._notifications.put_nowait(None))
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> bool:
+        if (agent := self._agent) and (task := self._task):
+            agent.stop()
+            try:
+                await task
+            except Exception as error:
+                logger.opt(exception=error).debug("The reader is stopped by an error.")
+        return await self._pipeline.__aexit__(exc_type, exc_val, exc_tb)
+
+    @property
+    def errors(self) -> list[str]:
+        """利用者に示して終了すべきエラーのメッセージ. 取り出した分は消える."""
+        messages: list[str] = []
+        queue = self._pipeline.errors
+        while not queue.empty():
+            messages.append(queue.get_nowait())
+        return messages
+
+    def stop(self) -> None:
+        """処理を止める. 任意のスレッドから呼び出せる. 止まると通知も終わる."""
+        assert self._agent, "not entered"
+        self._agent.stop()
+
+    def push_frame(self, image: MatLike) -> None:
+        """
+        映像を与える. 処理が追いつかないときは, 最新の映像だけを処理する.
+        16:9 の BGR の映像を, 認識が前提とする大きさ (1920x1080) に拡大・縮小して処理する.
+        処理と同じイベントループのスレッドから呼び出す.
+
+        Raises:
+            RuntimeError: pushes_frames でないとき.
+            ValueError: BGR の映像でないか, 縦横比が 16:9 でないとき.
+        """
+        if not self._frames:
+            raise RuntimeError("The reader does not accept pushed frames.")
+        self._frames.push(fit_to_screen(image))
+
+    # 要求は任意のスレッドから送れる.
+
+    def request_opponent_team(self, *, with_types: bool = False) -> None:
+        self._send(Command.OPPONENT_TEAM_TYPES if with_types else Command.OPPONENT_TEAM)
+
+    def request_opponent_hp(self) -> None:
+        self._send(Command.OPPONENT_HP)
+
+    def request_ally_hp(self) -> None:
+        """選出中であれば選出を, そうでなければ味方の HP を通知させる."""
+        self._send(Command.ALLY)
+
+    def request_move(self) -> None:
+        self._send(Command.MOVE)
+
+    def request_cursor(self) -> None:
+        self._send(Command.CURSOR)
+
+    def request_screenshot(self) -> None:
+        self._send(Command.SCREENSHOT)
+
+    def apply_routine(self, routine: RoutineSettings) -> None:
+        """処理の設定を次の映像から反映する. チームや HP 履歴などの状態は引き継ぐ."""
+        self._pipeline.apply_routine(routine)
+
+    async def notifications(self) -> AsyncIterator[Notification]:
+        """
+        通知を通知した順に返す. 処理が止まると終わる.
+
+        Raises:
+            FatalError: 致命的なエラーで処理が止まったとき.
+        """
+        while (notification := await self._notifications.get()) is not None:
+            yield notification
+        # 止まった後に再び呼び出されても, 待たずに終わるようにする.
+        self._notifications.put_nowait(None)
+        if (
+            (task := self._task)
+            and not task.cancelled()
+            and (error := task.exception())
+        ):
+            raise error
+
+    def _send(self, command: Command) -> None:
+        assert self._agent, "not entered"
+        self._agent.commands.send(command)
@@ -1,5 +1,20 @@
-from .app import (
-    ReaderManager as ReaderManager,
-    run_settings_error as run_settings_error,
-    show_pnlib_error as show_pnlib_error,
-)
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .app import (
+        ReaderManager as ReaderManager,
+        run_settings_error as run_settings_error,
+        show_pnlib_error as show_pnlib_error,
+    )
+
+# 画面を用いない処理 (pipeline など) だけを読み込むときに Qt を読み込まないよう,
+# 画面に関わるものは使用時に読み込む.
+_APP_NAMES = frozenset({"ReaderManager", "run_settings_error", "show_pnlib_error"})
+
+
+def __getattr__(name: str) -> Any:
+    if name in _APP_NAMES:
+        from . import app
+
+        return getattr(app, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,33 @@
-import asyncio
+import itertools
 import time
+from typing import Iterable, Optional
 
 from loguru import logger
 from returns.pipeline import is_successful
 
+from pkscrd.app.reader.controller.command import Command, CommandChannel
 from pkscrd.app.reader.controller.image import ImageController
-from pkscrd.core.notification.service import Notifier
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.flight.model import DumpReason
+from pkscrd.core.flight.service import FlightRecorder
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.metrics.trace import Hop, Tracer
+from pkscrd.core.notification.service import NotificationPublisher, Notifier
+from pkscrd.core.scene.model import ImageScene, Scene
 from pkscrd.core.screen.service import ScreenFetcher
+from pkscrd.core.screen.service.recorder import ScreenRecorder
 from pkscrd.core.tolerance.model import FatalError
 
+POLLING_INTERVAL_IN_SECONDS = 0.1
+
+# 対戦外の場面. 続けば休止状態に入る.
+# 不明な場面は対戦中の演出でもあるため, 対戦外の場面に続くときだけ対戦外とみなす.
+_IDLE_SCENES = frozenset({Scene.LOBBY, Scene.FIELD_MENU})
+_IDLE_IMAGE_SCENES = frozenset(
+    {ImageScene.LOBBY, ImageScene.FIELD_MENU, ImageScene.UNKNOWN}
+)
+
 
 class ImageProcess:
 
@@ -17,17 +36,141 @@ class ImageProcess:
         fetcher: ScreenFetcher,
         controller: ImageController,
         notifier: Notifier,
+        recorder: Optional[ScreenRecorder] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+        flight_recorder: Optional[FlightRecorder] = None,
+        budget_in_seconds: Optional[float] = None,
+        publisher: Optional[NotificationPublisher] = None,
     ):
+        """
+        Args:
+            budget_in_seconds: 1 フレームの処理時間の予算.
+                超えそうなときは, 後回しにできる処理を次のフレームへ回す.
+            publisher: 読み上げとは別に通知を配信する先.
+        """
         self._fetcher = fetcher
         self._controller = controller
         self._notifier = notifier
+        self._recorder = recorder
+        self._metrics = metrics or NullMetrics()
+        self._tracer = tracer
+        self._flight_recorder = flight_recorder
+        self._budget_in_seconds = budget_in_seconds
+        self._publisher = publisher
+        self._sequence = 0
 
-    async def __call__(self) -> None:
-        if not is_successful(result := await self._fetcher.fetch()):
+    def set_controller(self, controller: ImageController) -> None:
+        """次の映像から処理に用いるコントローラを差し替える."""
+        self._controller = controller
+
+    def set_notifier(self, notifier: Notifier) -> None:
+        """次の通知から用いる通知機能を差し替える."""
+        self._notifier = notifier
+
+    def set_publisher(self, publisher: Optional[NotificationPublisher]) -> None:
+        """次の通知から用いる配信先を差し替える. None のときは配信しない."""
+        self._publisher = publisher
+
+    @property
+    def scene(self) -> Scene:
+        """直近に処理した映像から認識したシーン."""
+        return self._controller.scene
+
+    async def probe(self) -> Optional[ImageScene]:
+        """
+        映像を取得し, 画像のシーンだけを認識する. 休止中に全体の処理の代わりに行う.
+
+        Returns:
+            画像のシーン. 映像の取得に失敗したときは None.
+        """
+        with self._metrics.stage(Stage.FETCH):
+            result = await self._fetcher.fetch()
+        if not is_successful(result):
+            self._metrics.count("fetch_failures_total")
+            return None
+        self._metrics.count("probes_total")
+        return self._controller.probe(result.unwrap())
+
+    async def execute(self, commands: Iterable[Command]) -> bool:
+        """
+        命令を実行する. 既知の状態から答えられる命令はすぐに通知し,
+        答えられない命令があれば映像を取得し, 必要な検出処理だけを行う.
+
+        Returns:
+            映像を処理したか.
+        """
+        detectors: list[frozenset[str]] = []
+        for command in commands:
+            if command is Command.WAKE:
+                continue
+            if notification := self._controller.answer(command):
+                self._metrics.count("commands_total", command=command, path="answer")
+                self._notify(notification, time.perf_counter())
+                continue
+            self._metrics.count("commands_total", command=command, path="frame")
+            detectors.append(command.detectors)
+        if not detectors:
+            return False
+        await self(only=frozenset(itertools.chain.from_iterable(detectors)))
+        return True
+
+    async def __call__(self, *, only: Optional[frozenset[str]] = None) -> None:
+        """
+        Args:
+            only: 行う検出処理の名前. 与えられたときは, それ以外の検出処理を行わない.
+        """
+        self._sequence += 1
+        if not (flight_recorder := self._flight_recorder):
+            await self._process(only)
             return
+        flight_recorder.begin(self._sequence)
+        try:
+            await self._process(only)
+        finally:
+            flight_recorder.end()
+
+    async def _process(self, only: Optional[frozenset[str]]) -> None:
+        metrics = self._metrics
+        captured_at = time.perf_counter()
+        deadline = (
+            captured_at + self._budget_in_seconds
+            if self._budget_in_seconds is not None
+            else None
+        )
+        with metrics.stage(Stage.FRAME):
+            with metrics.stage(Stage.FETCH):
+                result = await self._fetcher.fetch()
+            if not is_successful(result):
+                metrics.count("fetch_failures_total")
+                return
+            metrics.count("frames_total")
+            image = result.unwrap()
+            if self._recorder:
+                self._recorder.record(image)
 
-        async for notification in self._controller.handle(result.unwrap()):
-            self._notifier.notify(notification)
+            async for notification in self._controller.handle(
+                image, deadline=deadline, only=only
+            ):
+                self._notify(notification, captured_at)
+
+    def _notify(self, notification: Notification, captured_at: float) -> None:
+        metrics = self._metrics
+        trace = None
+        if tracer := self._tracer:
+            kind = type(notification).__name__
+            trace = tracer.start(self._sequence, captured_at, kind)
+            trace.mark(Hop.RECOGNIZED)
+        with metrics.stage(Stage.NOTIFICATION):
+            self._notifier.notify(notification, trace)
+        if publisher := self._publisher:
+            # 取得時刻は経過時間の計測用の時計で記録しているため, UNIX 時間に直す.
+            publisher.publish(
+                notification, time.time() - (time.perf_counter() - captured_at)
+            )
+        if flight_recorder := self._flight_recorder:
+            flight_recorder.record_notification(repr(notification)[:300])
+        metrics.count("notifications_total")
 
 
 class ImageProcessAgent:
@@ -37,37 +180,127 @@ class ImageProcessAgent:
     - 映像を取得する.
     - 映像に関する処理を起動し, 通知を取得する.
     - 取得した通知を起動する.
+
+    ロビーなど対戦外の場面が idle_after_in_seconds 続くと休止状態に入り,
+    idle_interval_in_seconds ごとに画像のシーンだけを調べる.
+    選出や指示の場面が現れるか, 起こされると元の間隔に戻る.
+    不明な場面は, 対戦外の場面に続くとき (または対戦の場面を見る前) だけ対戦外とみなす.
+
+    命令が届くと待機を解き, 次の映像を待たずに実行する.
     """
 
     def __init__(
         self,
         process: ImageProcess,
         *,
-        interval_in_seconds: float = 0.1,
+        interval_in_seconds: float = POLLING_INTERVAL_IN_SECONDS,
+        idle_after_in_seconds: Optional[float] = None,
+        idle_interval_in_seconds: float = 1.0,
+        metrics: Optional[Metrics] = None,
+        flight_recorder: Optional[FlightRecorder] = None,
+        commands: Optional[CommandChannel] = None,
     ):
+        """
+        Args:
+            idle_after_in_seconds: 休止状態に入るまでの時間. None のときは休止しない.
+        """
         self._process = process
         self._interval_in_seconds = interval_in_seconds
+        self._idle_after_in_seconds = idle_after_in_seconds
+        self._idle_interval_in_seconds = idle_interval_in_seconds
+        self._metrics = metrics or NullMetrics()
+        self._flight_recorder = flight_recorder
+        self._commands = commands or CommandChannel()
         self._stopped = False
 
+        self._idle = False
+        # 対戦外の場面が続き始めた時刻.
+        self._quiet_since: Optional[float] = None
+        # 直近の既知の場面が選出や指示の場面だったか.
+        self._in_battle = False
+        self._metrics.register_gauge("polling_idle", lambda: float(self._idle))
+
+    @property
+    def idle(self) -> bool:
+        return self._idle
+
+    @property
+    def commands(self) -> CommandChannel:
+        """命令の通り道. 任意のスレッドから命令を送れる."""
+        return self._commands
+
     def stop(self) -> None:
+        """処理を止める. 任意のスレッドから呼び出せ, 待機中であればすぐに止まる."""
         self._stopped = True
+        self._commands.send(Command.WAKE)
+
+    def wake(self) -> None:
+        """休止状態から元の間隔に戻す. 任意のスレッドから呼び出せる."""
+        self._commands.send(Command.WAKE)
 
     async def __call__(self) -> None:
+        commands = self._commands
+        commands.open()
         while not self._stopped:
             start = time.time()
+            received = commands.receive()
+            if received:
+                self._wake()
+            idle = self._idle
 
             try:
-                await self._process()
+                if received and await self._process.execute(received):
+                    self._update_idle(start)
+                elif idle:
+                    image_scene = await self._process.probe()
+                    if image_scene and image_scene not in _IDLE_IMAGE_SCENES:
+                        self._in_battle = True
+                        self._wake()
+                else:
+                    await self._process()
+                    self._update_idle(start)
             except Exception as e:
                 # エラーハンドラから送出されたエラーは処理を止めるためのものなので再送する.
                 if isinstance(e, FatalError):
+                    if self._flight_recorder:
+                        self._flight_recorder.dump(DumpReason.FATAL, wait=True)
                     raise
                 logger.opt(exception=e).warning(
                     "An error occurred while processing s screenshot.",
                 )
 
             duration = time.time() - start
+            if self._idle:
+                await commands.wait(self._idle_interval_in_seconds - duration)
+                continue
+            if idle:
+                # 起こされたときは待たずに処理する.
+                continue
             if duration > self._interval_in_seconds:
                 logger.debug("Polling interval is over: {:.4f}", duration)
+                self._metrics.count("polling_overruns_total")
                 continue
-            await asyncio.sleep(self._interval_in_seconds - duration)
+            await commands.wait(self._interval_in_seconds - duration)
+
+    def _update_idle(self, now: float) -> None:
+        if self._idle_after_in_seconds is None:
+            return
+        if (scene := self._process.scene) is not Scene.UNKNOWN:
+            self._in_battle = scene not in _IDLE_SCENES
+        if self._in_battle:
+            self._quiet_since = None
+            return
+        if self._quiet_since is None:
+            self._quiet_since = now
+            return
+        if now - self._quiet_since >= self._idle_after_in_seconds:
+            logger.info("Polling becomes idle.")
+            self._idle = True
+            self._metrics.count("polling_idle_transitions_total")
+
+    def _wake(self) -> None:
+        self._quiet_since = None
+        if not self._idle:
+            return
+        logger.info("Polling wakes up.")
+        self._idle = False
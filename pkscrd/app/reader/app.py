@@ -1,8 +1,10 @@
+import asyncio
 import contextlib
+import functools
 import os
+import threading
 import types
-from concurrent.futures import ProcessPoolExecutor
-from queue import Queue
+from queue import Full, Queue
 from typing import Optional, Type
 
 from PySide6.QtWidgets import QWidget, QMessageBox
@@ -10,151 +12,344 @@ from loguru import logger
 
 from pkscrd.app.gui import set_window_icon
 from pkscrd.app.settings.error import SettingsError
-from pkscrd.app.settings.service import select_path, load_settings
-from pkscrd.core.cursor.service import (
-    CommandCursorReader,
-    PokemonCursorReader,
-    TextCursorReader,
-)
-from pkscrd.core.move.service import MoveReader
-from pkscrd.core.hp.service import AllyHpReader
-from pkscrd.usecase.ally import AllyUseCase
-from pkscrd.usecase.cursor import CursorUseCase
-from pkscrd.usecase.hp import AllyHpUseCase, OpponentHpUseCase
-from pkscrd.usecase.move import MoveUseCase
-from pkscrd.usecase.selection import SelectionUseCase
-from pkscrd.usecase.team import TeamUseCase
-from .agent import ImageProcess, ImageProcessAgent
-from .controller.gui import GuiController, SettingsErrorDialog
+from pkscrd.app.settings.model import Settings
+from pkscrd.app.settings.service import diff_settings, select_path, load_settings
+from pkscrd.core.flight.model import DumpReason
+from pkscrd.core.metrics.infra import Control
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.notification.service import Notifier, Phonemizer
+from pkscrd.core.pokemon.service import PokemonMapper
+from pkscrd.core.screen.service.impl.replay import ReplayMode, ReplayScreenFetcher
+from .agent import ImageProcessAgent
+from .controller.gui import GuiController, SettingsErrorDialog, watch_error
 from .error import (
     create_bouyomichan_tolerance_callback,
-    create_capture_tolerance_callback,
-    create_obs_tolerance_callback,
     create_voicevox_tolerance_callback,
-    watch_error,
 )
-from .factory.controller import create_image_controller
+from .factory.core.metrics import using_metrics
 from .factory.core.notification import using_notifier
-from .factory.core.ocr import create_ocr_engine
-from .factory.core.screen import using_screen_fetcher
-from .factory.core.screenshot import create_screenshot_use_case
+from .factory.core.profiler import create_profiler, create_profiler_controls
+from .factory.core.stream import using_notification_stream
+from .isolated import RecognitionSupervisor
+from .pipeline import ReaderPipeline
+from .session import ReaderSessions
+from .startup import Component, StartupCallback, start_component
 
 
 class ReaderManager:
     """Reader アプリケーションのコンテクスト管理"""
 
-    def __init__(self, max_workers: int = 3) -> None:
+    def __init__(
+        self,
+        max_workers: int = 3,
+        startup_callback: Optional[StartupCallback] = None,
+        recognition_threads: int = 4,
+    ) -> None:
+        """
+        Args:
+            max_workers: チームの認識に用いるワーカープロセス数.
+            recognition_threads: 画像認識を並行して行うスレッド数.
+        """
         self._max_workers = max_workers
+        self._recognition_threads = recognition_threads
+        self._startup_callback = startup_callback
+        self._stack = contextlib.AsyncExitStack()
+        self._stack.callback(self._exit_notifier)
 
-        self._screen_fetcher_manager: Optional[
-            contextlib.AbstractAsyncContextManager
+        self._settings_path = ""
+        self._settings = Settings()
+        self._errors: Queue[str] = Queue(maxsize=10)
+        self._metrics: Metrics = NullMetrics()
+        self._notifier_manager: Optional[
+            contextlib.AbstractContextManager[Notifier]
         ] = None
-        self._notifier_manager: Optional[contextlib.AbstractContextManager] = None
-        self._executor_manager: Optional[ProcessPoolExecutor] = None
-
-    async def __aenter__(self) -> tuple[[GuiController, ImageProcessAgent]]:
-        settings_path = select_path()
-        settings = load_settings(select_path())
-        errors: Queue[str] = Queue(maxsize=10)
-
-        screen_fetcher_manager = using_screen_fetcher(
-            settings.screen,
-            settings.obs,
-            settings.capture_device,
-            obs_tolerance_callback=create_obs_tolerance_callback(errors),
-            capture_tolerance_callback=create_capture_tolerance_callback(errors),
-        )
-        screen_fetcher = await screen_fetcher_manager.__aenter__()
-        self._screen_fetcher_manager = screen_fetcher_manager
+        self._session_notifier_managers: list[
+            contextlib.AbstractContextManager[Notifier]
+        ] = []
+        self._notifier_lock = threading.Lock()
+        self._notifier_generation = 0
+        self._pipeline: Optional[ReaderPipeline] = None
+        self._supervisor: Optional[RecognitionSupervisor] = None
+        self._sessions: Optional[ReaderSessions] = None
 
-        notifier_manager = using_notifier(
-            settings.notification,
-            settings.bouyomichan,
-            settings.voicevox,
-            settings.audio,
-            bouyomichan_tolerance_callback=create_bouyomichan_tolerance_callback(
-                errors
-            ),
-            voicevox_tolerance_callback=create_voicevox_tolerance_callback(errors),
-        )
-        notifier = notifier_manager.__enter__()
-        self._notifier_manager = notifier_manager
+    async def __aenter__(
+        self,
+    ) -> tuple[
+        GuiController, ImageProcessAgent | RecognitionSupervisor | ReaderSessions
+    ]:
+        self._settings_path = settings_path = select_path()
+        self._settings = settings = load_settings(settings_path)
+        # 実行中のプロファイラは終了時に止め, 集計を書き出す.
+        profiler = create_profiler(os.path.dirname(settings_path))
+        self._stack.callback(profiler.stop)
+        controls = create_profiler_controls(profiler)
 
-        ocr = await create_ocr_engine(settings.ocr)
+        polling: ImageProcessAgent | RecognitionSupervisor | ReaderSessions
+        if settings.sessions:
+            if settings.polling.uses_child_process:
+                raise SettingsError(
+                    "複数のセッション (sessions) は, 別のプロセスでの映像の処理"
+                    " (polling.uses_child_process) と同時に使用できません."
+                )
+            # 要求はすべてのセッションに送る. 処理に関わる操作は行えない.
+            polling = sessions = await self._start_sessions(settings, controls)
+            send = sessions.send
+            step = None
+            dump_flight_recorder = None
+        elif settings.polling.uses_child_process:
+            # 映像の処理は子プロセスで行うため, 処理に関わる操作は行えない.
+            polling = supervisor = await self._start_supervisor(settings, controls)
+            send = supervisor.send
+            step = None
+            dump_flight_recorder = None
+        else:
+            self._pipeline = pipeline = ReaderPipeline(
+                settings,
+                functools.partial(self._enter_notifier, settings),
+                dir_path=os.path.dirname(settings_path),
+                errors=self._errors,
+                startup_callback=self._startup_callback,
+                controls=controls,
+                max_workers=self._max_workers,
+                recognition_threads=self._recognition_threads,
+            )
+            polling = agent = await self._stack.enter_async_context(pipeline)
+            self._metrics = pipeline.metrics
+            send = agent.commands.send
+            screen_fetcher = pipeline.screen_fetcher
+            step = (
+                screen_fetcher.step
+                if isinstance(screen_fetcher, ReplayScreenFetcher)
+                and screen_fetcher.mode is ReplayMode.STEP
+                else None
+            )
+            dump_flight_recorder = (
+                functools.partial(flight_recorder.dump, DumpReason.REQUESTED)
+                if (flight_recorder := pipeline.flight_recorder)
+                else None
+            )
 
-        opponent_team = TeamUseCase.of_opponent()
-        opponent_hp = OpponentHpUseCase.create()
-        ally_team = TeamUseCase.of_ally(
-            uses_auto_callback=settings.routine.notifies_ally_team,
-        )
-        selection = SelectionUseCase(ally_team)
-        ally_hp = AllyHpUseCase.of(AllyHpReader.create(ocr))
-        ally = AllyUseCase(selection, ally_hp)
-        move_reader = MoveReader.create(ocr)
-        move = MoveUseCase(move_reader)
-        cursor = CursorUseCase(
-            command_reader=CommandCursorReader(),
-            pokemon_reader=PokemonCursorReader(
-                text_reader=(TextCursorReader(ocr)),
-                ocr=ocr,
-            ),
-            move_reader=move_reader,
-            ally_team=ally_team,
-        )
-        screenshot = create_screenshot_use_case(
-            settings.screenshot,
-            dir_path=os.path.dirname(settings_path),
+        stream = await self._stack.enter_async_context(
+            using_notification_stream(settings.stream, send, metrics=self._metrics)
         )
+        if self._supervisor:
+            self._supervisor.set_publisher(stream)
+        elif self._sessions:
+            self._sessions.set_publisher(stream)
+        elif self._pipeline:
+            self._pipeline.set_publisher(stream)
 
         gui = GuiController(
-            opponent_team=opponent_team,
-            opponent_hp=opponent_hp,
-            ally=ally,
-            move=move,
-            cursor=cursor,
-            screenshot=screenshot,
+            send=send,
             uses_buttons=settings.gui.uses_buttons,
+            reconfigure=self.reconfigure,
+            step=step,
+            toggle_profiler=profiler.toggle,
+            dump_flight_recorder=dump_flight_recorder,
         )
-        watch_error(gui, errors)
-
-        executor_manager = ProcessPoolExecutor(self._max_workers)
-        executor = executor_manager.__enter__()
-        self._executor_manager = executor_manager
-
-        image = create_image_controller(
-            settings.routine,
-            ally=ally,
-            opponent_team=opponent_team,
-            ally_team=ally_team,
-            selection=selection,
-            opponent_hp=opponent_hp,
-            ally_hp=ally_hp,
-            move=move,
-            cursor=cursor,
-            screenshot=screenshot,
-            executor=executor,
-            ocr=ocr,
-        )
-        return gui, ImageProcessAgent(ImageProcess(screen_fetcher, image, notifier))
+        watch_error(gui, self._errors)
+        return gui, polling
 
     async def __aexit__(
         self,
-        exc_type: Type[BaseException],
-        exc_val: BaseException,
-        exc_tb: types.TracebackType,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
     ) -> bool:
         logger.debug("Starting exiting the reader.")
-        if self._screen_fetcher_manager:
-            logger.debug("Exiting the screen fetcher.")
-            await self._screen_fetcher_manager.__aexit__(exc_type, exc_val, exc_tb)
-        if self._notifier_manager:
-            logger.debug("Exiting the notifier.")
-            self._notifier_manager.__exit__(exc_type, exc_val, exc_tb)
-        if self._executor_manager:
-            logger.debug("Exiting the executor.")
-            self._executor_manager.__exit__(exc_type, exc_val, exc_tb)
+        await self._stack.__aexit__(exc_type, exc_val, exc_tb)
         return False
 
+    def reconfigure(self) -> bool:
+        """
+        設定ファイルを読み直し, 再起動せずに反映できる変更であれば反映する.
+        チームや HP 履歴などの対戦中の状態は引き継ぐ.
+        通知機能はスレッドで作り直し, 失敗したときはエラーとして知らせる.
+
+        Returns:
+            反映できたら True, 再起動が必要であれば False.
+        """
+        try:
+            settings = load_settings(self._settings_path)
+        except SettingsError as error:
+            logger.opt(exception=error).debug("Failed to reload the settings.")
+            return False
+
+        changes = diff_settings(self._settings, settings)
+        logger.debug("Changed settings: {}", sorted(changes))
+        if not changes <= _RECONFIGURABLE_SECTIONS:
+            return False
+
+        if changes & _NOTIFIER_SECTIONS:
+            if self._sessions:
+                return False  # セッションごとの通知機能は作り直さない.
+            # 接続確認や試験合成で画面を止めないよう, 通知機能はスレッドで作り直す.
+            with self._notifier_lock:
+                self._notifier_generation += 1
+                generation = self._notifier_generation
+            threading.Thread(
+                target=self._replace_notifier,
+                args=(settings, generation),
+                daemon=True,
+            ).start()
+
+        if "routine" in changes:
+            if supervisor := self._supervisor:
+                supervisor.reconfigure(settings.routine)
+            elif sessions := self._sessions:
+                sessions.apply_routine(settings.routine)
+            else:
+                assert self._pipeline
+                self._pipeline.apply_routine(settings.routine)
+
+        self._settings = settings
+        return True
+
+    async def _start_supervisor(
+        self,
+        settings: Settings,
+        controls: dict[str, Control],
+    ) -> RecognitionSupervisor:
+        self._metrics = await self._stack.enter_async_context(
+            using_metrics(settings.metrics, controls=controls)
+        )
+        notifier = await start_component(
+            Component.NOTIFIER,
+            asyncio.to_thread(self._enter_notifier, settings, self._metrics),
+            self._startup_callback,
+        )
+        self._supervisor = supervisor = self._stack.enter_context(
+            RecognitionSupervisor(
+                self._settings_path,
+                notifier,
+                self._errors,
+                startup_callback=self._startup_callback,
+                debugging=bool(os.getenv("_PKSCRD_DEBUG")),
+            )
+        )
+        await supervisor.start()
+        return supervisor
+
+    async def _start_sessions(
+        self,
+        settings: Settings,
+        controls: dict[str, Control],
+    ) -> ReaderSessions:
+        # 読みの変換結果とポケモンのデータベースは, セッション間で共有する.
+        enter_notifier = functools.partial(
+            self._enter_session_notifier,
+            Phonemizer(),
+            await asyncio.to_thread(PokemonMapper.load),
+        )
+        self._sessions = sessions = ReaderSessions(
+            settings,
+            enter_notifier,
+            dir_path=os.path.dirname(self._settings_path),
+            errors=self._errors,
+            startup_callback=self._startup_callback,
+            controls=controls,
+            max_workers=self._max_workers,
+            recognition_threads=self._recognition_threads,
+        )
+        await self._stack.enter_async_context(sessions)
+        self._metrics = sessions.metrics
+        return sessions
+
+    def _create_notifier_manager(
+        self,
+        settings: Settings,
+        metrics: Metrics,
+        *,
+        phonemizer: Optional[Phonemizer] = None,
+        pokemon_mapper: Optional[PokemonMapper] = None,
+        confirms: bool = True,
+    ) -> contextlib.AbstractContextManager[Notifier]:
+        return using_notifier(
+            settings.notification,
+            settings.bouyomichan,
+            settings.voicevox,
+            settings.audio,
+            bouyomichan_tolerance_callback=create_bouyomichan_tolerance_callback(
+                self._errors
+            ),
+            voicevox_tolerance_callback=create_voicevox_tolerance_callback(
+                self._errors
+            ),
+            metrics=metrics,
+            phonemizer=phonemizer,
+            pokemon_mapper=pokemon_mapper,
+            confirms=confirms,
+        )
+
+    def _enter_session_notifier(
+        self,
+        phonemizer: Phonemizer,
+        pokemon_mapper: PokemonMapper,
+        name: str,
+        settings: Settings,
+        metrics: Metrics,
+    ) -> Notifier:
+        manager = self._create_notifier_manager(
+            settings,
+            metrics,
+            phonemizer=phonemizer,
+            pokemon_mapper=pokemon_mapper,
+        )
+        notifier = manager.__enter__()
+        self._session_notifier_managers.append(manager)
+        logger.debug("The notifier of the session is ready: {}", name)
+        return notifier
+
+    def _enter_notifier(self, settings: Settings, metrics: Metrics) -> Notifier:
+        # 接続確認や試験合成で待たされるため, 起動時はスレッドから呼び出す.
+        manager = self._create_notifier_manager(settings, metrics)
+        notifier = manager.__enter__()
+        self._notifier_manager = manager
+        return notifier
+
+    def _replace_notifier(self, settings: Settings, generation: int) -> None:
+        # 設定の読み直し時は, 接続を確認する発話を行わない.
+        manager = self._create_notifier_manager(settings, self._metrics, confirms=False)
+        try:
+            notifier = manager.__enter__()
+        except SettingsError as error:
+            logger.opt(exception=error).debug("Failed to replace the notifier.")
+            with contextlib.suppress(Full):
+                self._errors.put_nowait(str(error))
+            return
+
+        # 作り直す間に設定が再び変更されたときは, 新しい方を用いる.
+        stale: Optional[contextlib.AbstractContextManager[Notifier]] = manager
+        with self._notifier_lock:
+            if generation == self._notifier_generation:
+                stale, self._notifier_manager = self._notifier_manager, manager
+                if supervisor := self._supervisor:
+                    supervisor.set_notifier(notifier)
+                else:
+                    assert self._pipeline
+                    self._pipeline.set_notifier(notifier)
+                logger.debug("The notifier is replaced.")
+
+        if stale:
+            # 古い通知機能は, 発話中の内容を待ってこのスレッドで後始末する.
+            stale.__exit__(None, None, None)
+
+    def _exit_notifier(self) -> None:
+        with self._notifier_lock:
+            # 作り直している通知機能は, 作り終えても用いない.
+            self._notifier_generation += 1
+            manager, self._notifier_manager = self._notifier_manager, None
+        if manager:
+            logger.debug("Exiting the notifier.")
+            manager.__exit__(None, None, None)
+        while self._session_notifier_managers:
+            self._session_notifier_managers.pop().__exit__(None, None, None)
+
+
+# 再起動せずに反映できる設定項目.
+_NOTIFIER_SECTIONS = frozenset({"notification", "bouyomichan", "voicevox", "audio"})
+_RECONFIGURABLE_SECTIONS = _NOTIFIER_SECTIONS | {"routine"}
+
 
 def show_pnlib_error(parent: Optional[QWidget] = None) -> None:
     """
@@ -0,0 +1,91 @@
+import asyncio
+import collections
+import enum
+from typing import Optional
+
+from . import detector
+
+
+class Command(enum.StrEnum):
+    """画面から映像の処理へ送る命令."""
+
+    OPPONENT_TEAM = "opponent_team"
+    OPPONENT_TEAM_TYPES = "opponent_team_types"
+    OPPONENT_HP = "opponent_hp"
+    ALLY = "ally"
+    MOVE = "move"
+    CURSOR = "cursor"
+    SCREENSHOT = "screenshot"
+    WAKE = "wake"
+    """休止中のポーリングを起こすだけの命令."""
+
+    @property
+    def detectors(self) -> frozenset[str]:
+        """映像から答えるときに必要な検出処理の名前."""
+        return _DETECTORS.get(self, frozenset())
+
+
+_DETECTORS: dict[Command, frozenset[str]] = {
+    Command.OPPONENT_HP: frozenset({detector.OPPONENT_HP.name}),
+    Command.ALLY: frozenset({detector.SELECTION.name, detector.ALLY_HP.name}),
+    Command.MOVE: frozenset({detector.MOVE.name}),
+    Command.CURSOR: frozenset({detector.CURSOR.name}),
+}
+
+
+class CommandChannel:
+    """
+    画面のスレッドから, 映像を処理するイベントループへ命令を送る通り道.
+
+    命令は任意のスレッドから送れる. 受け取る側は待機中でもすぐに起こされる.
+    """
+
+    def __init__(self) -> None:
+        self._commands: collections.deque[Command] = collections.deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._arrived: Optional[asyncio.Event] = None
+
+    def open(self) -> None:
+        """受け取る側のイベントループで呼び出す. 以降, 命令が届くと待機を解く."""
+        self._loop = asyncio.get_running_loop()
+        self._arrived = asyncio.Event()
+
+    def send(self, command: Command) -> None:
+        self._commands.append(command)
+        if (loop := self._loop) is None or (arrived := self._arrived) is None:
+            return
+        try:
+            loop.call_soon_threadsafe(arrived.set)
+        except RuntimeError:
+            pass  # ループが閉じた後は何もしない.
+
+    def receive(self) -> list[Command]:
+        """届いている命令を, 届いた順にすべて取り出す."""
+        commands: list[Command] = []
+        while True:
+            try:
+                commands.append(self._commands.popleft())
+            except IndexError:
+                return commands
+
+    async def wait(self, timeout_in_seconds: float) -> bool:
+        """
+        命令が届くまで, 最大 timeout_in_seconds 秒待つ.
+
+        Returns:
+            命令が届いていれば True.
+        """
+        assert (arrived := self._arrived) and (loop := self._loop), "not opened"
+        deadline = loop.time() + timeout_in_seconds
+        while True:
+            # 送る側は命令を積んでから知らせるので, 知らせを消してから積まれた命令を確かめる.
+            # 取り出し済みの命令の知らせが残っていても, 命令が積まれるまでは待ち続ける.
+            arrived.clear()
+            if self._commands:
+                return True
+            if (remaining := deadline - loop.time()) <= 0:
+                return False
+            try:
+                await asyncio.wait_for(arrived.wait(), remaining)
+            except TimeoutError:
+                return bool(self._commands)
@@ -0,0 +1,267 @@
+import collections
+import dataclasses
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Optional
+
+from cv2.typing import MatLike
+from loguru import logger
+
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.scene.model import ImageScene, Scene, SceneGroup
+
+if TYPE_CHECKING:
+    from .image import ImageRecognition
+
+SKIPS_TOTAL = "detector_skips_total"
+
+
+@dataclasses.dataclass(frozen=True)
+class DetectorSpec:
+    """検出処理を行う条件の宣言."""
+
+    name: str
+    stage: Stage
+    """処理時間を記録する処理段階."""
+    scenes: Optional[frozenset[ImageScene | SceneGroup]] = None
+    """
+    処理する場面. 画像のシーンか, 認識したシーンの分類のいずれかが含まれれば処理する.
+    None のときは場面によらず処理する.
+    """
+    every: int = 1
+    """処理するフレームの間隔. ポーリング間隔 0.1 秒のとき, 2 であれば 5 Hz となる."""
+    priority: int = 0
+    """通知の優先度. 小さいほど先に通知する. 同じ優先度では登録順とする."""
+    optional: bool = False
+    """フレームの処理時間が予算を超えそうなとき, 次のフレームへ後回しにできるか."""
+
+    def applies_to(self, image_scene: ImageScene, scene: Scene) -> bool:
+        scenes = self.scenes
+        return scenes is None or image_scene in scenes or scene.group in scenes
+
+
+DetectorHandler = Callable[
+    [ImageScene, MatLike, Optional["ImageRecognition"]],
+    Awaitable[Optional[Notification]],
+]
+"""検出処理. 画像のシーン, 画像, 画像だけから決まる認識結果を受け取る."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Detector:
+    spec: DetectorSpec
+    handle: DetectorHandler
+    requested: Callable[[], bool] = lambda: False
+    """利用者の要求が保留されているか. 保留されていれば条件によらず処理する."""
+
+
+_COMMAND_IMAGE_SCENES = frozenset(
+    {
+        ImageScene.COMMAND,
+        ImageScene.COMMAND_MOVE,
+        ImageScene.COMMAND_POKEMON,
+        ImageScene.COMMAND_POKEMON_SUMMARY,
+        ImageScene.COMMAND_POKEMON_MOVES_AND_STATS,
+        ImageScene.COMMAND_POKEMON_MEMORIES,
+        ImageScene.COMMAND_CANCELING,
+        ImageScene.COMMAND_TEAM,
+        ImageScene.COMMAND_SITUATION,
+    }
+)
+_SELECTION_IMAGE_SCENES = frozenset(
+    {
+        ImageScene.SELECTION,
+        ImageScene.SELECTION_SUMMARY,
+        ImageScene.SELECTION_MOVES_AND_STATS,
+        ImageScene.SELECTION_MEMORIES,
+        ImageScene.SELECTION_COMPLETE,
+    }
+)
+# HP ゲージは指示画面と, シーンを特定できない行動中にのみ表示される.
+_BATTLE_SCENES: frozenset[ImageScene | SceneGroup] = _COMMAND_IMAGE_SCENES | {
+    ImageScene.UNKNOWN,
+    SceneGroup.COMMAND,
+}
+# ログは選出画面以外で表示されうる.
+_NON_SELECTION_SCENES: frozenset[ImageScene | SceneGroup] = (
+    frozenset(ImageScene) - _SELECTION_IMAGE_SCENES
+)
+
+# 選出は要求への応答もあるため場面によらず処理し, 認識自体は選出画面でのみ行う.
+SELECTION = DetectorSpec("selection", Stage.SELECTION, priority=-1)
+MOVE = DetectorSpec("move", Stage.MOVE)
+CURSOR = DetectorSpec("cursor", Stage.CURSOR)
+OPPONENT_HP = DetectorSpec("opponent_hp", Stage.OPPONENT_HP, _BATTLE_SCENES, priority=1)
+# 味方 HP は OCR を伴うため, 要求されていなければ後回しにできる.
+ALLY_HP = DetectorSpec(
+    "ally_hp",
+    Stage.ALLY_HP,
+    _BATTLE_SCENES,
+    priority=1,
+    optional=True,
+)
+LOG = DetectorSpec(
+    "log",
+    Stage.LOG,
+    _NON_SELECTION_SCENES,
+    every=2,
+    priority=2,
+    optional=True,
+)
+
+
+class DetectorScheduler:
+    """
+    宣言に従い, フレームごとに行う検出処理を選ぶ.
+
+    期限が与えられたときは, 直近の処理時間から見積もった所要時間が期限を超えないよう,
+    後回しにできる処理を優先度の低いものから次のフレームへ回す.
+    ただし後回しが max_deferrals 回続いた処理は, 期限を超えても行う.
+    場面や間隔, 期限の条件により飛ばした処理は, 理由ごとに数える.
+    """
+
+    def __init__(
+        self,
+        detectors: Iterable[Detector],
+        metrics: Optional[Metrics] = None,
+        *,
+        max_deferrals: int = 10,
+        overload_window: int = 50,
+        overload_ratio: float = 0.5,
+        smoothing: float = 0.2,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._detectors = sorted(detectors, key=lambda d: d.spec.priority)
+        self._metrics = metrics or NullMetrics()
+        self._max_deferrals = max_deferrals
+        self._overload_count = int(overload_window * overload_ratio)
+        self._smoothing = smoothing
+        self._clock = clock
+
+        # 最後に処理してから経過したフレーム数. 初回は必ず処理する.
+        self._elapsed = {d.spec.name: d.spec.every for d in self._detectors}
+        self._deferrals = {d.spec.name: 0 for d in self._detectors}
+        self._costs: dict[str, float] = {}
+        # 直近のフレームで処理を後回しにしたか.
+        self._shed: collections.deque[bool] = collections.deque(maxlen=overload_window)
+        self._overloaded = False
+        self._overload_reported = False
+
+    def cost(self, name: str) -> float:
+        """処理時間の見積もり (秒). 未計測であれば 0 とする."""
+        return self._costs.get(name, 0.0)
+
+    def select(
+        self,
+        image_scene: ImageScene,
+        scene: Scene,
+        deadline: Optional[float] = None,
+        only: Optional[frozenset[str]] = None,
+    ) -> list[Detector]:
+        """
+        今回のフレームで行う検出処理を, 優先度順に返す.
+
+        Args:
+            deadline: フレームの処理を終えたい時刻 (clock と同じ時計).
+            only: 行う検出処理の名前. 与えられたときは, それ以外を飛ばす.
+        """
+        due: list[tuple[Detector, bool]] = []
+        for detector in self._detectors:
+            spec = detector.spec
+            self._elapsed[spec.name] += 1
+            if only is not None and spec.name not in only:
+                self._metrics.count(SKIPS_TOTAL, detector=spec.name, reason="command")
+                continue
+            if detector.requested():
+                due.append((detector, True))
+                continue
+            if not spec.applies_to(image_scene, scene):
+                self._metrics.count(SKIPS_TOTAL, detector=spec.name, reason="scene")
+                continue
+            if self._elapsed[spec.name] < spec.every:
+                self._metrics.count(SKIPS_TOTAL, detector=spec.name, reason="rate")
+                continue
+            due.append((detector, False))
+
+        shed = self._shed_over_budget(due, deadline) if deadline is not None else set()
+        self._update_overload(bool(shed))
+
+        selected: list[Detector] = []
+        for detector, _ in due:
+            name = detector.spec.name
+            if name in shed:
+                self._deferrals[name] += 1
+                self._metrics.count(SKIPS_TOTAL, detector=name, reason="budget")
+                continue
+            self._elapsed[name] = 0
+            self._deferrals[name] = 0
+            selected.append(detector)
+        return selected
+
+    async def run(
+        self,
+        detector: Detector,
+        image_scene: ImageScene,
+        image: MatLike,
+        recognition: Optional["ImageRecognition"],
+    ) -> Optional[Notification]:
+        """検出処理を行い, 処理時間の見積もりを更新する."""
+        began_at = self._clock()
+        try:
+            return await detector.handle(image_scene, image, recognition)
+        finally:
+            elapsed = self._clock() - began_at
+            name = detector.spec.name
+            if (cost := self._costs.get(name)) is None:
+                self._costs[name] = elapsed
+            else:
+                self._costs[name] = cost + self._smoothing * (elapsed - cost)
+
+    def poll_overload(self) -> bool:
+        """
+        後回しが続いている状態になったかを返す. 状態になったときに 1 度だけ True を返し,
+        後回しがなくなるまでは再び True を返さない.
+        """
+        if not self._overloaded or self._overload_reported:
+            return False
+        self._overload_reported = True
+        return True
+
+    def _shed_over_budget(
+        self,
+        due: list[tuple[Detector, bool]],
+        deadline: float,
+    ) -> set[str]:
+        # 並行して行う処理も, 見積もりは処理時間の合計とする (安全側に倒す).
+        remaining = deadline - self._clock()
+        projected = sum(
+            self.cost(d.spec.name)
+            for d, requested in due
+            if requested or not d.spec.optional
+        )
+        shed: set[str] = set()
+        for detector, requested in due:
+            name = detector.spec.name
+            if requested or not detector.spec.optional:
+                continue
+            cost = self.cost(name)
+            if (
+                projected + cost <= remaining
+                or self._deferrals[name] >= self._max_deferrals
+            ):
+                projected += cost
+                continue
+            shed.add(name)
+        return shed
+
+    def _update_overload(self, shed: bool) -> None:
+        self._shed.append(shed)
+        count = sum(self._shed)
+        if not self._overloaded and count >= self._overload_count:
+            logger.warning("Optional detectors are shed continuously.")
+            self._overloaded = True
+        elif self._overloaded and count == 0:
+            logger.info("Optional detectors are no longer shed.")
+            self._overloaded = False
+            self._overload_reported = False
@@ -1,32 +1,26 @@
 from importlib.resources import as_file, files
+from queue import Empty, Queue
 from typing import Callable, Optional
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QTimer, Qt
 from PySide6.QtGui import QKeyEvent, QPixmap
 from PySide6.QtWidgets import QLabel, QMessageBox, QPushButton, QVBoxLayout, QWidget
 
 from pkscrd import __version__
-from pkscrd.app.configuration import run_configuration
 from pkscrd.app.gui import set_window_icon
-from pkscrd.usecase.ally import AllyUseCase
-from pkscrd.usecase.cursor import CursorUseCase
-from pkscrd.usecase.hp import OpponentHpUseCase
-from pkscrd.usecase.move import MoveUseCase
-from pkscrd.usecase.screenshot import ScreenshotUseCase
-from pkscrd.usecase.team import TeamUseCase
+from pkscrd.app.reader.controller.command import Command
 
 
 class GuiController(QWidget):
 
     def __init__(
         self,
-        opponent_team: TeamUseCase,
-        opponent_hp: OpponentHpUseCase,
-        ally: AllyUseCase,
-        move: MoveUseCase,
-        cursor: CursorUseCase,
-        screenshot: ScreenshotUseCase,
+        send: Callable[[Command], None],
         uses_buttons: bool = True,
+        reconfigure: Optional[Callable[[], bool]] = None,
+        step: Optional[Callable[[], None]] = None,
+        toggle_profiler: Optional[Callable[[], None]] = None,
+        dump_flight_recorder: Optional[Callable[[], None]] = None,
         parent: Optional[QWidget] = None,
     ):
         super().__init__(parent)
@@ -36,12 +30,27 @@ class GuiController(QWidget):
         set_window_icon(self)
         self.setMinimumWidth(320)
 
-        def on_check_types() -> None:
-            opponent_team.request(with_types=True)
+        def commanding(command: Command) -> Callable[[], None]:
+            # 映像の処理へ命令を送り, 次の映像を待たずに処理させる.
+            return lambda: send(command)
+
+        request_opponent_team = commanding(Command.OPPONENT_TEAM)
+        on_check_types = commanding(Command.OPPONENT_TEAM_TYPES)
+        request_opponent_hp = commanding(Command.OPPONENT_HP)
+        request_ally = commanding(Command.ALLY)
+        request_move = commanding(Command.MOVE)
+        request_cursor = commanding(Command.CURSOR)
+        request_saving = commanding(Command.SCREENSHOT)
 
         def on_configure() -> None:
+            # 設定画面は必要になるまで読み込まない.
+            from pkscrd.app.configuration import run_configuration
+
             configured = run_configuration(self)
             if configured:
+                # 再起動せずに反映できる変更であれば, 対戦中の状態を保ったまま反映する.
+                if reconfigure and reconfigure():
+                    return
                 self._needs_restart = True
                 self.close()
 
@@ -49,22 +58,34 @@ class GuiController(QWidget):
             tuple[Qt.KeyboardModifier, Qt.Key],
             Callable[[], None],
         ] = {
-            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_O): opponent_team.request,
+            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_O): request_opponent_team,
             (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_T): on_check_types,
-            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_H): opponent_hp.request,
-            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_A): ally.request,
-            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_M): move.request,
-            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_C): cursor.request,
-            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_1): screenshot.request_saving,
+            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_H): request_opponent_hp,
+            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_A): request_ally,
+            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_M): request_move,
+            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_C): request_cursor,
+            (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_1): request_saving,
             (Qt.KeyboardModifier.ControlModifier, Qt.Key.Key_Comma): on_configure,
         }
+        if step:
+            # 記録のステップ再生時のみ.
+            self._key_mapping[(Qt.KeyboardModifier.NoModifier, Qt.Key.Key_N)] = step
+        if toggle_profiler:
+            self._key_mapping[(Qt.KeyboardModifier.ControlModifier, Qt.Key.Key_P)] = (
+                toggle_profiler
+            )
+        if dump_flight_recorder:
+            # フライトレコーダの使用時のみ.
+            self._key_mapping[(Qt.KeyboardModifier.ControlModifier, Qt.Key.Key_D)] = (
+                dump_flight_recorder
+            )
 
         if uses_buttons:
             layout = QVBoxLayout()
             self.setLayout(layout)
 
             read_opponent_team_button = QPushButton("相手チーム確認 (O)", parent=self)
-            read_opponent_team_button.pressed.connect(opponent_team.request)
+            read_opponent_team_button.pressed.connect(request_opponent_team)
             layout.addWidget(read_opponent_team_button)
 
             check_types_button = QPushButton("相手チームのタイプ確認 (T)", parent=self)
@@ -72,23 +93,23 @@ class GuiController(QWidget):
             layout.addWidget(check_types_button)
 
             read_opponent_hp = QPushButton("相手 HP 確認 (H)", parent=self)
-            read_opponent_hp.pressed.connect(opponent_hp.request)
+            read_opponent_hp.pressed.connect(request_opponent_hp)
             layout.addWidget(read_opponent_hp)
 
             read_ally_hp = QPushButton("味方情報確認 (A)", parent=self)
-            read_ally_hp.pressed.connect(ally.request)
+            read_ally_hp.pressed.connect(request_ally)
             layout.addWidget(read_ally_hp)
 
             read_moves = QPushButton("技を読み取り (M)", parent=self)
-            read_moves.pressed.connect(move.request)
+            read_moves.pressed.connect(request_move)
             layout.addWidget(read_moves)
 
             read_cursor = QPushButton("カーソルを読み取り (C)", parent=self)
-            read_cursor.pressed.connect(cursor.request)
+            read_cursor.pressed.connect(request_cursor)
             layout.addWidget(read_cursor)
 
             save_screenshots = QPushButton("スクリーンショット保存 (1)", parent=self)
-            save_screenshots.pressed.connect(screenshot.request_saving)
+            save_screenshots.pressed.connect(request_saving)
             layout.addWidget(save_screenshots)
 
             configure = QPushButton("設定画面を表示 (Ctrl+,)", parent=self)
@@ -142,3 +163,31 @@ class SettingsErrorDialog(QMessageBox):
     @property
     def needs_configuration(self) -> bool:
         return self.clickedButton() == self._configure
+
+
+def watch_error(
+    w: QWidget,
+    messages: Queue[str],
+    interval_in_millis: int = 100,
+) -> None:
+    timer = QTimer(w)
+    timer.setInterval(interval_in_millis)
+
+    def watch_() -> None:
+        try:
+            message = messages.get_nowait()
+        except Empty:
+            return
+
+        QMessageBox.critical(
+            w,
+            "エラー",
+            message,
+            QMessageBox.StandardButton.Ok,
+            QMessageBox.StandardButton.NoButton,
+        )
+        w.close()
+        timer.stop()
+
+    timer.timeout.connect(watch_)
+    timer.start()
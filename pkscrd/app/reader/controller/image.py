@@ -1,11 +1,19 @@
 import asyncio
 import concurrent.futures
-from typing import AsyncIterator, Optional
+import dataclasses
+from typing import AsyncIterator, Callable, Optional
 
 from cv2.typing import MatLike
 
-from pkscrd.core.notification.model import Notification
+from pkscrd.core.flight.service import FlightRecorder
+from pkscrd.core.hp.service import OpponentHpMap, recognize_opponent_hps
+from pkscrd.core.log.service import recognize_general_log_box
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.notification.model import Notification, OverloadNotification
+from pkscrd.core.scene.model import ImageScene, Scene
 from pkscrd.core.scene.service import SceneDetector, recognize_image_scene
+from pkscrd.core.terastal.model import TeraTypeDetectionSummary
 from pkscrd.core.terastal.service import TerastalDetector
 from pkscrd.usecase.ally import AllyUseCase
 from pkscrd.usecase.cursor import CursorUseCase
@@ -17,6 +25,30 @@ from pkscrd.usecase.screenshot import ScreenshotUseCase
 from pkscrd.usecase.selection import SelectionUseCase
 from pkscrd.usecase.team import TeamUseCase
 from pkscrd.usecase.terastal import notify_tera_type
+from . import detector
+from .command import Command
+from .detector import Detector, DetectorScheduler
+
+
+@dataclasses.dataclass(frozen=True)
+class ImageRecognition:
+    """
+    画像だけから決まる認識結果.
+    前後の画像に依存しないため, 別プロセスで先に求めておける.
+    """
+
+    scene: ImageScene
+    opponent_hps: OpponentHpMap
+    general_log_box: Optional[bool] = None
+    """汎用ログ表示欄があるか. None のときは認識していない."""
+
+
+def recognize_image(image: MatLike) -> ImageRecognition:
+    return ImageRecognition(
+        scene=recognize_image_scene(image),
+        opponent_hps=recognize_opponent_hps(image),
+        general_log_box=recognize_general_log_box(image),
+    )
 
 
 class ImageController:
@@ -39,7 +71,17 @@ class ImageController:
         log: Optional[LogUseCase] = None,
         terastal_detector: Optional[TerastalDetector] = None,
         executor: Optional[concurrent.futures.Executor] = None,
+        metrics: Optional[Metrics] = None,
+        flight_recorder: Optional[FlightRecorder] = None,
+        thread_pool: Optional[concurrent.futures.Executor] = None,
     ):
+        """
+        Args:
+            executor: チームの認識に用いるプロセスプール.
+            thread_pool: 画像認識を並行して行うスレッドプール.
+                OpenCV や NumPy は GIL を解放するため, GIL があっても並行して動作する.
+                未指定時はイベントループのスレッドで順に行う.
+        """
         self._scene = scene
         self._ally = ally
         self._opponent_team = opponent_team
@@ -53,48 +95,201 @@ class ImageController:
         self._terastal_detector = terastal_detector
         self._screenshot = screenshot
         self._map_func = executor.map if executor else None
+        self._metrics = metrics or NullMetrics()
+        self._flight_recorder = flight_recorder
+        self._thread_pool = thread_pool
 
         self._scene_detector = SceneDetector()
+        self._current_scene = Scene.UNKNOWN
+        self._current_image_scene = ImageScene.UNKNOWN
+        self._scheduler = DetectorScheduler(self._create_detectors(), metrics)
+
+    @property
+    def scene(self) -> Scene:
+        """直近に処理した映像から認識したシーン."""
+        return self._current_scene
+
+    def probe(self, image: MatLike) -> ImageScene:
+        """
+        画像のシーンだけを認識する. シーンの履歴は更新しない.
+        休止中に, 対戦の場面に戻ったかを安価に調べるために用いる.
+        """
+        with self._metrics.stage(Stage.SCENE):
+            return recognize_image_scene(image)
 
-    async def handle(self, image: MatLike) -> AsyncIterator[Notification]:
+    def answer(self, command: Command) -> Optional[Notification]:
+        """
+        命令に, 直近に処理した映像までの状態から答える.
+        答えられないときは, 次に処理する映像に伴う通知を要求して None を返す.
+        """
+        match command:
+            case Command.OPPONENT_TEAM | Command.OPPONENT_TEAM_TYPES:
+                return self._opponent_team.answer(
+                    self._current_image_scene,
+                    with_types=command is Command.OPPONENT_TEAM_TYPES,
+                )
+            case Command.OPPONENT_HP:
+                return self._opponent_hp.answer()
+            case Command.ALLY:
+                self._ally.request()
+            case Command.MOVE:
+                self._move.request()
+            case Command.CURSOR:
+                self._cursor.request()
+            case Command.SCREENSHOT:
+                self._screenshot.request_saving()
+        return None
+
+    async def handle(
+        self,
+        image: MatLike,
+        recognition: Optional[ImageRecognition] = None,
+        *,
+        deadline: Optional[float] = None,
+        only: Optional[frozenset[str]] = None,
+    ) -> AsyncIterator[Notification]:
+        """
+        映像を処理し, 通知を返す.
+        認識結果が与えられたときは, 画像から認識し直さない.
+        期限 (time.perf_counter の時刻) が与えられたときは, 期限を超えないよう
+        後回しにできる処理を次のフレームへ回す.
+        検出処理の名前が与えられたときは, それ以外の検出処理を行わない.
+        """
         n: Optional[Notification]
         nt: Notification
+        metrics = self._metrics
 
         if n := self._screenshot.handle(image):
             yield n
 
         # 処理の優先度がつくテラスタルを最優先で処理
-        if self._terastal_detector:
-            tera_type_detection_summary = self._terastal_detector.detect(image)
-            if tera_type_detection_summary:
-                yield notify_tera_type(tera_type_detection_summary)
-            # 高いリアルタイム性が求められるので, テラスタイプ判定中は他の処理は止める.
-            if self._terastal_detector.is_detecting:
+        # 高いリアルタイム性が求められるので, テラスタイプ判定中は他の処理は止める.
+        terastal = self._terastal_detector
+        if terastal and terastal.is_detecting:
+            summary = await self._detect_terastal(terastal, image)
+            if terastal.is_detecting:
+                return
+            image_scene = await self._recognize_scene(image, recognition)
+        else:
+            # テラスタルの前兆と画像のシーンは互いに独立しているため, 並行して求める.
+            summary, image_scene = await asyncio.gather(
+                self._detect_terastal(terastal, image),
+                self._recognize_scene(image, recognition),
+            )
+            if terastal and terastal.is_detecting:
                 return
+        if summary:
+            yield notify_tera_type(summary)
 
-        image_scene = recognize_image_scene(image)
-        scene = self._scene_detector.detect(image_scene)
-        for nt in self._scene.handle(scene, image_scene):
+        with metrics.stage(Stage.SCENE):
+            scene = self._current_scene = self._scene_detector.detect(image_scene)
+            self._current_image_scene = image_scene
+            if self._flight_recorder:
+                self._flight_recorder.record_scene(image_scene.name, scene.name)
+            scene_notifications = list(self._scene.handle(scene, image_scene))
+            self._ally.handle(scene)
+        for nt in scene_notifications:
             yield nt
-        self._ally.handle(scene)
 
-        if n := self._opponent_team.handle(image_scene, image, map_func=self._map_func):
-            yield n
-        if n := self._ally_team.handle(image_scene, image, map_func=self._map_func):
-            yield n
-        if n := self._selection.handle(image_scene, image):
-            yield n
+        with metrics.stage(Stage.TEAMS):
+            opponent_team = self._opponent_team.handle(
+                image_scene, image, map_func=self._map_func
+            )
+            ally_team = self._ally_team.handle(
+                image_scene, image, map_func=self._map_func
+            )
+        if opponent_team:
+            yield opponent_team
+        if ally_team:
+            yield ally_team
 
+        # 場面や間隔, 期限の条件を満たす検出処理だけを, 並行して行う.
+        # 相手 HP や汎用ログ表示欄の認識も, 検出処理を行うときにだけ行う.
+        scheduler = self._scheduler
         for n in await asyncio.gather(
-            self._move.handle(image_scene, image),
-            self._cursor.handle(image_scene, image),
-            self._opponent_hp.handle(image),
-            self._ally_hp.handle(image),
-            self._log.handle(image_scene, image) if self._log else _none(),
+            *(
+                metrics.measure(
+                    d.spec.stage,
+                    scheduler.run(d, image_scene, image, recognition),
+                )
+                for d in scheduler.select(image_scene, scene, deadline, only)
+            )
         ):
             if n:
                 yield n
+        if scheduler.poll_overload():
+            yield OverloadNotification()
+
+    async def _detect_terastal(
+        self,
+        terastal: Optional[TerastalDetector],
+        image: MatLike,
+    ) -> Optional[TeraTypeDetectionSummary]:
+        if not terastal:
+            return None
+        return await self._metrics.measure(
+            Stage.TERASTAL, self._offload(terastal.detect, image)
+        )
+
+    async def _recognize_scene(
+        self,
+        image: MatLike,
+        recognition: Optional[ImageRecognition],
+    ) -> ImageScene:
+        """画像のシーンを認識する. 認識結果が与えられたときは, それを用いる."""
+        if recognition:
+            return recognition.scene
+        return await self._metrics.measure(
+            Stage.RECOGNITION, self._offload(recognize_image_scene, image)
+        )
+
+    async def _offload[*Ts, T](self, func: Callable[[*Ts], T], *args: *Ts) -> T:
+        """スレッドプールがあれば, そこで同期処理を行う."""
+        if (thread_pool := self._thread_pool) is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(thread_pool, func, *args)
+
+    def _create_detectors(self) -> list[Detector]:
+        move, cursor, selection = self._move, self._cursor, self._selection
+        opponent_hp, ally_hp, log = self._opponent_hp, self._ally_hp, self._log
+        offload = self._offload
+
+        async def handle_opponent_hp(
+            s: ImageScene, i: MatLike, r: Optional[ImageRecognition]
+        ) -> Optional[Notification]:
+            hps = r.opponent_hps if r else await offload(recognize_opponent_hps, i)
+            return await opponent_hp.handle(i, hps)
+
+        detectors = [
+            Detector(
+                detector.SELECTION,
+                lambda s, i, r: offload(selection.handle, s, i),
+            ),
+            Detector(detector.MOVE, lambda s, i, r: move.handle(s, i)),
+            Detector(detector.CURSOR, lambda s, i, r: cursor.handle(s, i)),
+            Detector(
+                detector.OPPONENT_HP,
+                handle_opponent_hp,
+                lambda: opponent_hp.requested,
+            ),
+            Detector(
+                detector.ALLY_HP,
+                lambda s, i, r: ally_hp.handle(i),
+                lambda: ally_hp.requested,
+            ),
+        ]
+        if log:
 
+            async def handle_log(
+                s: ImageScene, i: MatLike, r: Optional[ImageRecognition]
+            ) -> Optional[Notification]:
+                general_log_box = (
+                    r.general_log_box
+                    if r and r.general_log_box is not None
+                    else await offload(recognize_general_log_box, i)
+                )
+                return await log.handle(s, i, general_log_box)
 
-async def _none() -> None:
-    return None
+            detectors.append(Detector(detector.LOG, handle_log))
+        return detectors
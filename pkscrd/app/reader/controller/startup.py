@@ -0,0 +1,63 @@
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+
+from PySide6.QtWidgets import QApplication, QFormLayout, QLabel, QWidget
+
+from pkscrd import __version__
+from pkscrd.app.gui import set_window_icon
+from pkscrd.app.reader.startup import Component, ComponentStatus
+
+_T = TypeVar("_T")
+
+
+class StartupWindow(QWidget):
+    """起動中の各コンポーネントの準備状況を表示する."""
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Pokéscreader for SV v{__version__} - 起動中")
+        set_window_icon(self)
+        self.setMinimumWidth(320)
+
+        layout = QFormLayout()
+        self.setLayout(layout)
+
+        self._labels: dict[Component, QLabel] = {}
+        for component, name in _COMPONENT_NAMES.items():
+            label = QLabel(_STATUS_TEXTS[None], self)
+            label.setAccessibleName(name)
+            layout.addRow(name, label)
+            self._labels[component] = label
+
+    def update_status(self, component: Component, status: ComponentStatus) -> None:
+        self._labels[component].setText(_STATUS_TEXTS[status])
+        QApplication.processEvents()
+
+    async def wait_for(
+        self,
+        aw: Awaitable[_T],
+        interval_in_seconds: float = 0.05,
+    ) -> _T:
+        """
+        画面を応答可能に保ちながら完了を待つ.
+        イベントループが Qt と共有されていないため, 定期的にイベントを処理する.
+        """
+        task = asyncio.ensure_future(aw)
+        while not task.done():
+            QApplication.processEvents()
+            await asyncio.wait((task,), timeout=interval_in_seconds)
+        return task.result()
+
+
+_COMPONENT_NAMES = {
+    Component.SCREEN: "映像",
+    Component.NOTIFIER: "読み上げ",
+    Component.OCR: "文字認識",
+    Component.EXECUTOR: "画像処理",
+}
+_STATUS_TEXTS = {
+    None: "待機中",
+    ComponentStatus.STARTING: "準備中",
+    ComponentStatus.READY: "完了",
+    ComponentStatus.FAILED: "失敗",
+}
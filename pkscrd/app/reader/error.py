@@ -1,7 +1,4 @@
-from queue import Queue, Empty
-
-from PySide6.QtCore import QTimer
-from PySide6.QtWidgets import QWidget, QMessageBox
+from queue import Queue
 
 from pkscrd.core.tolerance.service import QueuingToleranceCallback
 
@@ -38,31 +35,3 @@ def create_voicevox_tolerance_callback(errors: Queue[str]) -> QueuingToleranceCa
         "VOICEVOX への接続失敗が長時間続きました. アプリを終了します.",
         "VOICEVOX へ接続できなくなりました. アプリを終了します.",
     )
-
-
-def watch_error(
-    w: QWidget,
-    messages: Queue[str],
-    interval_in_millis: int = 100,
-) -> None:
-    timer = QTimer(w)
-    timer.setInterval(interval_in_millis)
-
-    def watch_() -> None:
-        try:
-            message = messages.get_nowait()
-        except Empty:
-            return
-
-        QMessageBox.critical(
-            w,
-            "エラー",
-            message,
-            QMessageBox.StandardButton.Ok,
-            QMessageBox.StandardButton.NoButton,
-        )
-        w.close()
-        timer.stop()
-
-    timer.timeout.connect(watch_)
-    timer.start()
@@ -1,9 +1,19 @@
 import concurrent.futures
+import dataclasses
 from typing import Optional
 
 from pkscrd.app.reader.controller.image import ImageController
 from pkscrd.app.settings.model import RoutineSettings
+from pkscrd.core.cursor.service import (
+    CommandCursorReader,
+    PokemonCursorReader,
+    TextCursorReader,
+)
+from pkscrd.core.flight.service import FlightRecorder
+from pkscrd.core.hp.service import AllyHpReader
 from pkscrd.core.log.service import LogReader
+from pkscrd.core.metrics.service import Metrics
+from pkscrd.core.move.service import MoveReader
 from pkscrd.core.ocr.service import OcrEngine
 from pkscrd.core.terastal.service import TerastalDetector
 from pkscrd.usecase.ally import AllyUseCase
@@ -17,19 +27,64 @@ from pkscrd.usecase.selection import SelectionUseCase
 from pkscrd.usecase.team import TeamUseCase
 
 
-def create_image_controller(
+@dataclasses.dataclass(frozen=True)
+class UseCases:
+    """対戦中の状態を持つユースケースの組."""
+
+    opponent_team: TeamUseCase
+    opponent_hp: OpponentHpUseCase
+    ally_team: TeamUseCase
+    selection: SelectionUseCase
+    ally_hp: AllyHpUseCase
+    ally: AllyUseCase
+    move: MoveUseCase
+    cursor: CursorUseCase
+    screenshot: ScreenshotUseCase
+
+
+def create_use_cases(
     settings: RoutineSettings,
-    ally: AllyUseCase,
-    opponent_team: TeamUseCase,
-    ally_team: TeamUseCase,
-    selection: SelectionUseCase,
-    opponent_hp: OpponentHpUseCase,
-    ally_hp: AllyHpUseCase,
-    move: MoveUseCase,
-    cursor: CursorUseCase,
+    ocr: OcrEngine,
     screenshot: ScreenshotUseCase,
+) -> UseCases:
+    opponent_team = TeamUseCase.of_opponent()
+    opponent_hp = OpponentHpUseCase.create()
+    ally_team = TeamUseCase.of_ally(uses_auto_callback=settings.notifies_ally_team)
+    selection = SelectionUseCase(ally_team)
+    ally_hp = AllyHpUseCase.of(AllyHpReader.create(ocr))
+    ally = AllyUseCase(selection, ally_hp)
+    move_reader = MoveReader.create(ocr)
+    move = MoveUseCase(move_reader)
+    cursor = CursorUseCase(
+        command_reader=CommandCursorReader(),
+        pokemon_reader=PokemonCursorReader(
+            text_reader=(TextCursorReader(ocr)),
+            ocr=ocr,
+        ),
+        move_reader=move_reader,
+        ally_team=ally_team,
+    )
+    return UseCases(
+        opponent_team=opponent_team,
+        opponent_hp=opponent_hp,
+        ally_team=ally_team,
+        selection=selection,
+        ally_hp=ally_hp,
+        ally=ally,
+        move=move,
+        cursor=cursor,
+        screenshot=screenshot,
+    )
+
+
+def create_image_controller(
+    settings: RoutineSettings,
+    use_cases: UseCases,
     executor: concurrent.futures.Executor,
     ocr: OcrEngine,
+    metrics: Optional[Metrics] = None,
+    flight_recorder: Optional[FlightRecorder] = None,
+    thread_pool: Optional[concurrent.futures.Executor] = None,
 ) -> ImageController:
     log: Optional[LogUseCase] = None
     if settings.notifies_log:
@@ -41,21 +96,24 @@ def create_image_controller(
 
     return ImageController(
         scene=SceneUseCase(
-            opponent_team=opponent_team,
-            ally_team=ally_team,
-            opponent_hp=opponent_hp,
-            ally_hp=ally_hp,
+            opponent_team=use_cases.opponent_team,
+            ally_team=use_cases.ally_team,
+            opponent_hp=use_cases.opponent_hp,
+            ally_hp=use_cases.ally_hp,
         ),
-        ally=ally,
-        opponent_team=opponent_team,
-        ally_team=ally_team,
-        selection=selection,
-        opponent_hp=opponent_hp,
-        ally_hp=ally_hp,
-        move=move,
-        cursor=cursor,
-        screenshot=screenshot,
+        ally=use_cases.ally,
+        opponent_team=use_cases.opponent_team,
+        ally_team=use_cases.ally_team,
+        selection=use_cases.selection,
+        opponent_hp=use_cases.opponent_hp,
+        ally_hp=use_cases.ally_hp,
+        move=use_cases.move,
+        cursor=use_cases.cursor,
+        screenshot=use_cases.screenshot,
         executor=executor,
         log=log,
         terastal_detector=terastal_detector,
+        metrics=metrics,
+        flight_recorder=flight_recorder,
+        thread_pool=thread_pool,
     )
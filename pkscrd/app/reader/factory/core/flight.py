@@ -0,0 +1,39 @@
+import contextlib
+import os
+from typing import Iterator, Optional
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import FlightRecorderSettings
+from pkscrd.core.flight.infra import FlightDumpFileWriter
+from pkscrd.core.flight.service import FlightRecorder
+
+
+@contextlib.contextmanager
+def using_flight_recorder(
+    settings: FlightRecorderSettings,
+    *,
+    dir_path: Optional[str] = None,
+) -> Iterator[Optional[FlightRecorder]]:
+    """
+    設定からフライトレコーダを作成する. 記録しない設定であれば None を返す.
+
+    Raises:
+        ConfigurationError: 設定に問題がありそうなとき.
+    """
+    if not settings.enabled:
+        yield None
+        return
+
+    dir_path = settings.dir_path or dir_path or os.getcwd()
+    if not os.path.isdir(dir_path):
+        raise SettingsError(
+            "フライトレコーダの書き出し先が見つかりませんでした."
+            " 書き出し先のディレクトリ (dir_path) が正しいか確認してください."
+        )
+
+    with FlightRecorder(
+        FlightDumpFileWriter(dir_path),
+        size=settings.frames,
+        stall_threshold_in_seconds=settings.stall_threshold_in_seconds,
+    ) as recorder:
+        yield recorder
@@ -0,0 +1,58 @@
+import asyncio
+import contextlib
+from typing import AsyncIterator, Mapping, Optional
+
+from loguru import logger
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import MetricsSettings
+from pkscrd.core.metrics.exposition import summarize
+from pkscrd.core.metrics.infra import Control, MetricsHttpServer
+from pkscrd.core.metrics.service import Metrics, MetricsRegistry, NullMetrics
+
+
+@contextlib.asynccontextmanager
+async def using_metrics(
+    settings: MetricsSettings,
+    *,
+    controls: Optional[Mapping[str, Control]] = None,
+) -> AsyncIterator[Metrics]:
+    """
+    設定から計測機能を作成する. 計測しない設定であれば何もしない実装を返す.
+    計測値の公開と要約の出力は, イベントループが動いている間だけ行う.
+    計測値を公開するときは, 制御用のエンドポイントも公開する.
+
+    Raises:
+        ConfigurationError: 設定に問題がありそうなとき.
+    """
+    if not settings.enabled:
+        yield NullMetrics()
+        return
+
+    registry = MetricsRegistry()
+    async with contextlib.AsyncExitStack() as stack:
+        if settings.port is not None:
+            try:
+                await stack.enter_async_context(
+                    MetricsHttpServer.create(registry, settings.port, controls=controls)
+                )
+            except OSError as error:
+                logger.opt(exception=error).debug("Failed to serve metrics.")
+                raise SettingsError(
+                    "計測値の公開を開始できませんでした."
+                    " ポート番号 (port) が他のアプリと重複していないか確認してください."
+                )
+
+        if interval := settings.summary_interval_in_seconds:
+            task = asyncio.create_task(_log_summaries(registry, interval))
+            stack.callback(task.cancel)
+        try:
+            yield registry
+        finally:
+            logger.info("Metrics summary:\n{}", summarize(registry.snapshot()))
+
+
+async def _log_summaries(metrics: Metrics, interval_in_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_in_seconds)
+        logger.info("Metrics summary:\n{}", summarize(metrics.snapshot()))
@@ -1,29 +1,39 @@
 import contextlib
 from typing import Optional, Iterator
 
+from loguru import logger
+
 from pkscrd.app.settings.model import (
     NotificationSettings,
     BouyomichanSettings,
     VoicevoxSettings,
     AudioSettings,
 )
+from pkscrd.core.metrics.service import Metrics, NullMetrics
 from pkscrd.core.notification.service import (
     Talker,
     Notifier,
     Messenger,
     AllyHpFormatter,
     AllyHpFormat,
+    Phonemizer,
 )
-from pkscrd.core.pokemon.repos import load_pokemons
 from pkscrd.core.pokemon.service import PokemonMapper
 from pkscrd.core.tolerance.model import ToleranceCallback
 from .talker import using_talker
 
 
-def create_notifier(notification: NotificationSettings, talker: Talker) -> Notifier:
+def create_notifier(
+    notification: NotificationSettings,
+    talker: Talker,
+    *,
+    phonemizer: Optional[Phonemizer] = None,
+    pokemon_mapper: Optional[PokemonMapper] = None,
+) -> Notifier:
     messenger = Messenger(
         ally_hp_formatter=AllyHpFormatter(AllyHpFormat(notification.ally_hp_format)),
-        pokemon_mapper=PokemonMapper(load_pokemons()),
+        pokemon_mapper=pokemon_mapper or PokemonMapper.load(),
+        phonemizer=phonemizer,
     )
     return Notifier(messenger, talker)
 
@@ -37,7 +47,17 @@ def using_notifier(
     *,
     bouyomichan_tolerance_callback: Optional[ToleranceCallback] = None,
     voicevox_tolerance_callback: Optional[ToleranceCallback] = None,
+    metrics: Optional[Metrics] = None,
+    phonemizer: Optional[Phonemizer] = None,
+    pokemon_mapper: Optional[PokemonMapper] = None,
+    confirms: bool = True,
 ) -> Iterator[Notifier]:
+    """
+    設定から通知機能を作成する.
+    phonemizer と pokemon_mapper を与えたときは, 他の通知機能と共有する.
+    confirms が False のときは, 接続を確認する発話を行わない.
+    """
+    metrics = metrics or NullMetrics()
     with using_talker(
         notification=notification,
         bouyomichan=bouyomichan,
@@ -45,5 +65,27 @@ def using_notifier(
         audio=audio,
         bouyomichan_tolerance_callback=bouyomichan_tolerance_callback,
         voicevox_tolerance_callback=voicevox_tolerance_callback,
+        metrics=metrics,
+        confirms=confirms,
     ) as talker:
-        yield create_notifier(notification, talker)
+        phonemizer = phonemizer or Phonemizer()
+        _register_phonemizer_stats(metrics, phonemizer)
+        try:
+            yield create_notifier(
+                notification,
+                talker,
+                phonemizer=phonemizer,
+                pokemon_mapper=pokemon_mapper,
+            )
+        finally:
+            logger.debug("Phonemizer cache: {}", phonemizer.stats)
+
+
+def _register_phonemizer_stats(metrics: Metrics, phonemizer: Phonemizer) -> None:
+    # 通知機能を作り直したときは, 新しいキャッシュの統計で上書きする.
+    line, phrase = "phonemizer_line", "phonemizer_phrase"
+    register = metrics.register_counter
+    register("cache_hits_total", lambda: phonemizer.stats.line_hits, cache=line)
+    register("cache_misses_total", lambda: phonemizer.stats.line_misses, cache=line)
+    register("cache_hits_total", lambda: phonemizer.stats.phrase_hits, cache=phrase)
+    register("cache_misses_total", lambda: phonemizer.stats.phrase_misses, cache=phrase)
@@ -11,6 +11,7 @@ from pkscrd.app.settings.model import (
     NotificationSettings,
 )
 from pkscrd.app.settings.error import SettingsError
+from pkscrd.core.metrics.service import Metrics, NullMetrics
 from pkscrd.core.notification.infra.audio import (
     AudioClient,
     DefaultDeviceNotFoundError,
@@ -22,8 +23,14 @@ from pkscrd.core.notification.infra.bouyomichan import BouyomichanClient
 from pkscrd.core.notification.infra.voicevox import VoiceVoxClient
 from pkscrd.core.notification.service import Talker
 from pkscrd.core.notification.service.impl.bouyomichan import BouyomichanTalker
-from pkscrd.core.notification.service.impl.queuing import QueuingTalker
-from pkscrd.core.notification.service.impl.voicevox import VoicevoxTalker
+from pkscrd.core.notification.service.impl.measured import MeasuredTalker
+from pkscrd.core.metrics.trace import Trace
+from pkscrd.core.notification.service.impl.queuing import QueuingTalker, dequeue_text
+from pkscrd.core.notification.service.impl.voicevox import (
+    AudioItem,
+    VoicevoxTalker,
+    dequeue_audio,
+)
 from pkscrd.core.tolerance.model import ToleranceCallback
 from pkscrd.core.tolerance.service import Tolerance
 from .util import watch_queue
@@ -33,14 +40,34 @@ def create_bouyomichan_talker(
     settings: BouyomichanSettings,
     *,
     tolerance_callback: Optional[ToleranceCallback] = None,
+    metrics: Optional[Metrics] = None,
+    confirms: bool = True,
 ) -> Talker:
     """
     設定に対応するインスタンスを作成する.
 
+    Args:
+        confirms: 接続を確認する発話を行うか.
+            行わないときは, 接続できなくても作成する.
+
     Raises:
         ConfigurationError: 設定に問題がありそうなとき.
     """
     client = BouyomichanClient(port=settings.port)
+    if confirms:
+        _confirm_bouyomichan(client, settings)
+
+    talker = BouyomichanTalker(
+        client,
+        Tolerance(callback=tolerance_callback, warning_count=2, fatal_count=4),
+        speed=settings.speed,
+    )
+    return MeasuredTalker(talker, metrics) if metrics and metrics.enabled else talker
+
+
+def _confirm_bouyomichan(
+    client: BouyomichanClient, settings: BouyomichanSettings
+) -> None:
     try:
         client.talk(
             "棒読みちゃんとの接続を確認しました。",
@@ -56,12 +83,6 @@ def create_bouyomichan_talker(
             f" HTTP 連携のポート番号が {settings.port} になっているか確認してください."
         )
 
-    return BouyomichanTalker(
-        client,
-        Tolerance(callback=tolerance_callback, warning_count=2, fatal_count=4),
-        speed=settings.speed,
-    )
-
 
 @contextlib.contextmanager
 def using_voicevox_talker(
@@ -70,10 +91,16 @@ def using_voicevox_talker(
     *,
     sample_rate: int = 24000,
     tolerance_callback: Optional[ToleranceCallback] = None,
+    metrics: Optional[Metrics] = None,
+    confirms: bool = True,
 ) -> Iterator[Talker]:
     """
     設定に対応するインスタンスを作成する.
 
+    Args:
+        confirms: 接続を確認する音声を再生するか.
+            再生しないときも, 試験合成で接続と話者の設定は確認する.
+
     Raises:
         ConfigurationError: 設定に問題がありそうなとき.
     """
@@ -91,7 +118,8 @@ def using_voicevox_talker(
         )
     logger.debug("Audio output device: {}", device)
 
-    audio_queue: Queue[bytes] = Queue(maxsize=10)
+    metrics = metrics or NullMetrics()
+    audio_queue: Queue[AudioItem] = Queue(maxsize=10)
     client = VoiceVoxClient()
     try:
         client.initialize_speaker(voicevox.speaker)
@@ -114,7 +142,8 @@ def using_voicevox_talker(
         )
 
     logger.debug("Wav: {}", wav.getparams())
-    audio_queue.put(wav.readframes(wav.getnframes()))
+    if confirms:
+        audio_queue.put((wav.readframes(wav.getnframes()), None))
 
     inner_talker = VoicevoxTalker(
         client,
@@ -125,15 +154,25 @@ def using_voicevox_talker(
         speed_scale=voicevox.speed_scale,
         sampling_rate=sample_rate,
         uses_stereo=voicevox.uses_stereo,
+        metrics=metrics,
     )
 
-    text_queue: Queue[str] = Queue(maxsize=10)
+    text_queue: Queue[tuple[str, Optional[Trace]]] = Queue(maxsize=10)
+    metrics.register_gauge("queue_depth", text_queue.qsize, queue="tts_text")
+    metrics.register_gauge("queue_depth", audio_queue.qsize, queue="tts_audio")
     with (
         AudioClient.for_wave(wav, device_index=device.index) as audio_client,
-        watch_queue(text_queue, inner_talker),
-        watch_queue(audio_queue, audio_client.play),
+        watch_queue(
+            text_queue,
+            dequeue_text(
+                MeasuredTalker(inner_talker, metrics)
+                if metrics.enabled
+                else inner_talker
+            ),
+        ),
+        watch_queue(audio_queue, dequeue_audio(audio_client.play)),
     ):
-        yield QueuingTalker(text_queue)
+        yield QueuingTalker(text_queue, metrics)
 
 
 # HACK 共通化.
@@ -149,12 +188,16 @@ def using_talker(
     *,
     bouyomichan_tolerance_callback: Optional[ToleranceCallback] = None,
     voicevox_tolerance_callback: Optional[ToleranceCallback] = None,
+    metrics: Optional[Metrics] = None,
+    confirms: bool = True,
 ) -> Iterator[Talker]:
     if notification.engine == "voicevox":
         with using_voicevox_talker(
             voicevox,
             audio,
             tolerance_callback=voicevox_tolerance_callback,
+            metrics=metrics,
+            confirms=confirms,
         ) as talker:
             yield talker
         return
@@ -162,5 +205,7 @@ def using_talker(
     talker = create_bouyomichan_talker(
         bouyomichan,
         tolerance_callback=bouyomichan_tolerance_callback,
+        metrics=metrics,
+        confirms=confirms,
     )
     yield talker
@@ -1,8 +1,15 @@
+from typing import Optional
+
 from pkscrd.app.settings.model import OcrSettings
 from pkscrd.app.settings.error import SettingsError
+from pkscrd.core.flight.service import FlightRecorder
+from pkscrd.core.metrics.service import Metrics
 from pkscrd.core.ocr.error import NotAvailableError
 from pkscrd.core.ocr.service import OcrEngine
 from pkscrd.core.ocr.service.impl.empty import EmptyEngine
+from pkscrd.core.ocr.service.impl.measured import MeasuredEngine
+from pkscrd.core.ocr.service.impl.recorded import RecordedEngine
+from pkscrd.core.ocr.service.impl.scheduled import OcrScheduler
 from pkscrd.core.ocr.service.impl.tesseract import (
     TesseractEngine,
     DllNotCompatibleError,
@@ -12,13 +19,59 @@ from pkscrd.core.ocr.service.impl.tesseract import (
 from pkscrd.core.ocr.service.impl.winocr import WinOcrEngine
 
 
-async def create_ocr_engine(settings: OcrSettings, lang: str = "ja") -> OcrEngine:
+async def create_ocr_engine(
+    settings: OcrSettings,
+    lang: str = "ja",
+    *,
+    metrics: Optional[Metrics] = None,
+    flight_recorder: Optional[FlightRecorder] = None,
+) -> OcrEngine:
     """
     設定に対応する OCR エンジンを作成する.
+    計測が有効であれば, 読み取りの回数と処理時間を計測する.
+    フライトレコーダがあれば, 読み取りの入出力を記録する.
+
+    Raises:
+        ConfigurationError: 設定の問題が疑われるとき.
+    """
+    engine = await _create_ocr_engine(settings, lang)
+    if metrics and metrics.enabled:
+        engine = MeasuredEngine(engine, metrics)
+    if flight_recorder:
+        engine = RecordedEngine(engine, flight_recorder)
+    return engine
+
+
+async def create_ocr_scheduler(settings: OcrSettings, lang: str = "ja") -> OcrScheduler:
+    """
+    複数のセッションで共有する OCR エンジンを作成する.
+    計測やフライトレコーダへの記録はセッションごとに行う.
 
     Raises:
         ConfigurationError: 設定の問題が疑われるとき.
     """
+    engine = await _create_ocr_engine(settings, lang)
+    return OcrScheduler(engine, settings.concurrency)
+
+
+def create_session_ocr_engine(
+    scheduler: OcrScheduler,
+    session: str,
+    *,
+    metrics: Optional[Metrics] = None,
+    flight_recorder: Optional[FlightRecorder] = None,
+) -> OcrEngine:
+    """
+    共有する OCR エンジンをセッションから用いる.
+    フライトレコーダがあれば, 読み取りの入出力を記録する.
+    """
+    engine = scheduler.session(session, metrics)
+    if flight_recorder:
+        engine = RecordedEngine(engine, flight_recorder)
+    return engine
+
+
+async def _create_ocr_engine(settings: OcrSettings, lang: str) -> OcrEngine:
     match settings.engine:
         case "winocr":
             try:
@@ -0,0 +1,18 @@
+from pkscrd.core.metrics.infra import Control
+from pkscrd.core.profiler.infra import CollapsedStackFileWriter
+from pkscrd.core.profiler.service import ProfilerSwitch, SamplingProfiler
+
+
+def create_profiler(dir_path: str) -> ProfilerSwitch:
+    """集計を指定ディレクトリへ書き出すプロファイラを作成する."""
+    return ProfilerSwitch(SamplingProfiler(), CollapsedStackFileWriter(dir_path))
+
+
+def create_profiler_controls(profiler: ProfilerSwitch) -> dict[str, Control]:
+    """プロファイラを操作する制御用エンドポイントを作成する."""
+    return {
+        "/profiler/start": lambda: (
+            "started" if profiler.start() else "already running"
+        ),
+        "/profiler/stop": lambda: profiler.stop() or "no profile is written",
+    }
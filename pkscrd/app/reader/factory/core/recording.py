@@ -0,0 +1,52 @@
+import contextlib
+import os
+from datetime import datetime
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import RecordingSettings
+from pkscrd.core.screen.infra.archive import FrameArchiveWriter
+from pkscrd.core.screen.service.recorder import ScreenRecorder
+
+
+@contextlib.contextmanager
+def using_screen_recorder(
+    settings: RecordingSettings,
+    *,
+    dir_path: Optional[str] = None,
+) -> Iterator[Optional[ScreenRecorder]]:
+    """
+    設定から映像の記録を作成する. 記録しない設定であれば None を返す.
+
+    Raises:
+        ConfigurationError: 設定に問題がありそうなとき.
+    """
+    if not settings.enabled:
+        yield None
+        return
+
+    path = f"{datetime.now():%Y-%m-%d-%H-%M-%S}{RECORDING_EXTENSION}"
+    if dir_path := settings.dir_path or dir_path:
+        path = os.path.join(dir_path, path)
+    try:
+        writer = FrameArchiveWriter.create(path)
+    except OSError as error:
+        logger.opt(exception=error).debug("Failed to create the recording.")
+        raise SettingsError(
+            "映像の記録ファイルを作成できませんでした."
+            " 記録先のディレクトリ (dir_path) が正しいか確認してください."
+        )
+
+    logger.debug("Recording to: {}", path)
+    with ScreenRecorder(
+        writer,
+        every=settings.every,
+        quality=settings.quality,
+        max_bytes=settings.max_megabytes * 1024**2,
+    ) as recorder:
+        yield recorder
+
+
+RECORDING_EXTENSION = ".pkscrd-frames"
@@ -4,12 +4,20 @@ from typing import AsyncIterator, Iterator, Optional
 
 from loguru import logger
 
-from pkscrd.app.settings.model import CaptureDeviceSettings, ObsSettings, ScreenSettings
+from pkscrd.app.settings.model import (
+    CaptureDeviceSettings,
+    ObsSettings,
+    ReplaySettings,
+    ScreenSettings,
+)
 from pkscrd.app.settings.error import SettingsError
+from pkscrd.core.metrics.service import Metrics
 from pkscrd.core.screen.infra.device import CaptureDeviceClient
+from pkscrd.core.screen.infra.replay import open_recording
 from pkscrd.core.screen.service import ScreenFetcher
 from pkscrd.core.screen.service.impl.device import DeviceScreenFetcher
 from pkscrd.core.screen.service.impl.obs import ObsRecovery, ObsScreenFetcher
+from pkscrd.core.screen.service.impl.replay import ReplayMode, ReplayScreenFetcher
 from pkscrd.core.screen.infra.obs import ObsClient
 from pkscrd.core.tolerance.model import ToleranceCallback
 from pkscrd.core.tolerance.service import AsyncTolerance
@@ -23,6 +31,7 @@ async def using_obs_screen_fetcher(
     warning_error_count: int = 5,
     fatal_error_count: int = 15,
     recovery_sleep_in_seconds: float = 5.0,
+    metrics: Optional[Metrics] = None,
 ) -> AsyncIterator[ScreenFetcher]:
     """
     設定からインスタンスを作成する.
@@ -60,7 +69,7 @@ async def using_obs_screen_fetcher(
             warning_count=warning_error_count,
             fatal_count=fatal_error_count,
         )
-        yield ObsScreenFetcher(obs, settings.source, tolerance)
+        yield ObsScreenFetcher(obs, settings.source, tolerance, metrics)
 
 
 @contextlib.contextmanager
@@ -103,14 +112,45 @@ def using_device_screen_fetcher(
         yield DeviceScreenFetcher(client, tolerance)
 
 
+@contextlib.contextmanager
+def using_replay_screen_fetcher(
+    settings: ReplaySettings,
+) -> Iterator[ReplayScreenFetcher]:
+    """
+    記録された映像を再生するインスタンスを作成する.
+
+    Raises:
+        ConfigurationError: 設定に問題がありそうなとき.
+    """
+    try:
+        reader = open_recording(settings.path)
+    except (OSError, ValueError) as error:
+        logger.opt(exception=error).debug("Failed to open the recording.")
+        raise SettingsError(
+            "記録された映像を開けませんでした."
+            " 再生する記録のパス (path) が正しいか確認してください."
+        )
+
+    with reader:
+        if not reader.timestamps:
+            raise SettingsError("記録された映像にフレームが含まれていません.")
+        yield ReplayScreenFetcher(
+            reader,
+            ReplayMode(settings.mode),
+            loops=settings.loops,
+        )
+
+
 @contextlib.asynccontextmanager
 async def using_screen_fetcher(
     screen: ScreenSettings,
     obs: Optional[ObsSettings],
     capture: Optional[CaptureDeviceSettings],
+    replay: Optional[ReplaySettings] = None,
     *,
     obs_tolerance_callback: Optional[ToleranceCallback] = None,
     capture_tolerance_callback: Optional[ToleranceCallback] = None,
+    metrics: Optional[Metrics] = None,
 ) -> AsyncIterator[ScreenFetcher]:
     match screen.engine:
         case "obs":
@@ -122,6 +162,7 @@ async def using_screen_fetcher(
             async with using_obs_screen_fetcher(
                 settings=obs,
                 tolerance_callback=obs_tolerance_callback,
+                metrics=metrics,
             ) as obs_screen_fetcher:
                 yield obs_screen_fetcher
         case "capture-device":
@@ -135,3 +176,10 @@ async def using_screen_fetcher(
                 tolerance_callback=capture_tolerance_callback,
             ) as device_screen_fetcher:
                 yield device_screen_fetcher
+        case "replay":
+            if not replay:
+                raise SettingsError(
+                    "記録の再生設定が見つかりません. 設定が正しいか確認してください."
+                )
+            with using_replay_screen_fetcher(replay) as replay_screen_fetcher:
+                yield replay_screen_fetcher
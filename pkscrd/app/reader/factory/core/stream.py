@@ -0,0 +1,62 @@
+import contextlib
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional
+
+from loguru import logger
+
+from pkscrd.app.reader.controller.command import Command
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import StreamSettings
+from pkscrd.core.metrics.service import Metrics
+
+if TYPE_CHECKING:
+    from pkscrd.core.notification.infra.stream import NotificationStreamServer
+
+
+@contextlib.asynccontextmanager
+async def using_notification_stream(
+    settings: StreamSettings,
+    send: Callable[[Command], None],
+    *,
+    metrics: Optional[Metrics] = None,
+) -> AsyncIterator[Optional["NotificationStreamServer"]]:
+    """
+    設定から通知を配信するサーバを作成する. 配信しない設定であれば None を返す.
+    受け付けた要求は命令として送る.
+
+    Raises:
+        ConfigurationError: 設定に問題がありそうなとき.
+    """
+    if settings.port is None:
+        yield None
+        return
+
+    # WebSocket の実装は必要になるまで読み込まない.
+    from pkscrd.core.notification.infra.stream import NotificationStreamServer
+
+    def handle_request(request: str) -> bool:
+        try:
+            command = Command(request)
+        except ValueError:
+            return False
+        send(command)
+        return True
+
+    async with contextlib.AsyncExitStack() as stack:
+        try:
+            server = await stack.enter_async_context(
+                NotificationStreamServer.create(
+                    handle_request,
+                    settings.port,
+                    queue_size=settings.queue_size,
+                    max_clients=settings.max_clients,
+                    metrics=metrics,
+                    origins=settings.allowed_origins,
+                )
+            )
+        except OSError as error:
+            logger.opt(exception=error).debug("Failed to serve notifications.")
+            raise SettingsError(
+                "通知の配信を開始できませんでした."
+                " ポート番号 (port) が他のアプリと重複していないか確認してください."
+            )
+        yield server
@@ -0,0 +1,437 @@
+import asyncio
+import collections
+import dataclasses
+import multiprocessing
+import multiprocessing.context
+import multiprocessing.process
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Optional, Type, TypeAlias
+
+from loguru import logger
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import RoutineSettings
+from pkscrd.app.settings.service import load_settings
+from pkscrd.core.metrics.trace import Trace
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.notification.service import NotificationPublisher, Notifier
+from pkscrd.core.tolerance.model import FatalError
+from .controller.command import Command
+from .pipeline import ReaderPipeline
+from .startup import Component, ComponentStatus, StartupCallback
+
+
+@dataclasses.dataclass(frozen=True)
+class StatusMessage:
+    """子プロセスでのコンポーネントの準備状況."""
+
+    component: Component
+    status: ComponentStatus
+
+
+@dataclasses.dataclass(frozen=True)
+class ReadyMessage:
+    """子プロセスで映像の処理を始めた."""
+
+
+@dataclasses.dataclass(frozen=True)
+class NotificationMessage:
+    notification: Notification
+
+
+@dataclasses.dataclass(frozen=True)
+class PublishedMessage:
+    """読み上げとは別に配信する通知."""
+
+    notification: Notification
+    captured_at: float
+
+
+@dataclasses.dataclass(frozen=True)
+class ErrorMessage:
+    """利用者に示して終了すべきエラー."""
+
+    text: str
+
+
+@dataclasses.dataclass(frozen=True)
+class FailedMessage:
+    """子プロセスで映像の処理が止まった. 準備中であれば準備の失敗を表す."""
+
+    error: BaseException
+
+
+Message: TypeAlias = (
+    StatusMessage
+    | ReadyMessage
+    | NotificationMessage
+    | PublishedMessage
+    | ErrorMessage
+    | FailedMessage
+)
+Order: TypeAlias = Command | RoutineSettings | None
+"""子プロセスへの指示. None は停止を表す."""
+
+RecognitionTarget: TypeAlias = Callable[
+    [str, "multiprocessing.Queue[Order]", "multiprocessing.Queue[Message]", bool],
+    None,
+]
+"""子プロセスの処理. 設定ファイルのパス, 指示, 子プロセスからの知らせ, デバッグ中かを受け取る."""
+
+
+class QueueNotifier(Notifier):
+    """通知を親プロセスへ送る通知機能. 通知の経路は親プロセスで記録する."""
+
+    def __init__(self, events: "multiprocessing.Queue[Message]") -> None:
+        self._events = events
+
+    def notify(
+        self,
+        notification: Notification,
+        trace: Optional[Trace] = None,
+    ) -> None:
+        self._events.put(NotificationMessage(notification))
+
+
+class QueuePublisher(NotificationPublisher):
+    """配信する通知を親プロセスへ送る."""
+
+    def __init__(self, events: "multiprocessing.Queue[Message]") -> None:
+        self._events = events
+
+    def publish(self, notification: Notification, captured_at: float) -> None:
+        self._events.put(PublishedMessage(notification, captured_at))
+
+
+def run_recognition(
+    settings_path: str,
+    orders: "multiprocessing.Queue[Order]",
+    events: "multiprocessing.Queue[Message]",
+    debugging: bool,
+) -> None:
+    """子プロセスで映像の処理を行う. 指示の None を受け取るまで続ける."""
+    logger.remove()
+    logger.add(
+        sys.stderr or "log-recognition.txt",
+        level="DEBUG" if debugging else "WARNING",
+        enqueue=True,
+    )
+    try:
+        asyncio.run(_recognize(settings_path, orders, events))
+    except BaseException as error:
+        logger.opt(exception=error).debug("The recognition process is failed.")
+        events.put(FailedMessage(_picklable(error)))
+    else:
+        logger.debug("The recognition process is stopped.")
+
+
+async def _recognize(
+    settings_path: str,
+    orders: "multiprocessing.Queue[Order]",
+    events: "multiprocessing.Queue[Message]",
+) -> None:
+    settings = load_settings(settings_path)
+    # 計測値は親プロセスが公開するため, 子プロセスでは要約をログに出力するだけとする.
+    settings = settings.model_copy(
+        update={"metrics": settings.metrics.model_copy(update={"port": None})}
+    )
+    pipeline = ReaderPipeline(
+        settings,
+        QueueNotifier(events),
+        dir_path=os.path.dirname(settings_path),
+        startup_callback=lambda c, s: events.put(StatusMessage(c, s)),
+    )
+    async with pipeline as agent:
+        if settings.stream.port is not None:
+            # 通知は親プロセスが配信する.
+            pipeline.set_publisher(QueuePublisher(events))
+
+        def receive() -> None:
+            while (order := orders.get()) is not None:
+                if isinstance(order, RoutineSettings):
+                    pipeline.apply_routine(order)
+                else:
+                    agent.commands.send(order)
+            agent.stop()
+
+        def forward_errors() -> None:
+            while True:
+                events.put(ErrorMessage(pipeline.errors.get()))
+
+        threading.Thread(target=receive, name="orders", daemon=True).start()
+        threading.Thread(target=forward_errors, name="errors", daemon=True).start()
+        events.put(ReadyMessage())
+        await agent()
+
+
+def _picklable(error: BaseException) -> BaseException:
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return RuntimeError(repr(error))
+    return error
+
+
+@dataclasses.dataclass(frozen=True)
+class _Child:
+    process: multiprocessing.process.BaseProcess
+    orders: "multiprocessing.Queue[Order]"
+    events: "multiprocessing.Queue[Message]"
+
+
+class RecognitionSupervisor:
+    """
+    映像の処理を子プロセスで行い, 見守る.
+
+    命令や設定の変更は子プロセスへ送り, 通知やエラーは子プロセスから受け取る.
+    子プロセスが異常終了するか, 致命的でないエラーで止まったときは再起動する. ただし restart_window_in_seconds 秒の間に
+    max_restarts 回を超えて異常終了したときは, エラーを示して再起動をやめる.
+    再起動すると, チームや HP 履歴などの対戦中の状態は失われる.
+    """
+
+    def __init__(
+        self,
+        settings_path: str,
+        notifier: Notifier,
+        errors: queue.Queue[str],
+        *,
+        startup_callback: Optional[StartupCallback] = None,
+        debugging: bool = False,
+        max_restarts: int = 3,
+        restart_window_in_seconds: float = 600.0,
+        stop_timeout_in_seconds: float = 10.0,
+        context: Optional[multiprocessing.context.BaseContext] = None,
+        target: RecognitionTarget = run_recognition,
+    ):
+        """
+        Args:
+            startup_callback: 最初の起動時の準備状況を受け取る.
+            context: 子プロセスの起動方法. 未指定時は GUI を引き継がない spawn とする.
+        """
+        self._settings_path = settings_path
+        self._notifier = notifier
+        self._errors = errors
+        self._startup_callback = startup_callback
+        self._debugging = debugging
+        self._max_restarts = max_restarts
+        self._restart_window_in_seconds = restart_window_in_seconds
+        self._stop_timeout_in_seconds = stop_timeout_in_seconds
+        self._context = context or multiprocessing.get_context("spawn")
+        self._target = target
+
+        self._publisher: Optional[NotificationPublisher] = None
+        self._child: Optional[_Child] = None
+        self._stopped = False
+        self._restarts: collections.deque[float] = collections.deque()
+
+    def __enter__(self) -> "RecognitionSupervisor":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> None:
+        self.close()
+
+    @property
+    def pid(self) -> Optional[int]:
+        """子プロセスの ID. 起動していなければ None."""
+        return self._child.process.pid if self._child else None
+
+    @property
+    def restarts(self) -> int:
+        """直近に再起動した回数."""
+        return len(self._restarts)
+
+    def set_notifier(self, notifier: Notifier) -> None:
+        """次の通知から用いる通知機能を差し替える."""
+        self._notifier = notifier
+
+    def set_publisher(self, publisher: Optional[NotificationPublisher]) -> None:
+        """子プロセスから受け取った通知の配信先を差し替える. None のときは配信しない."""
+        self._publisher = publisher
+
+    def send(self, command: Command) -> None:
+        """命令を子プロセスへ送る. 任意のスレッドから呼び出せる."""
+        self._order(command)
+
+    def reconfigure(self, routine: RoutineSettings) -> None:
+        """処理の設定を子プロセスへ送る. 子プロセスは次の映像から反映する."""
+        self._order(routine)
+
+    def stop(self) -> None:
+        """子プロセスを止める. 任意のスレッドから呼び出せる."""
+        self._stopped = True
+        self._order(None)
+
+    async def start(self) -> None:
+        """
+        子プロセスを起動し, 映像の処理を始めるまで待つ.
+
+        Raises:
+            SettingsError: 子プロセスで設定の誤りが見つかったとき.
+        """
+        self._child = child = self._spawn()
+        callback = self._startup_callback
+        while True:
+            message = await asyncio.to_thread(self._receive, child)
+            match message:
+                case ReadyMessage():
+                    logger.debug("The recognition process is ready.")
+                    # 再起動時は起動画面がないため, 準備状況を知らせない.
+                    self._startup_callback = None
+                    if self._stopped:
+                        # 起動を待つ間に止められていれば, 新しい子プロセスも止める.
+                        child.orders.put(None)
+                    return
+                case StatusMessage(component=component, status=status):
+                    if callback:
+                        callback(component, status)
+                case FailedMessage(error=error):
+                    await asyncio.to_thread(child.process.join)
+                    if isinstance(error, SettingsError):
+                        raise error
+                    raise RuntimeError(
+                        "Failed to start the recognition process."
+                    ) from error
+                case None if not child.process.is_alive():
+                    raise RuntimeError(
+                        f"The recognition process exited: {child.process.exitcode}"
+                    )
+                case None:
+                    continue
+                case _:
+                    self._dispatch(message)
+
+    async def __call__(self) -> None:
+        """子プロセスからの通知を受け取り続ける. 止めるか, 再起動をやめるまで続ける."""
+        try:
+            # 止めた後も, 子プロセスが終わるまでに送られた通知は受け取る.
+            while child := self._child:
+                failed = await asyncio.to_thread(self._pump, child)
+                if self._stopped or failed:
+                    return
+                logger.warning(
+                    "The recognition process exited unexpectedly: {}",
+                    child.process.exitcode,
+                )
+                if not self._may_restart():
+                    self._errors.put(
+                        "映像の処理が繰り返し異常終了しました. アプリを終了します."
+                    )
+                    return
+                try:
+                    await self.start()
+                except Exception as error:
+                    logger.opt(exception=error).warning(
+                        "Failed to restart the recognition process."
+                    )
+                    self._errors.put(
+                        "映像の処理を再起動できませんでした. アプリを終了します."
+                    )
+                    return
+        finally:
+            await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """子プロセスの終了を待つ. 待っても終わらなければ強制終了する."""
+        if not (child := self._child):
+            return
+        self._child = None
+        self._stopped = True
+        child.orders.put(None)
+        self._join(child)
+        logger.debug("The recognition process is closed.")
+
+    def _spawn(self) -> _Child:
+        context = self._context
+        orders: "multiprocessing.Queue[Order]" = context.Queue()
+        events: "multiprocessing.Queue[Message]" = context.Queue()
+        # チームの認識用のワーカープロセスを起動できるよう, デーモンにはしない.
+        process = context.Process(  # type: ignore[attr-defined]
+            target=self._target,
+            args=(self._settings_path, orders, events, self._debugging),
+            name="recognition",
+        )
+        process.start()
+        logger.debug("The recognition process is started: {}", process.pid)
+        return _Child(process, orders, events)
+
+    def _join(self, child: _Child) -> None:
+        child.process.join(self._stop_timeout_in_seconds)
+        if child.process.is_alive():
+            logger.warning("Terminating the recognition process.")
+            child.process.terminate()
+            child.process.join()
+
+    def _order(self, order: Order) -> None:
+        if child := self._child:
+            child.orders.put(order)
+
+    def _pump(self, child: _Child) -> bool:
+        """
+        子プロセスが止まるまで, 子プロセスからの知らせを処理する.
+
+        Returns:
+            子プロセスが自ら止まったときか, 致命的なエラーで止まったときは True.
+        """
+        while True:
+            message = self._receive(child)
+            if isinstance(message, FailedMessage):
+                # 致命的なエラーであれば, 利用者へ示すメッセージは送り済みとする.
+                if isinstance(message.error, FatalError):
+                    return True
+                # それ以外のエラーは異常終了と同じく再起動する.
+                logger.opt(exception=message.error).warning(
+                    "The recognition process is failed."
+                )
+                self._join(child)
+                return False
+            if message is not None:
+                self._dispatch(message)
+            elif not child.process.is_alive():
+                # 終了直前に送られた知らせを取りこぼさないよう, 残りを処理してから返す.
+                while (message := self._receive(child, 0)) is not None:
+                    self._dispatch(message)
+                return False
+
+    def _dispatch(self, message: Any) -> None:
+        match message:
+            case NotificationMessage(notification=notification):
+                self._notifier.notify(notification)
+            case PublishedMessage(notification=notification, captured_at=at):
+                if publisher := self._publisher:
+                    publisher.publish(notification, at)
+            case ErrorMessage(text=text):
+                self._errors.put(text)
+            case _:
+                logger.debug("Ignored message: {}", message)
+
+    @staticmethod
+    def _receive(child: _Child, timeout: float = 0.1) -> Optional[Message]:
+        try:
+            return (
+                child.events.get(timeout=timeout)
+                if timeout
+                else child.events.get_nowait()
+            )
+        except queue.Empty:
+            return None
+
+    def _may_restart(self) -> bool:
+        now = time.monotonic()
+        restarts = self._restarts
+        while restarts and now - restarts[0] > self._restart_window_in_seconds:
+            restarts.popleft()
+        if len(restarts) >= self._max_restarts:
+            return False
+        restarts.append(now)
+        return True
@@ -0,0 +1,394 @@
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import os
+import types
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from queue import Queue
+from typing import AsyncIterator, Callable, Mapping, Optional, Type, TypeVar, cast
+
+from loguru import logger
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import RoutineSettings, Settings
+from pkscrd.core.flight.service import FlightRecorder, RecordingMetrics
+from pkscrd.core.metrics.infra import Control
+from pkscrd.core.metrics.service import LabeledMetrics, Metrics, NullMetrics
+from pkscrd.core.metrics.trace import Tracer
+from pkscrd.core.notification.service import NotificationPublisher, Notifier
+from pkscrd.core.ocr.service import OcrEngine
+from pkscrd.core.ocr.service.impl.scheduled import OcrScheduler
+from pkscrd.core.screen.service import ScreenFetcher
+from pkscrd.core.screen.service.impl.replay import ReplayMode, ReplayScreenFetcher
+from pkscrd.usecase.team import TeamUseCase
+from .agent import POLLING_INTERVAL_IN_SECONDS, ImageProcess, ImageProcessAgent
+from .controller.image import ImageController
+from .error import create_capture_tolerance_callback, create_obs_tolerance_callback
+from .factory.controller import create_image_controller, create_use_cases
+from .factory.core.flight import using_flight_recorder
+from .factory.core.metrics import using_metrics
+from .factory.core.ocr import (
+    create_ocr_engine,
+    create_ocr_scheduler,
+    create_session_ocr_engine,
+)
+from .factory.core.recording import using_screen_recorder
+from .factory.core.screen import using_screen_fetcher
+from .factory.core.screenshot import create_screenshot_use_case
+from .startup import Component, StartupCallback, start_component
+
+_T = TypeVar("_T")
+
+NotifierFactory = Callable[[Metrics], Notifier]
+"""計測機能を受け取り, 通知機能を準備する. 準備に時間がかかりうるため, スレッドから呼び出す."""
+
+
+@dataclasses.dataclass(frozen=True)
+class SharedEngines:
+    """複数のセッションで共有する認識の資源."""
+
+    ocr: OcrScheduler
+    executor: ProcessPoolExecutor
+    """チームの認識に用いるワーカープロセス."""
+    thread_pool: ThreadPoolExecutor
+    """画像認識を並行して行うスレッド."""
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def create(
+        settings: Settings,
+        *,
+        startup_callback: Optional[StartupCallback] = None,
+        max_workers: int = 3,
+        recognition_threads: int = 4,
+    ) -> AsyncIterator["SharedEngines"]:
+        """
+        Raises:
+            ConfigurationError: 設定の問題が疑われるとき.
+        """
+        with contextlib.ExitStack() as stack:
+            results = await asyncio.gather(
+                start_component(
+                    Component.OCR,
+                    create_ocr_scheduler(settings.ocr),
+                    startup_callback,
+                ),
+                start_component(
+                    Component.EXECUTOR,
+                    _start_executor(stack, max_workers),
+                    startup_callback,
+                ),
+                return_exceptions=True,
+            )
+            if failures := [r for r in results if isinstance(r, BaseException)]:
+                raise next(
+                    (f for f in failures if isinstance(f, SettingsError)),
+                    failures[0],
+                )
+            ocr, executor = cast(tuple[OcrScheduler, ProcessPoolExecutor], results)
+            thread_pool = stack.enter_context(
+                ThreadPoolExecutor(
+                    recognition_threads, thread_name_prefix="recognition"
+                )
+            )
+            yield SharedEngines(ocr, executor, thread_pool)
+
+
+class ReaderPipeline:
+    """
+    映像の取得から通知までの処理のコンテクスト管理. 画面 (Qt) に依存しない.
+
+    映像は設定に従って取得するか, 与えられた取得方法で取得する.
+    準備したエージェントを呼び出すと, 止めるまで映像を処理し続ける.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        notifier: Notifier | NotifierFactory,
+        *,
+        dir_path: str,
+        screen_fetcher: Optional[ScreenFetcher] = None,
+        errors: Optional[Queue[str]] = None,
+        startup_callback: Optional[StartupCallback] = None,
+        controls: Optional[Mapping[str, Control]] = None,
+        max_workers: int = 3,
+        recognition_threads: int = 4,
+        session: Optional[str] = None,
+        shared: Optional[SharedEngines] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        """
+        Args:
+            notifier: 通知機能か, 通知機能を準備する関数.
+            dir_path: スクリーンショットや記録などの書き出し先の既定値.
+            screen_fetcher: 映像の取得方法. 未指定時は設定に従って準備する.
+            errors: 利用者に示して終了すべきエラーのメッセージを受け取る.
+            controls: 計測値とともに公開する制御用のエンドポイント.
+            max_workers: チームの認識に用いるワーカープロセス数.
+            recognition_threads: 画像認識を並行して行うスレッド数.
+            session: セッション名. 指定時は計測値にラベルとして加える.
+            shared: 他のセッションと共有する認識の資源.
+                指定時は max_workers と recognition_threads を用いない.
+            metrics: 他のセッションと共有する計測機能. 未指定時は設定に従って準備する.
+        """
+        self._settings = settings
+        self._notifier = notifier
+        self._dir_path = dir_path
+        self._screen_fetcher = screen_fetcher
+        self._errors: Queue[str] = errors if errors is not None else Queue(maxsize=10)
+        self._startup_callback = startup_callback
+        self._controls = controls
+        self._max_workers = max_workers
+        self._recognition_threads = recognition_threads
+        self._session = session
+        self._shared = shared
+        self._shared_metrics = metrics
+        self._stack = contextlib.AsyncExitStack()
+
+        self._metrics: Metrics = NullMetrics()
+        self._flight_recorder: Optional[FlightRecorder] = None
+        self._process: Optional[ImageProcess] = None
+        self._agent: Optional[ImageProcessAgent] = None
+        self._ally_team: Optional[TeamUseCase] = None
+        self._create_image_controller: Optional[
+            Callable[[RoutineSettings], ImageController]
+        ] = None
+
+    async def __aenter__(self) -> ImageProcessAgent:
+        try:
+            return await self._start()
+        except:  # noqa: E722
+            await self._stack.__aexit__(None, None, None)
+            raise
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> bool:
+        logger.debug("Starting exiting the pipeline.")
+        await self._stack.__aexit__(exc_type, exc_val, exc_tb)
+        return False
+
+    @property
+    def agent(self) -> ImageProcessAgent:
+        assert self._agent, "not entered"
+        return self._agent
+
+    @property
+    def screen_fetcher(self) -> ScreenFetcher:
+        assert self._screen_fetcher, "not entered"
+        return self._screen_fetcher
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    @property
+    def flight_recorder(self) -> Optional[FlightRecorder]:
+        return self._flight_recorder
+
+    @property
+    def errors(self) -> Queue[str]:
+        """利用者に示して終了すべきエラーのメッセージ."""
+        return self._errors
+
+    def set_notifier(self, notifier: Notifier) -> None:
+        """次の通知から用いる通知機能を差し替える."""
+        assert self._process, "not entered"
+        self._process.set_notifier(notifier)
+
+    def set_publisher(self, publisher: Optional[NotificationPublisher]) -> None:
+        """次の通知から用いる配信先を差し替える. None のときは配信しない."""
+        assert self._process, "not entered"
+        self._process.set_publisher(publisher)
+
+    def apply_routine(self, routine: RoutineSettings) -> None:
+        """処理の設定を次の映像から反映する. チームや HP 履歴などの状態は引き継ぐ."""
+        assert self._process and self._ally_team and self._create_image_controller
+        self._ally_team.set_uses_auto_notification(routine.notifies_ally_team)
+        self._process.set_controller(self._create_image_controller(routine))
+
+    async def _start(self) -> ImageProcessAgent:
+        settings = self._settings
+        dir_path = self._dir_path
+        callback = self._startup_callback
+        # 各コンポーネントが計測箇所を登録できるよう, 計測機能を最初に準備する.
+        metrics = self._shared_metrics
+        if metrics is None:
+            metrics = await self._stack.enter_async_context(
+                using_metrics(settings.metrics, controls=self._controls)
+            )
+        self._metrics = metrics
+        if self._session:
+            self._metrics = metrics = LabeledMetrics(metrics, session=self._session)
+        self._flight_recorder = flight_recorder = self._stack.enter_context(
+            using_flight_recorder(settings.flight_recorder, dir_path=dir_path)
+        )
+        if flight_recorder:
+            # 処理段階の処理時間は計測機能を通して記録する.
+            self._metrics = metrics = RecordingMetrics(metrics, flight_recorder)
+
+        # 互いに依存しないコンポーネントは並行して準備する.
+        # 失敗したときにも準備できたものを確実に後始末できるよう, すべての完了を待つ.
+        notifier = self._notifier
+        shared = self._shared
+        results = await asyncio.gather(
+            (
+                _completed(self._screen_fetcher)
+                if self._screen_fetcher
+                else start_component(
+                    Component.SCREEN, self._start_screen_fetcher(), callback
+                )
+            ),
+            (
+                _completed(notifier)
+                if isinstance(notifier, Notifier)
+                else start_component(
+                    Component.NOTIFIER,
+                    asyncio.to_thread(notifier, metrics),
+                    callback,
+                )
+            ),
+            (
+                _completed(
+                    create_session_ocr_engine(
+                        shared.ocr,
+                        self._session or "",
+                        metrics=metrics,
+                        flight_recorder=flight_recorder,
+                    )
+                )
+                if shared
+                else start_component(
+                    Component.OCR,
+                    create_ocr_engine(
+                        settings.ocr,
+                        metrics=metrics,
+                        flight_recorder=flight_recorder,
+                    ),
+                    callback,
+                )
+            ),
+            (
+                _completed(shared.executor)
+                if shared
+                else start_component(
+                    Component.EXECUTOR,
+                    _start_executor(self._stack, self._max_workers),
+                    callback,
+                )
+            ),
+            return_exceptions=True,
+        )
+        if failures := [r for r in results if isinstance(r, BaseException)]:
+            raise next(
+                (f for f in failures if isinstance(f, SettingsError)),
+                failures[0],
+            )
+        screen_fetcher, notifier, ocr, executor = cast(
+            tuple[ScreenFetcher, Notifier, OcrEngine, ProcessPoolExecutor],
+            results,
+        )
+        self._screen_fetcher = screen_fetcher
+
+        screenshot = create_screenshot_use_case(settings.screenshot, dir_path=dir_path)
+        use_cases = create_use_cases(settings.routine, ocr, screenshot)
+
+        # 画像認識を並行して行う. 設定の再読み込みで作り直すコントローラ間で共有する.
+        thread_pool = (
+            shared.thread_pool
+            if shared
+            else self._stack.enter_context(
+                ThreadPoolExecutor(
+                    self._recognition_threads, thread_name_prefix="recognition"
+                )
+            )
+        )
+
+        self._ally_team = use_cases.ally_team
+        self._create_image_controller = functools.partial(
+            create_image_controller,
+            use_cases=use_cases,
+            executor=executor,
+            ocr=ocr,
+            metrics=metrics,
+            flight_recorder=flight_recorder,
+            thread_pool=thread_pool,
+        )
+        recorder = self._stack.enter_context(
+            using_screen_recorder(settings.recording, dir_path=dir_path)
+        )
+        if recorder:
+            metrics.register_counter(
+                "recorded_frames_total", lambda: recorder.stats.recorded
+            )
+            metrics.register_counter(
+                "dropped_frames_total",
+                lambda: recorder.stats.dropped,
+                reason="recorder",
+            )
+            metrics.register_gauge(
+                "queue_depth", lambda: recorder.pending, queue="recorder"
+            )
+        image = self._create_image_controller(settings.routine)
+        self._process = ImageProcess(
+            screen_fetcher,
+            image,
+            notifier,
+            recorder,
+            metrics=metrics,
+            tracer=Tracer(metrics) if metrics.enabled else None,
+            flight_recorder=flight_recorder,
+            budget_in_seconds=POLLING_INTERVAL_IN_SECONDS,
+        )
+        self._agent = ImageProcessAgent(
+            self._process,
+            # 記録の再生は時間が実時間と異なりうるため, 実時間の再生でのみ休止する.
+            idle_after_in_seconds=(
+                settings.polling.idle_after_in_seconds or None
+                if not isinstance(screen_fetcher, ReplayScreenFetcher)
+                or screen_fetcher.mode is ReplayMode.REALTIME
+                else None
+            ),
+            idle_interval_in_seconds=settings.polling.idle_interval_in_seconds,
+            metrics=metrics,
+            flight_recorder=flight_recorder,
+        )
+        return self._agent
+
+    async def _start_screen_fetcher(self) -> ScreenFetcher:
+        settings = self._settings
+        return await self._stack.enter_async_context(
+            using_screen_fetcher(
+                settings.screen,
+                settings.obs,
+                settings.capture_device,
+                settings.replay,
+                obs_tolerance_callback=create_obs_tolerance_callback(self._errors),
+                capture_tolerance_callback=create_capture_tolerance_callback(
+                    self._errors
+                ),
+                metrics=self._metrics,
+            )
+        )
+
+
+async def _start_executor(
+    stack: contextlib.ExitStack | contextlib.AsyncExitStack,
+    max_workers: int,
+) -> ProcessPoolExecutor:
+    executor = stack.enter_context(ProcessPoolExecutor(max_workers))
+    # 初回の使用時に待たされないよう, ワーカープロセスを先に起動しておく.
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(loop.run_in_executor(executor, os.getpid) for _ in range(max_workers))
+    )
+    return executor
+
+
+async def _completed(value: _T) -> _T:
+    return value
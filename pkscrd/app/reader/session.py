@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import functools
+import os
+import types
+from queue import Queue
+from typing import Callable, Mapping, Optional, Type
+
+from loguru import logger
+
+from pkscrd.app.settings.model import RoutineSettings, SessionSettings, Settings
+from pkscrd.app.settings.service import overlay_session
+from pkscrd.core.metrics.infra import Control
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.notification.service import NotificationPublisher, Notifier
+from pkscrd.core.screen.service import ScreenFetcher
+from .controller.command import Command
+from .factory.core.metrics import using_metrics
+from .pipeline import ReaderPipeline, SharedEngines
+from .startup import StartupCallback
+
+SessionNotifierFactory = Callable[[str, Settings, Metrics], Notifier]
+"""
+セッション名とセッション単体の設定, 計測機能を受け取り, 通知機能を準備する.
+準備に時間がかかりうるため, スレッドから呼び出す.
+"""
+
+
+class ReaderSessions:
+    """
+    複数の映像を同じプロセスで処理する. 画面 (Qt) に依存しない.
+
+    セッションごとに映像の取得, 対戦中の状態, 通知先を持ち,
+    OCR エンジンとワーカープロセス, 画像認識のスレッド, 計測機能は共有する.
+    OCR の読み取りはセッション間で順番に行い, 計測値にはセッション名のラベルを加える.
+    スクリーンショットや記録はセッション名のディレクトリに書き出す.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        notifier: SessionNotifierFactory,
+        *,
+        dir_path: str,
+        screen_fetchers: Optional[Mapping[str, ScreenFetcher]] = None,
+        errors: Optional[Queue[str]] = None,
+        startup_callback: Optional[StartupCallback] = None,
+        controls: Optional[Mapping[str, Control]] = None,
+        max_workers: int = 3,
+        recognition_threads: int = 4,
+    ) -> None:
+        """
+        Args:
+            settings: sessions を 1 つ以上含む設定.
+            notifier: セッションごとの通知機能を準備する関数.
+            dir_path: 書き出し先の既定値. セッション名のディレクトリを作って書き出す.
+            screen_fetchers: セッション名ごとの映像の取得方法.
+                含まないセッションは設定に従って準備する.
+            errors: 利用者に示して終了すべきエラーのメッセージを受け取る.
+            controls: 計測値とともに公開する制御用のエンドポイント.
+            max_workers: チームの認識に用いるワーカープロセス数.
+            recognition_threads: 画像認識を並行して行うスレッド数.
+        """
+        assert settings.sessions, "no sessions"
+        self._settings = settings
+        self._notifier = notifier
+        self._dir_path = dir_path
+        self._screen_fetchers = screen_fetchers or {}
+        self._errors: Queue[str] = errors if errors is not None else Queue(maxsize=10)
+        self._startup_callback = startup_callback
+        self._controls = controls
+        self._max_workers = max_workers
+        self._recognition_threads = recognition_threads
+        self._stack = contextlib.AsyncExitStack()
+
+        self._metrics: Metrics = NullMetrics()
+        self._pipelines: dict[str, ReaderPipeline] = {}
+
+    async def __aenter__(self) -> "ReaderSessions":
+        try:
+            await self._start()
+        except:  # noqa: E722
+            await self._stack.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> bool:
+        logger.debug("Starting exiting the sessions.")
+        await self._stack.__aexit__(exc_type, exc_val, exc_tb)
+        return False
+
+    async def __call__(self) -> None:
+        """
+        止めるまで各セッションの映像を処理し続ける.
+        いずれかのセッションがエラーで止まったときは, 他のセッションも止める.
+        """
+        tasks = [
+            asyncio.create_task(pipeline.agent(), name=f"session-{name}")
+            for name, pipeline in self._pipelines.items()
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            self.stop()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in tasks:
+            if not task.cancelled() and (error := task.exception()):
+                raise error
+
+    @property
+    def pipelines(self) -> Mapping[str, ReaderPipeline]:
+        """セッション名ごとの処理. 設定の順に並ぶ."""
+        return self._pipelines
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    @property
+    def errors(self) -> Queue[str]:
+        """利用者に示して終了すべきエラーのメッセージ."""
+        return self._errors
+
+    def stop(self) -> None:
+        """すべてのセッションを止める. 任意のスレッドから呼び出せる."""
+        for pipeline in self._pipelines.values():
+            pipeline.agent.stop()
+
+    def send(self, command: Command) -> None:
+        """すべてのセッションに要求を送る. 任意のスレッドから呼び出せる."""
+        for pipeline in self._pipelines.values():
+            pipeline.agent.commands.send(command)
+
+    def set_publisher(self, publisher: Optional[NotificationPublisher]) -> None:
+        """すべてのセッションの配信先を差し替える. None のときは配信しない."""
+        for pipeline in self._pipelines.values():
+            pipeline.set_publisher(publisher)
+
+    def apply_routine(self, routine: RoutineSettings) -> None:
+        """すべてのセッションに処理の設定を次の映像から反映する."""
+        for pipeline in self._pipelines.values():
+            pipeline.apply_routine(routine)
+
+    async def _start(self) -> None:
+        settings = self._settings
+        callback = self._startup_callback
+        self._metrics = metrics = await self._stack.enter_async_context(
+            using_metrics(settings.metrics, controls=self._controls)
+        )
+        shared = await self._stack.enter_async_context(
+            SharedEngines.create(
+                settings,
+                startup_callback=callback,
+                max_workers=self._max_workers,
+                recognition_threads=self._recognition_threads,
+            )
+        )
+        for session in settings.sessions:
+            name = session.name
+            dir_path = os.path.join(self._dir_path, name)
+            os.makedirs(dir_path, exist_ok=True)
+            session_settings = create_session_settings(settings, session)
+            pipeline = ReaderPipeline(
+                session_settings,
+                functools.partial(self._notifier, name, session_settings),
+                dir_path=dir_path,
+                screen_fetcher=self._screen_fetchers.get(name),
+                errors=self._errors,
+                startup_callback=callback,
+                session=name,
+                shared=shared,
+                metrics=metrics,
+            )
+            # 準備できたセッションから順に, 終了時に後始末する.
+            await self._stack.enter_async_context(pipeline)
+            self._pipelines[name] = pipeline
+            logger.debug("Session is started: {}", name)
+
+
+def create_session_settings(settings: Settings, session: SessionSettings) -> Settings:
+    """
+    セッション単体の設定を作る. セッションで指定した項目を全体の設定に重ね,
+    明示された記録の書き出し先も, セッション名のディレクトリに分ける.
+    """
+    settings = overlay_session(settings, session)
+    name = session.name
+    update = {}
+    for key in ("recording", "flight_recorder"):
+        section = getattr(settings, key)
+        if section.dir_path is None:
+            continue
+        dir_path = os.path.join(section.dir_path, name)
+        # 書き出し先が見つからないときは, 各機能の準備で設定の誤りとして扱う.
+        if os.path.isdir(section.dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        update[key] = section.model_copy(update={"dir_path": dir_path})
+    return settings.model_copy(update=update)
@@ -0,0 +1,58 @@
+import enum
+import time
+from typing import Awaitable, Callable, Optional, TypeAlias, TypeVar
+
+from loguru import logger
+
+_T = TypeVar("_T")
+
+
+class Component(enum.StrEnum):
+    """起動時に準備するコンポーネント."""
+
+    SCREEN = "screen"
+    NOTIFIER = "notifier"
+    OCR = "ocr"
+    EXECUTOR = "executor"
+
+
+class ComponentStatus(enum.Enum):
+    """コンポーネントの準備状況."""
+
+    STARTING = enum.auto()
+    READY = enum.auto()
+    FAILED = enum.auto()
+
+
+StartupCallback: TypeAlias = Callable[[Component, ComponentStatus], None]
+
+
+async def start_component(
+    component: Component,
+    starting: Awaitable[_T],
+    callback: Optional[StartupCallback] = None,
+) -> _T:
+    """
+    コンポーネントの準備を待ち, 所要時間を記録する.
+    準備状況はコールバックに通知する.
+    """
+    if callback:
+        callback(component, ComponentStatus.STARTING)
+
+    began_at = time.perf_counter()
+    try:
+        result = await starting
+    except BaseException:
+        logger.debug(
+            "Failed to start {}: {:.3f}s",
+            component,
+            time.perf_counter() - began_at,
+        )
+        if callback:
+            callback(component, ComponentStatus.FAILED)
+        raise
+
+    logger.debug("Started {}: {:.3f}s", component, time.perf_counter() - began_at)
+    if callback:
+        callback(component, ComponentStatus.READY)
+    return result
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import os
+import sys
+from typing import Optional, Sequence
+
+import pnlib
+from loguru import logger
+
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.service import load_settings, select_path
+from .service import RecognitionServer
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    映像を WebSocket で受け取って認識し, 通知を返すサーバを実行する.
+    Ctrl+C で終了する.
+    """
+    args = _parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "INFO")
+
+    if not pnlib.is_successfully_loaded():
+        print("起動に必要な情報の読み込みが失敗しました.", file=sys.stderr)
+        return 1
+
+    try:
+        path = args.settings or select_path()
+        settings = load_settings(path)
+        server = RecognitionServer(
+            settings,
+            dir_path=os.path.dirname(path) or os.getcwd(),
+            host=args.host,
+            port=args.port,
+        )
+        return asyncio.run(_run(server))
+    except SettingsError as error:
+        print(error, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+
+async def _run(server: RecognitionServer) -> int:
+    async with server:
+        logger.info("Listening on port {}.", server.port)
+        await server()
+    if errors := _drain(server):
+        for message in errors:
+            print(message, file=sys.stderr)
+        return 1
+    return 0
+
+
+def _drain(server: RecognitionServer) -> list[str]:
+    messages: list[str] = []
+    while not server.errors.empty():
+        messages.append(server.errors.get_nowait())
+    return messages
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="pkscrd-server",
+        description=(
+            "映像を WebSocket で受け取って認識し, 通知を返す."
+            " ws://<host>:<port>/sessions/<セッション名> に映像をバイナリメッセージで送る."
+        ),
+    )
+    parser.add_argument(
+        "-s",
+        "--settings",
+        help="設定ファイル. 省略時は読み上げアプリと同じく選ぶ.",
+    )
+    parser.add_argument("--host", help="待ち受けるアドレス. 省略時は設定に従う.")
+    parser.add_argument(
+        "--port", type=int, help="待ち受けるポート. 省略時は設定に従う."
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
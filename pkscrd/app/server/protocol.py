@@ -0,0 +1,123 @@
+import struct
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+RAW_MAGIC = b"PKRW"
+"""無圧縮の映像の先頭. 続けて幅と高さ (リトルエンディアンの uint16), BGR の画素を並べる."""
+
+_RAW_HEADER = struct.Struct("<4sHH")
+
+MAX_FRAME_PIXELS = 3840 * 2160
+"""
+受け付ける映像の画素数の上限. 小さな画像ファイルでも, 展開すると巨大になりうるため,
+展開する前にヘッダの大きさで確かめる.
+"""
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_IHDR = struct.Struct(">4sII")
+_JPEG_SOI = b"\xff\xd8"
+_JPEG_SEGMENT = struct.Struct(">BBH")
+_JPEG_SOF_SIZE = struct.Struct(">BHH")
+# 大きさを持つ SOF マーカー. C4 (DHT), C8 (JPG), CC (DAC) は SOF ではない.
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# 長さを持たないマーカー (TEM, RST0-7).
+_JPEG_STANDALONE_MARKERS = frozenset({0x01, *range(0xD0, 0xD8)})
+
+SESSION_PATH_PREFIX = "/sessions/"
+"""接続先のパス. 続けてセッション名を指定する."""
+
+
+def encode_jpeg(image: MatLike, quality: int = 80) -> bytes:
+    """
+    Raises:
+        ValueError: エンコードできないとき.
+    """
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Failed to encode the frame.")
+    return buffer.tobytes()
+
+
+def encode_raw(image: MatLike) -> bytes:
+    """
+    Raises:
+        ValueError: BGR の映像でないとき.
+    """
+    if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+        raise ValueError(f"Unsupported frame: {image.shape} {image.dtype}")
+    height, width = image.shape[:2]
+    return (
+        _RAW_HEADER.pack(RAW_MAGIC, width, height)
+        + np.ascontiguousarray(image).tobytes()
+    )
+
+
+def decode_frame(data: bytes) -> MatLike:
+    """
+    無圧縮の映像か, JPEG, PNG の画像を BGR の映像に戻す.
+
+    Raises:
+        ValueError: 映像として解釈できないか, 画素数が MAX_FRAME_PIXELS を超えるとき.
+    """
+    if data.startswith(RAW_MAGIC):
+        if len(data) < _RAW_HEADER.size:
+            raise ValueError("Truncated raw frame header.")
+        _, width, height = _RAW_HEADER.unpack_from(data)
+        _check_pixels(width, height)
+        pixels = np.frombuffer(data, dtype=np.uint8, offset=_RAW_HEADER.size)
+        if pixels.size != width * height * 3:
+            raise ValueError(f"Raw frame size mismatch: {width}x{height}")
+        # 受信したバッファは書き換えられないため, 処理で書き換えられるよう複製する.
+        return pixels.reshape(height, width, 3).copy()
+
+    _check_pixels(*_image_size(data))
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Failed to decode the frame.")
+    return image
+
+
+def _check_pixels(width: int, height: int) -> None:
+    if not 0 < width * height <= MAX_FRAME_PIXELS:
+        raise ValueError(f"Unsupported frame size: {width}x{height}")
+
+
+def _image_size(data: bytes) -> tuple[int, int]:
+    """
+    画像ファイルのヘッダから (幅, 高さ) を読み取る.
+
+    Raises:
+        ValueError: JPEG, PNG でないか, ヘッダが壊れているとき.
+    """
+    try:
+        if data.startswith(_PNG_SIGNATURE):
+            chunk, width, height = _PNG_IHDR.unpack_from(data, len(_PNG_SIGNATURE) + 4)
+            if chunk != b"IHDR":
+                raise ValueError("Missing PNG header.")
+            return width, height
+        if data.startswith(_JPEG_SOI):
+            return _jpeg_size(data)
+    except struct.error as error:
+        raise ValueError("Truncated image header.") from error
+    raise ValueError("Unsupported image format.")
+
+
+def _jpeg_size(data: bytes) -> tuple[int, int]:
+    offset = len(_JPEG_SOI)
+    while True:
+        prefix, marker, length = _JPEG_SEGMENT.unpack_from(data, offset)
+        if prefix != 0xFF:
+            raise ValueError("Invalid JPEG marker.")
+        if marker == 0xFF:
+            offset += 1  # 詰め物.
+        elif marker in _JPEG_STANDALONE_MARKERS:
+            offset += 2
+        elif marker in _JPEG_SOF_MARKERS:
+            _, height, width = _JPEG_SOF_SIZE.unpack_from(
+                data, offset + _JPEG_SEGMENT.size
+            )
+            return width, height
+        else:
+            offset += 2 + length
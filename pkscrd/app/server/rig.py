@@ -0,0 +1,212 @@
+"""
+ループバックで認識サーバを起動し, 記録した映像を再生して送る試験装置.
+セッション数を変えて, 1 台で処理できる映像の数を見積もるのにも用いる.
+
+    python -m pkscrd.app.server.rig [-s SETTINGS] [--sessions N]
+                                    [--encoding jpeg|raw] [--mode realtime|max-speed] RECORDING
+
+受け取ったメッセージを JSON Lines で標準出力に, セッションごとの集計を標準エラー出力に書き出す.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import sys
+import tempfile
+from typing import Any, Literal, Optional, Sequence
+
+import pnlib
+from loguru import logger
+from returns.pipeline import is_successful
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed
+
+from pkscrd.app.reader.agent import POLLING_INTERVAL_IN_SECONDS
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import Settings
+from pkscrd.app.settings.service import load_settings
+from pkscrd.core.screen.infra.replay import open_recording
+from pkscrd.core.screen.service.impl.replay import (
+    EndOfRecordingError,
+    ReplayMode,
+    ReplayScreenFetcher,
+)
+from .protocol import SESSION_PATH_PREFIX, encode_jpeg, encode_raw
+from .service import RecognitionServer
+
+Encoding = Literal["jpeg", "raw"]
+
+_LOOPBACK = "127.0.0.1"
+_NORMAL_CLOSURE = 1000
+
+
+@dataclasses.dataclass
+class ReplayResult:
+    """1 つのセッションに映像を送った結果."""
+
+    session: str
+    sent: int = 0
+    messages: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+    closed: Optional[str] = None
+    """サーバに接続を断られたときの理由."""
+
+    @property
+    def dropped(self) -> int:
+        """サーバが処理しきれずに捨てた映像の数."""
+        return sum(1 for m in self.messages if m.get("type") == "dropped")
+
+    @property
+    def notifications(self) -> int:
+        return sum(1 for m in self.messages if m.get("type") not in _NOT_NOTIFICATIONS)
+
+
+_NOT_NOTIFICATIONS = frozenset({"dropped", "error"})
+
+
+async def replay_to_server(
+    url: str,
+    session: str,
+    fetcher: ReplayScreenFetcher,
+    *,
+    encoding: Encoding = "jpeg",
+    quality: int = 80,
+    interval_in_seconds: float = POLLING_INTERVAL_IN_SECONDS,
+    linger_in_seconds: float = 1.0,
+    requests: Sequence[str] = (),
+) -> ReplayResult:
+    """
+    記録の終端に達するまで, 取得した映像をセッションに送る.
+    読めない映像は飛ばす. 送り終えた後も linger_in_seconds 秒は通知を待つ.
+
+    Args:
+        url: サーバの URL (ws://<host>:<port>).
+        requests: 接続した直後に送る要求の名前.
+    """
+    result = ReplayResult(session)
+    async with connect(
+        url + SESSION_PATH_PREFIX + session, max_size=None
+    ) as connection:
+        receiving = asyncio.create_task(_receive(connection, result))
+        try:
+            for request in requests:
+                await connection.send(json.dumps({"request": request}))
+            while True:
+                fetched = await fetcher.fetch()
+                if not is_successful(fetched):
+                    if isinstance(fetched.failure(), EndOfRecordingError):
+                        break
+                    logger.warning("Skip an unreadable frame: {}", fetched.failure())
+                    continue
+                image = fetched.unwrap()
+                if encoding == "raw":
+                    data = encode_raw(image)
+                else:
+                    data = await asyncio.to_thread(encode_jpeg, image, quality)
+                await connection.send(data)
+                result.sent += 1
+                await asyncio.sleep(interval_in_seconds)
+            await asyncio.sleep(linger_in_seconds)
+        except ConnectionClosed:
+            pass
+        finally:
+            receiving.cancel()
+    if (code := connection.close_code) not in (None, _NORMAL_CLOSURE):
+        result.closed = connection.close_reason or str(code)
+    return result
+
+
+async def _receive(connection: ClientConnection, result: ReplayResult) -> None:
+    try:
+        async for message in connection:
+            result.messages.append(json.loads(message))
+    except ConnectionClosed:
+        pass
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "WARNING")
+
+    if not pnlib.is_successfully_loaded():
+        print("起動に必要な情報の読み込みが失敗しました.", file=sys.stderr)
+        return 1
+
+    try:
+        settings = load_settings(args.settings) if args.settings else Settings()
+        results = asyncio.run(_run(settings, args))
+    except (SettingsError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    for result in results:
+        for message in result.messages:
+            print(
+                json.dumps({"session": result.session, **message}, ensure_ascii=False)
+            )
+        print(
+            f"{result.session}: sent={result.sent} dropped={result.dropped}"
+            f" notifications={result.notifications}"
+            + (f" closed={result.closed}" if result.closed else ""),
+            file=sys.stderr,
+        )
+    return 1 if any(r.closed for r in results) else 0
+
+
+async def _run(settings: Settings, args: argparse.Namespace) -> list[ReplayResult]:
+    with tempfile.TemporaryDirectory() as dir_path:
+        async with RecognitionServer(
+            settings, dir_path=dir_path, host=_LOOPBACK, port=0
+        ) as server:
+            serving = asyncio.create_task(server())
+            try:
+                results = await asyncio.gather(
+                    *(
+                        replay_to_server(
+                            f"ws://{_LOOPBACK}:{server.port}",
+                            f"rig{i}",
+                            ReplayScreenFetcher(
+                                open_recording(args.recording), ReplayMode(args.mode)
+                            ),
+                            encoding=args.encoding,
+                            requests=args.requests,
+                        )
+                        for i in range(args.sessions)
+                    )
+                )
+            finally:
+                server.stop()
+                await serving
+    return results
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m pkscrd.app.server.rig",
+        description="ループバックで認識サーバを起動し, 記録した映像を再生して送る.",
+    )
+    parser.add_argument("recording", help="動画, 画像ディレクトリ, フレームアーカイブ.")
+    parser.add_argument("-s", "--settings", help="設定ファイル. 省略時は既定の設定.")
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument("--encoding", choices=("jpeg", "raw"), default="jpeg")
+    parser.add_argument(
+        "--mode",
+        choices=(ReplayMode.REALTIME, ReplayMode.MAX_SPEED),
+        default=ReplayMode.REALTIME,
+    )
+    parser.add_argument(
+        "-r",
+        "--request",
+        dest="requests",
+        action="append",
+        default=[],
+        help="接続した直後に送る要求 (opponent_team など).",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
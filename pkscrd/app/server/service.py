@@ -0,0 +1,430 @@
+import asyncio
+import collections
+import contextlib
+import functools
+import json
+import os
+import types
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from typing import Mapping, Optional, Type
+
+from cv2.typing import MatLike
+from loguru import logger
+from pydantic import ValidationError
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from pkscrd.app.reader.agent import ImageProcessAgent
+from pkscrd.app.reader.controller.command import Command
+from pkscrd.app.reader.factory.core.metrics import using_metrics
+from pkscrd.app.reader.pipeline import ReaderPipeline, SharedEngines
+from pkscrd.app.reader.session import create_session_settings
+from pkscrd.app.reader.startup import StartupCallback
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import SessionSettings, Settings
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.metrics.trace import Trace
+from pkscrd.core.notification.infra.stream import (
+    encode_error,
+    encode_notification,
+    parse_request,
+)
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.notification.service import NotificationPublisher, Notifier
+from pkscrd.core.screen.service.impl.push import PushScreenFetcher, fit_to_screen
+from .protocol import SESSION_PATH_PREFIX, decode_frame
+
+# 接続を断る理由 (RFC 6455).
+_POLICY_VIOLATION = 1008
+_INTERNAL_ERROR = 1011
+_TRY_AGAIN_LATER = 1013
+
+
+class _SilentNotifier(Notifier):
+    """読み上げない. 通知は配信先から接続へ返す."""
+
+    def __init__(self) -> None:
+        pass
+
+    def notify(
+        self,
+        notification: Notification,
+        trace: Optional[Trace] = None,
+    ) -> None:
+        pass
+
+
+class _Session(NotificationPublisher):
+    """
+    接続をまたいで保持するセッション.
+    送信待ちのメッセージは queue_size 件まで保持し, 超えた分は古いものから捨てる.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pipeline: ReaderPipeline,
+        frames: PushScreenFetcher,
+        queue_size: int,
+    ) -> None:
+        self.name = name
+        self.pipeline = pipeline
+        self.frames = frames
+        self.outbox: asyncio.Queue[str] = asyncio.Queue(queue_size)
+        self.connected = False
+        self.decoding = False
+        self.received = 0
+        self.dropped: collections.Counter[str] = collections.Counter()
+        """捨てた映像の数. 理由ごとに数える."""
+        self.dropped_messages = 0
+        self.task: Optional[asyncio.Task[None]] = None
+        self._loop = asyncio.get_running_loop()
+
+    @property
+    def agent(self) -> ImageProcessAgent:
+        return self.pipeline.agent
+
+    def publish(self, notification: Notification, captured_at: float) -> None:
+        message = encode_notification(notification, captured_at)
+        try:
+            self._loop.call_soon_threadsafe(self.put, message)
+        except RuntimeError:
+            pass  # ループが閉じた後は何もしない.
+
+    def put(self, message: str) -> None:
+        if self.outbox.full():
+            self.outbox.get_nowait()
+            self.dropped_messages += 1
+        self.outbox.put_nowait(message)
+
+
+class RecognitionServer:
+    """
+    映像を WebSocket で受け取って認識し, 通知を同じ接続で返すサーバ. 画面 (Qt) に依存しない.
+
+    ws://<host>:<port>/sessions/<セッション名> に接続し, 映像をバイナリメッセージで送る.
+    映像は JPEG, PNG の画像か, 無圧縮の形式 (protocol.encode_raw()) とする.
+    16:9 の映像を受け付け, 認識が前提とする大きさ (1920x1080) に拡大・縮小する.
+    要求は {"request": 名前} として受け付け, 通知は通知の配信と同じ形式で返す.
+
+    セッションは名前ごとに最初の接続で準備し, 切断しても対戦中の状態を保持する.
+    1 つのセッションに同時に接続できるのは 1 つまでとする.
+    OCR エンジンやワーカープロセスはセッション間で共有する.
+
+    処理が追いつかないときは, 受け取った映像を捨てて {"type": "dropped", "payload": {"reason": 理由}} を返す.
+    理由は, セッションの前の映像をデコードしている (pending) か,
+    デコードを待つ映像が max_pending_frames に達した (busy) かである.
+    認識が追いつかないときは, デコードした最新の映像だけを認識する.
+    セッション数が max_sessions に達したときは, 新しいセッションへの接続を断る.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        dir_path: str,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        startup_callback: Optional[StartupCallback] = None,
+        max_workers: int = 3,
+        recognition_threads: int = 4,
+    ) -> None:
+        """
+        Args:
+            dir_path: 書き出し先の既定値. セッション名のディレクトリを作って書き出す.
+            host: 待ち受けるアドレス. 未指定時は設定に従う.
+            port: 待ち受けるポート. 未指定時は設定に従う. 0 のときは空いているものを用いる.
+            max_workers: チームの認識に用いるワーカープロセス数.
+            recognition_threads: 画像認識を並行して行うスレッド数.
+        """
+        self._settings = settings
+        self._dir_path = dir_path
+        self._host = host or settings.server.host
+        self._port = settings.server.port if port is None else port
+        self._startup_callback = startup_callback
+        self._max_workers = max_workers
+        self._recognition_threads = recognition_threads
+        self._stack = contextlib.AsyncExitStack()
+        self._errors: Queue[str] = Queue(maxsize=10)
+
+        self._metrics: Metrics = NullMetrics()
+        self._shared: Optional[SharedEngines] = None
+        self._decoder: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[Server] = None
+        self._sessions: dict[str, _Session] = {}
+        self._opening = asyncio.Lock()
+        self._decoding = 0
+        self._decodes: set[asyncio.Task[None]] = set()
+        self._stopped = asyncio.Event()
+        self._closing = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> "RecognitionServer":
+        try:
+            await self._start()
+        except:  # noqa: E722
+            await self._stack.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> bool:
+        logger.debug("Starting exiting the recognition server.")
+        self._closing = True
+        await self._stop_sessions()
+        await asyncio.gather(*self._decodes, return_exceptions=True)
+        await self._stack.__aexit__(exc_type, exc_val, exc_tb)
+        return False
+
+    async def __call__(self) -> None:
+        """
+        止めるまで映像を受け付ける.
+        いずれかのセッションがエラーで止まったときは, 他のセッションも止める.
+        """
+        await self._stopped.wait()
+        if error := await self._stop_sessions():
+            raise error
+
+    @property
+    def port(self) -> int:
+        """待ち受けているポート."""
+        assert self._server, "not entered"
+        return next(iter(self._server.sockets)).getsockname()[1]
+
+    @property
+    def sessions(self) -> Mapping[str, ReaderPipeline]:
+        """セッション名ごとの処理. 準備した順に並ぶ."""
+        return {name: session.pipeline for name, session in self._sessions.items()}
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    @property
+    def errors(self) -> Queue[str]:
+        """利用者に示して終了すべきエラーのメッセージ."""
+        return self._errors
+
+    def stop(self) -> None:
+        """映像の受け付けを止める. 任意のスレッドから呼び出せる."""
+        if loop := self._loop:
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _start(self) -> None:
+        settings = self._settings
+        self._loop = asyncio.get_running_loop()
+        self._metrics = metrics = await self._stack.enter_async_context(
+            using_metrics(settings.metrics)
+        )
+        self._shared = await self._stack.enter_async_context(
+            SharedEngines.create(
+                settings,
+                startup_callback=self._startup_callback,
+                max_workers=self._max_workers,
+                recognition_threads=self._recognition_threads,
+            )
+        )
+        self._decoder = self._stack.enter_context(
+            ThreadPoolExecutor(
+                settings.server.decode_threads, thread_name_prefix="decode"
+            )
+        )
+        metrics.register_gauge("server_sessions", lambda: len(self._sessions))
+        metrics.register_gauge("queue_depth", lambda: self._decoding, queue="decode")
+        try:
+            self._server = await self._stack.enter_async_context(
+                serve(
+                    self._handle,
+                    self._host,
+                    self._port,
+                    max_size=settings.server.max_frame_megabytes * 1024**2,
+                    # ブラウザで開いたページからは接続させない.
+                    origins=[None],
+                )
+            )
+        except OSError as error:
+            logger.opt(exception=error).debug("Failed to serve recognition.")
+            raise SettingsError(
+                "映像の受け付けを開始できませんでした."
+                " アドレス (host) とポート番号 (port) が正しく,"
+                " 他のアプリと重複していないか確認してください."
+            )
+        logger.debug("Serving recognition on {}:{}", self._host, self.port)
+
+    async def _stop_sessions(self) -> Optional[BaseException]:
+        """すべてのセッションを止め, エラーで止まったものがあれば最初のエラーを返す."""
+        for session in self._sessions.values():
+            session.agent.stop()
+        tasks = [s.task for s in self._sessions.values() if s.task]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return next(
+            (r for r in results if isinstance(r, Exception)),
+            None,
+        )
+
+    async def _open(self, name: str) -> Optional[_Session]:
+        """
+        セッションを返す. 初めてのセッションであれば準備する.
+        セッション数が上限に達しているときは None を返す.
+
+        Raises:
+            ConfigurationError: 準備できないとき.
+        """
+        async with self._opening:
+            if session := self._sessions.get(name):
+                return session
+            if (
+                self._closing
+                or len(self._sessions) >= self._settings.server.max_sessions
+            ):
+                return None
+
+            dir_path = os.path.join(self._dir_path, name)
+            os.makedirs(dir_path, exist_ok=True)
+            frames = PushScreenFetcher()
+            pipeline = ReaderPipeline(
+                create_session_settings(self._settings, SessionSettings(name=name)),
+                _SilentNotifier(),
+                dir_path=dir_path,
+                screen_fetcher=frames,
+                errors=self._errors,
+                session=name,
+                shared=self._shared,
+                metrics=self._metrics,
+            )
+            agent = await self._stack.enter_async_context(pipeline)
+            session = _Session(name, pipeline, frames, self._settings.server.queue_size)
+            pipeline.set_publisher(session)
+            self._register_metrics(session)
+            session.task = task = asyncio.create_task(agent(), name=f"session-{name}")
+            task.add_done_callback(self._check_session)
+            self._sessions[name] = session
+            logger.debug("Session is started: {}", name)
+            return session
+
+    @staticmethod
+    def _register_metrics(session: _Session) -> None:
+        metrics = session.pipeline.metrics
+        metrics.register_counter("received_frames_total", lambda: session.received)
+        for reason in ("pending", "busy"):
+            metrics.register_counter(
+                "dropped_frames_total",
+                functools.partial(session.dropped.__getitem__, reason),
+                reason=reason,
+            )
+        metrics.register_counter(
+            "dropped_frames_total", lambda: session.frames.skipped, reason="stale"
+        )
+        metrics.register_counter(
+            "dropped_events_total", lambda: session.dropped_messages, reason="server"
+        )
+
+    def _check_session(self, task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and (error := task.exception()):
+            logger.opt(exception=error).error("Session is stopped: {}", task.get_name())
+            self._stopped.set()
+
+    async def _handle(self, connection: ServerConnection) -> None:
+        request = connection.request
+        if not (name := _session_name(request.path if request else "")):
+            await connection.close(_POLICY_VIOLATION, "invalid session")
+            return
+
+        try:
+            session = await self._open(name)
+        except SettingsError as error:
+            logger.warning("Failed to start the session {}: {}", name, error)
+            await connection.close(_INTERNAL_ERROR, "failed to start the session")
+            return
+        if session is None:
+            logger.warning("Too many sessions: {}", len(self._sessions))
+            await connection.close(_TRY_AGAIN_LATER, "too many sessions")
+            return
+        if session.connected:
+            await connection.close(_POLICY_VIOLATION, "session in use")
+            return
+
+        session.connected = True
+        logger.debug("Session {} is connected: {}", name, connection.remote_address)
+        sending = asyncio.create_task(self._send(session, connection))
+        try:
+            async for message in connection:
+                if isinstance(message, bytes):
+                    self._receive_frame(session, message)
+                else:
+                    self._receive_request(session, message)
+        except ConnectionClosed:
+            pass
+        finally:
+            sending.cancel()
+            session.connected = False
+            logger.debug("Session {} is disconnected.", name)
+
+    @staticmethod
+    async def _send(session: _Session, connection: ServerConnection) -> None:
+        with contextlib.suppress(ConnectionClosed):
+            while True:
+                await connection.send(await session.outbox.get())
+
+    def _receive_request(self, session: _Session, message: str) -> None:
+        try:
+            request = parse_request(message)
+        except ValueError:
+            session.put(encode_error("invalid request"))
+            return
+        try:
+            command = Command(request)
+        except ValueError:
+            session.put(encode_error(f"unknown request: {request}"))
+            return
+        session.agent.commands.send(command)
+
+    def _receive_frame(self, session: _Session, data: bytes) -> None:
+        session.received += 1
+        if session.decoding:
+            reason = "pending"
+        elif self._decoding >= self._settings.server.max_pending_frames:
+            reason = "busy"
+        else:
+            session.decoding = True
+            self._decoding += 1
+            task = asyncio.create_task(self._decode(session, data))
+            self._decodes.add(task)
+            task.add_done_callback(self._decodes.discard)
+            return
+
+        session.dropped[reason] += 1
+        session.put(json.dumps({"type": "dropped", "payload": {"reason": reason}}))
+
+    async def _decode(self, session: _Session, data: bytes) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            image = await loop.run_in_executor(self._decoder, _decode_frame, data)
+        except ValueError as error:
+            logger.debug("Invalid frame from {}: {}", session.name, error)
+            session.put(encode_error("invalid frame"))
+        else:
+            session.frames.push(image)
+        finally:
+            session.decoding = False
+            self._decoding -= 1
+
+
+def _decode_frame(data: bytes) -> MatLike:
+    return fit_to_screen(decode_frame(data))
+
+
+def _session_name(path: str) -> Optional[str]:
+    """接続先のパスからセッション名を取り出す. 使えない名前であれば None を返す."""
+    if not path.startswith(SESSION_PATH_PREFIX):
+        return None
+    try:
+        return SessionSettings(name=path.removeprefix(SESSION_PATH_PREFIX)).name
+    except ValidationError:
+        return None
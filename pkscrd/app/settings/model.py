@@ -1,10 +1,10 @@
 from typing import Optional, Literal, Annotated
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class ScreenSettings(BaseModel):
-    engine: Literal["obs", "capture-device"] = "obs"
+    engine: Literal["obs", "capture-device", "replay"] = "obs"
 
 
 class ObsSettings(BaseModel):
@@ -17,6 +17,12 @@ class CaptureDeviceSettings(BaseModel):
     name: str
 
 
+class ReplaySettings(BaseModel):
+    path: str
+    mode: Literal["realtime", "max-speed", "step"] = "realtime"
+    loops: bool = False
+
+
 class NotificationSettings(BaseModel):
     engine: Literal["bouyomichan", "voicevox"] = "bouyomichan"
     ally_hp_format: Literal["both", "numerator", "ratio"] = "both"
@@ -46,6 +52,8 @@ class GuiSettings(BaseModel):
 
 class OcrSettings(BaseModel):
     engine: Literal["winocr", "tesseract", "none"] = "winocr"
+    concurrency: Annotated[int, Field(gt=0, le=32)] = 2
+    """複数のセッションで共有するとき, 同時に行う読み取りの数."""
 
 
 class AudioSettings(BaseModel):
@@ -57,10 +65,89 @@ class ScreenshotSettings(BaseModel):
     buffer_size: Annotated[int, Field(gt=0, le=10000)] = 1
 
 
+class RecordingSettings(BaseModel):
+    enabled: bool = False
+    dir_path: Optional[str] = None
+    every: Annotated[int, Field(gt=0, le=100)] = 1
+    quality: Annotated[int, Field(gt=0, le=100)] = 80
+    max_megabytes: Annotated[int, Field(gt=0)] = 2048
+
+
+class MetricsSettings(BaseModel):
+    enabled: bool = False
+    port: Optional[Annotated[int, Field(gt=0, lt=65536)]] = None
+    """計測値を公開するポート. 未指定時は公開しない."""
+    summary_interval_in_seconds: Annotated[float, Field(ge=0)] = 60.0
+    """要約をログに出力する間隔. 0 のときは出力しない."""
+
+
+class StreamSettings(BaseModel):
+    port: Optional[Annotated[int, Field(gt=0, lt=65536)]] = None
+    """通知を WebSocket で配信するポート. 未指定時は配信しない."""
+    queue_size: Annotated[int, Field(gt=0, le=10000)] = 100
+    """接続ごとに保持する送信待ちの通知の数. 超えた分は古いものから捨てる."""
+    max_clients: Annotated[int, Field(gt=0, le=1000)] = 64
+    allowed_origins: list[str] = []
+    """
+    接続を受け付けるブラウザのページの Origin (http://localhost:8080 など).
+    ブラウザ以外からの接続は常に受け付ける.
+    """
+
+
+class ServerSettings(BaseModel):
+    host: str = "127.0.0.1"
+    """待ち受けるアドレス. 他の機器から映像を受け取るときは 0.0.0.0 などを指定する."""
+    port: Annotated[int, Field(gt=0, lt=65536)] = 9466
+    max_sessions: Annotated[int, Field(gt=0, le=64)] = 4
+    """同時に処理するセッションの数. 超えた分の接続は断る."""
+    decode_threads: Annotated[int, Field(gt=0, le=32)] = 2
+    max_pending_frames: Annotated[int, Field(gt=0, le=1000)] = 4
+    """デコードを待つ映像の数. 超えた分の映像は捨てる."""
+    max_frame_megabytes: Annotated[int, Field(gt=0, le=100)] = 8
+    queue_size: Annotated[int, Field(gt=0, le=10000)] = 100
+    """セッションごとに保持する送信待ちの通知の数. 超えた分は古いものから捨てる."""
+
+
+class FlightRecorderSettings(BaseModel):
+    enabled: bool = False
+    dir_path: Optional[str] = None
+    frames: Annotated[int, Field(gt=0, le=10000)] = 300
+    """記録を保持するフレーム数."""
+    stall_threshold_in_seconds: Optional[Annotated[float, Field(gt=0)]] = 2.0
+    """処理が停滞したとみなす 1 フレームの処理時間. 未指定時は停滞を契機に書き出さない."""
+
+
+class PollingSettings(BaseModel):
+    idle_after_in_seconds: Annotated[float, Field(ge=0)] = 60.0
+    """ロビーなど対戦外の場面が続いたとき, 休止状態に入るまでの時間. 0 のときは休止しない."""
+    idle_interval_in_seconds: Annotated[float, Field(gt=0, le=10)] = 1.0
+    """休止状態でのポーリング間隔."""
+    uses_child_process: bool = False
+    """映像の処理を画面と別のプロセスで行う. 異常終了したときは画面を閉じずに再起動する."""
+
+
+class SessionSettings(BaseModel):
+    """
+    同じプロセスで処理する映像の 1 つ. 指定しない項目は全体の設定に従う.
+    OCR エンジンやワーカープロセスは他のセッションと共有する.
+    """
+
+    name: Annotated[str, Field(pattern=r"^[0-9A-Za-z_-]{1,32}$")]
+    """計測値のラベルや書き出し先のディレクトリ名に用いる."""
+    screen: ScreenSettings = Field(default_factory=ScreenSettings)
+    obs: Optional[ObsSettings] = None
+    capture_device: Optional[CaptureDeviceSettings] = None
+    replay: Optional[ReplaySettings] = None
+    notification: Optional[NotificationSettings] = None
+    bouyomichan: Optional[BouyomichanSettings] = None
+    voicevox: Optional[VoicevoxSettings] = None
+
+
 class Settings(BaseModel):
     screen: ScreenSettings = Field(default_factory=ScreenSettings)
     obs: Optional[ObsSettings] = None
     capture_device: Optional[CaptureDeviceSettings] = None
+    replay: Optional[ReplaySettings] = None
     notification: NotificationSettings = Field(default_factory=NotificationSettings)
     bouyomichan: BouyomichanSettings = Field(default_factory=BouyomichanSettings)
     voicevox: VoicevoxSettings = Field(default_factory=VoicevoxSettings)
@@ -69,3 +156,24 @@ class Settings(BaseModel):
     ocr: OcrSettings = Field(default_factory=OcrSettings)
     audio: AudioSettings = Field(default_factory=AudioSettings)
     screenshot: ScreenshotSettings = Field(default_factory=ScreenshotSettings)
+    recording: RecordingSettings = Field(default_factory=RecordingSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    flight_recorder: FlightRecorderSettings = Field(
+        default_factory=FlightRecorderSettings
+    )
+    polling: PollingSettings = Field(default_factory=PollingSettings)
+    stream: StreamSettings = Field(default_factory=StreamSettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
+    sessions: list[SessionSettings] = Field(default_factory=list)
+    """複数の映像を処理するときのセッション. 未指定時は screen などの 1 つだけを処理する."""
+
+    @field_validator("sessions")
+    @classmethod
+    def _validate_unique_names(
+        cls,
+        sessions: list[SessionSettings],
+    ) -> list[SessionSettings]:
+        names = [s.name for s in sessions]
+        if len(set(names)) != len(names):
+            raise ValueError("セッションの名前が重複しています.")
+        return sessions
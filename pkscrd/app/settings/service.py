@@ -7,7 +7,7 @@ from loguru import logger
 from pydantic import ValidationError
 from pydantic_core import ErrorDetails
 
-from .model import Settings
+from .model import SessionSettings, Settings
 from .error import SettingsError, SettingsFileNotFoundError
 
 
@@ -75,6 +75,35 @@ def load_settings(path: Optional[str] = None) -> Settings:
         )
 
 
+def diff_settings(old: Settings, new: Settings) -> frozenset[str]:
+    """
+    設定の差分を求める.
+
+    Returns:
+        値が変化した項目 (セクション) 名の集合.
+    """
+    return frozenset(
+        name
+        for name in Settings.model_fields
+        if getattr(old, name) != getattr(new, name)
+    )
+
+
+def overlay_session(settings: Settings, session: SessionSettings) -> Settings:
+    """
+    セッションで指定した項目を全体の設定に重ねる.
+
+    Returns:
+        セッションを含まない, セッション単体の設定.
+    """
+    update = {
+        name: value
+        for name in session.model_fields_set - {"name"}
+        if (value := getattr(session, name)) is not None
+    }
+    return settings.model_copy(update=update | {"sessions": []})
+
+
 def create_validation_error_message(e: ValidationError) -> Iterator[str]:
     return (_fix_line(details) for details in e.errors())
 
@@ -0,0 +1,64 @@
+import json
+import os
+import zipfile
+from datetime import datetime
+from typing import Any, Callable
+
+import cv2
+
+from .model import DumpReason, FrameRecord
+
+FLIGHT_DUMP_PREFIX = "flight-"
+
+
+class FlightDumpFileWriter:
+    """
+    フライトレコーダの記録を ZIP ファイルに書き出す.
+
+    frames.jsonl に 1 行 1 フレームで記録を, ocr/ 以下に OCR の入力画像の縮小版 (PNG) を収める.
+    """
+
+    def __init__(self, dir_path: str, clock: Callable[[], datetime] = datetime.now):
+        self._dir_path = dir_path
+        self._clock = clock
+
+    def __call__(self, records: list[FrameRecord], reason: DumpReason) -> str:
+        """
+        Raises:
+            OSError: 書き出しが失敗したとき.
+        """
+        name = f"{FLIGHT_DUMP_PREFIX}{self._clock():%Y-%m-%d-%H-%M-%S-%f}-{reason}.zip"
+        path = os.path.join(self._dir_path, name)
+        with zipfile.ZipFile(path, "x") as file:
+            lines = [
+                json.dumps(_to_json(record, file), ensure_ascii=False)
+                for record in records
+            ]
+            file.writestr(
+                "frames.jsonl",
+                "".join(f"{line}\n" for line in lines),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+        return path
+
+
+def _to_json(record: FrameRecord, file: zipfile.ZipFile) -> dict[str, Any]:
+    ocr: list[dict[str, Any]] = []
+    for index, item in enumerate(record.ocr):
+        thumbnail = None
+        ret, data = cv2.imencode(".png", item.thumbnail)
+        if ret:
+            thumbnail = f"ocr/{record.sequence}-{index}.png"
+            file.writestr(thumbnail, data.tobytes())
+        ocr.append({"method": item.method, "text": item.text, "thumbnail": thumbnail})
+
+    return {
+        "sequence": record.sequence,
+        "started_at": record.started_at,
+        "duration": record.duration,
+        "stages": dict(record.stages),
+        "image_scene": record.image_scene,
+        "scene": record.scene,
+        "ocr": ocr,
+        "notifications": record.notifications,
+    }
@@ -0,0 +1,54 @@
+import enum
+from typing import NamedTuple, Optional
+
+from cv2.typing import MatLike
+
+
+class DumpReason(enum.StrEnum):
+    """記録を書き出す契機."""
+
+    FATAL = "fatal"
+    """致命的なエラーが発生した."""
+    STALL = "stall"
+    """1 フレームの処理が閾値を超えた."""
+    REQUESTED = "requested"
+    """利用者が要求した."""
+
+
+class OcrRecord(NamedTuple):
+    """OCR の入出力."""
+
+    method: str
+    thumbnail: MatLike
+    """入力画像の縮小版."""
+    text: Optional[str]
+    """読み取り結果. 読み取れなかったときは None."""
+
+
+class FrameRecord:
+    """
+    1 フレームの処理の記録.
+    毎フレーム作るため, 生成と追記の負荷が小さくなるよう単純な構造に留める.
+    """
+
+    __slots__ = (
+        "sequence",
+        "started_at",
+        "duration",
+        "stages",
+        "image_scene",
+        "scene",
+        "ocr",
+        "notifications",
+    )
+
+    def __init__(self, sequence: int, started_at: float):
+        self.sequence = sequence
+        self.started_at = started_at
+        self.duration: Optional[float] = None
+        """処理時間 (秒). 処理中は None."""
+        self.stages: list[tuple[str, float]] = []
+        self.image_scene: Optional[str] = None
+        self.scene: Optional[str] = None
+        self.ocr: list[OcrRecord] = []
+        self.notifications: list[str] = []
@@ -0,0 +1,218 @@
+import collections
+import threading
+import time
+import types
+from typing import Callable, Optional, Type
+
+import cv2
+from cv2.typing import MatLike
+from loguru import logger
+
+from pkscrd.core.metrics.model import STAGE_SECONDS, MetricsSnapshot
+from pkscrd.core.metrics.service import Metrics
+from .model import DumpReason, FrameRecord, OcrRecord
+
+FlightDumpWriter = Callable[[list[FrameRecord], DumpReason], str]
+"""記録を書き出し, 書き出し先を返す."""
+
+
+class FlightRecorder:
+    """
+    直近のフレームの処理内容をメモリ上に記録するフライトレコーダ.
+
+    処理段階ごとの処理時間, シーンの判定, OCR の入出力, 通知を直近 size フレーム分だけ保持し,
+    致命的なエラーや処理の停滞, 利用者の要求を契機にファイルへ書き出す.
+    記録はフレームを処理するスレッドからのみ受け付ける. 他のスレッドからの記録は無視する.
+    """
+
+    def __init__(
+        self,
+        writer: FlightDumpWriter,
+        *,
+        size: int = 300,
+        stall_threshold_in_seconds: Optional[float] = None,
+        cooldown_in_seconds: float = 60.0,
+        thumbnail_size: tuple[int, int] = (240, 60),
+        clock: Callable[[], float] = time.time,
+    ):
+        self._writer = writer
+        self._stall_threshold = stall_threshold_in_seconds
+        self._cooldown = cooldown_in_seconds
+        self._thumbnail_size = thumbnail_size
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._records: collections.deque[FrameRecord] = collections.deque(maxlen=size)
+        self._current: Optional[FrameRecord] = None
+        self._thread_id: Optional[int] = None
+        self._last_stall_dump: Optional[float] = None
+        self._stopped = threading.Event()
+        self._watchdog = threading.Thread(target=self._watch, daemon=True)
+
+    @property
+    def records(self) -> list[FrameRecord]:
+        """保持している記録. 古いものから並べる."""
+        with self._lock:
+            return list(self._records)
+
+    def begin(self, sequence: int) -> None:
+        """フレームの処理を始める. 呼び出したスレッドからの記録を受け付ける."""
+        record = FrameRecord(sequence, self._clock())
+        with self._lock:
+            self._records.append(record)
+        self._current = record
+        self._thread_id = threading.get_ident()
+
+    def end(self) -> None:
+        """フレームの処理を終える. 処理時間が閾値を超えていれば記録を書き出す."""
+        if (record := self._current) is None:
+            return
+        self._current = None
+        record.duration = self._clock() - record.started_at
+        if (
+            self._stall_threshold is not None
+            and record.duration > self._stall_threshold
+        ):
+            self.dump(DumpReason.STALL)
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        if record := self._frame():
+            record.stages.append((stage, seconds))
+
+    def record_scene(self, image_scene: str, scene: str) -> None:
+        if record := self._frame():
+            record.image_scene = image_scene
+            record.scene = scene
+
+    def record_ocr(self, method: str, image: MatLike, text: Optional[str]) -> None:
+        if record := self._frame():
+            record.ocr.append(OcrRecord(method, self._thumbnail(image), text))
+
+    def record_notification(self, description: str) -> None:
+        if record := self._frame():
+            record.notifications.append(description)
+
+    def dump(self, reason: DumpReason, *, wait: bool = False) -> None:
+        """
+        記録を書き出す. 停滞による書き出しは, 前回から一定時間が経つまで行わない.
+
+        Args:
+            wait: 書き出しの完了を待つか. 待たないときは別スレッドで書き出す.
+        """
+        now = self._clock()
+        with self._lock:
+            if reason is DumpReason.STALL:
+                last = self._last_stall_dump
+                if last is not None and now - last < self._cooldown:
+                    return
+                self._last_stall_dump = now
+            records = list(self._records)
+
+        if wait:
+            self._write(records, reason)
+            return
+        threading.Thread(
+            target=self._write, args=(records, reason), daemon=True
+        ).start()
+
+    def check_stall(self) -> None:
+        """処理中のフレームが閾値を超えて止まっていれば記録を書き出す."""
+        record = self._current
+        if (
+            record
+            and self._stall_threshold is not None
+            and self._clock() - record.started_at > self._stall_threshold
+        ):
+            self.dump(DumpReason.STALL)
+
+    def start(self) -> None:
+        """処理の停滞を監視するスレッドを起動する. 閾値がなければ何もしない."""
+        if self._stall_threshold is not None:
+            self._watchdog.start()
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._watchdog.is_alive():
+            self._watchdog.join()
+
+    def __enter__(self) -> "FlightRecorder":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> None:
+        self.close()
+
+    def _frame(self) -> Optional[FrameRecord]:
+        if threading.get_ident() != self._thread_id:
+            return None
+        return self._current
+
+    def _thumbnail(self, image: MatLike) -> MatLike:
+        height, width = image.shape[:2]
+        max_width, max_height = self._thumbnail_size
+        scale = min(max_width / max(width, 1), max_height / max(height, 1))
+        if scale >= 1.0:
+            return image.copy()
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def _write(self, records: list[FrameRecord], reason: DumpReason) -> None:
+        try:
+            path = self._writer(records, reason)
+        except Exception as error:
+            logger.opt(exception=error).warning("Failed to dump the flight recorder.")
+            return
+        logger.warning("Flight recorder is dumped ({}): {}", reason, path)
+
+    def _watch(self) -> None:
+        assert self._stall_threshold is not None
+        interval = self._stall_threshold / 2
+        while not self._stopped.wait(interval):
+            self.check_stall()
+
+
+class RecordingMetrics(Metrics):
+    """
+    処理段階の処理時間をフライトレコーダにも記録する. 計測は実体に委ねる.
+    計測が無効でも処理段階の処理時間は測る.
+    """
+
+    def __init__(self, metrics: Metrics, recorder: FlightRecorder):
+        self._metrics = metrics
+        self._recorder = recorder
+
+    @property
+    def enabled(self) -> bool:
+        return self._metrics.enabled
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self._metrics.observe(name, value, **labels)
+        if name == STAGE_SECONDS:
+            self._recorder.record_stage(labels.get("stage", ""), value)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        self._metrics.count(name, value, **labels)
+
+    def register_gauge(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        self._metrics.register_gauge(name, func, **labels)
+
+    def register_counter(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        self._metrics.register_counter(name, func, **labels)
+
+    def snapshot(self) -> MetricsSnapshot:
+        return self._metrics.snapshot()
@@ -18,9 +18,19 @@ class LogReader:
     def __init__(self, reader: "OcrLogReader"):
         self._reader = reader
 
-    async def read(self, scene: ImageScene, image: cv2.typing.MatLike) -> Optional[Log]:
-        """ログメッセージを読み取る."""
-        if recognize_general_log_box(image):
+    async def read(
+        self,
+        scene: ImageScene,
+        image: cv2.typing.MatLike,
+        general_log_box: Optional[bool] = None,
+    ) -> Optional[Log]:
+        """
+        ログメッセージを読み取る.
+        汎用ログ表示欄の有無が与えられたときは, 画像から認識し直さない.
+        """
+        if general_log_box is None:
+            general_log_box = recognize_general_log_box(image)
+        if general_log_box:
             if general_log := await self._reader.read(image, LogType.GENERAL):
                 return Log(LogType.GENERAL, ["".join(line) for line in general_log])
             return None
@@ -0,0 +1,111 @@
+import itertools
+from typing import Iterable, Iterator, TypeVar
+
+from .model import STAGE_SECONDS, Labels, MetricsSnapshot, Stage
+from .trace import LATENCY_QUANTILE_SECONDS, QUANTILES, Hop
+
+PREFIX = "pkscrd_"
+
+_V = TypeVar("_V")
+
+
+def to_prometheus_text(snapshot: MetricsSnapshot) -> str:
+    """Prometheus のテキスト形式 (0.0.4) に変換する."""
+    lines: list[str] = []
+    for name, items in _group(snapshot.histograms.items()):
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for labels, histogram in items:
+            cumulative = histogram.cumulative_counts
+            for bound, count in zip(histogram.buckets, cumulative):
+                le = (*labels, ("le", _format_value(bound)))
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(le)} {count}")
+            le = (*labels, ("le", "+Inf"))
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(le)} {histogram.count}")
+            lines.append(
+                f"{PREFIX}{name}_sum{_format_labels(labels)}"
+                f" {_format_value(histogram.sum)}"
+            )
+            lines.append(
+                f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}"
+            )
+    for type_, values in (("counter", snapshot.counters), ("gauge", snapshot.gauges)):
+        for name, value_items in _group(values.items()):
+            lines.append(f"# TYPE {PREFIX}{name} {type_}")
+            for labels, value in value_items:
+                lines.append(
+                    f"{PREFIX}{name}{_format_labels(labels)} {_format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+def summarize(snapshot: MetricsSnapshot) -> str:
+    """ログに出力する要約を作る. 処理段階とホップは処理順に並べる."""
+    lines = [f"{'stage':<14}{'count':>8}{'mean ms':>10}{'max ms':>10}"]
+    for stage in Stage:
+        if (histogram := snapshot.stage(stage)) and histogram.count:
+            lines.append(
+                f"{stage.value:<14}{histogram.count:>8}"
+                f"{histogram.mean * 1e3:>10.2f}{histogram.max * 1e3:>10.2f}"
+            )
+    lines.extend(_summarize_latencies(snapshot))
+    for (name, labels), value in sorted(
+        itertools.chain(snapshot.counters.items(), snapshot.gauges.items())
+    ):
+        if name == LATENCY_QUANTILE_SECONDS:
+            continue
+        lines.append(f"{name}{_format_labels(labels)}: {_format_value(value)}")
+    return "\n".join(lines)
+
+
+def _summarize_latencies(snapshot: MetricsSnapshot) -> list[str]:
+    table: dict[tuple[str, str], dict[str, float]] = {}
+    for (name, labels), value in snapshot.gauges.items():
+        if name == LATENCY_QUANTILE_SECONDS:
+            label = dict(labels)
+            row = table.setdefault((label["kind"], label["hop"]), {})
+            row[label["quantile"]] = value
+    if not table:
+        return []
+
+    hops = [hop.value for hop in Hop]
+    header = "".join(f"{f'p{q * 100:g} ms':>10}" for q in QUANTILES)
+    lines = [f"{'notification':<24}{'hop':<12}{header}"]
+    for kind, hop in sorted(table, key=lambda key: (key[0], hops.index(key[1]))):
+        row = table[(kind, hop)]
+        values = "".join(f"{row.get(str(q), 0.0) * 1e3:>10.2f}" for q in QUANTILES)
+        lines.append(f"{kind:<24}{hop:<12}{values}")
+    return lines
+
+
+def _group(
+    items: Iterable[tuple[tuple[str, Labels], _V]],
+) -> Iterator[tuple[str, list[tuple[Labels, _V]]]]:
+    ordered = sorted(items, key=lambda item: item[0])
+    for name, group in itertools.groupby(ordered, key=lambda item: item[0][0]):
+        # 処理段階のヒストグラムはラベルを処理順に並べると読みやすい.
+        entries = [(key[1], value) for key, value in group]
+        if name == STAGE_SECONDS:
+            entries.sort(key=lambda entry: _stage_order(entry[0]))
+        yield name, entries
+
+
+def _stage_order(labels: Labels) -> int:
+    stage = dict(labels).get("stage", "")
+    try:
+        return list(Stage).index(Stage(stage))
+    except ValueError:
+        return len(Stage)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
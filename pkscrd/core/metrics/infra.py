@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+from typing import AsyncIterator, Callable, Mapping, Optional
+
+from loguru import logger
+
+from .exposition import to_prometheus_text
+from .service import Metrics
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Control = Callable[[], str]
+"""制御用エンドポイントの処理. 応答の本文を返す. 待たされうるためスレッドで呼び出す."""
+
+
+class MetricsHttpServer:
+    """
+    計測値を Prometheus のテキスト形式で公開する HTTP サーバ.
+    外部へ公開しないよう, ループバックアドレスでのみ待ち受ける.
+    制御用のエンドポイントも POST で受け付ける.
+    ブラウザで開いたページから操作されないよう, Origin ヘッダ付きの POST は拒否する.
+    """
+
+    def __init__(self, metrics: Metrics, controls: Optional[Mapping[str, Control]]):
+        self._metrics = metrics
+        self._controls = controls or {}
+        self._port = 0
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            has_origin = False
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name = line.split(b":", 1)[0].strip().lower()
+                has_origin = has_origin or name == b"origin"
+            method, target, *_ = request_line.decode("latin-1").split(" ")
+            path = target.split("?")[0]
+            if method == "GET" and path == "/metrics":
+                body = to_prometheus_text(self._metrics.snapshot()).encode()
+                status = "200 OK"
+            elif method == "POST" and has_origin and path in self._controls:
+                # ブラウザは他のサイトからの POST にも Origin を付けて送る.
+                body, status = b"Forbidden\n", "403 Forbidden"
+            elif method == "POST" and (control := self._controls.get(path)):
+                body = f"{await asyncio.to_thread(control)}\n".encode()
+                status = "200 OK"
+            else:
+                body, status = b"Not Found\n", "404 Not Found"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {_CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError) as error:
+            logger.opt(exception=error).debug("Failed to serve metrics.")
+        finally:
+            writer.close()
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def create(
+        metrics: Metrics,
+        port: int,
+        host: str = "127.0.0.1",
+        *,
+        controls: Optional[Mapping[str, Control]] = None,
+    ) -> AsyncIterator["MetricsHttpServer"]:
+        """
+        Args:
+            controls: パスごとの制御用エンドポイントの処理.
+        Raises:
+            OSError: 待ち受けを開始できないとき.
+        """
+        server = MetricsHttpServer(metrics, controls)
+        async with await asyncio.start_server(server._handle, host, port) as inner:
+            server._port = inner.sockets[0].getsockname()[1]
+            logger.debug("Serving metrics on {}:{}", host, server._port)
+            yield server
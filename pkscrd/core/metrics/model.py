@@ -0,0 +1,116 @@
+import bisect
+import dataclasses
+import enum
+
+Labels = tuple[tuple[str, str], ...]
+"""ラベル名と値の組. 名前順に並べる."""
+
+
+class Stage(enum.StrEnum):
+    """処理時間を計測する処理段階."""
+
+    FRAME = "frame"
+    """映像 1 枚の処理全体."""
+    FETCH = "fetch"
+    DECODE = "decode"
+    TERASTAL = "terastal"
+    RECOGNITION = "recognition"
+    """画像のシーンの認識. 相手 HP などは, それぞれの検出処理の段階で認識する."""
+    SCENE = "scene"
+    TEAMS = "teams"
+    SELECTION = "selection"
+    MOVE = "move"
+    CURSOR = "cursor"
+    OPPONENT_HP = "opponent_hp"
+    ALLY_HP = "ally_hp"
+    LOG = "log"
+    NOTIFICATION = "notification"
+    TTS = "tts"
+
+
+STAGE_SECONDS = "stage_seconds"
+"""処理段階ごとの処理時間のヒストグラム. ラベル stage に段階を持つ."""
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+"""処理時間のヒストグラムの区間の上端 (秒)."""
+
+
+@dataclasses.dataclass(frozen=True)
+class HistogramSnapshot:
+    """
+    ヒストグラムのある時点の値.
+    counts は各区間に入った観測数で, 最後の要素は最大の上端を超えたものを数える.
+    """
+
+    buckets: tuple[float, ...]
+    counts: tuple[int, ...]
+    count: int
+    sum: float
+    max: float
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def cumulative_counts(self) -> list[int]:
+        """各区間の上端以下の観測数. Prometheus の le に対応する."""
+        result: list[int] = []
+        total = 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Histogram:
+    """固定の区間で観測値を数える. スレッド安全ではないため, 呼び出し側で排他する."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._count += 1
+        self._sum += value
+        if value > self._max:
+            self._max = value
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            buckets=self._buckets,
+            counts=tuple(self._counts),
+            count=self._count,
+            sum=self._sum,
+            max=self._max,
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class MetricsSnapshot:
+    """計測値のある時点の値. キーは計測名とラベルの組."""
+
+    histograms: dict[tuple[str, Labels], HistogramSnapshot]
+    counters: dict[tuple[str, Labels], float]
+    gauges: dict[tuple[str, Labels], float]
+
+    def stage(self, stage: Stage) -> HistogramSnapshot | None:
+        return self.histograms.get((STAGE_SECONDS, (("stage", stage.value),)))
@@ -0,0 +1,247 @@
+import contextlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, ContextManager, Iterator, TypeVar
+
+from loguru import logger
+
+from .model import (
+    DEFAULT_BUCKETS,
+    STAGE_SECONDS,
+    Histogram,
+    Labels,
+    MetricsSnapshot,
+    Stage,
+)
+
+_T = TypeVar("_T")
+
+
+class Metrics(ABC):
+    """
+    処理時間や回数を計測する.
+    計測しないときは NullMetrics を用い, 計測箇所の負荷をほぼなくす.
+    """
+
+    @property
+    @abstractmethod
+    def enabled(self) -> bool: ...
+
+    @abstractmethod
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """ヒストグラムに値を記録する."""
+
+    @abstractmethod
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        """カウンタを増やす."""
+
+    @abstractmethod
+    def register_gauge(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        """
+        取得時に値を求めるゲージを登録する. 同じ名前とラベルの登録は上書きする.
+        キューの長さなど, 変化のたびに記録するまでもない値に用いる.
+        """
+
+    @abstractmethod
+    def register_counter(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        """
+        取得時に値を求めるカウンタを登録する. 同じ名前とラベルの登録は上書きする.
+        キャッシュの統計など, 他で数えている値に用いる.
+        """
+
+    @abstractmethod
+    def snapshot(self) -> MetricsSnapshot: ...
+
+    def timer(self, name: str, **labels: str) -> ContextManager[None]:
+        """ブロックの処理時間をヒストグラムに記録する."""
+        return self._time(name, labels)
+
+    def stage(self, stage: Stage) -> ContextManager[None]:
+        """処理段階の処理時間を記録する."""
+        return self._time(STAGE_SECONDS, {"stage": stage.value})
+
+    async def measure(self, stage: Stage, awaitable: Awaitable[_T]) -> _T:
+        """
+        非同期処理の処理時間を記録する.
+        並行して実行する処理の時間は, 他の処理を待つ時間を含む.
+        """
+        with self.stage(stage):
+            return await awaitable
+
+    @contextlib.contextmanager
+    def _time(self, name: str, labels: dict[str, str]) -> Iterator[None]:
+        began_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - began_at, **labels)
+
+
+class NullMetrics(Metrics):
+    """何も計測しない."""
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        pass
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        pass
+
+    def register_gauge(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        pass
+
+    def register_counter(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        pass
+
+    def snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot({}, {}, {})
+
+    def timer(self, name: str, **labels: str) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+    def stage(self, stage: Stage) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+    async def measure(self, stage: Stage, awaitable: Awaitable[_T]) -> _T:
+        return await awaitable
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class LabeledMetrics(Metrics):
+    """
+    すべての計測値にラベルを加える. 計測は実体に委ねる.
+    複数のセッションで計測機能を共有するときに, セッションごとの値を区別する.
+    """
+
+    def __init__(self, metrics: Metrics, **labels: str):
+        self._metrics = metrics
+        self._labels = labels
+
+    @property
+    def enabled(self) -> bool:
+        return self._metrics.enabled
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self._metrics.observe(name, value, **labels, **self._labels)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        self._metrics.count(name, value, **labels, **self._labels)
+
+    def register_gauge(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        self._metrics.register_gauge(name, func, **labels, **self._labels)
+
+    def register_counter(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        self._metrics.register_counter(name, func, **labels, **self._labels)
+
+    def snapshot(self) -> MetricsSnapshot:
+        return self._metrics.snapshot()
+
+
+class MetricsRegistry(Metrics):
+    """
+    計測値をメモリ上に集計する.
+    読み上げなど別スレッドからも記録されるため, 記録はロックで排他する.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._gauge_funcs: dict[tuple[str, Labels], Callable[[], float]] = {}
+        self._counter_funcs: dict[tuple[str, Labels], Callable[[], float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, _to_labels(labels))
+        with self._lock:
+            if (histogram := self._histograms.get(key)) is None:
+                histogram = self._histograms[key] = Histogram(self._buckets)
+            histogram.observe(value)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, _to_labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_gauge(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        with self._lock:
+            self._gauge_funcs[(name, _to_labels(labels))] = func
+
+    def register_counter(
+        self,
+        name: str,
+        func: Callable[[], float],
+        **labels: str,
+    ) -> None:
+        with self._lock:
+            self._counter_funcs[(name, _to_labels(labels))] = func
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            histograms = {k: h.snapshot() for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+            gauge_funcs = list(self._gauge_funcs.items())
+            counter_funcs = list(self._counter_funcs.items())
+
+        # 登録された関数は他のロックを取りうるため, ロックの外で呼び出す.
+        counters.update(_evaluate(counter_funcs))
+        return MetricsSnapshot(histograms, counters, dict(_evaluate(gauge_funcs)))
+
+
+def _to_labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _evaluate(
+    funcs: list[tuple[tuple[str, Labels], Callable[[], float]]],
+) -> Iterator[tuple[tuple[str, Labels], float]]:
+    for key, func in funcs:
+        try:
+            yield key, float(func())
+        except Exception as error:
+            logger.opt(exception=error).debug("Failed to evaluate metric: {}", key)
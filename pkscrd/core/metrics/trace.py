@@ -0,0 +1,141 @@
+"""
+映像の取得から読み上げ開始までの遅延の追跡.
+
+映像の取得時刻を起点として, 通知が各段階 (ホップ) を通過した時刻を記録する.
+読み上げが始まったら追跡を終え, ホップごとの起点からの遅延を通知の種類別に集計する.
+"""
+
+import collections
+import enum
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+from .service import Metrics
+
+
+class Hop(enum.StrEnum):
+    """追跡するホップ. 通過する順に並べる."""
+
+    RECOGNIZED = "recognized"
+    """映像の処理から通知が得られた."""
+    MESSAGED = "messaged"
+    """通知を読み上げ文に変換した."""
+    DEQUEUED = "dequeued"
+    """読み上げ待ちのキューから取り出した."""
+    SYNTHESIZED = "synthesized"
+    """音声を合成した."""
+    PLAYING = "playing"
+    """音声の再生を始めた."""
+    REQUESTED = "requested"
+    """外部アプリに読み上げを依頼した."""
+
+
+LATENCY_SECONDS = "notification_latency_seconds"
+LATENCY_QUANTILE_SECONDS = "notification_latency_quantile_seconds"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Trace:
+    """1 つの通知の追跡. 別スレッドへ引き渡されうるが, 同時には 1 スレッドだけが触る."""
+
+    def __init__(
+        self,
+        sequence: int,
+        captured_at: float,
+        kind: str,
+        on_finish: Callable[["Trace"], None],
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.sequence = sequence
+        self.captured_at = captured_at
+        self.kind = kind
+        self.spans: list[tuple[Hop, float]] = []
+        self._on_finish = on_finish
+        self._clock = clock
+        self._finished = False
+
+    def mark(self, hop: Hop) -> None:
+        """ホップを通過した時刻を記録する."""
+        self.spans.append((hop, self._clock()))
+
+    def finish(self, hop: Hop) -> None:
+        """最後のホップを記録し, 追跡を終える. 2 回目以降は何もしない."""
+        if self._finished:
+            return
+        self._finished = True
+        self.mark(hop)
+        self._on_finish(self)
+
+    @property
+    def latencies(self) -> list[tuple[Hop, float]]:
+        """ホップごとの起点からの遅延 (秒)."""
+        return [(hop, at - self.captured_at) for hop, at in self.spans]
+
+
+class Tracer:
+    """
+    追跡を始め, 終えた追跡を集計する.
+    遅延はヒストグラムに記録するほか, 直近 window 件からパーセンタイルを求めて公開する.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        *,
+        window: int = 1000,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._metrics = metrics
+        self._window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._samples: dict[tuple[str, Hop], collections.deque[float]] = {}
+
+    def start(self, sequence: int, captured_at: float, kind: str) -> Trace:
+        """通知の追跡を始める. captured_at は clock と同じ時計による映像の取得時刻."""
+        return Trace(sequence, captured_at, kind, self._record, self._clock)
+
+    def percentiles(self, kind: str, hop: Hop) -> Optional[dict[float, float]]:
+        """直近の遅延のパーセンタイル. 記録がなければ None を返す."""
+        with self._lock:
+            samples = self._samples.get((kind, hop))
+            values = sorted(samples) if samples else None
+        if not values:
+            return None
+        return {q: _nearest_rank(values, q) for q in QUANTILES}
+
+    def _record(self, trace: Trace) -> None:
+        for hop, latency in trace.latencies:
+            self._metrics.observe(
+                LATENCY_SECONDS, latency, kind=trace.kind, hop=hop.value
+            )
+            with self._lock:
+                if (samples := self._samples.get((trace.kind, hop))) is None:
+                    samples = collections.deque(maxlen=self._window)
+                    self._samples[(trace.kind, hop)] = samples
+                    registers = True
+                else:
+                    registers = False
+                samples.append(latency)
+            if registers:
+                self._register_quantiles(trace.kind, hop)
+
+    def _register_quantiles(self, kind: str, hop: Hop) -> None:
+        def quantile(q: float) -> Callable[[], float]:
+            return lambda: (self.percentiles(kind, hop) or {}).get(q, 0.0)
+
+        for q in QUANTILES:
+            self._metrics.register_gauge(
+                LATENCY_QUANTILE_SECONDS,
+                quantile(q),
+                kind=kind,
+                hop=hop.value,
+                quantile=str(q),
+            )
+
+
+def _nearest_rank(sorted_values: list[float], q: float) -> float:
+    index = math.ceil(q * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, index))]
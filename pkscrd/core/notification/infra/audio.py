@@ -1,10 +1,12 @@
 import contextlib
 import dataclasses
 import enum
-from typing import Iterator, Optional
+from typing import TYPE_CHECKING, Iterator, Optional
 from wave import Wave_read
 
-import sounddevice
+# PortAudio の読み込みを伴うため, sounddevice は使用時に読み込む.
+if TYPE_CHECKING:
+    import sounddevice
 
 
 @dataclasses.dataclass(frozen=True)
@@ -30,6 +32,8 @@ class HostApi:
 
 
 def list_outputs() -> Iterator[HostApi]:
+    import sounddevice
+
     return (
         HostApi(
             name=hostapi["name"],
@@ -128,7 +132,7 @@ class DataType(enum.StrEnum):
 
 class AudioClient:
 
-    def __init__(self, stream: sounddevice.RawOutputStream):
+    def __init__(self, stream: "sounddevice.RawOutputStream"):
         self._stream = stream
 
     def play(self, data: bytes) -> None:
@@ -137,6 +141,8 @@ class AudioClient:
     @staticmethod
     @contextlib.contextmanager
     def for_wave(wav: Wave_read, device_index: int) -> Iterator["AudioClient"]:
+        import sounddevice
+
         with sounddevice.RawOutputStream(
             channels=wav.getnchannels(),
             samplerate=wav.getframerate(),
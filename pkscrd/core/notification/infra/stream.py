@@ -0,0 +1,208 @@
+import asyncio
+import contextlib
+import json
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+from loguru import logger
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+from websockets.typing import Origin
+
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.notification.model import Notification
+from pkscrd.core.notification.service import NotificationPublisher
+from pkscrd.core.notification.service.serializer import notification_to_dict
+
+RequestHandler = Callable[[str], bool]
+"""要求の名前を受け取り, 受け付けたかを返す. イベントループのスレッドから呼び出す."""
+
+# 接続数が上限に達したときの切断理由 (RFC 6455 の Try Again Later).
+_TRY_AGAIN_LATER = 1013
+
+
+def encode_notification(notification: Notification, captured_at: float) -> str:
+    """通知を {"type": 通知の種類, "payload": 各フィールド, "timestamp": 映像の取得時刻} にする."""
+    payload = notification_to_dict(notification)
+    return json.dumps(
+        {"type": payload.pop("type"), "payload": payload, "timestamp": captured_at},
+        ensure_ascii=False,
+    )
+
+
+def encode_error(message: str) -> str:
+    """要求を受け付けられない理由を {"type": "error", "payload": {"message": 理由}} にする."""
+    return json.dumps(
+        {"type": "error", "payload": {"message": message}}, ensure_ascii=False
+    )
+
+
+def parse_request(message: str | bytes) -> str:
+    """
+    {"request": 名前} から要求の名前を取り出す.
+
+    Raises:
+        ValueError: 要求として解釈できないとき.
+    """
+    try:
+        request = json.loads(message)["request"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("invalid request")
+    if not isinstance(request, str):
+        raise ValueError("invalid request")
+    return request
+
+
+class _Client:
+
+    def __init__(self, connection: ServerConnection, queue_size: int):
+        self.connection = connection
+        self.queue: asyncio.Queue[str] = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def put(self, message: str) -> None:
+        """送信を待つメッセージを積む. 積みきれないときは最も古いものを捨てる."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class NotificationStreamServer(NotificationPublisher):
+    """
+    通知を JSON で配信し, 読み上げアプリのキー操作と同じ要求を受け付ける WebSocket サーバ.
+    外部へ公開しないよう, ループバックアドレスでのみ待ち受ける.
+
+    通知は {"type": 通知の種類, "payload": 各フィールド, "timestamp": 映像の取得時刻}
+    として配信する. 要求は {"request": 名前} として受け付け, 受け付けられないときは
+    {"type": "error", "payload": {"message": 理由}} を返す.
+
+    接続ごとに送信待ちのメッセージを queue_size 件まで保持し, 超えた分は古いものから捨てる.
+    そのため送信の遅い接続があっても, 映像の処理は待たされない.
+
+    ブラウザで開いたページからは, Origin を許可したものだけ接続を受け付ける.
+    """
+
+    def __init__(
+        self,
+        handle_request: RequestHandler,
+        *,
+        queue_size: int = 100,
+        max_clients: int = 64,
+        metrics: Optional[Metrics] = None,
+    ):
+        self._handle_request = handle_request
+        self._queue_size = queue_size
+        self._max_clients = max_clients
+        self._metrics = metrics or NullMetrics()
+        self._clients: set[_Client] = set()
+        self._dropped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._port = 0
+
+        self._metrics.register_gauge("stream_clients", lambda: len(self._clients))
+        self._metrics.register_counter(
+            "dropped_events_total", lambda: self.dropped, reason="stream"
+        )
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    @property
+    def dropped(self) -> int:
+        """送信が追いつかずに捨てたメッセージの数. 切断済みの接続の分も含む."""
+        return self._dropped + sum(c.dropped for c in self._clients)
+
+    def publish(self, notification: Notification, captured_at: float) -> None:
+        message = encode_notification(notification, captured_at)
+        if not (loop := self._loop):
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, message)
+        except RuntimeError:
+            pass  # ループが閉じた後は何もしない.
+
+    def _broadcast(self, message: str) -> None:
+        for client in self._clients:
+            client.put(message)
+
+    async def _handle(self, connection: ServerConnection) -> None:
+        if len(self._clients) >= self._max_clients:
+            logger.warning("Too many stream clients: {}", len(self._clients))
+            await connection.close(_TRY_AGAIN_LATER, "too many clients")
+            return
+
+        client = _Client(connection, self._queue_size)
+        self._clients.add(client)
+        logger.debug("A stream client is connected: {}", connection.remote_address)
+        sending = asyncio.create_task(self._send(client))
+        try:
+            async for message in connection:
+                if error := self._receive(message):
+                    client.put(encode_error(error))
+        except ConnectionClosed:
+            pass
+        finally:
+            sending.cancel()
+            self._clients.discard(client)
+            self._dropped += client.dropped
+            logger.debug("A stream client is disconnected.")
+
+    @staticmethod
+    async def _send(client: _Client) -> None:
+        with contextlib.suppress(ConnectionClosed):
+            while True:
+                await client.connection.send(await client.queue.get())
+
+    def _receive(self, message: str | bytes) -> Optional[str]:
+        """要求を処理する. 受け付けられないときは理由を返す."""
+        try:
+            request = parse_request(message)
+        except ValueError:
+            return "invalid request"
+        if not self._handle_request(request):
+            return f"unknown request: {request}"
+        return None
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def create(
+        handle_request: RequestHandler,
+        port: int,
+        host: str = "127.0.0.1",
+        *,
+        queue_size: int = 100,
+        max_clients: int = 64,
+        metrics: Optional[Metrics] = None,
+        origins: Sequence[str] = (),
+    ) -> AsyncIterator["NotificationStreamServer"]:
+        """
+        Args:
+            origins: 接続を受け付けるブラウザのページの Origin.
+                Origin ヘッダのない接続 (ブラウザ以外) は常に受け付ける.
+        Raises:
+            OSError: 待ち受けを開始できないとき.
+        """
+        server = NotificationStreamServer(
+            handle_request,
+            queue_size=queue_size,
+            max_clients=max_clients,
+            metrics=metrics,
+        )
+        async with serve(
+            server._handle,
+            host,
+            port,
+            origins=[None, *(Origin(origin) for origin in origins)],
+        ) as inner:
+            server._loop = asyncio.get_running_loop()
+            server._port = next(iter(inner.sockets)).getsockname()[1]
+            logger.debug("Serving notifications on {}:{}", host, server._port)
+            try:
+                yield server
+            finally:
+                server._loop = None
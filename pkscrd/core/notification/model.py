@@ -126,6 +126,11 @@ class TeraTypeNotification:
     possible: list[TeraType] = dataclasses.field(default_factory=list)
 
 
+@dataclasses.dataclass(frozen=True)
+class OverloadNotification:
+    """処理遅延通知. 処理が追いつかず, 一部の読み取りを間引き続けていることを伝える."""
+
+
 CursorNotification: TypeAlias = (
     PokemonCursorNotification
     | SelectionCompleteButtonNotification
@@ -144,4 +149,5 @@ Notification: TypeAlias = (
     | ScreenshotNotification
     | CursorNotification
     | TeraTypeNotification
+    | OverloadNotification
 )
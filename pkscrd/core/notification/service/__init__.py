@@ -4,4 +4,7 @@ from .messenger import (
     Messenger as Messenger,
 )
 from .notifier import Notifier as Notifier
+from .phonemizer import Phonemizer as Phonemizer
+from .publisher import NotificationPublisher as NotificationPublisher
+from .serializer import notification_to_dict as notification_to_dict
 from .talker import Talker as Talker
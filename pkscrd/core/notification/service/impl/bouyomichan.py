@@ -1,3 +1,8 @@
+from typing import Optional
+
+from returns.pipeline import is_successful
+
+from pkscrd.core.metrics.trace import Hop, Trace
 from pkscrd.core.notification.infra.bouyomichan import BouyomichanClient
 from pkscrd.core.notification.service.talker import Talker
 from pkscrd.core.tolerance.service import Tolerance
@@ -17,5 +22,10 @@ class BouyomichanTalker(Talker):
         self._monitor = tolerance
         self._speed = speed
 
-    def __call__(self, text: str) -> None:
-        self._monitor.handle(lambda: self._client.talk(text, speed=self._speed))
+    def __call__(self, text: str, trace: Optional[Trace] = None) -> None:
+        result = self._monitor.handle(
+            lambda: self._client.talk(text, speed=self._speed)
+        )
+        # 再生は棒読みちゃんに任せるため, 依頼できた時点で追跡を終える.
+        if trace and is_successful(result):
+            trace.finish(Hop.REQUESTED)
@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import Metrics
+from pkscrd.core.metrics.trace import Trace
+from pkscrd.core.notification.service.talker import Talker
+
+
+class MeasuredTalker(Talker):
+    """読み上げの処理時間を計測する. 読み上げは実体に委ねる."""
+
+    def __init__(self, talker: Talker, metrics: Metrics):
+        self._talker = talker
+        self._metrics = metrics
+
+    def __call__(self, text: str, trace: Optional[Trace] = None) -> None:
+        with self._metrics.stage(Stage.TTS):
+            self._talker(text, trace)
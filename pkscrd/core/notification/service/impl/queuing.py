@@ -1,7 +1,10 @@
 from queue import Full, Queue
+from typing import Callable, Optional
 
 from loguru import logger
 
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.metrics.trace import Hop, Trace
 from pkscrd.core.notification.service.talker import Talker
 
 
@@ -12,14 +15,32 @@ class QueuingTalker(Talker):
     代わりにエラーハンドリングは甘くなるので, 実体である Talker で十分に行うこと.
     """
 
-    def __init__(self, queue: Queue[str]):
+    def __init__(
+        self,
+        queue: Queue[tuple[str, Optional[Trace]]],
+        metrics: Optional[Metrics] = None,
+    ):
         self._queue = queue
+        self._metrics = metrics or NullMetrics()
 
-    def __call__(self, text: str) -> None:
+    def __call__(self, text: str, trace: Optional[Trace] = None) -> None:
         try:
-            self._queue.put_nowait(text)
+            self._queue.put_nowait((text, trace))
         except Full:
+            self._metrics.count("tts_dropped_total", queue="text")
             logger.warning(
                 "発話待ちが多すぎるため, 発話がスキップされました. 発話内容: {}",
                 text,
             )
+
+
+def dequeue_text(talker: Talker) -> Callable[[tuple[str, Optional[Trace]]], None]:
+    """キューから取り出した発話内容を, 実体である Talker に渡す関数を作る."""
+
+    def consume(item: tuple[str, Optional[Trace]]) -> None:
+        text, trace = item
+        if trace:
+            trace.mark(Hop.DEQUEUED)
+        talker(text, trace)
+
+    return consume
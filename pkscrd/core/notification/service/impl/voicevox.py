@@ -1,12 +1,18 @@
 from queue import Full, Queue
+from typing import Any, Callable, Optional
 
 from loguru import logger
 from returns.pipeline import is_successful
 
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.metrics.trace import Hop, Trace
 from pkscrd.core.notification.infra.voicevox import VoiceVoxClient
 from pkscrd.core.notification.service.talker import Talker
 from pkscrd.core.tolerance.service import Tolerance
 
+AudioItem = tuple[bytes, Optional[Trace]]
+"""再生待ちの音声と, その追跡."""
+
 
 class VoicevoxTalker(Talker):
     """
@@ -19,7 +25,7 @@ class VoicevoxTalker(Talker):
     def __init__(
         self,
         client: VoiceVoxClient,
-        queue_: Queue[bytes],
+        queue_: Queue[AudioItem],
         tolerance: Tolerance,
         *,
         speaker: int = 0,
@@ -27,6 +33,7 @@ class VoicevoxTalker(Talker):
         speed_scale: float = 1.7,
         sampling_rate: int = 16000,
         uses_stereo: bool = True,
+        metrics: Optional[Metrics] = None,
     ):
         self._client = client
         self._queue = queue_
@@ -36,8 +43,9 @@ class VoicevoxTalker(Talker):
         self._speed_scale = speed_scale
         self._sampling_rate = sampling_rate
         self._uses_stereo = uses_stereo
+        self._metrics = metrics or NullMetrics()
 
-    def __call__(self, text: str) -> None:
+    def __call__(self, text: str, trace: Optional[Trace] = None) -> None:
         query_result = self._tolerance.handle(
             lambda: self._client.audio_query(text, speaker=self._speaker)
         )
@@ -58,11 +66,26 @@ class VoicevoxTalker(Talker):
         if not is_successful(wav_result):
             return
 
+        if trace:
+            trace.mark(Hop.SYNTHESIZED)
         with wav_result.unwrap() as wav:
             try:
-                self._queue.put_nowait(wav.readframes(wav.getnframes()))
+                self._queue.put_nowait((wav.readframes(wav.getnframes()), trace))
             except Full:
+                self._metrics.count("tts_dropped_total", queue="audio")
                 logger.warning(
                     "発話待ちが多すぎるため, 発話がスキップされました: {}",
                     text,
                 )
+
+
+def dequeue_audio(play: Callable[[bytes], Any]) -> Callable[[AudioItem], None]:
+    """キューから取り出した音声を再生する関数を作る. 再生を始めた時点で追跡を終える."""
+
+    def consume(item: AudioItem) -> None:
+        data, trace = item
+        if trace:
+            trace.finish(Hop.PLAYING)
+        play(data)
+
+    return consume
@@ -3,7 +3,6 @@ import math
 from typing import Optional
 
 from loguru import logger
-from romajiphonem import phonemize
 
 from pkscrd.core.cursor.model import PokemonCursorScene
 from pkscrd.core.hp.model import VisibleHp
@@ -16,6 +15,7 @@ from pkscrd.core.notification.model import (
     MovesNotification,
     Notification,
     OpponentHpNotification,
+    OverloadNotification,
     PokemonCursorNotification,
     ScreenshotNotification,
     SelectionCompleteButtonNotification,
@@ -31,6 +31,7 @@ from pkscrd.core.pokemon.model import Team, Type
 from pkscrd.core.pokemon.service import PokemonMapper
 from pkscrd.core.scene.model import SceneChange
 from pkscrd.core.terastal.model import TeraType
+from .phonemizer import Phonemizer
 
 
 class AllyHpFormat(enum.StrEnum):
@@ -72,9 +73,15 @@ class Messenger:
         self,
         ally_hp_formatter: AllyHpFormatter,
         pokemon_mapper: PokemonMapper,
+        phonemizer: Optional[Phonemizer] = None,
     ) -> None:
         self._ally_hp_formatter = ally_hp_formatter
         self._pokemon_mapper = pokemon_mapper
+        self._phonemizer = phonemizer or Phonemizer()
+
+    @property
+    def phonemizer(self) -> Phonemizer:
+        return self._phonemizer
 
     def convert_to_text(self, notification: Notification) -> str:
         match notification:
@@ -115,7 +122,7 @@ class Messenger:
                 return "技。" + "。".join(map(_convert_move_item, items))
 
             case LogNotification(lines=lines):
-                return "、".join(phonemize(line) for line in lines)
+                return "、".join(map(self._phonemizer, lines))
 
             case ScreenshotNotification(succeeded=succeeded):
                 if succeeded:
@@ -175,6 +182,11 @@ class Messenger:
                     message += "、".join(_TERA_TYPE_MAP[item] for item in possible)
                 return message
 
+            case OverloadNotification():
+                return (
+                    "処理が追いつかないため、ログとエイチピーの読み取りを間引いています"
+                )
+
             case _:
                 logger.warning("Unsupported notification: {}", notification)
                 return "想定されていない発話です"
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from loguru import logger
 
+from pkscrd.core.metrics.trace import Hop, Trace
 from pkscrd.core.notification.model import Notification
 from .messenger import Messenger
 from .talker import Talker
@@ -12,8 +15,14 @@ class Notifier:
         self._messenger = messenger
         self._talker = talker
 
-    def notify(self, notification: Notification) -> None:
+    def notify(
+        self,
+        notification: Notification,
+        trace: Optional[Trace] = None,
+    ) -> None:
         """通知する."""
         text = self._messenger.convert_to_text(notification)
+        if trace:
+            trace.mark(Hop.MESSAGED)
         logger.debug("Notify: {}", text)
-        self._talker(text)
+        self._talker(text, trace)
@@ -0,0 +1,84 @@
+import functools
+import re
+from typing import NamedTuple
+
+
+class PhonemizerStats(NamedTuple):
+    """読み変換キャッシュの統計."""
+
+    line_hits: int
+    line_misses: int
+    phrase_hits: int
+    phrase_misses: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.line_hits + self.phrase_hits
+        total = hits + self.phrase_misses
+        return hits / total if total else 0.0
+
+
+class Phonemizer:
+    """
+    ローマ字混じりのログを読み上げ用のカナに変換する.
+
+    変換結果は行単位と句単位の 2 段で有界キャッシュする.
+    ログは「〇〇の ムーンフォース!」のように定型の句が繰り返し現れるため,
+    行全体が初出でも句単位のキャッシュでほとんど辞書引きだけで済む.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._maxsize = maxsize
+        self._convert_phrase = functools.lru_cache(maxsize=maxsize)(_phonemize)
+        self._convert_line = functools.lru_cache(maxsize=maxsize)(
+            self._convert_line_uncached
+        )
+
+    def __call__(self, line: str) -> str:
+        if not _LATIN_PATTERN.search(line):
+            # 変換対象の文字がなければ辞書を引くまでもない.
+            return line
+        return self._convert_line(line)
+
+    @property
+    def stats(self) -> PhonemizerStats:
+        line = self._convert_line.cache_info()
+        phrase = self._convert_phrase.cache_info()
+        return PhonemizerStats(
+            line_hits=line.hits,
+            line_misses=line.misses,
+            phrase_hits=phrase.hits,
+            phrase_misses=phrase.misses,
+            size=line.currsize + phrase.currsize,
+            maxsize=self._maxsize * 2,
+        )
+
+    def _convert_line_uncached(self, line: str) -> str:
+        return "".join(
+            self._convert_phrase(phrase) if _LATIN_PATTERN.search(phrase) else phrase
+            for phrase in split_phrases(line)
+        )
+
+
+def _phonemize(text: str) -> str:
+    # 読み変換の辞書は大きいため, ログを読み上げるまで読み込まない.
+    from romajiphonem import phonemize
+
+    return phonemize(text)
+
+
+def split_phrases(line: str) -> list[str]:
+    """
+    読み変換の結果を変えない位置でログを句に分割する.
+
+    分割は英字, 空白, アポストロフィ以外の区切り文字の直後でのみ行う.
+    ローマ字の読み変換はこれらの文字の並びを単位とするため,
+    句ごとに変換して連結しても行全体を変換した結果と一致する.
+    """
+    return [phrase for phrase in _DELIMITER_PATTERN.split(line) if phrase]
+
+
+_LATIN_PATTERN = re.compile(r"[A-Za-z]")
+_DELIMITER_PATTERN = re.compile(r"(?<=[、。！？!?の])")
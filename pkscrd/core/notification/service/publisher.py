@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+
+from pkscrd.core.notification.model import Notification
+
+
+class NotificationPublisher(ABC):
+    """通知を読み上げとは別に外部へ配信する."""
+
+    @abstractmethod
+    def publish(self, notification: Notification, captured_at: float) -> None:
+        """
+        配信する. 任意のスレッドから呼び出せ, 配信を待たずに返る.
+
+        Args:
+            captured_at: 通知のもとになった映像の取得時刻 (UNIX 時間).
+        """
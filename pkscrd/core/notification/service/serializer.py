@@ -0,0 +1,41 @@
+import dataclasses
+import enum
+from typing import Any, Mapping
+
+from pkscrd.core.notification.model import Notification
+
+
+def notification_to_dict(notification: Notification) -> dict[str, Any]:
+    """
+    通知を JSON として書き出せる辞書に変換する.
+    通知の種類は "type" に, 各フィールドは同名のキーに入れる.
+    列挙型は名前で表す.
+    """
+    return {
+        "type": type(notification).__name__,
+        **{
+            field.name: _to_jsonable(getattr(notification, field.name))
+            for field in dataclasses.fields(notification)
+        },
+    }
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.name
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: _to_jsonable(getattr(value, field.name))
+            for field in dataclasses.fields(value)
+        }
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {k: _to_jsonable(v) for k, v in value._asdict().items()}
+    if isinstance(value, Mapping):
+        return {_to_key(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    return value
+
+
+def _to_key(key: Any) -> str:
+    return key.name if isinstance(key, enum.Enum) else str(key)
@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from pkscrd.core.metrics.trace import Trace
 
 
 class Talker(ABC):
     """テキストを読み上げる"""
 
     @abstractmethod
-    def __call__(self, text: str) -> None: ...
+    def __call__(self, text: str, trace: Optional[Trace] = None) -> None:
+        """
+        Args:
+            trace: 遅延の追跡. 与えられたとき, 読み上げの各段階を記録する.
+        """
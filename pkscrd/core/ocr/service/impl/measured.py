@@ -0,0 +1,47 @@
+from typing import Optional
+
+from cv2.typing import MatLike
+
+from pkscrd.core.metrics.service import Metrics
+from pkscrd.core.ocr.model import Fraction, LineContentType, LogFormat, TextColor
+from pkscrd.core.ocr.service import OcrEngine
+
+OCR_SECONDS = "ocr_seconds"
+OCR_CALLS = "ocr_calls_total"
+
+
+class MeasuredEngine(OcrEngine):
+    """読み取りの回数と処理時間を計測する. 読み取りは実体に委ねる."""
+
+    def __init__(self, engine: OcrEngine, metrics: Metrics):
+        self._engine = engine
+        self._metrics = metrics
+
+    async def read_line(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+        *,
+        content_type: Optional[LineContentType] = None,
+    ) -> Optional[str]:
+        self._metrics.count(OCR_CALLS, method="read_line")
+        with self._metrics.timer(OCR_SECONDS, method="read_line"):
+            return await self._engine.read_line(
+                image,
+                text_color,
+                content_type=content_type,
+            )
+
+    async def read_fraction(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+    ) -> Optional[Fraction]:
+        self._metrics.count(OCR_CALLS, method="read_fraction")
+        with self._metrics.timer(OCR_SECONDS, method="read_fraction"):
+            return await self._engine.read_fraction(image, text_color)
+
+    async def read_log(self, image: MatLike, format: LogFormat) -> list[list[str]]:
+        self._metrics.count(OCR_CALLS, method="read_log")
+        with self._metrics.timer(OCR_SECONDS, method="read_log"):
+            return await self._engine.read_log(image, format)
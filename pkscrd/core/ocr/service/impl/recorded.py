@@ -0,0 +1,52 @@
+from typing import Optional
+
+from cv2.typing import MatLike
+
+from pkscrd.core.flight.service import FlightRecorder
+from pkscrd.core.ocr.model import Fraction, LineContentType, LogFormat, TextColor
+from pkscrd.core.ocr.service import OcrEngine
+
+
+class RecordedEngine(OcrEngine):
+    """読み取りの入出力をフライトレコーダに記録する. 読み取りは実体に委ねる."""
+
+    def __init__(self, engine: OcrEngine, recorder: FlightRecorder):
+        self._engine = engine
+        self._recorder = recorder
+
+    async def read_line(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+        *,
+        content_type: Optional[LineContentType] = None,
+    ) -> Optional[str]:
+        text = await self._engine.read_line(
+            image,
+            text_color,
+            content_type=content_type,
+        )
+        self._recorder.record_ocr("read_line", image, text)
+        return text
+
+    async def read_fraction(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+    ) -> Optional[Fraction]:
+        fraction = await self._engine.read_fraction(image, text_color)
+        self._recorder.record_ocr(
+            "read_fraction",
+            image,
+            f"{fraction.numerator}/{fraction.denominator}" if fraction else None,
+        )
+        return fraction
+
+    async def read_log(self, image: MatLike, format: LogFormat) -> list[list[str]]:
+        lines = await self._engine.read_log(image, format)
+        self._recorder.record_ocr(
+            "read_log",
+            image,
+            "\n".join(" ".join(line) for line in lines) if lines else None,
+        )
+        return lines
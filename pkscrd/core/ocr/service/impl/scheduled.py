@@ -0,0 +1,151 @@
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from cv2.typing import MatLike
+
+from pkscrd.core.metrics.service import Metrics, NullMetrics
+from pkscrd.core.ocr.model import Fraction, LineContentType, LogFormat, TextColor
+from pkscrd.core.ocr.service import OcrEngine
+from .measured import MeasuredEngine
+
+OCR_WAIT_SECONDS = "ocr_wait_seconds"
+
+
+class OcrScheduler:
+    """
+    複数のセッションで OCR エンジンを共有し, 同時に行う読み取りの数を制限する.
+
+    待たせる読み取りはセッションごとに到着順に並べ, セッション間では順番に行う.
+    そのため読み取りの多いセッションがあっても, 他のセッションは待たされ続けない.
+    同じイベントループのスレッドから用いる.
+    """
+
+    def __init__(self, engine: OcrEngine, concurrency: int = 1):
+        assert concurrency > 0
+        self._engine = engine
+        self._concurrency = concurrency
+        self._running = 0
+        self._waiting: dict[str, deque[asyncio.Future[None]]] = {}
+        self._turns: deque[str] = deque()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def waiting(self, session: str) -> int:
+        """セッションの待っている読み取りの数."""
+        return len(self._waiting.get(session, ()))
+
+    def session(self, name: str, metrics: Optional[Metrics] = None) -> OcrEngine:
+        """
+        セッション用の OCR エンジンを返す.
+        計測機能があれば, 待ち時間と待ちの数, 読み取りの回数と処理時間を計測する.
+        """
+        metrics = metrics or NullMetrics()
+        metrics.register_gauge("queue_depth", lambda: self.waiting(name), queue="ocr")
+        engine = MeasuredEngine(self._engine, metrics) if metrics.enabled else None
+        return ScheduledEngine(self, name, engine or self._engine, metrics)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, session: str) -> AsyncIterator[None]:
+        """読み取りの枠を確保する. 空きがなければ順番が来るまで待つ."""
+        if self._running < self._concurrency and not self._turns:
+            self._running += 1
+        else:
+            await self._wait(session)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _wait(self, session: str) -> None:
+        future = asyncio.get_running_loop().create_future()
+        if (queue := self._waiting.get(session)) is None:
+            queue = self._waiting[session] = deque()
+            self._turns.append(session)
+        queue.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 枠を渡された後に取り消されたときは, 次に回す.
+                self._release()
+            else:
+                self._discard(session, future)
+            raise
+
+    def _release(self) -> None:
+        """枠を返し, 待っているセッションに順番に渡す."""
+        self._running -= 1
+        while self._turns and self._running < self._concurrency:
+            session = self._turns.popleft()
+            queue = self._waiting[session]
+            future = queue.popleft()
+            if queue:
+                self._turns.append(session)
+            else:
+                del self._waiting[session]
+            if future.cancelled():
+                continue  # 取り消しの後始末を待たずに飛ばす.
+            future.set_result(None)
+            self._running += 1
+
+    def _discard(self, session: str, future: asyncio.Future[None]) -> None:
+        if (queue := self._waiting.get(session)) is None or future not in queue:
+            return  # 枠を渡すときに飛ばされた.
+        queue.remove(future)
+        if not queue:
+            del self._waiting[session]
+            self._turns.remove(session)
+
+
+class ScheduledEngine(OcrEngine):
+    """スケジューラの順番を待って読み取る. 読み取りは実体に委ねる."""
+
+    def __init__(
+        self,
+        scheduler: OcrScheduler,
+        session: str,
+        engine: OcrEngine,
+        metrics: Metrics,
+    ):
+        self._scheduler = scheduler
+        self._session = session
+        self._engine = engine
+        self._metrics = metrics
+
+    async def read_line(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+        *,
+        content_type: Optional[LineContentType] = None,
+    ) -> Optional[str]:
+        async with self._slot():
+            return await self._engine.read_line(
+                image,
+                text_color,
+                content_type=content_type,
+            )
+
+    async def read_fraction(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+    ) -> Optional[Fraction]:
+        async with self._slot():
+            return await self._engine.read_fraction(image, text_color)
+
+    async def read_log(self, image: MatLike, format: LogFormat) -> list[list[str]]:
+        async with self._slot():
+            return await self._engine.read_log(image, format)
+
+    @contextlib.asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        began_at = time.perf_counter()
+        async with self._scheduler.slot(self._session):
+            self._metrics.observe(OCR_WAIT_SECONDS, time.perf_counter() - began_at)
+            yield
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+from .repos import dump_compiled_pokemons, load_pokemons
+from .service import PokemonMapper
+
+
+def main() -> None:  # pragma: no cover
+    """
+    コンパイル済みのポケモンデータベースを作成する.
+    出力先を省略したときはリソースディレクトリに作成する.
+    """
+    from loguru import logger
+
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        path = str(Path(__file__).parent / "resources" / "pokemons.bin")
+
+    dump_compiled_pokemons(path, map(PokemonMapper.convert, load_pokemons()))
+    logger.info("Compiled pokemon database: {}", path)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
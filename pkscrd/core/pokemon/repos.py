@@ -1,10 +1,18 @@
+import bisect
 import csv
 import gzip
 import dataclasses
+import hashlib
+import mmap
+import struct
+from collections.abc import Mapping
 from importlib.resources import files
-from typing import Iterator, Optional
+from importlib.resources.abc import Traversable
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
-from pkscrd.core.pokemon.model import Type
+from pkscrd.core.pokemon import model
+from pkscrd.core.pokemon.model import PokemonId, Type
 
 
 @dataclasses.dataclass(frozen=True)
@@ -19,9 +27,7 @@ class Pokemon:
 
 def load_pokemons() -> Iterator[Pokemon]:
     with (
-        files("pkscrd.core.pokemon.resources")
-        .joinpath("pokemons.tsv.gz")
-        .open("rb") as file,
+        _get_resources().joinpath(_SOURCE_NAME).open("rb") as file,
         gzip.open(file, "rt", encoding="utf-8") as f,
     ):
         reader = csv.reader(f, delimiter="\t")
@@ -36,3 +42,173 @@ def load_pokemons() -> Iterator[Pokemon]:
             )
             for row in reader
         )
+
+
+class CompiledPokemons(Mapping[PokemonId, model.Pokemon]):
+    """
+    コンパイル済みのポケモンデータベース.
+
+    ファイルをメモリマップして参照するため, 読み込みはファイルサイズによらず一定時間で済み,
+    複数のプロセスから読み込んでもページキャッシュを共有できる.
+    レコードは参照のたびにデコードする.
+    """
+
+    def __init__(self, buffer: mmap.mmap | bytes):
+        self._buffer = buffer
+        _, _, _, self._count = _HEADER.unpack_from(buffer)
+        self._records_offset = _HEADER.size + _INDEX_ENTRY.size * self._count
+        self._keys = _IndexKeys(buffer, self._count)
+
+    def __getitem__(self, id: PokemonId) -> model.Pokemon:
+        index = bisect.bisect_left(self._keys, tuple(id))
+        if index >= self._count or self._keys[index] != tuple(id):
+            raise KeyError(id)
+        _, _, offset = _INDEX_ENTRY.unpack_from(
+            self._buffer, _HEADER.size + _INDEX_ENTRY.size * index
+        )
+        return _decode_record(
+            self._buffer, self._records_offset + offset, PokemonId(*id)
+        )
+
+    def __iter__(self) -> Iterator[PokemonId]:
+        return (PokemonId(*key) for key in self._keys)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def load_compiled_pokemons(path: Optional[str] = None) -> Optional[CompiledPokemons]:
+    """
+    コンパイル済みのポケモンデータベースを読み込む.
+    ファイルがないか, 元のデータベースと版が一致しないときは None を返す.
+    """
+    path_ = Path(path) if path else _get_resources() / _COMPILED_NAME
+    if not path_.is_file():
+        return None
+
+    buffer: mmap.mmap | bytes
+    if isinstance(path_, Path):
+        with path_.open("rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        # HACK ZIP 内などファイルシステム上にないときはメモリ上に読み込む.
+        buffer = path_.read_bytes()
+
+    if not _is_compatible(buffer):
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+        return None
+    return CompiledPokemons(buffer)
+
+
+def dump_compiled_pokemons(path: str, pokemons: Iterable[model.Pokemon]) -> None:
+    """ポケモン情報をコンパイル済みのデータベースとして書き出す."""
+    index = bytearray()
+    records = bytearray()
+    for pokemon in sorted(pokemons, key=lambda p: p.id):
+        index += _INDEX_ENTRY.pack(*pokemon.id, len(records))
+        records += _encode_record(pokemon)
+
+    header = _HEADER.pack(
+        _MAGIC,
+        _FORMAT_VERSION,
+        compute_source_digest(),
+        len(index) // _INDEX_ENTRY.size,
+    )
+    Path(path).write_bytes(header + index + records)
+
+
+def compute_source_digest() -> bytes:
+    """
+    コンパイル済みデータベースの版として用いる, 元のデータベースのダイジェストを求める.
+    タイプはコード化して収録するため, タイプの定義もダイジェストに含める.
+    """
+    digest = hashlib.sha256(_get_resources().joinpath(_SOURCE_NAME).read_bytes())
+    digest.update("\t".join(_TYPES).encode("utf-8"))
+    return digest.digest()
+
+
+class _IndexKeys:
+    """インデックスのキーを二分探索するためのシーケンス."""
+
+    def __init__(self, buffer: mmap.mmap | bytes, count: int):
+        self._buffer = buffer
+        self._count = count
+
+    def __getitem__(self, index: int) -> tuple[int, int]:
+        pokedex_number, form_index, _ = _INDEX_ENTRY.unpack_from(
+            self._buffer, _HEADER.size + _INDEX_ENTRY.size * index
+        )
+        return pokedex_number, form_index
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return (self[index] for index in range(self._count))
+
+
+def _encode_record(pokemon: model.Pokemon) -> bytes:
+    name = pokemon.name.encode("utf-8")
+    data = bytearray(_NAME_LENGTH.pack(len(name)) + name)
+    data += _TYPESET_COUNT.pack(len(pokemon.typesets))
+    for typeset in pokemon.typesets:
+        codes = [_TYPES.index(type_) for type_ in typeset]
+        data += _TYPESET.pack(codes[0], codes[1] if len(codes) > 1 else _NO_TYPE)
+    return bytes(data)
+
+
+def _decode_record(
+    buffer: mmap.mmap | bytes,
+    offset: int,
+    id: PokemonId,
+) -> model.Pokemon:
+    (name_length,) = _NAME_LENGTH.unpack_from(buffer, offset)
+    offset += _NAME_LENGTH.size
+    name = bytes(buffer[offset : offset + name_length]).decode("utf-8")
+    offset += name_length
+
+    (typeset_count,) = _TYPESET_COUNT.unpack_from(buffer, offset)
+    offset += _TYPESET_COUNT.size
+    typesets: list[tuple[Type] | tuple[Type, Type]] = []
+    for _ in range(typeset_count):
+        code1, code2 = _TYPESET.unpack_from(buffer, offset)
+        offset += _TYPESET.size
+        typesets.append(
+            (_TYPES[code1], _TYPES[code2]) if code2 != _NO_TYPE else (_TYPES[code1],)
+        )
+    return model.Pokemon(id=id, name=name, typesets=typesets)
+
+
+def _is_compatible(buffer: mmap.mmap | bytes) -> bool:
+    if len(buffer) < _HEADER.size:
+        return False
+    magic, version, digest, _ = _HEADER.unpack_from(buffer)
+    return (
+        magic == _MAGIC
+        and version == _FORMAT_VERSION
+        and digest == compute_source_digest()
+    )
+
+
+def _get_resources() -> Traversable:
+    return files("pkscrd.core.pokemon.resources")
+
+
+_SOURCE_NAME = "pokemons.tsv.gz"
+_COMPILED_NAME = "pokemons.bin"
+
+# フォーマットを変更したときは版を上げること.
+_MAGIC = b"PKSCRDPK"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sH32sI")  # マジック, 版, 元データのダイジェスト, 件数
+_INDEX_ENTRY = struct.Struct("<HHI")  # 図鑑番号, フォルム番号, レコード位置
+_NAME_LENGTH = struct.Struct("<H")
+_TYPESET_COUNT = struct.Struct("<B")
+_TYPESET = struct.Struct("<BB")
+_TYPES = tuple(Type)
+_NO_TYPE = 0xFF
@@ -1,26 +1,49 @@
+from collections.abc import Mapping
 from typing import Iterable, Optional
 
+from loguru import logger
+
 from .model import Pokemon, PokemonId, Type
-from .repos import Pokemon as PokemonR
+from .repos import Pokemon as PokemonR, load_compiled_pokemons, load_pokemons
 
 
 class PokemonMapper:
     """ID からポケモンにマッピングする. 選出画面向け."""
 
     def __init__(self, pokemons: Iterable[PokemonR]):
-        converted = (
-            Pokemon(
-                id=PokemonId(p.pokedex_number, p.form_index),
-                name=PokemonMapper._fix_name(p),
-                typesets=PokemonMapper._fix_typesets(p),
-            )
-            for p in pokemons
-        )
-        self._mapping = {p.id: p for p in converted}
+        converted = map(PokemonMapper.convert, pokemons)
+        self._mapping: Mapping[PokemonId, Pokemon] = {p.id: p for p in converted}
 
     def get(self, id: PokemonId) -> Optional[Pokemon]:
         return self._mapping.get(id)
 
+    @staticmethod
+    def of(mapping: Mapping[PokemonId, Pokemon]) -> "PokemonMapper":
+        """変換済みのポケモン情報から作成する."""
+        mapper = PokemonMapper(())
+        mapper._mapping = mapping
+        return mapper
+
+    @staticmethod
+    def load() -> "PokemonMapper":
+        """
+        コンパイル済みのデータベースから作成する.
+        利用できないときは元のデータベースから変換して作成する.
+        """
+        if compiled := load_compiled_pokemons():
+            return PokemonMapper.of(compiled)
+        logger.info("Compiled pokemon database is unavailable. Use the TSV instead.")
+        return PokemonMapper(load_pokemons())
+
+    @staticmethod
+    def convert(pokemon: PokemonR) -> Pokemon:
+        """元のデータベースのレコードを読み上げ用のポケモン情報に変換する."""
+        return Pokemon(
+            id=PokemonId(pokemon.pokedex_number, pokemon.form_index),
+            name=PokemonMapper._fix_name(pokemon),
+            typesets=PokemonMapper._fix_typesets(pokemon),
+        )
+
     @staticmethod
     def _fix_name(pokemon: PokemonR) -> str:
         if mapped := PokemonMapper._NAME_MAPPING.get(
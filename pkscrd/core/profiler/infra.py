@@ -0,0 +1,38 @@
+import os
+from datetime import datetime
+from typing import Callable
+
+from .model import Profile
+
+PROFILE_EXTENSION = ".collapsed"
+
+
+def to_collapsed(profile: Profile) -> str:
+    """
+    折りたたみスタック形式 (1 行に "根;...;葉 標本数") に変換する.
+    speedscope や FlameGraph でそのまま読み込める.
+    """
+    lines = sorted(
+        f"{';'.join(label.replace(';', ':') for label in stack)} {count}"
+        for stack, count in profile.samples.items()
+    )
+    return "".join(f"{line}\n" for line in lines)
+
+
+class CollapsedStackFileWriter:
+    """集計を折りたたみスタック形式のファイルに書き出す."""
+
+    def __init__(self, dir_path: str, clock: Callable[[], datetime] = datetime.now):
+        self._dir_path = dir_path
+        self._clock = clock
+
+    def __call__(self, profile: Profile) -> str:
+        """
+        Raises:
+            OSError: 書き出しが失敗したとき.
+        """
+        name = f"profile-{self._clock():%Y-%m-%d-%H-%M-%S}{PROFILE_EXTENSION}"
+        path = os.path.join(self._dir_path, name)
+        with open(path, "x", encoding="utf-8") as file:
+            file.write(to_collapsed(profile))
+        return path
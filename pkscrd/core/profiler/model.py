@@ -0,0 +1,18 @@
+import dataclasses
+
+Stack = tuple[str, ...]
+"""スレッド名を根とし, 呼び出し元から順に並べた関数の列."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Profile:
+    """標本化したスタックの集計."""
+
+    samples: dict[Stack, int]
+    """スタックごとの標本数."""
+    interval_in_seconds: float
+    duration_in_seconds: float
+
+    @property
+    def total(self) -> int:
+        return sum(self.samples.values())
@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import time
+import types
+from typing import Callable, Optional
+
+from loguru import logger
+
+from .model import Profile, Stack
+
+ProfileWriter = Callable[[Profile], str]
+"""集計を書き出し, 書き出し先を返す."""
+
+
+class SamplingProfiler:
+    """
+    全スレッドのスタックを一定間隔で標本化するプロファイラ.
+
+    CPython の sys._current_frames を用いるため, 外部ツールや拡張モジュールを必要としない.
+    待機中のスレッドも標本に含む (実時間で標本化する).
+    停止すると集計を返し, 再び開始できる.
+    """
+
+    def __init__(self, interval_in_seconds: float = 0.005, *, max_depth: int = 128):
+        self._interval = interval_in_seconds
+        self._max_depth = max_depth
+        self._labels: dict[types.CodeType, str] = {}
+        self._samples: dict[Stack, int] = {}
+        self._started_at = 0.0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._samples = {}
+        self._started_at = time.perf_counter()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        if thread := self._thread:
+            self._stopped.set()
+            thread.join()
+            self._thread = None
+        return Profile(
+            samples=self._samples,
+            interval_in_seconds=self._interval,
+            duration_in_seconds=time.perf_counter() - self._started_at,
+        )
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names: dict[int, str] = {}
+        while not self._stopped.wait(self._interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if (name := names.get(ident)) is None:
+                    names = {t.ident: t.name for t in threading.enumerate() if t.ident}
+                    name = names.get(ident, str(ident))
+                stack = (name, *self._walk(frame))
+                self._samples[stack] = self._samples.get(stack, 0) + 1
+
+    def _walk(self, frame: Optional[types.FrameType]) -> list[str]:
+        labels: list[str] = []
+        while frame and len(labels) < self._max_depth:
+            code = frame.f_code
+            if (label := self._labels.get(code)) is None:
+                label = self._labels[code] = (
+                    f"{code.co_qualname}"
+                    f" ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return labels
+
+
+class ProfilerSwitch:
+    """
+    プロファイラの開始と停止を切り替え, 停止したら集計を書き出す.
+    画面のキー操作や制御用エンドポイントなど, 複数のスレッドから操作される.
+    """
+
+    def __init__(self, profiler: SamplingProfiler, writer: ProfileWriter):
+        self._profiler = profiler
+        self._writer = writer
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._profiler.running
+
+    def start(self) -> bool:
+        """
+        Returns:
+            開始したら True, すでに実行中であれば False.
+        """
+        with self._lock:
+            if self._profiler.running:
+                return False
+            self._profiler.start()
+        logger.warning("Profiling is started.")
+        return True
+
+    def stop(self) -> Optional[str]:
+        """
+        Returns:
+            集計の書き出し先. 実行中でなかったときや書き出しが失敗したときは None.
+        """
+        with self._lock:
+            if not self._profiler.running:
+                return None
+            profile = self._profiler.stop()
+        try:
+            path = self._writer(profile)
+        except OSError as error:
+            logger.opt(exception=error).warning("Failed to write the profile.")
+            return None
+        logger.warning("Profiling is stopped ({} samples): {}", profile.total, path)
+        return path
+
+    def toggle(self) -> None:
+        if not self.start():
+            self.stop()
@@ -0,0 +1,206 @@
+import bisect
+import dataclasses
+import io
+import struct
+import types
+from typing import BinaryIO, Optional, Sequence, Type
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+
+@dataclasses.dataclass(frozen=True)
+class ArchivedFrame:
+    """フレームアーカイブ中のフレームの索引."""
+
+    sequence: int
+    timestamp: float
+    offset: int
+    size: int
+
+
+class FrameArchiveReader:
+    """
+    フレームアーカイブを読み込む.
+
+    フレームアーカイブは, エンコード済みのフレームをチャンク単位で追記したファイル.
+    各チャンクの先頭にフレームのシーケンス番号, 取得時刻, 大きさの索引を持つため,
+    フレーム本体を読まずに索引だけを集めて任意のフレームへシークできる.
+    書き込み途中で中断したファイルも, 完全なチャンクまでは読み込める.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._frames = list(_scan(file))
+        self._timestamps = [frame.timestamp for frame in self._frames]
+
+    @property
+    def frames(self) -> list[ArchivedFrame]:
+        return self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def read_bytes(self, index: int) -> bytes:
+        frame = self._frames[index]
+        self._file.seek(frame.offset)
+        return self._file.read(frame.size)
+
+    def read(self, index: int) -> Optional[MatLike]:
+        data = np.frombuffer(self.read_bytes(index), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    def find(self, timestamp: float) -> int:
+        """指定時刻以前で最も新しいフレームの位置を返す. なければ 0 を返す."""
+        return max(bisect.bisect_right(self._timestamps, timestamp) - 1, 0)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "FrameArchiveReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> None:
+        self.close()
+
+    @staticmethod
+    def open(path: str) -> "FrameArchiveReader":
+        """
+        ファイルを開く.
+
+        Raises:
+            ValueError: フレームアーカイブではないとき.
+        """
+        file = open(path, "rb")
+        if not _read_header(file):
+            file.close()
+            raise ValueError(f"Not a frame archive: {path}")
+        return FrameArchiveReader(file)
+
+
+class FrameArchiveWriter:
+    """
+    フレームアーカイブを書き込む.
+    チャンクは索引と本体をまとめて追記するため, 中断しても書き込み済みのチャンクは失われない.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._size = file.tell()
+
+    @property
+    def size(self) -> int:
+        """書き込み済みの大きさ (バイト)."""
+        return self._size
+
+    def write_chunk(self, frames: Sequence[tuple[int, float, bytes]]) -> int:
+        """
+        エンコード済みのフレームを 1 チャンクとして書き込む.
+
+        Args:
+            frames: シーケンス番号, 取得時刻, エンコード済みフレームの組.
+        Returns:
+            書き込んだ大きさ (バイト).
+        """
+        if not frames:
+            return 0
+        data = bytearray(
+            CHUNK_HEADER.pack(
+                CHUNK_MAGIC,
+                len(frames),
+                sum(len(frame) for _, _, frame in frames),
+            )
+        )
+        for sequence, timestamp, frame in frames:
+            data += CHUNK_ENTRY.pack(sequence, timestamp, len(frame))
+        for _, _, frame in frames:
+            data += frame
+
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "FrameArchiveWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> None:
+        self.close()
+
+    @staticmethod
+    def create(path: str) -> "FrameArchiveWriter":
+        """ファイルを作成し, ヘッダを書き込む."""
+        file = open(path, "wb")
+        file.write(FILE_HEADER.pack(FILE_MAGIC, FORMAT_VERSION))
+        return FrameArchiveWriter(file)
+
+
+def chunk_size_of(frames: Sequence[tuple[int, float, bytes]]) -> int:
+    """チャンクとして書き込んだときの大きさ (バイト) を求める."""
+    return (
+        CHUNK_HEADER.size
+        + CHUNK_ENTRY.size * len(frames)
+        + sum(len(frame) for _, _, frame in frames)
+    )
+
+
+def is_frame_archive(path: str) -> bool:
+    """ファイルがフレームアーカイブであるかを判定する."""
+    try:
+        with open(path, "rb") as file:
+            return _read_header(file)
+    except OSError:
+        return False
+
+
+def _read_header(file: BinaryIO) -> bool:
+    data = file.read(FILE_HEADER.size)
+    if len(data) < FILE_HEADER.size:
+        return False
+    magic, version = FILE_HEADER.unpack(data)
+    return magic == FILE_MAGIC and version == FORMAT_VERSION
+
+
+def _scan(file: BinaryIO) -> list[ArchivedFrame]:
+    frames: list[ArchivedFrame] = []
+    file.seek(0, io.SEEK_END)
+    end = file.tell()
+
+    offset = FILE_HEADER.size
+    while offset + CHUNK_HEADER.size <= end:
+        file.seek(offset)
+        magic, count, payload_size = CHUNK_HEADER.unpack(file.read(CHUNK_HEADER.size))
+        index_size = CHUNK_ENTRY.size * count
+        payload_offset = offset + CHUNK_HEADER.size + index_size
+        if magic != CHUNK_MAGIC or payload_offset + payload_size > end:
+            break  # 書き込み途中のチャンク.
+
+        frame_offset = payload_offset
+        for sequence, timestamp, size in CHUNK_ENTRY.iter_unpack(file.read(index_size)):
+            frames.append(ArchivedFrame(sequence, timestamp, frame_offset, size))
+            frame_offset += size
+        offset = payload_offset + payload_size
+    return frames
+
+
+# フォーマットを変更したときは版を上げること.
+FILE_MAGIC = b"PKSCRDFA"
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct("<8sH")  # マジック, 版
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sII")  # マジック, フレーム数, フレーム本体の合計サイズ
+CHUNK_ENTRY = struct.Struct("<IdI")  # シーケンス番号, 取得時刻, サイズ
@@ -4,7 +4,6 @@ from typing import Iterator, Optional, Type
 
 import cv2
 from cv2.typing import MatLike
-from cv2_enumerate_cameras import enumerate_cameras
 
 
 class CaptureDeviceClient:
@@ -78,6 +77,9 @@ class Device:
 
 
 def get_devices() -> Iterator[Device]:
+    # デバイス一覧は設定画面や起動時にしか使わないため, 使用時に読み込む.
+    from cv2_enumerate_cameras import enumerate_cameras
+
     return (
         Device(index=cam.index, name=cam.name)
         for cam in enumerate_cameras(_API_PREFERENCE)
@@ -0,0 +1,161 @@
+import os
+import types
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Type
+
+import cv2
+from cv2.typing import MatLike
+
+from .archive import FrameArchiveReader, is_frame_archive
+
+
+class RecordingReader(ABC):
+    """
+    記録された映像をフレーム単位で読み込む.
+    フレームは位置で指定し, 各フレームの記録時刻 (秒) を事前に参照できる.
+    """
+
+    @property
+    @abstractmethod
+    def timestamps(self) -> list[float]:
+        """各フレームの記録時刻 (秒)."""
+
+    @abstractmethod
+    def read(self, index: int) -> Optional[MatLike]:
+        """指定位置のフレームを読み込む. 読み込めなければ None を返す."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "RecordingReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> None:
+        self.close()
+
+
+class VideoReader(RecordingReader):
+    """動画ファイルを読み込む."""
+
+    def __init__(self, capture: cv2.VideoCapture):
+        self._capture = capture
+        fps = capture.get(cv2.CAP_PROP_FPS) or _DEFAULT_FPS
+        count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self._timestamps = [index / fps for index in range(count)]
+        self._position = 0
+
+    @property
+    def timestamps(self) -> list[float]:
+        return self._timestamps
+
+    def read(self, index: int) -> Optional[MatLike]:
+        # 少し先のフレームはデコードせずに読み飛ばす方がシークより速い.
+        skip = index - self._position
+        if 0 <= skip <= _MAX_GRAB_SKIP:
+            for _ in range(skip):
+                self._capture.grab()
+        else:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+        ret, frame = self._capture.read()
+        self._position = index + 1
+        return frame if ret else None
+
+    def close(self) -> None:
+        self._capture.release()
+
+    @staticmethod
+    def open(path: str) -> "VideoReader":
+        """
+        動画ファイルを開く.
+
+        Raises:
+            ValueError: 動画ファイルとして開けないとき.
+        """
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise ValueError(f"Failed to open a video: {path}")
+        return VideoReader(capture)
+
+
+class ImageDirectoryReader(RecordingReader):
+    """
+    スクリーンショットとして保存された画像のディレクトリを読み込む.
+    ファイル名のタイムスタンプを記録時刻とする.
+    """
+
+    def __init__(self, paths: list[str]):
+        self._paths = paths
+        self._timestamps = [
+            _parse_timestamp(path, default=index * _DEFAULT_INTERVAL_IN_SECONDS)
+            for index, path in enumerate(paths)
+        ]
+
+    @property
+    def timestamps(self) -> list[float]:
+        return self._timestamps
+
+    def read(self, index: int) -> Optional[MatLike]:
+        return cv2.imread(self._paths[index], cv2.IMREAD_COLOR)
+
+    @staticmethod
+    def open(path: str) -> "ImageDirectoryReader":
+        paths = sorted(
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if os.path.splitext(name)[1].lower() in _IMAGE_EXTENSIONS
+        )
+        return ImageDirectoryReader(paths)
+
+
+class FrameArchiveRecordingReader(RecordingReader):
+    """フレームアーカイブを読み込む."""
+
+    def __init__(self, archive: FrameArchiveReader):
+        self._archive = archive
+        self._timestamps = [frame.timestamp for frame in archive.frames]
+
+    @property
+    def timestamps(self) -> list[float]:
+        return self._timestamps
+
+    def read(self, index: int) -> Optional[MatLike]:
+        return self._archive.read(index)
+
+    def close(self) -> None:
+        self._archive.close()
+
+
+def open_recording(path: str) -> RecordingReader:
+    """
+    記録の種類を判別して開く.
+
+    Raises:
+        ValueError: 開けないとき.
+    """
+    if os.path.isdir(path):
+        return ImageDirectoryReader.open(path)
+    if is_frame_archive(path):
+        return FrameArchiveRecordingReader(FrameArchiveReader.open(path))
+    return VideoReader.open(path)
+
+
+def _parse_timestamp(path: str, default: float) -> float:
+    # 保存時のファイル名形式に揃える. pkscrd.usecase.screenshot.save_image を参照.
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        return datetime.strptime(stem, "%Y-%m-%d-%H-%M-%S-%f").timestamp()
+    except ValueError:
+        return default
+
+
+_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+_DEFAULT_FPS = 30.0
+_DEFAULT_INTERVAL_IN_SECONDS = 0.1
+_MAX_GRAB_SKIP = 30
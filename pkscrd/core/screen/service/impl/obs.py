@@ -1,10 +1,13 @@
 import asyncio
+from typing import Optional
 
 import cv2
 import cv2.typing
 import numpy as np
 from returns.result import ResultE
 
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import Metrics, NullMetrics
 from pkscrd.core.screen.infra.obs import ObsClient
 from pkscrd.core.screen.service import ScreenFetcher
 from pkscrd.core.tolerance.service import AsyncTolerance
@@ -18,17 +21,20 @@ class ObsScreenFetcher(ScreenFetcher):
         obs: ObsClient,
         source: str,
         tolerance: AsyncTolerance,
+        metrics: Optional[Metrics] = None,
     ):
         self._obs = obs
         self._source = source
         self._tolerance = tolerance
+        self._metrics = metrics or NullMetrics()
 
     async def fetch(self) -> ResultE[cv2.typing.MatLike]:
         return await self._tolerance.handle(self._fetch)
 
     async def _fetch(self) -> cv2.typing.MatLike:
         data = await self._obs.get_source_screenshot(self._source)
-        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        with self._metrics.stage(Stage.DECODE):
+            return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
 
 
 class ObsRecovery:
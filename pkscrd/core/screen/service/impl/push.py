@@ -0,0 +1,85 @@
+import asyncio
+from typing import Optional
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+from returns.result import Failure, ResultE, Success
+
+from pkscrd.core.screen.service import ScreenFetcher
+
+SCREEN_SIZE = (1920, 1080)
+"""認識が前提とする映像の大きさ (幅, 高さ). 各認識は固定の座標で切り出す."""
+
+# 縦横比は 1366x768 などの 16:9 に近い大きさまで許す.
+_ASPECT_TOLERANCE = 0.01
+
+
+def fit_to_screen(image: MatLike) -> MatLike:
+    """
+    外部から与えられた映像を, 認識が前提とする大きさに拡大・縮小する.
+
+    Raises:
+        ValueError: BGR の映像でないか, 縦横比が 16:9 でないとき.
+    """
+    if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+        raise ValueError(f"Unsupported frame: {image.shape} {image.dtype}")
+    height, width = image.shape[:2]
+    if (width, height) == SCREEN_SIZE:
+        return image
+    screen_width, screen_height = SCREEN_SIZE
+    if (
+        not height
+        or abs(width * screen_height / (height * screen_width) - 1) > _ASPECT_TOLERANCE
+    ):
+        raise ValueError(f"Unsupported aspect ratio: {width}x{height}")
+    interpolation = cv2.INTER_AREA if width > screen_width else cv2.INTER_LINEAR
+    return cv2.resize(image, SCREEN_SIZE, interpolation=interpolation)
+
+
+class NoFrameError(RuntimeError):
+    """待っても新しい映像が与えられなかった."""
+
+
+class PushScreenFetcher(ScreenFetcher):
+    """
+    外部から与えられた映像を返す. 映像は fit_to_screen() で大きさを揃えておく.
+
+    保持するのは最新の映像だけで, 取得されずに上書きされた映像は飛ばす.
+    取得は新しい映像が与えられるまで, 最大 timeout_in_seconds 秒待つ.
+    """
+
+    def __init__(self, timeout_in_seconds: float = 1.0):
+        self._timeout_in_seconds = timeout_in_seconds
+        self._image: Optional[MatLike] = None
+        self._arrived = asyncio.Event()
+        self._pushed = 0
+        self._skipped = 0
+
+    @property
+    def pushed(self) -> int:
+        """与えられた映像の数."""
+        return self._pushed
+
+    @property
+    def skipped(self) -> int:
+        """取得されずに上書きされた映像の数."""
+        return self._skipped
+
+    def push(self, image: MatLike) -> None:
+        """映像を与える. 取得する側と同じイベントループのスレッドから呼び出す."""
+        if self._image is not None:
+            self._skipped += 1
+        self._image = image
+        self._pushed += 1
+        self._arrived.set()
+
+    async def fetch(self) -> ResultE[MatLike]:
+        try:
+            await asyncio.wait_for(self._arrived.wait(), self._timeout_in_seconds)
+        except TimeoutError:
+            return Failure(NoFrameError())
+        image, self._image = self._image, None
+        self._arrived.clear()
+        assert image is not None
+        return Success(image)
@@ -0,0 +1,120 @@
+import asyncio
+import bisect
+import enum
+import threading
+import time
+from typing import Callable, Optional
+
+from cv2.typing import MatLike
+from returns.result import Failure, ResultE, Success
+
+from pkscrd.core.screen.infra.replay import RecordingReader
+from pkscrd.core.screen.service import ScreenFetcher
+
+
+class ReplayMode(enum.StrEnum):
+    """記録の再生方法."""
+
+    REALTIME = "realtime"
+    """記録時刻に合わせて再生する. 取得が間に合わないフレームは飛ばす."""
+    MAX_SPEED = "max-speed"
+    """取得のたびに次のフレームを返す."""
+    STEP = "step"
+    """step() で進めるまで同じフレームを返し続ける."""
+
+
+class EndOfRecordingError(RuntimeError):
+    """記録の終端に達した."""
+
+
+class ReplayScreenFetcher(ScreenFetcher):
+    """記録された映像を再生する."""
+
+    def __init__(
+        self,
+        reader: RecordingReader,
+        mode: ReplayMode = ReplayMode.REALTIME,
+        *,
+        loops: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._reader = reader
+        self._timestamps = reader.timestamps
+        self._mode = mode
+        self._loops = loops
+        self._clock = clock
+
+        self._position = -1
+        self._started_at: Optional[float] = None
+        self._pending_steps = 0
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self) -> ReplayMode:
+        return self._mode
+
+    @property
+    def position(self) -> int:
+        """最後に返したフレームの位置. まだ返していなければ -1."""
+        return self._position
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        """最後に返したフレームの記録時刻."""
+        return self._timestamps[self._position] if self._position >= 0 else None
+
+    def step(self, count: int = 1) -> None:
+        """ステップ再生でフレームを進める. 他のスレッドから呼び出してよい."""
+        with self._lock:
+            self._pending_steps += count
+
+    async def fetch(self) -> ResultE[MatLike]:
+        index = self._next_index()
+        if index is None:
+            return Failure(EndOfRecordingError())
+
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(None, self._reader.read, index)
+        # 読み込めないフレームでも位置は進め, 次の取得では先へ進む.
+        self._position = index
+        if image is None:
+            return Failure(RuntimeError(f"Failed to read a frame: {index}"))
+        return Success(image)
+
+    def _next_index(self) -> Optional[int]:
+        if not self._timestamps:
+            return None
+
+        match self._mode:
+            case ReplayMode.MAX_SPEED:
+                return self._wrap(self._position + 1)
+
+            case ReplayMode.STEP:
+                with self._lock:
+                    steps, self._pending_steps = self._pending_steps, 0
+                if self._position < 0:
+                    return 0
+                index = self._wrap(self._position + steps)
+                return len(self._timestamps) - 1 if index is None else index
+
+            case ReplayMode.REALTIME:
+                now = self._clock()
+                if self._started_at is None:
+                    self._started_at = now
+                target = self._timestamps[0] + (now - self._started_at)
+                if target > self._timestamps[-1] + _END_MARGIN_IN_SECONDS:
+                    if not self._loops:
+                        return None
+                    self._started_at = now
+                    return 0
+                index = bisect.bisect_right(self._timestamps, target) - 1
+                return max(index, self._position, 0)
+
+    def _wrap(self, index: int) -> Optional[int]:
+        if index < len(self._timestamps):
+            return index
+        return 0 if self._loops else None
+
+
+# 最終フレームを表示し続ける時間.
+_END_MARGIN_IN_SECONDS = 0.1
@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+import types
+from typing import Callable, NamedTuple, Optional, Type
+
+import cv2
+from cv2.typing import MatLike
+from loguru import logger
+
+from pkscrd.core.screen.infra.archive import FrameArchiveWriter, chunk_size_of
+
+
+class RecorderStats(NamedTuple):
+    """記録の統計."""
+
+    recorded: int
+    """書き込んだフレーム数."""
+    dropped: int
+    """取りこぼしたフレーム数."""
+    size: int
+    """書き込んだ大きさ (バイト)."""
+
+
+class ScreenRecorder:
+    """
+    処理した映像をフレームアーカイブに記録する.
+
+    エンコードと書き込みは専用のスレッドで行い, 認識処理を待たせない.
+    待ち行列があふれたときや容量の上限に達したときは, フレームを捨てる.
+    """
+
+    def __init__(
+        self,
+        writer: FrameArchiveWriter,
+        *,
+        every: int = 1,
+        quality: int = 80,
+        max_bytes: int = 2 * 1024**3,
+        queue_size: int = 30,
+        chunk_size: int = 30,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._writer = writer
+        self._every = every
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self._max_bytes = max_bytes
+        self._chunk_size = chunk_size
+        self._clock = clock
+
+        self._queue: queue.Queue[Optional[tuple[int, float, MatLike]]] = queue.Queue(
+            maxsize=queue_size
+        )
+        self._sequence = 0
+        self._recorded = 0
+        self._dropped = 0
+        self._discarded = 0  # 書き込み側で捨てた数. 呼び出し側の数とは別に数える.
+        self._full = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def stats(self) -> RecorderStats:
+        return RecorderStats(
+            self._recorded,
+            self._dropped + self._discarded,
+            self._writer.size,
+        )
+
+    @property
+    def pending(self) -> int:
+        """書き込み待ちのフレーム数."""
+        return self._queue.qsize()
+
+    def record(self, image: MatLike) -> None:
+        """
+        フレームを記録する. 待たされることはない.
+        指定間隔から外れるフレームは記録しない.
+        """
+        sequence = self._sequence
+        self._sequence += 1
+        if sequence % self._every:
+            return
+        if self._full:
+            self._dropped += 1
+            return
+
+        try:
+            self._queue.put_nowait((sequence, self._clock(), image))
+        except queue.Full:
+            self._dropped += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        """待ち行列に残ったフレームを書き込んでから閉じる."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._writer.close()
+        logger.debug("Recorder: {}", self.stats)
+
+    def __enter__(self) -> "ScreenRecorder":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        chunk: list[tuple[int, float, bytes]] = []
+        while (item := self._queue.get()) is not None:
+            sequence, timestamp, image = item
+            ret, data = cv2.imencode(".jpg", image, self._params)
+            if not ret:
+                self._discarded += 1
+                continue
+            chunk.append((sequence, timestamp, data.tobytes()))
+            if len(chunk) >= self._chunk_size:
+                self._flush(chunk)
+                chunk = []
+        self._flush(chunk)
+
+    def _flush(self, chunk: list[tuple[int, float, bytes]]) -> None:
+        if not chunk or self._full:
+            self._discarded += len(chunk)
+            return
+        if self._writer.size + chunk_size_of(chunk) > self._max_bytes:
+            logger.warning("Recording is stopped: the size limit is reached.")
+            self._full = True
+            self._discarded += len(chunk)
+            return
+
+        try:
+            self._writer.write_chunk(chunk)
+        except OSError as error:
+            logger.opt(exception=error).warning("Failed to write the recording.")
+            self._full = True
+            self._discarded += len(chunk)
+            return
+        self._recorded += len(chunk)
@@ -7,8 +7,8 @@ import pnlib
 from PySide6.QtWidgets import QApplication
 from loguru import logger
 
-from pkscrd.app.configuration import run_configuration
 from pkscrd.app.reader import ReaderManager, run_settings_error, show_pnlib_error
+from pkscrd.app.reader.controller.startup import StartupWindow
 from pkscrd.app.settings.error import SettingsError, SettingsFileNotFoundError
 
 
@@ -35,15 +35,23 @@ def main() -> None:
         Returns:
             読み上げアプリケーションの実行が引き続き必要であれば True, そうでなければ False.
         """
-        context_manager = ReaderManager()
+        startup = StartupWindow()
+        context_manager = ReaderManager(startup_callback=startup.update_status)
 
         hit_except = False
         try:
-            window, polling = loop.run_until_complete(context_manager.__aenter__())
+            startup.show()
+            try:
+                window, polling = loop.run_until_complete(
+                    startup.wait_for(context_manager.__aenter__())
+                )
+            finally:
+                startup.close()
 
             polling_thread = threading.Thread(
                 target=loop.run_until_complete,
                 args=(polling(),),
+                name="polling",
                 daemon=True,
             )
             logger.debug("Polling thread: {}", polling_thread.name)
@@ -73,9 +81,16 @@ def main() -> None:
         except SettingsFileNotFoundError:
             # 設定ファイルが存在しないときは初期状態に該当するので,
             # メッセージを出さずに設定画面を表示する.
-            needs_reader = run_configuration()
+            needs_reader = _run_configuration()
         except SettingsError as error:
             needs_configuration = run_settings_error(error)
             if not needs_configuration:
                 break
-            needs_reader = run_configuration()
+            needs_reader = _run_configuration()
+
+
+def _run_configuration() -> bool:
+    # 設定画面は必要になるまで読み込まない.
+    from pkscrd.app.configuration import run_configuration
+
+    return run_configuration()
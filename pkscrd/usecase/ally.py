@@ -1,5 +1,6 @@
 from pkscrd.core.scene.model import Scene, SceneGroup
 from .hp import AllyHpUseCase
+from .request import RequestFlag
 from .selection import SelectionUseCase
 
 
@@ -9,17 +10,16 @@ class AllyUseCase:
     def __init__(self, selection: SelectionUseCase, ally_hp: AllyHpUseCase):
         self._selection = selection
         self._ally_hp = ally_hp
-        self._requested = False
+        self._requested = RequestFlag()
 
     def request(self) -> None:
         """コールバック呼び出しを要求する."""
-        self._requested = True
+        self._requested.set()
 
     def handle(self, scene: Scene) -> None:
         """シーンに応じて必要な要求を行う."""
-        if not self._requested:
+        if not self._requested.consume():
             return
-        self._requested = False
 
         if scene.group in (SceneGroup.SELECTION, SceneGroup.SELECTION_COMPLETE):
             self._selection.request()
@@ -15,6 +15,7 @@ from pkscrd.core.notification.model import (
     UnknownCursorNotification,
 )
 from pkscrd.core.scene.model import ImageScene
+from .request import RequestFlag
 from .team import TeamUseCase
 
 
@@ -32,19 +33,18 @@ class CursorUseCase:
         self._move_reader = move_reader
         self._ally_team = ally_team
 
-        self._requested = False
+        self._requested = RequestFlag()
 
     def request(self) -> None:
-        self._requested = True
+        self._requested.set()
 
     async def handle(
         self,
         scene: ImageScene,
         image: MatLike,
     ) -> Optional[CursorNotification]:
-        if not self._requested:
+        if not self._requested.consume():
             return None
-        self._requested = False
         logger.debug("Cursor recognition for scene: {}", scene)
 
         match scene:
@@ -5,8 +5,13 @@ from loguru import logger
 from cv2.typing import MatLike
 
 from pkscrd.core.hp.model import HpScene, VisibleHp
-from pkscrd.core.hp.service import AllyHpReader, recognize_opponent_hps
+from pkscrd.core.hp.service import (
+    AllyHpReader,
+    OpponentHpMap,
+    recognize_opponent_hps,
+)
 from pkscrd.core.notification.model import AllyHpNotification, OpponentHpNotification
+from .request import RequestFlag
 
 _Value = TypeVar("_Value")
 
@@ -65,20 +70,25 @@ class HpUseCase(Generic[_Value]):
         self._move = move
 
         self._current: Optional[_Value] = None
-        self._requested = False
-        self._command_event_requested = False
+        self._requested = RequestFlag()
+        self._command_event_requested = RequestFlag()
 
     @property
     def current(self) -> Optional[_Value]:
         return self._current
 
+    @property
+    def requested(self) -> bool:
+        """通知の要求が保留されているか."""
+        return self._requested.is_set
+
     def request(self) -> None:
         """イベントを要求する."""
-        self._requested = True
+        self._requested.set()
 
     def request_next_command(self) -> None:
         """次に指示画面の HP が読まれときの通知を要求する."""
-        self._command_event_requested = True
+        self._command_event_requested.set()
 
     def handle(
         self,
@@ -86,9 +96,8 @@ class HpUseCase(Generic[_Value]):
     ) -> Optional[HpNotification[_Value]]:
         self._update(current)
 
-        if not self._requested:
+        if not self._requested.consume():
             return None
-        self._requested = False
         return HpNotification(self.current)
 
     def _update(self, curr: Mapping[HpScene, _Value]) -> None:
@@ -98,8 +107,7 @@ class HpUseCase(Generic[_Value]):
         command = curr.get(HpScene.COMMAND)
         if command is not None:
             self._current = command
-            if self._command_event_requested:
-                self._command_event_requested = False
+            if self._command_event_requested.consume():
                 self.request()
             return
 
@@ -117,15 +125,30 @@ class OpponentHpUseCase:
     def current(self) -> Optional[float]:
         return self._inner.current
 
+    @property
+    def requested(self) -> bool:
+        return self._inner.requested
+
     def request(self) -> None:
         self._inner.request()
 
     def request_next_command(self) -> None:
         self._inner.request_next_command()
 
+    def answer(self) -> OpponentHpNotification:
+        """映像を待たずに, 直近に読み取った HP を通知する."""
+        return OpponentHpNotification(ratio=self.current)
+
     # HACK no async
-    async def handle(self, image: MatLike) -> Optional[OpponentHpNotification]:
-        n = self._inner.handle(recognize_opponent_hps(image))
+    async def handle(
+        self,
+        image: MatLike,
+        hps: Optional[OpponentHpMap] = None,
+    ) -> Optional[OpponentHpNotification]:
+        """認識済みの相手 HP が与えられたときは, 画像から認識し直さない."""
+        if hps is None:
+            hps = recognize_opponent_hps(image)
+        n = self._inner.handle(hps)
         return None if n is None else OpponentHpNotification(ratio=n.value)
 
     @staticmethod
@@ -139,6 +162,10 @@ class AllyHpUseCase:
         self._reader = reader
         self._inner = inner
 
+    @property
+    def requested(self) -> bool:
+        return self._inner.requested
+
     def request(self) -> None:
         self._inner.request()
 
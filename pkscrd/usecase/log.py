@@ -17,8 +17,11 @@ class LogUseCase:
         self,
         scene: ImageScene,
         image: MatLike,
+        general_log_box: Optional[bool] = None,
     ) -> Optional[LogNotification]:
-        log = self._stabilizer.handle(await self._reader.read(scene, image))
+        log = self._stabilizer.handle(
+            await self._reader.read(scene, image, general_log_box)
+        )
         return LogNotification(lines=log.lines) if log else None
 
     @staticmethod
@@ -5,24 +5,24 @@ import cv2.typing
 from pkscrd.core.move.service import MoveReader
 from pkscrd.core.notification.model import MovesNotification
 from pkscrd.core.scene.model import ImageScene
+from .request import RequestFlag
 
 
 class MoveUseCase:
 
     def __init__(self, reader: MoveReader) -> None:
         self._reader = reader
-        self._requested = False
+        self._requested = RequestFlag()
 
     def request(self) -> None:
-        self._requested = True
+        self._requested.set()
 
     async def handle(
         self,
         scene: ImageScene,
         image: cv2.typing.MatLike,
     ) -> Optional[MovesNotification]:
-        if not self._requested:
+        if not self._requested.consume():
             return None
-        self._requested = False
 
         return MovesNotification(items=await self._reader.read(scene, image))
@@ -0,0 +1,30 @@
+import threading
+
+
+class RequestFlag:
+    """
+    処理の要求を表すフラグ.
+
+    要求する側 (画面など) と処理する側 (映像を処理するスレッドプールなど) が別スレッドでもよい.
+    確認と取り下げを不可分に行うので, 要求は取りこぼされず, 1 度だけ処理される.
+    GIL のない CPython でも正しく動作するよう, 状態はロックで保護する.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._set = False
+
+    @property
+    def is_set(self) -> bool:
+        with self._lock:
+            return self._set
+
+    def set(self) -> None:
+        with self._lock:
+            self._set = True
+
+    def consume(self) -> bool:
+        """要求があれば取り下げて True を返す. なければ False を返す."""
+        with self._lock:
+            requested, self._set = self._set, False
+            return requested
@@ -8,6 +8,7 @@ from cv2.typing import MatLike
 from loguru import logger
 
 from pkscrd.core.notification.model import ScreenshotNotification
+from .request import RequestFlag
 
 
 class ScreenshotUseCase:
@@ -21,17 +22,16 @@ class ScreenshotUseCase:
         self._buffers: deque[tuple[datetime, MatLike]] = deque(maxlen=buffer_size)
         self._dir_path = dir_path
 
-        self._saving_requested = False
+        self._saving_requested = RequestFlag()
 
     def request_saving(self) -> None:
-        self._saving_requested = True
+        self._saving_requested.set()
 
     def handle(self, image: MatLike) -> Optional[ScreenshotNotification]:
         self._buffers.append((datetime.now(), image))
 
-        if not self._saving_requested:
+        if not self._saving_requested.consume():
             return None
-        self._saving_requested = False
 
         succeeded = all(
             save_image(image, timestamp, dir_path=self._dir_path)
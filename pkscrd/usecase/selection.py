@@ -7,6 +7,7 @@ from pnlib.selection import recognize_selection
 from pkscrd.core.notification.model import SelectionNotification, SelectionItem
 from pkscrd.core.scene.model import ImageScene
 from pkscrd.core.selection.service import hidden_partially
+from .request import RequestFlag
 from .team import TeamUseCase
 
 
@@ -16,10 +17,10 @@ class SelectionUseCase:
         self._ally_team = ally_team
 
         self._buffer: deque[list[Optional[int]]] = deque(maxlen=3)
-        self._requested = False
+        self._requested = RequestFlag()
 
     def request(self) -> None:
-        self._requested = True
+        self._requested.set()
 
     def handle(
         self,
@@ -35,9 +36,8 @@ class SelectionUseCase:
             if not current or not hidden_partially(current, selections):
                 self._buffer.append(selections)
 
-        if not self._requested:
+        if not self._requested.consume():
             return None
-        self._requested = False
         team = self._ally_team.current
         return SelectionNotification(
             items=[
@@ -6,6 +6,7 @@ from pnlib.pkmn import recognize_ally_team_for_selection, recognize_opponent_tea
 from pkscrd.core.notification.model import TeamDirection, TeamNotification
 from pkscrd.core.pokemon.model import PokemonId, Team
 from pkscrd.core.scene.model import ImageScene
+from .request import RequestFlag
 
 type MapFunc = Callable[
     [Callable[[MatLike], Optional[tuple[int, int]]], Iterable[int]],
@@ -32,8 +33,8 @@ class TeamUseCase:
         self._uses_auto_notification = uses_auto_notification
 
         self._current: Team = []
-        self._requested = False
-        self._update_requested = False
+        self._requested = RequestFlag()
+        self._update_requested = RequestFlag()
         self._with_types = False
 
     @property
@@ -43,12 +44,34 @@ class TeamUseCase:
 
     def request(self, with_types: bool = False) -> None:
         """次の handle に伴う通知を要求する."""
-        self._requested = True
         self._with_types = with_types
+        self._requested.set()
+
+    def answer(
+        self,
+        image_scene: ImageScene,
+        with_types: bool = False,
+    ) -> Optional[TeamNotification]:
+        """
+        映像を待たずに現在のチームを通知する.
+        チームが表示されている画像シーンでは読み直すため, 次の handle に伴う通知を要求して None を返す.
+        """
+        if self._scene_predicate(image_scene):
+            self.request(with_types=with_types)
+            return None
+        return TeamNotification(
+            direction=self._direction,
+            team=self.current,
+            with_types=with_types,
+        )
+
+    def set_uses_auto_notification(self, uses_auto_notification: bool) -> None:
+        """チーム更新時に自動で通知するかを切り替える."""
+        self._uses_auto_notification = uses_auto_notification
 
     def request_update(self) -> None:
         """次に可能な機会でチームの更新を要求する."""
-        self._update_requested = True
+        self._update_requested.set()
 
     def handle(
         self,
@@ -59,17 +82,16 @@ class TeamUseCase:
     ) -> Optional[TeamNotification]:
         """画像シーンを前提として画像を処理する"""
         if self._scene_predicate(image_scene):
-            if self._update_requested or self._requested:
+            # 更新の要求は, 更新する前に取り下げる. 更新中の要求は次の機会に処理する.
+            updating = self._update_requested.consume()
+            if updating or self._requested.is_set:
                 self._current = list(self._recognize(image, map_func))
 
-            if self._update_requested:
-                self._update_requested = False  # 更新は済んでいるのでフラグを折る
-                if self._uses_auto_notification:
-                    self.request(with_types=self._with_types)
+            if updating and self._uses_auto_notification:
+                self.request(with_types=self._with_types)
 
-        if not self._requested:
+        if not self._requested.consume():
             return None
-        self._requested = False
         return TeamNotification(
             direction=self._direction,
             team=self.current,
@@ -1,7 +1,9 @@
 import multiprocessing
 
-from pkscrd.main import main
-
 if __name__ == "__main__":
     multiprocessing.freeze_support()
+
+    # ワーカープロセスでは GUI を読み込まないよう, ここで読み込む.
+    from pkscrd.main import main
+
     main()
@@ -0,0 +1,79 @@
+import concurrent.futures
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from cv2.typing import MatLike
+from pytest import mark
+from pytest_mock import MockerFixture
+
+from pkscrd.app.analyzer.service import analyze, initialize_worker
+from pkscrd.app.reader.controller.image import ImageRecognition
+from pkscrd.core.notification.model import Notification, ScreenshotNotification
+from pkscrd.core.scene.model import ImageScene
+from pkscrd.core.screen.infra.replay import open_recording
+from pkscrd.usecase.screenshot import save_image
+
+
+class _FakeController:
+    """受け取ったフレームと認識結果を記録し, フレームごとに 1 件通知する."""
+
+    def __init__(self) -> None:
+        self.values: list[int] = []
+        self.recognitions: list[Optional[ImageRecognition]] = []
+
+    async def handle(
+        self,
+        image: MatLike,
+        recognition: Optional[ImageRecognition] = None,
+    ) -> AsyncIterator[Notification]:
+        self.values.append(int(image[0, 0, 0]))
+        self.recognitions.append(recognition)
+        yield ScreenshotNotification(succeeded=True)
+
+
+@mark.asyncio
+class Test_analyze:
+
+    async def test_認識を並列に行い_通知を記録順に返す(
+        self,
+        tempdir: str,
+        mocker: MockerFixture,
+    ):
+        recognition = ImageRecognition(scene=ImageScene.COMMAND, opponent_hps={})
+        mocker.patch(
+            "pkscrd.app.analyzer.service.recognize_image",
+            return_value=recognition,
+        )
+        begin = datetime(2024, 1, 1)
+        for index in range(20):
+            save_image(
+                np.full((8, 8, 3), index * 10, dtype=np.uint8),
+                begin + timedelta(seconds=index / 10),
+                dir_path=tempdir,
+            )
+        controller = _FakeController()
+
+        with (
+            open_recording(tempdir) as reader,
+            concurrent.futures.ThreadPoolExecutor(
+                3,
+                initializer=initialize_worker,
+                initargs=(tempdir,),
+            ) as executor,
+        ):
+            entries = [
+                entry
+                async for entry in analyze(
+                    reader,
+                    controller,  # type: ignore[arg-type]
+                    executor,
+                    batch_size=3,
+                    prefetch_batches=2,
+                )
+            ]
+
+        assert [entry.index for entry in entries] == list(range(20))
+        assert entries[10].timestamp - entries[0].timestamp == 1.0
+        assert [round(v / 10) for v in controller.values] == list(range(20))
+        assert controller.recognitions == [recognition] * 20
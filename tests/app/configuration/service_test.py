@@ -0,0 +1,49 @@
+import dataclasses
+import os
+
+from pkscrd.app.configuration.service import save, settings_to_conf
+from pkscrd.app.settings.service import load_settings
+
+
+def _write(tempdir: str, engine: str) -> str:
+    path = os.path.join(tempdir, "settings.toml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'[screen]\nengine = "{engine}"\n\n[replay]\npath = "a.mp4"\n')
+    return path
+
+
+class Test_save:
+
+    def test_記録の再生は変更せずに保存しても残す(self, tempdir: str):
+        path = _write(tempdir, "replay")
+        shown = settings_to_conf(load_settings(path))
+
+        save(shown, path, shown=shown)
+
+        settings = load_settings(path)
+        assert settings.screen.engine == "replay"
+        assert settings.replay and settings.replay.path == "a.mp4"
+
+    def test_記録の再生から別の取得方法を選ぶと書き換える(self, tempdir: str):
+        path = _write(tempdir, "replay")
+        shown = settings_to_conf(load_settings(path))
+        output = dataclasses.replace(
+            shown,
+            screen=dataclasses.replace(shown.screen, engine="capture-device"),
+        )
+
+        save(output, path, shown=shown)
+
+        assert load_settings(path).screen.engine == "capture-device"
+
+    def test_記録の再生でなければ表示した値を書き込む(self, tempdir: str):
+        path = _write(tempdir, "capture-device")
+        loaded = settings_to_conf(load_settings(path))
+        shown = dataclasses.replace(
+            loaded,
+            screen=dataclasses.replace(loaded.screen, engine="obs"),
+        )
+
+        save(shown, path, shown=shown)
+
+        assert load_settings(path).screen.engine == "obs"
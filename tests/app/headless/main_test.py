@@ -0,0 +1,26 @@
+import io
+from unittest.mock import NonCallableMock, call
+
+from pkscrd.app.headless.main import _receive
+from pkscrd.app.headless.service import HeadlessReader
+
+
+class Test_receive:
+
+    def test_命令を要求に変換し_終わりに達したら止める(self):
+        reader = NonCallableMock(HeadlessReader)
+
+        _receive(reader, io.StringIO("opponent_hp\n\nopponent_team_types\nunknown\n"))
+
+        assert reader.mock_calls == [
+            call.request_opponent_hp(),
+            call.request_opponent_team(with_types=True),
+            call.stop(),
+        ]
+
+    def test_quit_を受け取ったら残りを読まずに止める(self):
+        reader = NonCallableMock(HeadlessReader)
+
+        _receive(reader, io.StringIO("ally\nquit\nmove\n"))
+
+        assert reader.mock_calls == [call.request_ally_hp(), call.stop()]
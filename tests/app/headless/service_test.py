@@ -0,0 +1,122 @@
+import functools
+import queue
+
+import numpy as np
+from pytest import mark, raises
+from pytest_mock import MockerFixture
+
+from pkscrd.app.headless import HeadlessReader
+from pkscrd.app.reader.controller.command import Command, CommandChannel
+from pkscrd.app.settings.model import Settings
+from pkscrd.core.notification.model import (
+    OpponentHpNotification,
+    ScreenshotNotification,
+)
+from pkscrd.core.tolerance.model import FatalError
+
+
+class _FakeAgent:
+    """命令ごとに通知し, 与えられた映像ごとにスクリーンショットを通知する."""
+
+    def __init__(self, notifier, fetcher, fails: bool) -> None:
+        self.commands = CommandChannel()
+        self._notifier = notifier
+        self._fetcher = fetcher
+        self._fails = fails
+        self._stopped = False
+
+    def stop(self) -> None:
+        self._stopped = True
+        self.commands.send(Command.WAKE)
+
+    async def __call__(self) -> None:
+        self.commands.open()
+        while not self._stopped:
+            for command in self.commands.receive():
+                if command is Command.OPPONENT_HP:
+                    self._notifier.notify(OpponentHpNotification(ratio=0.5))
+            if (
+                self._fetcher
+                and (await self._fetcher.fetch()).value_or(None) is not None
+            ):
+                self._notifier.notify(ScreenshotNotification(succeeded=True))
+            if self._fails:
+                raise FatalError()
+            await self.commands.wait(0.01)
+
+
+class _FakePipeline:
+
+    def __init__(
+        self, settings, notifier, *, screen_fetcher=None, fails=False, **kwargs
+    ) -> None:
+        self._agent = _FakeAgent(notifier, screen_fetcher, fails)
+        self.errors: queue.Queue[str] = queue.Queue()
+        self.exited = False
+
+    async def __aenter__(self):
+        return self._agent
+
+    async def __aexit__(self, *args) -> bool:
+        self.exited = True
+        return False
+
+
+@mark.asyncio
+class TestHeadlessReader:
+
+    async def test_要求に応じた通知を返し_止めると終わる(self, mocker: MockerFixture):
+        mocker.patch("pkscrd.app.headless.service.ReaderPipeline", _FakePipeline)
+
+        async with HeadlessReader(Settings()) as sut:
+            sut.request_opponent_hp()
+            notifications = []
+            async for notification in sut.notifications():
+                notifications.append(notification)
+                sut.stop()
+
+        assert notifications == [OpponentHpNotification(ratio=0.5)]
+
+    async def test_与えた映像を処理する(self, mocker: MockerFixture):
+        mocker.patch("pkscrd.app.headless.service.ReaderPipeline", _FakePipeline)
+
+        async with HeadlessReader(Settings(), pushes_frames=True) as sut:
+            sut.push_frame(np.zeros((540, 960, 3), dtype=np.uint8))
+            notification = await anext(sut.notifications())
+            sut.stop()
+
+        assert notification == ScreenshotNotification(succeeded=True)
+
+    async def test_縦横比が異なる映像は受け付けない(self, mocker: MockerFixture):
+        mocker.patch("pkscrd.app.headless.service.ReaderPipeline", _FakePipeline)
+
+        async with HeadlessReader(Settings(), pushes_frames=True) as sut:
+            with raises(ValueError):
+                sut.push_frame(np.zeros((480, 640, 3), dtype=np.uint8))
+            sut.stop()
+
+    async def test_映像を与えない設定では映像を受け付けない(
+        self, mocker: MockerFixture
+    ):
+        mocker.patch("pkscrd.app.headless.service.ReaderPipeline", _FakePipeline)
+
+        async with HeadlessReader(Settings()) as sut:
+            with raises(RuntimeError):
+                sut.push_frame(np.zeros((1, 1, 3), dtype=np.uint8))
+            sut.stop()
+
+    async def test_致命的なエラーで止まると通知の後に送出する(
+        self, mocker: MockerFixture
+    ):
+        mocker.patch(
+            "pkscrd.app.headless.service.ReaderPipeline",
+            functools.partial(_FakePipeline, fails=True),
+        )
+
+        async with HeadlessReader(Settings()) as sut:
+            with raises(FatalError):
+                async for _ in sut.notifications():
+                    pass
+            # 止まった後に再び呼び出しても, 待たずに送出する.
+            with raises(FatalError):
+                await anext(sut.notifications())
@@ -0,0 +1,343 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, NonCallableMock, sentinel
+
+import numpy as np
+from pytest import mark, raises
+from returns.result import Failure, Success
+
+from pkscrd.app.reader.agent import ImageProcess, ImageProcessAgent
+from pkscrd.app.reader.controller.command import Command, CommandChannel
+from pkscrd.app.reader.controller.image import ImageController
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.flight.model import DumpReason
+from pkscrd.core.flight.service import FlightRecorder, RecordingMetrics
+from pkscrd.core.metrics.service import MetricsRegistry, NullMetrics
+from pkscrd.core.metrics.trace import Hop, Tracer
+from pkscrd.core.notification.service import NotificationPublisher, Notifier
+from pkscrd.core.scene.model import ImageScene, Scene
+from pkscrd.core.screen.service import ScreenFetcher
+from pkscrd.core.tolerance.model import FatalError
+
+
+def _controller(*notifications: object) -> ImageController:
+    async def handle(image, recognition=None, *, deadline=None, only=None):
+        for notification in notifications:
+            yield notification
+
+    return NonCallableMock(ImageController, handle=handle)
+
+
+@mark.asyncio
+class TestImageProcess:
+
+    async def test_処理段階ごとの処理時間と回数を計測する(self):
+        image = np.zeros((1, 1, 3), dtype=np.uint8)
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        fetcher.fetch.side_effect = [Success(image), Failure(RuntimeError())]
+        notifier = NonCallableMock(Notifier, notify=Mock())
+        metrics = MetricsRegistry()
+        sut = ImageProcess(
+            fetcher,
+            _controller(sentinel.n1, sentinel.n2),
+            notifier,
+            metrics=metrics,
+        )
+
+        await sut()
+        await sut()
+
+        snapshot = metrics.snapshot()
+        assert [snapshot.stage(s).count for s in (Stage.FRAME, Stage.FETCH)] == [2, 2]
+        assert snapshot.stage(Stage.NOTIFICATION).count == 2
+        assert snapshot.counters == {
+            ("frames_total", ()): 1,
+            ("fetch_failures_total", ()): 1,
+            ("notifications_total", ()): 2,
+        }
+        assert notifier.notify.call_count == 2
+
+    async def test_通知ごとに映像の取得時刻を起点とする追跡を始める(self):
+        image = np.zeros((1, 1, 3), dtype=np.uint8)
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        fetcher.fetch.return_value = Success(image)
+        notifier = NonCallableMock(Notifier, notify=Mock())
+        sut = ImageProcess(
+            fetcher,
+            _controller(1, "a"),
+            notifier,
+            tracer=Tracer(MetricsRegistry()),
+        )
+
+        await sut()
+        await sut()
+
+        traces = [c.args[1] for c in notifier.notify.call_args_list]
+        assert [(t.sequence, t.kind) for t in traces] == [
+            (1, "int"),
+            (1, "str"),
+            (2, "int"),
+            (2, "str"),
+        ]
+        assert traces[0].captured_at == traces[1].captured_at
+        assert traces[1].captured_at < traces[2].captured_at
+        assert [hop for hop, _ in traces[0].spans] == [Hop.RECOGNIZED]
+
+    async def test_フレームごとに処理内容をフライトレコーダに記録する(self):
+        image = np.zeros((1, 1, 3), dtype=np.uint8)
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        fetcher.fetch.side_effect = [Success(image), Failure(RuntimeError())]
+        recorder = FlightRecorder(Mock())
+        sut = ImageProcess(
+            fetcher,
+            _controller("a"),
+            NonCallableMock(Notifier, notify=Mock()),
+            metrics=RecordingMetrics(NullMetrics(), recorder),
+            flight_recorder=recorder,
+        )
+
+        await sut()
+        await sut()
+
+        first, second = recorder.records
+        assert (first.sequence, second.sequence) == (1, 2)
+        assert first.notifications == ["'a'"]
+        assert [stage for stage, _ in first.stages] == [
+            "fetch",
+            "notification",
+            "frame",
+        ]
+        assert second.duration is not None
+
+    async def test_休止中は画像のシーンだけを調べる(self):
+        image = np.zeros((1, 1, 3), dtype=np.uint8)
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        fetcher.fetch.side_effect = [Success(image), Failure(RuntimeError())]
+        controller = _controller()
+        controller.probe = Mock(return_value=ImageScene.LOBBY)
+        metrics = MetricsRegistry()
+        sut = ImageProcess(fetcher, controller, Mock(Notifier), metrics=metrics)
+
+        assert await sut.probe() is ImageScene.LOBBY
+        assert await sut.probe() is None
+
+        controller.probe.assert_called_once_with(image)
+        assert metrics.snapshot().counters == {
+            ("probes_total", ()): 1,
+            ("fetch_failures_total", ()): 1,
+        }
+
+    async def test_配信先には映像の取得時刻とともに通知を渡す(self):
+        image = np.zeros((1, 1, 3), dtype=np.uint8)
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        fetcher.fetch.return_value = Success(image)
+        publisher = NonCallableMock(NotificationPublisher, publish=Mock())
+        sut = ImageProcess(
+            fetcher,
+            _controller(sentinel.n1),
+            NonCallableMock(Notifier, notify=Mock()),
+            publisher=publisher,
+        )
+
+        began_at = time.time()
+        await sut()
+
+        ((notification, captured_at),) = [c.args for c in publisher.publish.mock_calls]
+        assert notification is sentinel.n1
+        assert began_at - 0.01 <= captured_at <= time.time()
+
+    async def test_既知の状態から答えられる命令は映像を待たずに通知する(self):
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        controller = _controller()
+        controller.answer = Mock(return_value=sentinel.answer)
+        notifier = NonCallableMock(Notifier, notify=Mock())
+        sut = ImageProcess(fetcher, controller, notifier)
+
+        assert not await sut.execute([Command.WAKE, Command.OPPONENT_HP])
+
+        controller.answer.assert_called_once_with(Command.OPPONENT_HP)
+        notifier.notify.assert_called_once_with(sentinel.answer, None)
+        fetcher.fetch.assert_not_called()
+
+    async def test_答えられない命令は必要な検出処理だけで映像を処理する(self):
+        image = np.zeros((1, 1, 3), dtype=np.uint8)
+        fetcher = NonCallableMock(ScreenFetcher, fetch=AsyncMock())
+        fetcher.fetch.return_value = Success(image)
+        handled: list[object] = []
+
+        async def handle(image, recognition=None, *, deadline=None, only=None):
+            handled.append(only)
+            yield sentinel.moves
+
+        controller = NonCallableMock(ImageController, handle=handle)
+        controller.answer = Mock(return_value=None)
+        notifier = NonCallableMock(Notifier, notify=Mock())
+        sut = ImageProcess(fetcher, controller, notifier)
+
+        assert await sut.execute([Command.MOVE, Command.SCREENSHOT])
+
+        assert handled == [frozenset({"move"})]
+        notifier.notify.assert_called_once_with(sentinel.moves, None)
+
+
+@mark.asyncio
+class TestImageProcessAgent:
+
+    async def test_命令が届くと待機を解いてすぐに実行する(self):
+        channel = CommandChannel()
+        process = AsyncMock(ImageProcess)
+        process.scene = Scene.COMMAND
+        process.execute.return_value = True
+        sut = ImageProcessAgent(process, interval_in_seconds=60, commands=channel)
+
+        async def send_later() -> None:
+            while not process.called:
+                await asyncio.sleep(0.001)
+            await asyncio.to_thread(channel.send, Command.CURSOR)
+
+        async def execute(commands: list[Command]) -> bool:
+            sut.stop()
+            return True
+
+        process.execute.side_effect = execute
+
+        await asyncio.wait_for(asyncio.gather(sut(), send_later()), 5)
+
+        process.execute.assert_called_once_with([Command.CURSOR])
+        assert process.call_count == 1
+
+    async def test_対戦外の場面が続くと休止し_選出の場面が現れると戻る(self):
+        calls: list[str] = []
+        process = AsyncMock(ImageProcess)
+        process.scene = Scene.LOBBY
+        sut = ImageProcessAgent(
+            process,
+            interval_in_seconds=0.001,
+            idle_after_in_seconds=0.01,
+            idle_interval_in_seconds=0.001,
+        )
+
+        async def process_fully() -> None:
+            if "probe" in calls:
+                sut.stop()
+            calls.append("full")
+
+        async def probe() -> ImageScene:
+            calls.append("probe")
+            if calls.count("probe") < 3:
+                return ImageScene.LOBBY
+            return ImageScene.SELECTION
+
+        process.side_effect = process_fully
+        process.probe.side_effect = probe
+
+        await asyncio.wait_for(sut(), 5)
+
+        assert calls[-4:] == ["probe", "probe", "probe", "full"]
+        assert "probe" not in calls[: calls.index("probe")]
+        assert not sut.idle
+
+    async def test_休止中に起こされるとすぐに元の間隔に戻る(self):
+        woken = threading.Event()
+        process = AsyncMock(ImageProcess)
+        process.scene = Scene.UNKNOWN
+        sut = ImageProcessAgent(
+            process,
+            interval_in_seconds=0.001,
+            idle_after_in_seconds=0.01,
+            idle_interval_in_seconds=60,
+        )
+
+        async def process_fully() -> None:
+            if woken.is_set():
+                sut.stop()
+
+        async def wake_when_idle() -> None:
+            while not sut.idle:
+                await asyncio.sleep(0.001)
+            woken.set()
+            # 画面のキー操作を模して, 別スレッドから起こす.
+            await asyncio.to_thread(sut.wake)
+
+        process.side_effect = process_fully
+
+        await asyncio.wait_for(asyncio.gather(sut(), wake_when_idle()), 5)
+
+        process.probe.assert_not_called()
+        assert not sut.idle
+
+    async def test_対戦中の場面では休止しない(self):
+        process = AsyncMock(ImageProcess)
+        process.scene = Scene.COMMAND
+        sut = ImageProcessAgent(
+            process,
+            interval_in_seconds=0.001,
+            idle_after_in_seconds=0.001,
+        )
+
+        async def process_fully() -> None:
+            if process.call_count >= 20:
+                sut.stop()
+
+        process.side_effect = process_fully
+
+        await asyncio.wait_for(sut(), 5)
+
+        process.probe.assert_not_called()
+
+    async def test_指示の場面に続く不明な場面では休止しない(self):
+        process = AsyncMock(ImageProcess)
+        process.scene = Scene.COMMAND
+        sut = ImageProcessAgent(
+            process,
+            interval_in_seconds=0.001,
+            idle_after_in_seconds=0.001,
+        )
+
+        async def process_fully() -> None:
+            # 技の演出などで, 指示の場面の後に不明な場面が長く続く.
+            process.scene = Scene.COMMAND if process.call_count == 1 else Scene.UNKNOWN
+            if process.call_count >= 50:
+                sut.stop()
+
+        process.side_effect = process_fully
+
+        await asyncio.wait_for(sut(), 5)
+
+        process.probe.assert_not_called()
+        assert not sut.idle
+
+    async def test_ロビーに続く不明な場面では休止する(self):
+        process = AsyncMock(ImageProcess)
+        process.scene = Scene.COMMAND
+        sut = ImageProcessAgent(
+            process,
+            interval_in_seconds=0.001,
+            idle_after_in_seconds=0.01,
+            idle_interval_in_seconds=0.001,
+        )
+
+        async def process_fully() -> None:
+            process.scene = [Scene.LOBBY, Scene.UNKNOWN][process.call_count % 2]
+
+        async def probe() -> ImageScene:
+            sut.stop()
+            return ImageScene.UNKNOWN
+
+        process.side_effect = process_fully
+        process.probe.side_effect = probe
+
+        await asyncio.wait_for(sut(), 5)
+
+        assert sut.idle
+
+    async def test_致命的なエラーではフライトレコーダを書き出す(self):
+        process = AsyncMock(ImageProcess, side_effect=FatalError())
+        recorder = NonCallableMock(FlightRecorder)
+        sut = ImageProcessAgent(process, flight_recorder=recorder)
+
+        with raises(FatalError):
+            await sut()
+
+        recorder.dump.assert_called_once_with(DumpReason.FATAL, wait=True)
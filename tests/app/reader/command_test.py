@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+from pytest import mark
+
+from pkscrd.app.reader.controller.command import Command, CommandChannel
+
+
+class TestCommand:
+
+    def test_映像から答えるときに必要な検出処理(self):
+        assert Command.OPPONENT_HP.detectors == frozenset({"opponent_hp"})
+        assert Command.ALLY.detectors == frozenset({"selection", "ally_hp"})
+        assert Command.OPPONENT_TEAM.detectors == frozenset()
+
+
+@mark.asyncio
+class TestCommandChannel:
+
+    async def test_届いた順にすべて取り出す(self):
+        sut = CommandChannel()
+        sut.open()
+
+        sut.send(Command.MOVE)
+        sut.send(Command.CURSOR)
+
+        assert await sut.wait(0)
+        assert sut.receive() == [Command.MOVE, Command.CURSOR]
+        assert sut.receive() == []
+        assert not await sut.wait(0.001)
+
+    async def test_別スレッドから送ると待機がすぐに解ける(self):
+        sut = CommandChannel()
+        sut.open()
+        loop = asyncio.get_running_loop()
+
+        thread = threading.Thread(target=sut.send, args=(Command.OPPONENT_HP,))
+        loop.call_later(0.01, thread.start)
+        started = loop.time()
+
+        assert await sut.wait(60)
+        assert loop.time() - started < 10
+        assert sut.receive() == [Command.OPPONENT_HP]
+        thread.join()
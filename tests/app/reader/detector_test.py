@@ -0,0 +1,207 @@
+from pytest import mark
+
+from pkscrd.app.reader.controller.detector import (
+    ALLY_HP,
+    LOG,
+    MOVE,
+    OPPONENT_HP,
+    SKIPS_TOTAL,
+    Detector,
+    DetectorScheduler,
+    DetectorSpec,
+)
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import MetricsRegistry
+from pkscrd.core.scene.model import ImageScene, Scene, SceneGroup
+
+
+async def _handle(scene, image, recognition):
+    return None
+
+
+def _names(detectors: list[Detector]) -> list[str]:
+    return [d.spec.name for d in detectors]
+
+
+class TestDetectorSpec:
+
+    def test_画像のシーンかシーンの分類が含まれれば処理する(self):
+        sut = DetectorSpec(
+            "hp",
+            Stage.ALLY_HP,
+            frozenset({ImageScene.UNKNOWN, SceneGroup.COMMAND}),
+        )
+
+        assert sut.applies_to(ImageScene.UNKNOWN, Scene.SELECTION)
+        assert sut.applies_to(ImageScene.LOBBY, Scene.COMMAND_MOVE)
+        assert not sut.applies_to(ImageScene.SELECTION, Scene.SELECTION)
+
+    def test_選出画面ではHPとログを読み取らない(self):
+        for spec in (OPPONENT_HP, ALLY_HP, LOG):
+            assert not spec.applies_to(ImageScene.SELECTION, Scene.SELECTION)
+            assert spec.applies_to(ImageScene.UNKNOWN, Scene.COMMAND)
+        assert MOVE.applies_to(ImageScene.SELECTION, Scene.SELECTION)
+
+
+class TestDetectorScheduler:
+
+    def test_条件を満たす処理を優先度順に選ぶ(self):
+        metrics = MetricsRegistry()
+        sut = DetectorScheduler(
+            [
+                Detector(DetectorSpec("log", Stage.LOG, every=2, priority=2), _handle),
+                Detector(
+                    DetectorSpec(
+                        "hp", Stage.ALLY_HP, frozenset({SceneGroup.COMMAND}), priority=1
+                    ),
+                    _handle,
+                ),
+                Detector(DetectorSpec("move", Stage.MOVE), _handle),
+            ],
+            metrics,
+        )
+
+        frames = [
+            _names(sut.select(ImageScene.UNKNOWN, scene))
+            for scene in (
+                Scene.COMMAND,
+                Scene.COMMAND,
+                Scene.SELECTION,
+                Scene.SELECTION,
+            )
+        ]
+
+        assert frames == [
+            ["move", "hp", "log"],
+            ["move", "hp"],
+            ["move", "log"],
+            ["move"],
+        ]
+        assert metrics.snapshot().counters == {
+            (SKIPS_TOTAL, (("detector", "log"), ("reason", "rate"))): 2,
+            (SKIPS_TOTAL, (("detector", "hp"), ("reason", "scene"))): 2,
+        }
+
+    def test_要求が保留されていれば条件によらず処理する(self):
+        requested = [True]
+        sut = DetectorScheduler(
+            [
+                Detector(
+                    DetectorSpec("hp", Stage.ALLY_HP, frozenset(), every=10),
+                    _handle,
+                    lambda: requested[0],
+                )
+            ]
+        )
+
+        assert _names(sut.select(ImageScene.SELECTION, Scene.SELECTION)) == ["hp"]
+        assert _names(sut.select(ImageScene.SELECTION, Scene.SELECTION)) == ["hp"]
+        requested[0] = False
+        assert _names(sut.select(ImageScene.UNKNOWN, Scene.COMMAND)) == []
+
+    def test_名前を指定すると_それ以外の処理を飛ばす(self):
+        metrics = MetricsRegistry()
+        sut = DetectorScheduler(
+            [
+                Detector(DetectorSpec("move", Stage.MOVE), _handle),
+                Detector(DetectorSpec("cursor", Stage.CURSOR), _handle, lambda: True),
+            ],
+            metrics,
+        )
+
+        selected = sut.select(
+            ImageScene.COMMAND, Scene.COMMAND, only=frozenset({"move"})
+        )
+
+        assert _names(selected) == ["move"]
+        assert metrics.snapshot().counters == {
+            (SKIPS_TOTAL, (("detector", "cursor"), ("reason", "command"))): 1,
+        }
+
+
+class _Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _timed(clock: _Clock, seconds: float):
+    async def handle(scene, image, recognition):
+        clock.now += seconds
+        return None
+
+    return handle
+
+
+@mark.asyncio
+class TestDetectorSchedulerBudget:
+
+    async def test_期限を超えそうなら後回しにできる処理を次のフレームへ回す(self):
+        clock = _Clock()
+        metrics = MetricsRegistry()
+        hp = Detector(DetectorSpec("hp", Stage.OPPONENT_HP), _timed(clock, 0.01))
+        log = Detector(
+            DetectorSpec("log", Stage.LOG, priority=1, optional=True),
+            _timed(clock, 0.05),
+        )
+        sut = DetectorScheduler([hp, log], metrics, clock=clock)
+
+        # 初回は見積もりがないため, すべて行って処理時間を学習する.
+        for d in sut.select(ImageScene.UNKNOWN, Scene.COMMAND, deadline=0.03):
+            await sut.run(d, ImageScene.UNKNOWN, None, None)
+        assert (sut.cost("hp"), sut.cost("log")) == (0.01, 0.05)
+
+        clock.now = 0.0
+        assert _names(sut.select(ImageScene.UNKNOWN, Scene.COMMAND, 0.03)) == ["hp"]
+        # 期限に余裕があれば, 後回しにした処理を行う.
+        assert _names(sut.select(ImageScene.UNKNOWN, Scene.COMMAND, 0.1)) == [
+            "hp",
+            "log",
+        ]
+        assert metrics.snapshot().counters == {
+            (SKIPS_TOTAL, (("detector", "log"), ("reason", "budget"))): 1,
+        }
+
+    async def test_後回しが続いた処理は期限を超えても行う(self):
+        clock = _Clock()
+        log = Detector(
+            DetectorSpec("log", Stage.LOG, optional=True), _timed(clock, 0.05)
+        )
+        sut = DetectorScheduler([log], max_deferrals=2, clock=clock)
+        await sut.run(log, ImageScene.UNKNOWN, None, None)
+
+        frames = [
+            _names(sut.select(ImageScene.UNKNOWN, Scene.COMMAND, 0.0)) for _ in range(4)
+        ]
+        assert frames == [[], [], ["log"], []]
+
+    async def test_後回しが続いたら1度だけ知らせる(self):
+        clock = _Clock()
+        log = Detector(
+            DetectorSpec("log", Stage.LOG, optional=True), _timed(clock, 0.05)
+        )
+        sut = DetectorScheduler(
+            [log], max_deferrals=100, overload_window=4, clock=clock
+        )
+        await sut.run(log, ImageScene.UNKNOWN, None, None)
+
+        polls = []
+        for deadline in (0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.0):
+            sut.select(ImageScene.UNKNOWN, Scene.COMMAND, deadline)
+            polls.append(sut.poll_overload())
+
+        assert polls == [
+            False,
+            True,
+            False,
+            False,
+            False,
+            False,
+            False,
+            False,
+            False,
+            True,
+        ]
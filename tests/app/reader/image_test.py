@@ -0,0 +1,110 @@
+from unittest.mock import AsyncMock, Mock, NonCallableMock, sentinel
+
+import numpy as np
+from pytest import mark
+from pytest_mock import MockerFixture
+
+from pkscrd.app.reader.controller.image import ImageController, ImageRecognition
+from pkscrd.core.scene.model import ImageScene
+from pkscrd.usecase.ally import AllyUseCase
+from pkscrd.usecase.cursor import CursorUseCase
+from pkscrd.usecase.hp import AllyHpUseCase, OpponentHpUseCase
+from pkscrd.usecase.log import LogUseCase
+from pkscrd.usecase.move import MoveUseCase
+from pkscrd.usecase.scene import SceneUseCase
+from pkscrd.usecase.screenshot import ScreenshotUseCase
+from pkscrd.usecase.selection import SelectionUseCase
+from pkscrd.usecase.team import TeamUseCase
+
+_IMAGE = np.zeros((1, 1, 3), dtype=np.uint8)
+
+
+def _controller(opponent_hp: OpponentHpUseCase, log: LogUseCase) -> ImageController:
+    return ImageController(
+        scene=NonCallableMock(SceneUseCase, handle=Mock(return_value=[])),
+        ally=NonCallableMock(AllyUseCase),
+        opponent_team=NonCallableMock(TeamUseCase, handle=Mock(return_value=None)),
+        ally_team=NonCallableMock(TeamUseCase, handle=Mock(return_value=None)),
+        selection=NonCallableMock(SelectionUseCase, handle=Mock(return_value=None)),
+        opponent_hp=opponent_hp,
+        ally_hp=NonCallableMock(AllyHpUseCase, handle=AsyncMock(), requested=False),
+        move=NonCallableMock(MoveUseCase, handle=AsyncMock(return_value=None)),
+        cursor=NonCallableMock(CursorUseCase, handle=AsyncMock(return_value=None)),
+        screenshot=NonCallableMock(ScreenshotUseCase, handle=Mock(return_value=None)),
+        log=log,
+    )
+
+
+@mark.asyncio
+class TestImageController:
+
+    async def _handle(self, sut: ImageController, **kwargs) -> None:
+        async for _ in sut.handle(_IMAGE, **kwargs):
+            pass
+
+    async def test_選出画面では相手HPと汎用ログ表示欄を認識しない(
+        self, mocker: MockerFixture
+    ):
+        patched = "pkscrd.app.reader.controller.image"
+        mocker.patch(
+            f"{patched}.recognize_image_scene", return_value=ImageScene.SELECTION
+        )
+        hps = mocker.patch(f"{patched}.recognize_opponent_hps")
+        log_box = mocker.patch(f"{patched}.recognize_general_log_box")
+        opponent_hp = NonCallableMock(
+            OpponentHpUseCase, handle=AsyncMock(return_value=None), requested=False
+        )
+        log = NonCallableMock(LogUseCase, handle=AsyncMock(return_value=None))
+        sut = _controller(opponent_hp, log)
+
+        for _ in range(2):
+            await self._handle(sut)
+
+        hps.assert_not_called()
+        log_box.assert_not_called()
+        opponent_hp.handle.assert_not_awaited()
+        log.handle.assert_not_awaited()
+
+    async def test_指示画面では相手HPと汎用ログ表示欄を認識して渡す(
+        self, mocker: MockerFixture
+    ):
+        patched = "pkscrd.app.reader.controller.image"
+        mocker.patch(
+            f"{patched}.recognize_image_scene", return_value=ImageScene.COMMAND
+        )
+        mocker.patch(f"{patched}.recognize_opponent_hps", return_value=sentinel.hps)
+        mocker.patch(f"{patched}.recognize_general_log_box", return_value=False)
+        opponent_hp = NonCallableMock(
+            OpponentHpUseCase, handle=AsyncMock(return_value=None), requested=False
+        )
+        log = NonCallableMock(LogUseCase, handle=AsyncMock(return_value=None))
+        sut = _controller(opponent_hp, log)
+
+        await self._handle(sut)
+
+        opponent_hp.handle.assert_awaited_once_with(_IMAGE, sentinel.hps)
+        log.handle.assert_awaited_once_with(ImageScene.COMMAND, _IMAGE, False)
+
+    async def test_認識結果が与えられたときは認識し直さない(
+        self, mocker: MockerFixture
+    ):
+        patched = "pkscrd.app.reader.controller.image"
+        scene = mocker.patch(f"{patched}.recognize_image_scene")
+        hps = mocker.patch(f"{patched}.recognize_opponent_hps")
+        log_box = mocker.patch(f"{patched}.recognize_general_log_box")
+        opponent_hp = NonCallableMock(
+            OpponentHpUseCase, handle=AsyncMock(return_value=None), requested=False
+        )
+        log = NonCallableMock(LogUseCase, handle=AsyncMock(return_value=None))
+        sut = _controller(opponent_hp, log)
+
+        await self._handle(
+            sut,
+            recognition=ImageRecognition(ImageScene.COMMAND, sentinel.hps, True),
+        )
+
+        scene.assert_not_called()
+        hps.assert_not_called()
+        log_box.assert_not_called()
+        opponent_hp.handle.assert_awaited_once_with(_IMAGE, sentinel.hps)
+        log.handle.assert_awaited_once_with(ImageScene.COMMAND, _IMAGE, True)
@@ -0,0 +1,80 @@
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+
+from pytest import mark
+
+_needs_pnlib = mark.skipif(
+    importlib.util.find_spec("pnlib") is None,
+    reason="pnlib is not installed",
+)
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@_needs_pnlib
+def test_リーダーの読み込み時間が予算内に収まる():
+    budget = float(os.getenv("PKSCRD_IMPORT_BUDGET_SECONDS", "2.0"))
+
+    result = _run_python("-X", "importtime", "-c", "import pkscrd.app.reader")
+
+    # 各行は "import time: self [us] | cumulative | imported package" の形式.
+    cumulative = next(
+        int(match.group(1))
+        for line in result.stderr.splitlines()
+        if (
+            match := re.match(
+                r"import time:\s*\d+ \|\s*(\d+) \| pkscrd\.app\.reader$", line
+            )
+        )
+    )
+    assert cumulative / 1_000_000 < budget
+
+
+@_needs_pnlib
+def test_使用時まで読み込まないモジュールはリーダーの読み込みで読み込まれない():
+    lazy_modules = (
+        "cv2_enumerate_cameras",
+        "pkscrd.app.configuration",
+        "romajiphonem",
+        "sounddevice",
+        "tomlkit",
+        "winocr",
+    )
+    code = (
+        "import sys, pkscrd.app.reader;"
+        f" print(*(m for m in {lazy_modules!r} if m in sys.modules))"
+    )
+    assert _run_python("-c", code).stdout.strip() == ""
+
+
+@_needs_pnlib
+def test_画面を用いない処理は_Qt_を読み込まない():
+    code = (
+        "import sys, pkscrd.app.headless.main, pkscrd.app.reader.isolated,"
+        " pkscrd.app.reader.session, pkscrd.app.server.main, pkscrd.app.server.rig;"
+        " print(*(m for m in sys.modules if m.startswith('PySide6')))"
+    )
+    assert _run_python("-c", code).stdout.strip() == ""
+
+
+def test_ワーカープロセスはアプリを読み込まない():
+    # spawn されたワーカープロセスはエントリポイントを __mp_main__ として読み込む.
+    script = os.path.join(
+        os.path.dirname(__file__), "..", "..", "..", "pokescreader-sv.py"
+    )
+    code = (
+        "import runpy, sys;"
+        f" runpy.run_path({script!r}, run_name='__mp_main__');"
+        " print(*(m for m in sys.modules if m.startswith('pkscrd')))"
+    )
+    assert _run_python("-c", code).stdout.strip() == ""
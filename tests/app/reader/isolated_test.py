@@ -0,0 +1,149 @@
+import asyncio
+import os
+import queue
+from unittest.mock import Mock, call
+
+from pytest import mark, raises
+
+from pkscrd.app.reader.controller.command import Command
+from pkscrd.app.reader.isolated import (
+    ErrorMessage,
+    FailedMessage,
+    NotificationMessage,
+    ReadyMessage,
+    RecognitionSupervisor,
+    StatusMessage,
+)
+from pkscrd.app.reader.startup import Component, ComponentStatus
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import RoutineSettings
+from pkscrd.core.notification.model import OpponentHpNotification
+from pkscrd.core.tolerance.model import FatalError
+
+
+def _echo(settings_path, orders, events, debugging):
+    """
+    命令を通知として返す子プロセス. CURSOR を受け取ると異常終了し,
+    MOVE を受け取るとエラーで, SCREENSHOT を受け取ると致命的なエラーで止まる.
+    """
+    events.put(StatusMessage(Component.SCREEN, ComponentStatus.READY))
+    if settings_path == "invalid":
+        events.put(FailedMessage(SettingsError("invalid")))
+        return
+    events.put(ReadyMessage())
+    while (order := orders.get()) is not None:
+        if order is Command.CURSOR:
+            os._exit(1)
+        if order is Command.MOVE:
+            events.put(FailedMessage(RuntimeError("failed")))
+            return
+        if order is Command.SCREENSHOT:
+            events.put(FailedMessage(FatalError()))
+            return
+        if isinstance(order, RoutineSettings):
+            events.put(ErrorMessage("reconfigured"))
+            continue
+        events.put(NotificationMessage(OpponentHpNotification(ratio=0.5)))
+
+
+def _create(settings_path="settings.toml", **kwargs) -> RecognitionSupervisor:
+    return RecognitionSupervisor(
+        settings_path,
+        kwargs.pop("notifier", Mock()),
+        kwargs.pop("errors", queue.Queue()),
+        target=_echo,
+        stop_timeout_in_seconds=5,
+        **kwargs,
+    )
+
+
+@mark.asyncio
+class TestRecognitionSupervisor:
+
+    async def test_準備状況を知らせてから起動を終える(self):
+        callback = Mock()
+        with _create(startup_callback=callback) as supervisor:
+            await supervisor.start()
+            assert supervisor.pid is not None
+            assert callback.call_args_list == [
+                call(Component.SCREEN, ComponentStatus.READY)
+            ]
+            supervisor.stop()
+            await supervisor()
+
+    async def test_子プロセスで設定の誤りが見つかれば送出する(self):
+        with _create("invalid") as supervisor:
+            with raises(SettingsError):
+                await supervisor.start()
+
+    async def test_命令を送ると子プロセスからの通知を通知する(self):
+        notifier = Mock()
+        errors: queue.Queue[str] = queue.Queue()
+        with _create(notifier=notifier, errors=errors) as supervisor:
+            await supervisor.start()
+            supervisor.send(Command.OPPONENT_HP)
+            supervisor.reconfigure(RoutineSettings())
+            supervisor.stop()
+            await supervisor()
+
+        notifier.notify.assert_called_once_with(OpponentHpNotification(ratio=0.5))
+        assert errors.get_nowait() == "reconfigured"
+
+    async def test_子プロセスが異常終了すると再起動する(self):
+        notifier = Mock()
+        with _create(notifier=notifier) as supervisor:
+            await supervisor.start()
+            pid = supervisor.pid
+            supervisor.send(Command.CURSOR)
+
+            async def stop_after_restart():
+                while supervisor.restarts == 0 or supervisor.pid == pid:
+                    await asyncio.sleep(0.01)
+                supervisor.send(Command.OPPONENT_HP)
+                supervisor.stop()
+
+            await asyncio.gather(supervisor(), stop_after_restart())
+
+        assert supervisor.restarts == 1
+        notifier.notify.assert_called_once_with(OpponentHpNotification(ratio=0.5))
+
+    async def test_子プロセスがエラーで止まると再起動する(self):
+        notifier = Mock()
+        errors: queue.Queue[str] = queue.Queue()
+        with _create(notifier=notifier, errors=errors) as supervisor:
+            await supervisor.start()
+            pid = supervisor.pid
+            supervisor.send(Command.MOVE)
+
+            async def stop_after_restart():
+                while supervisor.restarts == 0 or supervisor.pid == pid:
+                    await asyncio.sleep(0.01)
+                supervisor.send(Command.OPPONENT_HP)
+                supervisor.stop()
+
+            await asyncio.gather(supervisor(), stop_after_restart())
+
+        assert supervisor.restarts == 1
+        notifier.notify.assert_called_once_with(OpponentHpNotification(ratio=0.5))
+        assert errors.empty()
+
+    async def test_致命的なエラーで止まると再起動しない(self):
+        errors: queue.Queue[str] = queue.Queue()
+        with _create(errors=errors) as supervisor:
+            await supervisor.start()
+            supervisor.send(Command.SCREENSHOT)
+            await supervisor()
+
+        assert supervisor.restarts == 0
+        assert supervisor.pid is None
+        assert errors.empty()
+
+    async def test_異常終了が続くと再起動をやめてエラーを示す(self):
+        errors: queue.Queue[str] = queue.Queue()
+        with _create(errors=errors, max_restarts=0) as supervisor:
+            await supervisor.start()
+            supervisor.send(Command.CURSOR)
+            await supervisor()
+
+        assert supervisor.pid is None
+        assert "繰り返し異常終了" in errors.get_nowait()
@@ -0,0 +1,218 @@
+import asyncio
+import contextlib
+import os
+import queue
+from typing import Optional, cast
+from unittest.mock import NonCallableMock
+
+import numpy as np
+from cv2.typing import MatLike
+from pytest import mark, raises
+from pytest_mock import MockerFixture
+
+from pkscrd.app.reader.controller.command import Command, CommandChannel
+from pkscrd.app.reader.session import ReaderSessions
+from pkscrd.app.settings.model import Settings
+from pkscrd.core.metrics.service import Metrics
+from pkscrd.core.notification.service import Notifier
+from pkscrd.core.screen.infra.replay import RecordingReader
+from pkscrd.core.screen.service.impl.replay import ReplayMode, ReplayScreenFetcher
+from pkscrd.core.tolerance.model import FatalError
+
+
+class _FakeAgent:
+    """受け取った命令を記録し, 止めるまで待つ."""
+
+    def __init__(self, fails: bool) -> None:
+        self.commands = CommandChannel()
+        self.received: list[Command] = []
+        self._fails = fails
+        self._stopped = False
+
+    def stop(self) -> None:
+        self._stopped = True
+        self.commands.send(Command.WAKE)
+
+    async def __call__(self) -> None:
+        self.commands.open()
+        while not self._stopped:
+            self.received.extend(
+                c for c in self.commands.receive() if c is not Command.WAKE
+            )
+            if self._fails:
+                raise FatalError()
+            await self.commands.wait(0.01)
+
+
+class _FakePipeline:
+
+    def __init__(
+        self,
+        settings,
+        notifier,
+        *,
+        dir_path,
+        session,
+        shared,
+        metrics,
+        **kwargs,
+    ) -> None:
+        self.settings = settings
+        self.dir_path = dir_path
+        self.shared = shared
+        self.notifier = notifier(metrics)
+        self.agent = _FakeAgent(fails=session == "fails")
+        self.errors: queue.Queue[str] = queue.Queue()
+        self.exited = False
+
+    async def __aenter__(self):
+        return self.agent
+
+    async def __aexit__(self, *args) -> bool:
+        self.exited = True
+        return False
+
+
+@contextlib.asynccontextmanager
+async def _fake_shared_engines(settings, **kwargs):
+    yield "shared"
+
+
+def _fake(sut: ReaderSessions, name: str) -> _FakePipeline:
+    return cast(_FakePipeline, sut.pipelines[name])
+
+
+def _notifier(name: str, settings: Settings, metrics: Metrics) -> Notifier:
+    return NonCallableMock(Notifier)
+
+
+class _ListReader(RecordingReader):
+
+    def __init__(self, count: int):
+        self._count = count
+
+    @property
+    def timestamps(self) -> list[float]:
+        return [i * 0.1 for i in range(self._count)]
+
+    def read(self, index: int) -> Optional[MatLike]:
+        return np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+
+def _settings(*names: str, **kwargs) -> Settings:
+    return Settings.model_validate(
+        {"sessions": [{"name": name} for name in names], **kwargs}
+    )
+
+
+@mark.asyncio
+class TestReaderSessions:
+
+    @staticmethod
+    def _patch(mocker: MockerFixture) -> None:
+        mocker.patch("pkscrd.app.reader.session.ReaderPipeline", _FakePipeline)
+        mocker.patch(
+            "pkscrd.app.reader.session.SharedEngines.create", _fake_shared_engines
+        )
+
+    async def test_セッションごとに処理を準備し_資源を共有する(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        self._patch(mocker)
+        settings = Settings.model_validate(
+            {
+                "voicevox": {"speaker": 1},
+                "sessions": [{"name": "a"}, {"name": "b", "voicevox": {"speaker": 2}}],
+            }
+        )
+        notified: list[tuple[str, int]] = []
+
+        def notifier(name, settings, metrics):
+            notified.append((name, settings.voicevox.speaker))
+            return metrics
+
+        async with ReaderSessions(settings, notifier, dir_path=tempdir) as sut:
+            assert list(sut.pipelines) == ["a", "b"]
+            assert notified == [("a", 1), ("b", 2)]
+            pipelines = [_fake(sut, name) for name in sut.pipelines]
+            for name, pipeline in zip(sut.pipelines, pipelines):
+                assert pipeline.dir_path == os.path.join(tempdir, name)
+                assert os.path.isdir(pipeline.dir_path)
+                assert pipeline.shared == "shared"
+                assert pipeline.settings.sessions == []
+
+        assert all(p.exited for p in pipelines)
+
+    async def test_要求はすべてのセッションに送る(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        self._patch(mocker)
+
+        async with ReaderSessions(
+            _settings("a", "b"), _notifier, dir_path=tempdir
+        ) as sut:
+            agents = [_fake(sut, name).agent for name in sut.pipelines]
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.02, sut.send, Command.OPPONENT_HP)
+            loop.call_later(0.1, sut.stop)
+            await sut()
+
+        assert [a.received for a in agents] == [[Command.OPPONENT_HP]] * 2
+
+    async def test_エラーで止まったセッションがあれば_他のセッションも止める(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        self._patch(mocker)
+
+        async with ReaderSessions(
+            _settings("a", "fails"), _notifier, dir_path=tempdir
+        ) as sut:
+            with raises(FatalError):
+                await sut()
+
+    async def test_明示された書き出し先もセッションごとに分ける(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        self._patch(mocker)
+        settings = _settings("a", recording={"dir_path": tempdir})
+
+        async with ReaderSessions(settings, _notifier, dir_path=tempdir) as sut:
+            pipeline = _fake(sut, "a")
+            assert pipeline.settings.recording.dir_path == os.path.join(tempdir, "a")
+
+    async def test_共有する資源で各セッションの映像を処理する(self, tempdir: str):
+        settings = _settings(
+            "a",
+            "b",
+            ocr={"engine": "none", "concurrency": 1},
+            metrics={"enabled": True, "summary_interval_in_seconds": 0},
+            routine={"notifies_tera_type": False},
+        )
+        fetchers = {
+            name: ReplayScreenFetcher(_ListReader(3), ReplayMode.MAX_SPEED)
+            for name in ("a", "b")
+        }
+
+        async with ReaderSessions(
+            settings,
+            _notifier,
+            dir_path=tempdir,
+            screen_fetchers=fetchers,
+            max_workers=1,
+            recognition_threads=1,
+        ) as sut:
+
+            async def stop_at_end() -> None:
+                while any(f.position < 2 for f in fetchers.values()):
+                    await asyncio.sleep(0.01)
+                sut.stop()
+
+            await asyncio.wait_for(asyncio.gather(sut(), stop_at_end()), 10.0)
+            snapshot = sut.metrics.snapshot()
+
+        assert [f.position for f in fetchers.values()] == [2, 2]
+        for name in ("a", "b"):
+            assert snapshot.counters[("frames_total", (("session", name),))] == 3
+            assert ("queue_depth", (("queue", "ocr"), ("session", name))) in (
+                snapshot.gauges
+            )
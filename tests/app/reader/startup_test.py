@@ -0,0 +1,40 @@
+from unittest.mock import Mock, call
+
+from pytest import mark, raises
+
+from pkscrd.app.reader.startup import Component, ComponentStatus, start_component
+
+
+@mark.asyncio
+class Test_start_component:
+
+    async def test_準備できたら完了を通知する(self):
+        callback = Mock()
+
+        async def starting() -> str:
+            return "started"
+
+        assert await start_component(Component.OCR, starting(), callback) == "started"
+        assert callback.call_args_list == [
+            call(Component.OCR, ComponentStatus.STARTING),
+            call(Component.OCR, ComponentStatus.READY),
+        ]
+
+    async def test_失敗したら失敗を通知して例外を送出する(self):
+        callback = Mock()
+
+        async def starting() -> str:
+            raise ValueError()
+
+        with raises(ValueError):
+            await start_component(Component.SCREEN, starting(), callback)
+        assert callback.call_args_list == [
+            call(Component.SCREEN, ComponentStatus.STARTING),
+            call(Component.SCREEN, ComponentStatus.FAILED),
+        ]
+
+    async def test_コールバックは省略できる(self):
+        async def starting() -> int:
+            return 1
+
+        assert await start_component(Component.EXECUTOR, starting()) == 1
@@ -0,0 +1,76 @@
+import struct
+import zlib
+
+import cv2
+import numpy as np
+from pytest import raises
+
+from pkscrd.app.server.protocol import (
+    MAX_FRAME_PIXELS,
+    RAW_MAGIC,
+    decode_frame,
+    encode_jpeg,
+    encode_raw,
+)
+
+
+class TestFrameProtocol:
+
+    _IMAGE = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+
+    def test_無圧縮の映像はそのまま戻す(self):
+        decoded = decode_frame(encode_raw(self._IMAGE))
+
+        assert np.array_equal(decoded, self._IMAGE)
+        assert decoded.flags.writeable
+
+    def test_JPEGの映像は大きさを保って戻す(self):
+        image = np.full((32, 48, 3), 128, dtype=np.uint8)
+
+        decoded = decode_frame(encode_jpeg(image, quality=100))
+
+        assert decoded.shape == image.shape
+        assert abs(int(decoded[0, 0, 0]) - 128) <= 2
+
+    def test_映像として解釈できなければ_ValueError(self):
+        raw = encode_raw(self._IMAGE)
+        for data in (b"", b"not an image", raw[:-1], raw[:6]):
+            with raises(ValueError):
+                decode_frame(data)
+
+    def test_BGRでない映像は無圧縮で送れない(self):
+        with raises(ValueError):
+            encode_raw(np.zeros((4, 6), dtype=np.uint8))
+
+    def test_PNGの映像も戻す(self):
+        ok, buffer = cv2.imencode(".png", self._IMAGE)
+        assert ok
+
+        assert np.array_equal(decode_frame(buffer.tobytes()), self._IMAGE)
+
+    def test_画素数が上限を超える映像は展開する前に_ValueError(self):
+        # 画素を持たない, ヘッダだけの巨大な PNG.
+        ihdr = struct.pack(">IIBBBBB", 20000, 20000, 8, 2, 0, 0, 0)
+        png = (
+            b"\x89PNG\r\n\x1a\n"
+            + struct.pack(">I", len(ihdr))
+            + b"IHDR"
+            + ihdr
+            + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+        )
+        jpeg = bytearray(encode_jpeg(np.zeros((16, 16, 3), dtype=np.uint8)))
+        sof = jpeg.index(b"\xff\xc0")
+        jpeg[sof + 5 : sof + 9] = struct.pack(">HH", 20000, 20000)
+        raw = struct.pack("<4sHH", RAW_MAGIC, 4000, 4000)
+
+        for data in (png, bytes(jpeg), raw):
+            with raises(ValueError, match="size"):
+                decode_frame(data)
+        assert 4000 * 4000 > MAX_FRAME_PIXELS
+
+    def test_JPEGとPNG以外の画像は受け付けない(self):
+        ok, buffer = cv2.imencode(".bmp", self._IMAGE)
+        assert ok
+
+        with raises(ValueError):
+            decode_frame(buffer.tobytes())
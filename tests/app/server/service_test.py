@@ -0,0 +1,296 @@
+import asyncio
+import contextlib
+import functools
+import time
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from cv2.typing import MatLike
+from pytest import mark, raises
+from pytest_mock import MockerFixture
+from returns.pipeline import is_successful
+from websockets.asyncio.client import connect
+from websockets.exceptions import InvalidStatus
+from websockets.typing import Origin
+
+from pkscrd.app.reader.controller.command import Command, CommandChannel
+from pkscrd.app.server import RecognitionServer
+from pkscrd.app.server.protocol import decode_frame, encode_raw
+from pkscrd.app.server.rig import replay_to_server
+from pkscrd.app.settings.model import Settings
+from pkscrd.core.metrics.service import NullMetrics
+from pkscrd.core.notification.model import OpponentHpNotification
+from pkscrd.core.screen.infra.replay import RecordingReader
+from pkscrd.core.screen.service.impl.replay import ReplayMode, ReplayScreenFetcher
+
+
+class _FakeAgent:
+    """映像ごとに画素値を HP として通知し, 相手 HP の要求には 0.5 を通知する."""
+
+    def __init__(self, pipeline: "_FakePipeline", fetcher) -> None:
+        self.commands = CommandChannel()
+        self._pipeline = pipeline
+        self._fetcher = fetcher
+        self._stopped = False
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    async def __call__(self) -> None:
+        self.commands.open()
+        while not self._stopped:
+            for command in self.commands.receive():
+                if command is Command.OPPONENT_HP:
+                    self._pipeline.publish(OpponentHpNotification(ratio=0.5))
+            if is_successful(fetched := await self._fetcher.fetch()):
+                value = int(fetched.unwrap()[0, 0, 0])
+                self._pipeline.publish(OpponentHpNotification(ratio=value / 100))
+
+
+class _FakePipeline:
+
+    def __init__(
+        self,
+        settings,
+        notifier,
+        *,
+        screen_fetcher,
+        session,
+        created: list[str],
+        **kwargs,
+    ) -> None:
+        created.append(session)
+        self.metrics = NullMetrics()
+        self.agent = _FakeAgent(self, screen_fetcher)
+        self._publisher = None
+
+    def set_publisher(self, publisher) -> None:
+        self._publisher = publisher
+
+    def publish(self, notification) -> None:
+        assert self._publisher
+        self._publisher.publish(notification, 0.0)
+
+    async def __aenter__(self):
+        return self.agent
+
+    async def __aexit__(self, *args) -> bool:
+        return False
+
+
+@contextlib.asynccontextmanager
+async def _fake_shared_engines(settings, **kwargs):
+    yield None
+
+
+class _ListReader(RecordingReader):
+
+    def __init__(self, values: list[Optional[int]]):
+        self._values = values
+
+    @property
+    def timestamps(self) -> list[float]:
+        return [i * 0.1 for i in range(len(self._values))]
+
+    def read(self, index: int) -> Optional[MatLike]:
+        if (value := self._values[index]) is None:
+            return None
+        return np.full((90, 160, 3), value, dtype=np.uint8)
+
+
+def _replay(*values: Optional[int]) -> ReplayScreenFetcher:
+    return ReplayScreenFetcher(_ListReader(list(values)), ReplayMode.MAX_SPEED)
+
+
+def _ratios(messages: list[dict]) -> list[float]:
+    return [
+        m["payload"]["ratio"] for m in messages if m["type"] == "OpponentHpNotification"
+    ]
+
+
+@mark.asyncio
+class TestRecognitionServer:
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def _serve(
+        mocker: MockerFixture,
+        tempdir: str,
+        created: Optional[list[str]] = None,
+        **server: int,
+    ) -> AsyncIterator[tuple[RecognitionServer, str]]:
+        mocker.patch(
+            "pkscrd.app.server.service.ReaderPipeline",
+            functools.partial(
+                _FakePipeline, created=[] if created is None else created
+            ),
+        )
+        mocker.patch(
+            "pkscrd.app.server.service.SharedEngines.create", _fake_shared_engines
+        )
+        settings = Settings.model_validate({"server": server})
+        async with RecognitionServer(
+            settings, dir_path=tempdir, host="127.0.0.1", port=0
+        ) as sut:
+            serving = asyncio.create_task(sut())
+            try:
+                yield sut, f"ws://127.0.0.1:{sut.port}"
+            finally:
+                sut.stop()
+                await serving
+
+    @mark.parametrize("encoding", ["raw", "jpeg"])
+    async def test_再生した映像を送ると_通知を返す(
+        self, mocker: MockerFixture, tempdir: str, encoding
+    ):
+        async with self._serve(mocker, tempdir) as (_, url):
+            result = await replay_to_server(
+                url,
+                "a",
+                _replay(10, 20, 30),
+                encoding=encoding,
+                interval_in_seconds=0.05,
+                linger_in_seconds=0.2,
+                requests=["opponent_hp"],
+            )
+
+        assert (result.sent, result.dropped, result.closed) == (3, 0, None)
+        ratios = _ratios(result.messages)
+        ratios.remove(0.5)
+        assert np.allclose(ratios, [0.1, 0.2, 0.3], atol=0.02)
+
+    async def test_読めない映像は飛ばして送る(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        async with self._serve(mocker, tempdir) as (_, url):
+            result = await replay_to_server(
+                url,
+                "a",
+                _replay(10, None, 30),
+                encoding="raw",
+                interval_in_seconds=0.05,
+                linger_in_seconds=0.2,
+            )
+
+        assert result.sent == 2
+        assert np.allclose(_ratios(result.messages), [0.1, 0.3], atol=0.02)
+
+    async def test_セッションは切断しても保持する(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        created: list[str] = []
+        async with self._serve(mocker, tempdir, created) as (sut, url):
+            for _ in range(2):
+                await replay_to_server(url, "a", _replay(10), linger_in_seconds=0.1)
+            await replay_to_server(url, "b", _replay(10), linger_in_seconds=0.1)
+
+            assert list(sut.sessions) == ["a", "b"]
+        assert created == ["a", "b"]
+
+    async def test_セッション数が上限に達すると新しいセッションを断る(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        async with self._serve(mocker, tempdir, max_sessions=1) as (_, url):
+            a = await replay_to_server(url, "a", _replay(10), linger_in_seconds=0.1)
+            b = await replay_to_server(url, "b", _replay(10), linger_in_seconds=0.1)
+
+        assert (a.closed, b.closed) == (None, "too many sessions")
+
+    async def test_同じセッションに同時には接続できない(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        async with self._serve(mocker, tempdir) as (_, url):
+            async with connect(url + "/sessions/a"):
+                result = await replay_to_server(
+                    url, "a", _replay(10), linger_in_seconds=0.1
+                )
+
+        assert result.closed == "session in use"
+
+    async def test_使えないセッション名は断る(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        async with self._serve(mocker, tempdir) as (_, url):
+            for path in ("/other/a", "/sessions/", "/sessions/a/b"):
+                async with connect(url + path) as connection:
+                    await connection.wait_closed()
+                assert connection.close_reason == "invalid session"
+
+    async def test_前の映像のデコード中に届いた映像は捨てる(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        def slow_decode(data: bytes) -> MatLike:
+            time.sleep(0.1)
+            return decode_frame(data)
+
+        mocker.patch("pkscrd.app.server.service.decode_frame", slow_decode)
+        async with self._serve(mocker, tempdir) as (_, url):
+            result = await replay_to_server(
+                url,
+                "a",
+                _replay(10, 20, 30),
+                encoding="raw",
+                interval_in_seconds=0,
+                linger_in_seconds=0.3,
+            )
+
+        assert (result.sent, result.dropped) == (3, 2)
+        assert [m["payload"] for m in result.messages if m["type"] == "dropped"] == [
+            {"reason": "pending"}
+        ] * 2
+        assert _ratios(result.messages) == [0.1]
+
+    async def test_デコードを待つ映像が上限に達すると映像を捨てる(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        def slow_decode(data: bytes) -> MatLike:
+            time.sleep(0.2)
+            return decode_frame(data)
+
+        mocker.patch("pkscrd.app.server.service.decode_frame", slow_decode)
+        async with self._serve(mocker, tempdir, max_pending_frames=1) as (_, url):
+            a, b = await asyncio.gather(
+                replay_to_server(
+                    url, "a", _replay(10), encoding="raw", linger_in_seconds=0.5
+                ),
+                replay_to_server(
+                    url, "b", _replay(20), encoding="raw", linger_in_seconds=0.5
+                ),
+            )
+
+        dropped = [m for r in (a, b) for m in r.messages if m["type"] == "dropped"]
+        assert dropped == [{"type": "dropped", "payload": {"reason": "busy"}}]
+
+    async def test_解釈できない要求と映像にはエラーを返す(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        async with self._serve(mocker, tempdir) as (_, url):
+            async with connect(url + "/sessions/a") as connection:
+                await connection.send('{"request": "unknown"}')
+                await connection.send("not json")
+                await connection.send(b"not an image")
+                # 縦横比が異なる映像は, 固定の座標で切り出せないため受け付けない.
+                await asyncio.sleep(0.1)
+                await connection.send(
+                    encode_raw(np.zeros((480, 640, 3), dtype=np.uint8))
+                )
+                messages = [await connection.recv() for _ in range(4)]
+
+        assert sorted(messages) == sorted(
+            [
+                '{"type": "error", "payload": {"message": "unknown request: unknown"}}',
+                '{"type": "error", "payload": {"message": "invalid request"}}',
+                '{"type": "error", "payload": {"message": "invalid frame"}}',
+                '{"type": "error", "payload": {"message": "invalid frame"}}',
+            ]
+        )
+
+    async def test_ブラウザで開いたページからは接続させない(
+        self, mocker: MockerFixture, tempdir: str
+    ):
+        async with self._serve(mocker, tempdir) as (_, url):
+            with raises(InvalidStatus):
+                async with connect(
+                    url + "/sessions/a", origin=Origin("https://example.com")
+                ):
+                    pass
@@ -2,7 +2,11 @@ from pydantic import TypeAdapter, ValidationError
 from pytest import raises
 
 from pkscrd.app.settings.model import Settings
-from pkscrd.app.settings.service import create_validation_error_message
+from pkscrd.app.settings.service import (
+    create_validation_error_message,
+    diff_settings,
+    overlay_session,
+)
 
 
 class Test_validation_error_to_message:
@@ -24,3 +28,57 @@ class Test_validation_error_to_message:
             "bouyomichan.speed: 整数を設定してください",
             "routine.notifies_log: true または false を設定してください",
         ]
+
+
+class Test_diff_settings:
+
+    def test_変化がなければ空集合を返す(self):
+        assert diff_settings(Settings(), Settings()) == frozenset()
+
+    def test_変化した項目名を返す(self):
+        old = Settings()
+        new = Settings.model_validate(
+            {"voicevox": {"speed_scale": 2.0}, "routine": {"notifies_log": False}}
+        )
+        assert diff_settings(old, new) == {"voicevox", "routine"}
+
+
+class Test_overlay_session:
+
+    def test_指定した項目だけを重ねる(self):
+        settings = Settings.model_validate(
+            {
+                "screen": {"engine": "obs"},
+                "obs": {"port": 4455, "password": "", "source": "main"},
+                "voicevox": {"speaker": 1},
+                "sessions": [
+                    {
+                        "name": "a",
+                        "screen": {"engine": "replay"},
+                        "replay": {"path": "a.pkscrd-frames"},
+                    },
+                    {"name": "b", "voicevox": {"speaker": 2}, "replay": None},
+                ],
+            }
+        )
+        a, b = (overlay_session(settings, s) for s in settings.sessions)
+
+        assert (a.screen.engine, a.replay, a.voicevox.speaker) == (
+            "replay",
+            settings.sessions[0].replay,
+            1,
+        )
+        assert (b.screen.engine, b.obs, b.voicevox.speaker) == (
+            "obs",
+            settings.obs,
+            2,
+        )
+        assert a.sessions == b.sessions == []
+
+    def test_名前の重複は受け付けない(self):
+        with raises(ValidationError):
+            Settings.model_validate({"sessions": [{"name": "a"}, {"name": "a"}]})
+
+    def test_ディレクトリ名に使えない名前は受け付けない(self):
+        with raises(ValidationError):
+            Settings.model_validate({"sessions": [{"name": "../a"}]})
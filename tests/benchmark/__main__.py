@@ -0,0 +1,77 @@
+"""
+検出処理のベンチマークを実行する.
+
+    python -m tests.benchmark [-k NAME] [--frames PATH | --synthetic N] [-o RESULT.json]
+                              [--baseline BASELINE.json] [--threshold 0.1]
+
+基準と比較したとき, 閾値を超えて遅くなったものがあれば終了コード 1 で終了する.
+"""
+
+import argparse
+import json
+import sys
+
+from . import cases  # noqa: F401 ベンチマークを登録する.
+from .frames import default_frames, load_frames, synthetic_frames
+from .runner import (
+    BenchmarkResult,
+    compare,
+    format_result,
+    run_benchmarks,
+    select_benchmarks,
+    to_report,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmark")
+    parser.add_argument("-k", dest="patterns", action="append", default=[])
+    parser.add_argument("--frames", help="動画, 画像ディレクトリ, フレームアーカイブ.")
+    parser.add_argument("--synthetic", type=int, help="合成するフレームの数.")
+    parser.add_argument("--max-frames", type=int, default=30)
+    parser.add_argument("-o", "--output", help="計測結果の JSON の出力先.")
+    parser.add_argument("--baseline", help="比較の基準とする計測結果の JSON.")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-round-time", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.frames:
+        frames = load_frames(args.frames, args.max_frames)
+    elif args.synthetic:
+        frames = synthetic_frames(args.synthetic)
+    else:
+        frames = default_frames()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results: list[BenchmarkResult] = []
+    for result in run_benchmarks(
+        select_benchmarks(args.patterns),
+        frames,
+        rounds=args.rounds,
+        min_round_time=args.min_round_time,
+    ):
+        if isinstance(result, BenchmarkResult):
+            results.append(result)
+            print(format_result(result, baseline), flush=True)
+        else:
+            name, reason = result
+            print(f"{name:<48} skipped: {reason}", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(to_report(results), f, indent=2)
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print(f"Regression: {r.name} {r.ratio:.2f}x", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+計測対象のベンチマーク.
+いずれも映像 1 枚あたりの処理を計測する. 処理の一部だけを計測するものは, 切り出しも含む.
+"""
+
+from cv2.typing import MatLike
+
+from pkscrd.core.cursor.service import _find_vertical_cursor_index
+from pkscrd.core.hp.model import HpScene
+from pkscrd.core.hp.service import recognize_gauge, recognize_opponent_hps
+from pkscrd.core.log.service import recognize_general_log_box
+from pkscrd.core.ocr.error import NotAvailableError
+from pkscrd.core.ocr.model import LogFormat, TextColor
+from pkscrd.core.ocr.service.impl.tesseract.core import (
+    Tesseract,
+    TesseractRuntimeError,
+)
+from pkscrd.core.ocr.service.util.image import optimize, optimize_log
+from pkscrd.core.scene.service import recognize_image_scene
+from .runner import Operation, SkipBenchmark, benchmark
+
+
+@benchmark("scene.recognize_image_scene")
+def _recognize_image_scene() -> Operation:
+    return recognize_image_scene
+
+
+@benchmark("hp.recognize_gauge")
+def _recognize_gauge() -> Operation:
+    return lambda image: recognize_gauge(image, HpScene.COMMAND, is_opponent=True)
+
+
+@benchmark("hp.recognize_opponent_hps")
+def _recognize_opponent_hps() -> Operation:
+    return recognize_opponent_hps
+
+
+@benchmark("terastal.omen._is_omen_inner")
+def _is_omen_inner() -> Operation:
+    from pkscrd.core.terastal.repos import load_terastal_omen_model
+    from pkscrd.core.terastal.service.omen import _is_omen_inner
+
+    try:
+        model = load_terastal_omen_model()
+    except FileNotFoundError as error:
+        raise SkipBenchmark(f"No omen model: {error}")
+    return lambda image: _is_omen_inner(image, model.mask_inner)
+
+
+@benchmark("terastal.TeraTypeDetector.detect")
+def _tera_type_detect() -> Operation:
+    from pkscrd.core.terastal.repos import load_tera_type_models
+    from pkscrd.core.terastal.service.teratype import TeraTypeDetector
+
+    try:
+        detector = TeraTypeDetector(load_tera_type_models())
+    except FileNotFoundError as error:
+        raise SkipBenchmark(f"No tera type models: {error}")
+    return detector.detect
+
+
+@benchmark("ocr.optimize")
+def _optimize() -> Operation:
+    # 技名の読み取り領域と同程度の大きさ.
+    return lambda image: optimize(image[800:860, 1500:1800], uses_blur=True)
+
+
+@benchmark("ocr.optimize_log")
+def _optimize_log() -> Operation:
+    fmt = LogFormat(TextColor.WHITE_AND_YELLOW, line_height=65, line_interval=16)
+    return lambda image: optimize_log(
+        image[782 + 16 : 782 + 65 * 2, 285:1650],
+        TextColor.WHITE_AND_YELLOW,
+        fmt,
+    )
+
+
+@benchmark("cursor._find_vertical_cursor_index")
+def _find_vertical_cursor_index_() -> Operation:
+    # 指示カーソルの読み取りと同じ条件.
+    return lambda image: _find_vertical_cursor_index(
+        image,
+        count=3,
+        top=780,
+        height=82,
+        left=1840,
+        width=30,
+        item_height=88,
+    )
+
+
+@benchmark("log.recognize_general_log_box")
+def _recognize_general_log_box() -> Operation:
+    return recognize_general_log_box
+
+
+def _create_tesseract() -> Tesseract:
+    try:
+        return Tesseract()
+    except (NotAvailableError, OSError) as error:
+        raise SkipBenchmark(f"Tesseract is not available: {error!r}")
+
+
+@benchmark("ocr.tesseract.recognize_line")
+def _recognize_line() -> Operation:
+    tesseract = _create_tesseract()
+
+    async def operation(image: MatLike) -> str:
+        region = image[800:860, 1500:1800]
+        greyscale = optimize(region)
+        try:
+            return await tesseract.recognize_line(
+                greyscale if greyscale is not None else region[:, :, 0]
+            )
+        except TesseractRuntimeError as error:
+            raise SkipBenchmark(f"Tesseract failed: {error!r}")
+
+    return operation
+
+
+@benchmark("ocr.tesseract.recognize_block")
+def _recognize_block() -> Operation:
+    tesseract = _create_tesseract()
+
+    async def operation(image: MatLike) -> list[list[str]]:
+        region = image[782 + 16 : 782 + 65 * 2, 285:1650]
+        greyscale = optimize(region)
+        try:
+            return await tesseract.recognize_block(
+                greyscale if greyscale is not None else region[:, :, 0]
+            )
+        except TesseractRuntimeError as error:
+            raise SkipBenchmark(f"Tesseract failed: {error!r}")
+
+    return operation
@@ -0,0 +1,52 @@
+import itertools
+from typing import Optional
+
+import numpy as np
+from cv2.typing import MatLike
+
+from pkscrd.core.cursor.model import PokemonCursorScene
+from pkscrd.core.hp.model import HpScene
+from pkscrd.core.move.model import MoveScene
+from pkscrd.core.screen.infra.replay import open_recording
+from tests.support.hud import HudFrameBuilder, generate_frames
+
+FRAME_SHAPE = (1080, 1920, 3)
+
+
+def default_frames() -> list[MatLike]:
+    """
+    記録がないときに用いるフレーム.
+    何も映っていない画面と, 主要な HUD を合成した画面.
+    """
+    return [
+        np.zeros(FRAME_SHAPE, dtype=np.uint8),
+        HudFrameBuilder()
+        .gauge(HpScene.COMMAND, 0.6)
+        .ally_hp(HpScene.COMMAND, 120, 167)
+        .command_cursor(0)
+        .build(noise=2.0, jpeg_quality=90, seed=0),
+        HudFrameBuilder()
+        .gauge(HpScene.MOVE, 0.3)
+        .ally_hp(HpScene.MOVE, 40, 167)
+        .move_names(MoveScene.COMMAND, ["Thunderbolt", "Volt Tackle"], selected=1)
+        .battle_log(["Pikachu used", "Thunderbolt!"])
+        .build(noise=2.0, jpeg_quality=90, seed=0),
+        HudFrameBuilder()
+        .pokemon_cursor(PokemonCursorScene.SELECTION, 2)
+        .general_log_box(["Choose a Pokemon."])
+        .build(noise=2.0, jpeg_quality=90, seed=0),
+    ]
+
+
+def synthetic_frames(count: int) -> list[MatLike]:
+    """HUD を無作為に合成したフレーム."""
+    return list(generate_frames(count))
+
+
+def load_frames(path: str, limit: Optional[int] = None) -> list[MatLike]:
+    """記録からフレームを読み込む. 記録の種類は再生と同じく判別する."""
+    with open_recording(path) as reader:
+        count = len(reader.timestamps)
+        step = max(count // limit, 1) if limit else 1
+        indices = itertools.islice(range(0, count, step), limit)
+        return [frame for i in indices if (frame := reader.read(i)) is not None]
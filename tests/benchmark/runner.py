@@ -0,0 +1,213 @@
+import asyncio
+import dataclasses
+import gc
+import inspect
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional, Sequence
+
+import cv2
+from cv2.typing import MatLike
+
+Operation = Callable[[MatLike], Any] | Callable[[MatLike], Awaitable[Any]]
+Setup = Callable[[], Operation]
+
+
+class SkipBenchmark(Exception):
+    """前提を満たさない環境でベンチマークを飛ばす."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Benchmark:
+    name: str
+    setup: Setup
+    """計測する処理を準備する. 処理はフレームを 1 枚受け取る."""
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    """1 つのベンチマークの計測結果. 時間は 1 回あたりの秒数."""
+
+    name: str
+    median: float
+    mean: float
+    stdev: float
+    min: float
+    rounds: int
+    loops: int
+
+
+@dataclasses.dataclass(frozen=True)
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+_REGISTRY: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """ベンチマークを登録する. 名前は "モジュール.関数" の形式とする."""
+
+    def decorator(setup: Setup) -> Setup:
+        assert name not in _REGISTRY, f"Duplicated benchmark: {name}"
+        _REGISTRY[name] = Benchmark(name, setup)
+        return setup
+
+    return decorator
+
+
+def select_benchmarks(patterns: Sequence[str] = ()) -> list[Benchmark]:
+    """名前に指定文字列のいずれかを含むベンチマークを名前順に返す."""
+    return [
+        b
+        for name, b in sorted(_REGISTRY.items())
+        if not patterns or any(p in name for p in patterns)
+    ]
+
+
+def measure(
+    operation: Operation,
+    frames: Sequence[MatLike],
+    *,
+    name: str = "",
+    rounds: int = 7,
+    min_round_time: float = 0.1,
+    warmup: int = 3,
+) -> BenchmarkResult:
+    """
+    処理を計測する.
+
+    1 ラウンドの時間が min_round_time 以上になるよう繰り返し回数を調整したうえで,
+    GC を止めて複数ラウンド計測する. 処理にはフレームを順に与え,
+    フレーム 1 枚あたりの平均時間を求める.
+    """
+    call = _as_sync(operation)
+    for _ in range(warmup):
+        _run_pass(call, frames)
+
+    # フレームによって処理時間が大きく異なるため, ラウンドはフレームを一巡する単位とする.
+    passes = _calibrate(call, frames, min_round_time)
+    timings: list[float] = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            began_at = time.perf_counter()
+            for _ in range(passes):
+                _run_pass(call, frames)
+            timings.append((time.perf_counter() - began_at) / (passes * len(frames)))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return BenchmarkResult(
+        name=name,
+        median=statistics.median(timings),
+        mean=statistics.fmean(timings),
+        stdev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        min=min(timings),
+        rounds=rounds,
+        loops=passes * len(frames),
+    )
+
+
+def run_benchmarks(
+    benchmarks: Iterable[Benchmark],
+    frames: Sequence[MatLike],
+    **kwargs: Any,
+) -> Iterator[BenchmarkResult | tuple[str, SkipBenchmark]]:
+    """ベンチマークを順に実行する. 飛ばしたものは名前と理由の組を返す."""
+    for b in benchmarks:
+        try:
+            yield measure(b.setup(), frames, name=b.name, **kwargs)
+        except SkipBenchmark as skip:
+            yield b.name, skip
+
+
+def compare(
+    results: Iterable[BenchmarkResult],
+    baseline: dict[str, Any],
+    threshold: float,
+) -> list[Regression]:
+    """
+    基準より中央値が threshold の割合を超えて遅くなったものを返す.
+    基準にないベンチマークは比較しない.
+    """
+    base_results = baseline.get("results", {})
+    return [
+        Regression(r.name, base["median"], r.median)
+        for r in results
+        if (base := base_results.get(r.name))
+        and r.median > base["median"] * (1.0 + threshold)
+    ]
+
+
+def to_report(results: Iterable[BenchmarkResult]) -> dict[str, Any]:
+    """JSON として書き出す計測結果を作る."""
+    return {
+        "environment": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+        },
+        "results": {
+            r.name: {k: v for k, v in dataclasses.asdict(r).items() if k != "name"}
+            for r in results
+        },
+    }
+
+
+def _as_sync(operation: Operation) -> Callable[[MatLike], Any]:
+    if not inspect.iscoroutinefunction(operation):
+        return operation
+
+    # 非同期処理はループの再利用によって, 起動のオーバーヘッドを小さくする.
+    loop = asyncio.new_event_loop()
+
+    def call(frame: MatLike) -> Any:
+        return loop.run_until_complete(operation(frame))
+
+    return call
+
+
+def _run_pass(call: Callable[[MatLike], Any], frames: Sequence[MatLike]) -> None:
+    for frame in frames:
+        call(frame)
+
+
+def _calibrate(
+    call: Callable[[MatLike], Any],
+    frames: Sequence[MatLike],
+    min_round_time: float,
+    max_passes: int = 1_000_000,
+) -> int:
+    passes = 1
+    while passes < max_passes:
+        began_at = time.perf_counter()
+        for _ in range(passes):
+            _run_pass(call, frames)
+        if time.perf_counter() - began_at >= min_round_time:
+            break
+        passes *= 2
+    return passes
+
+
+def format_result(result: BenchmarkResult, baseline: Optional[dict] = None) -> str:
+    line = (
+        f"{result.name:<48} {result.median * 1e6:>12.1f} us"
+        f" ± {result.stdev * 1e6:>9.1f} ({result.rounds} x {result.loops})"
+    )
+    if baseline and (base := baseline.get("results", {}).get(result.name)):
+        line += f"  {result.median / base['median']:>6.2f}x"
+    return line
@@ -0,0 +1,50 @@
+import numpy as np
+from .runner import BenchmarkResult, compare, measure, to_report
+
+
+def _result(name: str, median: float) -> BenchmarkResult:
+    return BenchmarkResult(name, median, median, 0.0, median, rounds=1, loops=1)
+
+
+class Test_measure:
+
+    def test_フレームを順に与えて1回あたりの時間を計測する(self):
+        frames = [np.zeros((1, 1, 3), np.uint8), np.ones((1, 1, 3), np.uint8)]
+        seen: list[int] = []
+
+        result = measure(
+            lambda frame: seen.append(int(frame[0, 0, 0])),
+            frames,
+            name="sample",
+            rounds=3,
+            min_round_time=0.0,
+            warmup=0,
+        )
+
+        assert result.name == "sample"
+        assert result.rounds == 3
+        assert result.min <= result.median
+        assert seen[:4] == [0, 1, 0, 1]
+        assert result.loops % 2 == 0
+
+    def test_非同期の処理も計測できる(self):
+        calls: list[None] = []
+
+        async def operation(_) -> None:
+            calls.append(None)
+
+        measure(operation, [None], rounds=2, min_round_time=0.0, warmup=0)
+        assert len(calls) >= 3
+
+
+class Test_compare:
+
+    _BASELINE = to_report([_result("fast", 1.0), _result("slow", 1.0)])
+
+    def test_閾値を超えて遅くなったものを返す(self):
+        regressions = compare(
+            [_result("fast", 1.05), _result("slow", 1.2), _result("new", 9.0)],
+            self._BASELINE,
+            threshold=0.1,
+        )
+        assert [(r.name, r.ratio) for r in regressions] == [("slow", 1.2)]
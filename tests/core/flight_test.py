@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import zipfile
+from unittest.mock import Mock
+
+import numpy as np
+
+from pkscrd.core.flight.infra import FlightDumpFileWriter
+from pkscrd.core.flight.model import DumpReason, FrameRecord
+from pkscrd.core.flight.service import FlightRecorder, RecordingMetrics
+from pkscrd.core.metrics.model import Stage
+from pkscrd.core.metrics.service import NullMetrics
+
+
+class _Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestFlightRecorder:
+
+    def test_直近のフレームだけを保持する(self):
+        sut = FlightRecorder(Mock(), size=2)
+        for sequence in range(3):
+            sut.begin(sequence)
+            sut.record_notification(f"n{sequence}")
+            sut.end()
+
+        assert [r.sequence for r in sut.records] == [1, 2]
+        assert [r.notifications for r in sut.records] == [["n1"], ["n2"]]
+
+    def test_他のスレッドからの記録は無視する(self):
+        sut = FlightRecorder(Mock())
+        sut.begin(1)
+        thread = threading.Thread(target=sut.record_stage, args=("tts", 1.0))
+        thread.start()
+        thread.join()
+        sut.record_stage("scene", 0.5)
+        sut.end()
+
+        assert sut.records[0].stages == [("scene", 0.5)]
+
+    def test_OCRの入力は縮小して記録する(self):
+        sut = FlightRecorder(Mock(), thumbnail_size=(50, 50))
+        sut.begin(1)
+        sut.record_ocr("read_line", np.zeros((20, 200, 3), dtype=np.uint8), "abc")
+        sut.record_ocr("read_line", np.zeros((10, 10, 3), dtype=np.uint8), None)
+
+        ocr = sut.records[0].ocr
+        assert [o.thumbnail.shape for o in ocr] == [(5, 50, 3), (10, 10, 3)]
+        assert [o.text for o in ocr] == ["abc", None]
+
+    def test_処理時間が閾値を超えたら書き出す(self):
+        writer = Mock(return_value="dump.zip")
+        clock = _Clock()
+        sut = FlightRecorder(
+            writer,
+            stall_threshold_in_seconds=1.0,
+            cooldown_in_seconds=10.0,
+            clock=clock,
+        )
+        for duration in (0.5, 1.5, 1.5):
+            sut.begin(1)
+            clock.now += duration
+            sut.end()
+            sut.dump(DumpReason.REQUESTED, wait=True)
+
+        # 停滞による書き出しは一定時間内に繰り返さない.
+        reasons = [c.args[1] for c in writer.call_args_list]
+        assert reasons.count(DumpReason.STALL) == 1
+        assert reasons.count(DumpReason.REQUESTED) == 3
+
+    def test_処理中のまま止まったフレームを書き出す(self):
+        writer = Mock(return_value="dump.zip")
+        clock = _Clock()
+        sut = FlightRecorder(writer, stall_threshold_in_seconds=1.0, clock=clock)
+        done = threading.Event()
+        writer.side_effect = lambda records, reason: done.set() or "dump.zip"
+
+        sut.begin(1)
+        sut.check_stall()
+        clock.now = 2.0
+        sut.check_stall()
+
+        assert done.wait(1.0)
+        records, reason = writer.call_args.args
+        assert reason is DumpReason.STALL
+        assert records[0].duration is None
+
+    def test_書き出しの失敗は記録を妨げない(self):
+        sut = FlightRecorder(Mock(side_effect=OSError()))
+        sut.dump(DumpReason.FATAL, wait=True)
+        sut.begin(1)
+        sut.end()
+
+        assert len(sut.records) == 1
+
+
+class TestRecordingMetrics:
+
+    def test_処理段階の処理時間を記録する(self):
+        recorder = FlightRecorder(Mock())
+        sut = RecordingMetrics(NullMetrics(), recorder)
+        recorder.begin(1)
+        with sut.stage(Stage.SCENE):
+            pass
+        sut.observe("ocr_seconds", 1.0)
+        recorder.end()
+
+        assert not sut.enabled
+        assert [stage for stage, _ in recorder.records[0].stages] == ["scene"]
+
+
+class TestFlightDumpFileWriter:
+
+    def test_記録とOCRの入力画像を書き出す(self, tempdir: str):
+        recorder = FlightRecorder(Mock())
+        recorder.begin(7)
+        recorder.record_stage("frame", 0.1)
+        recorder.record_scene("BATTLE", "BATTLE")
+        recorder.record_ocr("read_line", np.zeros((4, 4, 3), dtype=np.uint8), "あ")
+        recorder.record_notification("n")
+        recorder.end()
+        empty = FrameRecord(8, 0.0)
+
+        path = FlightDumpFileWriter(tempdir)(
+            [*recorder.records, empty], DumpReason.REQUESTED
+        )
+
+        assert os.path.dirname(path) == tempdir
+        assert path.endswith("-requested.zip")
+        with zipfile.ZipFile(path) as file:
+            lines = file.read("frames.jsonl").decode().splitlines()
+            assert "ocr/7-0.png" in file.namelist()
+        first, second = map(json.loads, lines)
+        assert first["sequence"] == 7
+        assert first["stages"] == {"frame": 0.1}
+        assert first["scene"] == "BATTLE"
+        assert first["ocr"] == [
+            {"method": "read_line", "text": "あ", "thumbnail": "ocr/7-0.png"}
+        ]
+        assert first["notifications"] == ["n"]
+        assert second["duration"] is None
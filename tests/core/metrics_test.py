@@ -0,0 +1,269 @@
+import asyncio
+
+import httpx
+from pytest import mark
+
+from pkscrd.core.metrics.exposition import summarize, to_prometheus_text
+from pkscrd.core.metrics.infra import MetricsHttpServer
+from pkscrd.core.metrics.model import STAGE_SECONDS, Histogram, Stage
+from pkscrd.core.metrics.service import LabeledMetrics, MetricsRegistry, NullMetrics
+from pkscrd.core.metrics.trace import LATENCY_SECONDS, Hop, Tracer
+
+
+class TestHistogram:
+
+    def test_区間の上端を含めて数える(self):
+        sut = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            sut.observe(value)
+
+        snapshot = sut.snapshot()
+        assert snapshot.counts == (2, 1, 1)
+        assert snapshot.cumulative_counts == [2, 3, 4]
+        assert snapshot.count == 4
+        assert snapshot.sum == 2.65
+        assert snapshot.max == 2.0
+
+
+class TestMetricsRegistry:
+
+    def test_処理段階の処理時間を記録する(self):
+        sut = MetricsRegistry()
+        with sut.stage(Stage.SCENE):
+            pass
+        with sut.stage(Stage.SCENE):
+            pass
+
+        histogram = sut.snapshot().stage(Stage.SCENE)
+        assert histogram and histogram.count == 2
+        assert sut.snapshot().stage(Stage.MOVE) is None
+
+    @mark.asyncio
+    async def test_非同期処理の処理時間を記録する(self):
+        sut = MetricsRegistry()
+
+        assert await sut.measure(Stage.LOG, asyncio.sleep(0.01, result=1)) == 1
+        histogram = sut.snapshot().stage(Stage.LOG)
+        assert histogram and histogram.sum >= 0.01
+
+    def test_ラベルごとに数える(self):
+        sut = MetricsRegistry()
+        sut.count("ocr_calls_total", method="read_line")
+        sut.count("ocr_calls_total", 2, method="read_line")
+        sut.count("ocr_calls_total", method="read_log")
+
+        assert sut.snapshot().counters == {
+            ("ocr_calls_total", (("method", "read_line"),)): 3,
+            ("ocr_calls_total", (("method", "read_log"),)): 1,
+        }
+
+    def test_登録した関数の値は取得時に求める(self):
+        sut = MetricsRegistry()
+        depth = [1]
+        sut.register_gauge("queue_depth", lambda: depth[0], queue="tts")
+        sut.register_counter("cache_hits_total", lambda: 1 / 0)
+        depth[0] = 3
+
+        snapshot = sut.snapshot()
+        assert snapshot.gauges == {("queue_depth", (("queue", "tts"),)): 3}
+        # 失敗した関数の値は含めない.
+        assert snapshot.counters == {}
+
+
+class TestNullMetrics:
+
+    def test_何も記録しない(self):
+        sut = NullMetrics()
+        with sut.stage(Stage.SCENE):
+            sut.count("frames_total")
+        sut.register_gauge("queue_depth", lambda: 1)
+
+        snapshot = sut.snapshot()
+        assert not sut.enabled
+        assert (snapshot.histograms, snapshot.counters, snapshot.gauges) == ({}, {}, {})
+
+
+class TestLabeledMetrics:
+
+    def test_すべての計測値にラベルを加える(self):
+        registry = MetricsRegistry()
+        sut = LabeledMetrics(registry, session="a")
+        with sut.stage(Stage.SCENE):
+            sut.count("frames_total")
+        sut.register_gauge("queue_depth", lambda: 2, queue="ocr")
+
+        snapshot = sut.snapshot()
+        assert sut.enabled
+        assert snapshot.counters == {("frames_total", (("session", "a"),)): 1}
+        assert snapshot.gauges == {
+            ("queue_depth", (("queue", "ocr"), ("session", "a"))): 2
+        }
+        assert snapshot.histograms.keys() == {
+            ("stage_seconds", (("session", "a"), ("stage", "scene")))
+        }
+
+
+class TestTracer:
+
+    def test_取得時刻からの遅延をホップごとに記録する(self):
+        clock = iter([1.5, 2.0, 4.0]).__next__
+        metrics = MetricsRegistry()
+        sut = Tracer(metrics, clock=clock)
+
+        trace = sut.start(1, 1.0, "Kind")
+        trace.mark(Hop.RECOGNIZED)
+        trace.mark(Hop.MESSAGED)
+        trace.finish(Hop.PLAYING)
+        trace.finish(Hop.PLAYING)  # 2 回目は記録しない.
+
+        assert trace.sequence == 1
+        assert trace.latencies == [
+            (Hop.RECOGNIZED, 0.5),
+            (Hop.MESSAGED, 1.0),
+            (Hop.PLAYING, 3.0),
+        ]
+        histograms = metrics.snapshot().histograms
+        key = (LATENCY_SECONDS, (("hop", "playing"), ("kind", "Kind")))
+        assert histograms[key].count == 1
+        assert histograms[key].sum == 3.0
+
+    def test_直近の遅延からパーセンタイルを求める(self):
+        metrics = MetricsRegistry()
+        sut = Tracer(metrics, window=100, clock=lambda: 0.0)
+        for i in range(200):
+            sut.start(i, -(i % 100 + 1) / 1000, "Kind").finish(Hop.REQUESTED)
+
+        assert sut.percentiles("Kind", Hop.REQUESTED) == {
+            0.5: 0.05,
+            0.9: 0.09,
+            0.99: 0.099,
+        }
+        assert sut.percentiles("Kind", Hop.PLAYING) is None
+        gauges = metrics.snapshot().gauges
+        assert (
+            gauges[
+                (
+                    "notification_latency_quantile_seconds",
+                    (("hop", "requested"), ("kind", "Kind"), ("quantile", "0.9")),
+                )
+            ]
+            == 0.09
+        )
+
+
+class TestExposition:
+
+    def test_Prometheusのテキスト形式に変換する(self):
+        metrics = MetricsRegistry(buckets=(0.1,))
+        metrics.observe(STAGE_SECONDS, 0.5, stage="scene")
+        metrics.observe(STAGE_SECONDS, 0.05, stage="fetch")
+        metrics.count("frames_total", 2)
+        metrics.register_gauge("queue_depth", lambda: 1, queue='a"b')
+
+        assert to_prometheus_text(metrics.snapshot()).splitlines() == [
+            "# TYPE pkscrd_stage_seconds histogram",
+            'pkscrd_stage_seconds_bucket{stage="fetch",le="0.1"} 1',
+            'pkscrd_stage_seconds_bucket{stage="fetch",le="+Inf"} 1',
+            'pkscrd_stage_seconds_sum{stage="fetch"} 0.05',
+            'pkscrd_stage_seconds_count{stage="fetch"} 1',
+            'pkscrd_stage_seconds_bucket{stage="scene",le="0.1"} 0',
+            'pkscrd_stage_seconds_bucket{stage="scene",le="+Inf"} 1',
+            'pkscrd_stage_seconds_sum{stage="scene"} 0.5',
+            'pkscrd_stage_seconds_count{stage="scene"} 1',
+            "# TYPE pkscrd_frames_total counter",
+            "pkscrd_frames_total 2",
+            "# TYPE pkscrd_queue_depth gauge",
+            'pkscrd_queue_depth{queue="a\\"b"} 1',
+        ]
+
+    def test_要約は処理段階を処理順に並べる(self):
+        metrics = MetricsRegistry()
+        metrics.observe(STAGE_SECONDS, 0.002, stage="tts")
+        metrics.observe(STAGE_SECONDS, 0.001, stage="fetch")
+        metrics.count("frames_total")
+
+        lines = summarize(metrics.snapshot()).splitlines()
+        assert [line.split()[0] for line in lines] == [
+            "stage",
+            "fetch",
+            "tts",
+            "frames_total:",
+        ]
+
+    def test_要約に通知の遅延のパーセンタイルを含める(self):
+        metrics = MetricsRegistry()
+        tracer = Tracer(metrics, clock=lambda: 0.0)
+        trace = tracer.start(1, -0.25, "Kind")
+        trace.mark(Hop.MESSAGED)
+        trace.finish(Hop.PLAYING)
+
+        lines = summarize(metrics.snapshot()).splitlines()
+        assert lines[1].split() == ["notification", "hop", "p50", "ms"] + [
+            "p90",
+            "ms",
+            "p99",
+            "ms",
+        ]
+        assert lines[2].split() == ["Kind", "messaged", "250.00", "250.00", "250.00"]
+        assert lines[3].split()[:2] == ["Kind", "playing"]
+        assert len(lines) == 4
+
+
+@mark.asyncio
+class TestMetricsHttpServer:
+
+    async def test_計測値を公開する(self):
+        metrics = MetricsRegistry()
+        metrics.count("frames_total")
+
+        async with MetricsHttpServer.create(metrics, 0) as server:
+            async with httpx.AsyncClient() as client:
+                url = f"http://127.0.0.1:{server.port}"
+                found = await client.get(f"{url}/metrics")
+                not_found = await client.get(f"{url}/")
+
+        assert found.status_code == 200
+        assert "pkscrd_frames_total 1" in found.text
+        assert not_found.status_code == 404
+
+    async def test_制御用エンドポイントはPOSTで受け付ける(self):
+        calls: list[str] = []
+
+        def start() -> str:
+            calls.append("start")
+            return "started"
+
+        async with MetricsHttpServer.create(
+            MetricsRegistry(), 0, controls={"/profiler/start": start}
+        ) as server:
+            async with httpx.AsyncClient() as client:
+                url = f"http://127.0.0.1:{server.port}/profiler/start"
+                posted = await client.post(url)
+                got = await client.get(url)
+
+        assert (posted.status_code, posted.text) == (200, "started\n")
+        assert got.status_code == 404
+        assert calls == ["start"]
+
+    async def test_ブラウザからの制御は拒否する(self):
+        calls: list[str] = []
+
+        def start() -> str:
+            calls.append("start")
+            return "started"
+
+        async with MetricsHttpServer.create(
+            MetricsRegistry(), 0, controls={"/profiler/start": start}
+        ) as server:
+            async with httpx.AsyncClient() as client:
+                url = f"http://127.0.0.1:{server.port}"
+                posted = await client.post(
+                    f"{url}/profiler/start", headers={"Origin": "https://example.com"}
+                )
+                got = await client.get(
+                    f"{url}/metrics", headers={"Origin": "https://example.com"}
+                )
+
+        assert posted.status_code == 403
+        assert got.status_code == 200
+        assert calls == []
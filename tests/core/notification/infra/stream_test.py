@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+from pytest import mark, raises
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosedError, InvalidStatus
+from websockets.typing import Origin
+
+from pkscrd.core.metrics.service import MetricsRegistry
+from pkscrd.core.notification.infra.stream import NotificationStreamServer
+from pkscrd.core.notification.model import (
+    OpponentHpNotification,
+    ScreenshotNotification,
+)
+
+
+async def _wait_for_clients(server: NotificationStreamServer, count: int) -> None:
+    while server.clients < count:
+        await asyncio.sleep(0.001)
+
+
+@mark.asyncio
+class TestNotificationStreamServer:
+
+    async def test_通知を種類と内容と取得時刻で配信する(self):
+        async with NotificationStreamServer.create(lambda _: True, 0) as server:
+            url = f"ws://127.0.0.1:{server.port}"
+            async with connect(url) as first, connect(url) as second:
+                await _wait_for_clients(server, 2)
+                server.publish(OpponentHpNotification(ratio=0.5), 1700000000.25)
+
+                messages = [json.loads(await c.recv()) for c in (first, second)]
+
+        assert (
+            messages
+            == [
+                {
+                    "type": "OpponentHpNotification",
+                    "payload": {"ratio": 0.5},
+                    "timestamp": 1700000000.25,
+                }
+            ]
+            * 2
+        )
+
+    async def test_許可していないページからの接続は拒否する(self):
+        allowed = "http://localhost:8080"
+        async with NotificationStreamServer.create(
+            lambda _: True, 0, origins=[allowed]
+        ) as server:
+            url = f"ws://127.0.0.1:{server.port}"
+            with raises(InvalidStatus) as error:
+                async with connect(url, origin=Origin("https://example.com")):
+                    pass
+            async with connect(url, origin=Origin(allowed)), connect(url):
+                await _wait_for_clients(server, 2)
+
+        assert error.value.response.status_code == 403
+
+    async def test_要求を受け付け_受け付けられなければエラーを返す(self):
+        requests: list[str] = []
+
+        def handle(request: str) -> bool:
+            requests.append(request)
+            return request == "opponent_hp"
+
+        async with NotificationStreamServer.create(handle, 0) as server:
+            async with connect(f"ws://127.0.0.1:{server.port}") as client:
+                await client.send(json.dumps({"request": "opponent_hp"}))
+                await client.send(json.dumps({"request": "unknown"}))
+                await client.send("not json")
+                errors = [json.loads(await client.recv()) for _ in range(2)]
+
+        assert requests == ["opponent_hp", "unknown"]
+        assert errors == [
+            {"type": "error", "payload": {"message": "unknown request: unknown"}},
+            {"type": "error", "payload": {"message": "invalid request"}},
+        ]
+
+    async def test_送信が追いつかない分は古いものから捨てる(self):
+        metrics = MetricsRegistry()
+        async with NotificationStreamServer.create(
+            lambda _: True, 0, queue_size=2, metrics=metrics
+        ) as server:
+            async with connect(f"ws://127.0.0.1:{server.port}") as client:
+                await _wait_for_clients(server, 1)
+                # 送信の機会を与えずに積む.
+                server._broadcast("1")
+                server._broadcast("2")
+                server._broadcast("3")
+
+                received = [await client.recv() for _ in range(2)]
+
+            assert server.dropped == 1
+        assert received == ["2", "3"]
+        assert metrics.snapshot().counters == {
+            ("dropped_events_total", (("reason", "stream"),)): 1
+        }
+
+    async def test_接続数が上限に達したら切断する(self):
+        async with NotificationStreamServer.create(
+            lambda _: True, 0, max_clients=1
+        ) as server:
+            url = f"ws://127.0.0.1:{server.port}"
+            async with connect(url):
+                await _wait_for_clients(server, 1)
+                async with connect(url) as rejected:
+                    try:
+                        await rejected.recv()
+                    except ConnectionClosedError as error:
+                        code = error.rcvd.code if error.rcvd else None
+
+        assert code == 1013
+
+    async def test_通知はほかのスレッドからも配信できる(self):
+        async with NotificationStreamServer.create(lambda _: True, 0) as server:
+            async with connect(f"ws://127.0.0.1:{server.port}") as client:
+                await _wait_for_clients(server, 1)
+                await asyncio.to_thread(
+                    server.publish, ScreenshotNotification(succeeded=True), 1.0
+                )
+
+                message = json.loads(await client.recv())
+
+        assert message["type"] == "ScreenshotNotification"
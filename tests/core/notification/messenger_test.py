@@ -14,6 +14,7 @@ from pkscrd.core.notification.model import (
     MovesNotification,
     Notification,
     OpponentHpNotification,
+    OverloadNotification,
     PokemonCursorNotification,
     SceneChangeNotification,
     ScreenshotNotification,
@@ -180,6 +181,10 @@ class TestMessenger:
             ScreenshotNotification(succeeded=True),
             "スクリーンショットを保存しました",
         ),
+        "処理遅延": (
+            OverloadNotification(),
+            "処理が追いつかないため、ログとエイチピーの読み取りを間引いています",
+        ),
         "ポケモンカーソル: 認識不可": (
             PokemonCursorNotification(scene=PokemonCursorScene.SELECTION, cursor=None),
             "ポケモンカーソルを認識できませんでした",
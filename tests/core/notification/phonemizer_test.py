@@ -0,0 +1,61 @@
+import pytest
+from romajiphonem import phonemize
+
+from pkscrd.core.notification.service.phonemizer import Phonemizer, split_phrases
+
+
+class TestSplitPhrases:
+
+    _CASES = {
+        "区切りなし": ("ムーンフォース", ["ムーンフォース"]),
+        "助詞で区切る": (
+            "Flutter Maneの ムーンフォース!",
+            ["Flutter Maneの", " ムーンフォース!"],
+        ),
+        "英字の並びは区切らない": ("Iron Bundle's turn", ["Iron Bundle's turn"]),
+        "連続する区切り": ("え!?", ["え!", "?"]),
+    }
+
+    @pytest.mark.parametrize(("line", "expected"), _CASES.values(), ids=_CASES.keys())
+    def test_split(self, line: str, expected: list[str]):
+        assert split_phrases(line) == expected
+
+
+class TestPhonemizer:
+
+    _LINES = (
+        "Flutter Maneの ムーンフォース!",
+        "相手の Iron Bundleは たおれた!",
+        "Great Tuskの こうげきが 上がった!",
+        "ムーンフォース!",
+    )
+
+    @pytest.mark.parametrize("line", _LINES)
+    def test_行全体を変換した結果と一致する(self, line: str):
+        assert Phonemizer()(line) == phonemize(line)
+
+    def test_英字を含まない行はキャッシュを使わない(self):
+        sut = Phonemizer()
+        assert sut("ムーンフォース!") == "ムーンフォース!"
+        assert sut.stats.line_misses == 0
+        assert sut.stats.phrase_misses == 0
+
+    def test_同じ行は行単位のキャッシュを引く(self):
+        sut = Phonemizer()
+        sut("Flutter Maneの ムーンフォース!")
+        sut("Flutter Maneの ムーンフォース!")
+        assert sut.stats.line_hits == 1
+        assert sut.stats.line_misses == 1
+
+    def test_繰り返し現れる句は句単位のキャッシュを引く(self):
+        sut = Phonemizer()
+        sut("Flutter Maneの ムーンフォース!")
+        sut("Flutter Maneの シャドーボール!")
+        assert sut.stats.line_misses == 2
+        assert sut.stats.phrase_hits == 1
+
+    def test_キャッシュは上限を超えない(self):
+        sut = Phonemizer(maxsize=2)
+        for name in ("Alpha", "Bravo", "Charlie", "Delta"):
+            sut(f"{name}の こうげき!")
+        assert sut.stats.size <= sut.stats.maxsize
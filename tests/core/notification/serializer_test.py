@@ -0,0 +1,81 @@
+import json
+from typing import Any
+
+import pytest
+
+from pkscrd.core.hp.model import VisibleHp
+from pkscrd.core.notification.model import (
+    AllyHpNotification,
+    LogNotification,
+    Notification,
+    SceneChangeNotification,
+    SelectionCompleteButtonNotification,
+    SelectionItem,
+    SelectionNotification,
+    TeamDirection,
+    TeamNotification,
+    TeraTypeNotification,
+)
+from pkscrd.core.notification.service.serializer import notification_to_dict
+from pkscrd.core.pokemon.model import PokemonId
+from pkscrd.core.scene.model import SceneChange
+from pkscrd.core.terastal.model import TeraType
+
+
+class Test_notification_to_dict:
+
+    _CASES = {
+        "列挙型は名前で表す": (
+            SceneChangeNotification(change=SceneChange.SELECTION_START),
+            {"type": "SceneChangeNotification", "change": "SELECTION_START"},
+        ),
+        "入れ子のデータクラス": (
+            AllyHpNotification(value=VisibleHp(84, 167)),
+            {"type": "AllyHpNotification", "value": {"current": 84, "max": 167}},
+        ),
+        "名前付きタプルと None を含むリスト": (
+            TeamNotification(
+                direction=TeamDirection.OPPONENT,
+                team=[PokemonId(25, 0), None],
+            ),
+            {
+                "type": "TeamNotification",
+                "direction": "OPPONENT",
+                "team": [{"pokedex_number": 25, "form_index": 0}, None],
+                "with_types": False,
+            },
+        ),
+        "データクラスのリスト": (
+            SelectionNotification(items=[SelectionItem(index_in_team=1), None]),
+            {
+                "type": "SelectionNotification",
+                "items": [{"index_in_team": 1, "pokemon_id": None}, None],
+            },
+        ),
+        "文字列のリスト": (
+            LogNotification(lines=["ピカチュウの", "10まんボルト!"]),
+            {"type": "LogNotification", "lines": ["ピカチュウの", "10まんボルト!"]},
+        ),
+        "フィールドなし": (
+            SelectionCompleteButtonNotification(),
+            {"type": "SelectionCompleteButtonNotification"},
+        ),
+        "StrEnum も名前で表す": (
+            TeraTypeNotification(primary=TeraType.FIRE),
+            {"type": "TeraTypeNotification", "primary": "FIRE", "possible": []},
+        ),
+    }
+
+    @pytest.mark.parametrize(
+        ("notification", "expected"),
+        _CASES.values(),
+        ids=_CASES.keys(),
+    )
+    def test_JSONとして書き出せる辞書に変換する(
+        self,
+        notification: Notification,
+        expected: dict[str, Any],
+    ):
+        actual = notification_to_dict(notification)
+        assert actual == expected
+        assert json.loads(json.dumps(actual)) == expected
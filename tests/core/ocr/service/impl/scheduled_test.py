@@ -0,0 +1,114 @@
+import asyncio
+from typing import Optional
+
+import numpy as np
+from cv2.typing import MatLike
+from pytest import mark
+
+from pkscrd.core.metrics.service import LabeledMetrics, MetricsRegistry
+from pkscrd.core.ocr.model import Fraction, LineContentType, LogFormat, TextColor
+from pkscrd.core.ocr.service import OcrEngine
+from pkscrd.core.ocr.service.impl.scheduled import OCR_WAIT_SECONDS, OcrScheduler
+
+_IMAGE = np.zeros((1, 1), dtype=np.uint8)
+
+
+class _GatedEngine(OcrEngine):
+    """読み取った順を記録し, 許可されるまで読み取りを終えない."""
+
+    def __init__(self) -> None:
+        self.read: list[str] = []
+        self.gate = asyncio.Event()
+
+    async def read_line(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+        *,
+        content_type: Optional[LineContentType] = None,
+    ) -> Optional[str]:
+        self.read.append(text_color.name)
+        await self.gate.wait()
+        return text_color.name
+
+    async def read_fraction(
+        self,
+        image: MatLike,
+        text_color: TextColor,
+    ) -> Optional[Fraction]:
+        return None
+
+    async def read_log(self, image: MatLike, format: LogFormat) -> list[list[str]]:
+        return []
+
+
+@mark.asyncio
+class TestOcrScheduler:
+
+    async def test_同時に行う読み取りの数を制限する(self):
+        engine = _GatedEngine()
+        sut = OcrScheduler(engine, concurrency=2)
+        a = sut.session("a")
+
+        tasks = [
+            asyncio.create_task(a.read_line(_IMAGE, TextColor.BLACK)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        assert (sut.running, sut.waiting("a"), len(engine.read)) == (2, 1, 2)
+        engine.gate.set()
+        assert await asyncio.gather(*tasks) == ["BLACK"] * 3
+        assert (sut.running, sut.waiting("a")) == (0, 0)
+
+    async def test_待たせた読み取りはセッション間で順番に行う(self):
+        engine = _GatedEngine()
+        sut = OcrScheduler(engine, concurrency=1)
+        a, b = sut.session("a"), sut.session("b")
+
+        tasks = [
+            asyncio.create_task(a.read_line(_IMAGE, TextColor.BLACK)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(b.read_line(_IMAGE, TextColor.WHITE)))
+        await asyncio.sleep(0)
+        engine.gate.set()
+        await asyncio.gather(*tasks)
+
+        # 先に積まれた a の読み取りを待たずに, b の読み取りを行う.
+        assert engine.read == ["BLACK", "BLACK", "WHITE", "BLACK"]
+
+    async def test_取り消された読み取りは枠を使わない(self):
+        engine = _GatedEngine()
+        sut = OcrScheduler(engine, concurrency=1)
+        a, b = sut.session("a"), sut.session("b")
+
+        first = asyncio.create_task(a.read_line(_IMAGE, TextColor.BLACK))
+        cancelled = asyncio.create_task(b.read_line(_IMAGE, TextColor.WHITE))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert sut.waiting("b") == 0
+
+        engine.gate.set()
+        assert await first == "BLACK"
+        assert await a.read_line(_IMAGE, TextColor.BLACK) == "BLACK"
+        assert engine.read == ["BLACK", "BLACK"]
+        assert sut.running == 0
+
+    async def test_セッションごとに待ち時間を計測する(self):
+        engine = _GatedEngine()
+        engine.gate.set()
+        registry = MetricsRegistry()
+        sut = OcrScheduler(engine)
+        a = sut.session("a", LabeledMetrics(registry, session="a"))
+
+        await a.read_line(_IMAGE, TextColor.BLACK)
+
+        snapshot = registry.snapshot()
+        assert (OCR_WAIT_SECONDS, (("session", "a"),)) in snapshot.histograms
+        assert snapshot.counters == {
+            ("ocr_calls_total", (("method", "read_line"), ("session", "a"))): 1
+        }
+        assert snapshot.gauges == {
+            ("queue_depth", (("queue", "ocr"), ("session", "a"))): 0
+        }
@@ -1,15 +1,23 @@
+import os
+
 from pytest import fixture, mark
 
 from pkscrd.core.pokemon.model import Pokemon, PokemonId, Type
-from pkscrd.core.pokemon.repos import load_pokemons
+from pkscrd.core.pokemon.repos import (
+    dump_compiled_pokemons,
+    load_compiled_pokemons,
+    load_pokemons,
+)
 from pkscrd.core.pokemon.service import PokemonMapper
 
 
 class TestPokemonMapper:
 
-    @fixture
-    def mapper(self) -> PokemonMapper:
-        return PokemonMapper(load_pokemons())
+    @fixture(params=("TSV", "コンパイル済み"))
+    def mapper(self, request) -> PokemonMapper:
+        if request.param == "TSV":
+            return PokemonMapper(load_pokemons())
+        return PokemonMapper.load()
 
     _CASES = {
         "ID直マッピング": (
@@ -74,3 +82,38 @@ class TestPokemonMapper:
     @mark.parametrize(("id", "expected"), _CASES.values(), ids=_CASES.keys())
     def test_get(self, mapper: PokemonMapper, id: PokemonId, expected: Pokemon):
         assert mapper.get(id) == expected
+
+
+class TestCompiledPokemons:
+
+    def test_同梱のデータベースは元のデータベースと一致する(self):
+        compiled = load_compiled_pokemons()
+        assert compiled is not None
+        expected = {p.id: p for p in map(PokemonMapper.convert, load_pokemons())}
+        assert dict(compiled) == expected
+
+    def test_書き出したデータベースを読み込める(self, tempdir: str):
+        path = os.path.join(tempdir, "pokemons.bin")
+        pokemons = [
+            Pokemon(PokemonId(892, 0), "ウーラオス", [(Type.FIGHTING, Type.WATER)]),
+            Pokemon(PokemonId(4, 0), "ヒトカゲ", [(Type.FIRE,)]),
+        ]
+        dump_compiled_pokemons(path, pokemons)
+
+        compiled = load_compiled_pokemons(path)
+        assert compiled is not None
+        assert list(compiled) == [PokemonId(4, 0), PokemonId(892, 0)]
+        assert compiled[PokemonId(892, 0)] == pokemons[0]
+        assert compiled.get(PokemonId(5, 0)) is None
+        compiled.close()
+
+    def test_ファイルがなければNoneを返す(self, tempdir: str):
+        assert load_compiled_pokemons(os.path.join(tempdir, "none.bin")) is None
+
+    def test_版が一致しなければNoneを返す(self, tempdir: str):
+        path = os.path.join(tempdir, "pokemons.bin")
+        dump_compiled_pokemons(path, [])
+        with open(path, "r+b") as f:
+            f.seek(10)
+            f.write(b"\x00" * 32)
+        assert load_compiled_pokemons(path) is None
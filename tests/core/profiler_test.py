@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+from pkscrd.core.profiler.infra import CollapsedStackFileWriter, to_collapsed
+from pkscrd.core.profiler.model import Profile
+from pkscrd.core.profiler.service import ProfilerSwitch, SamplingProfiler
+
+
+def _busy(stopped: threading.Event) -> None:
+    while not stopped.is_set():
+        sum(range(100))
+
+
+class TestSamplingProfiler:
+
+    def test_他のスレッドのスタックを標本化する(self):
+        stopped = threading.Event()
+        thread = threading.Thread(target=_busy, args=(stopped,), name="busy")
+        thread.start()
+        sut = SamplingProfiler(0.001)
+        try:
+            sut.start()
+            time.sleep(0.05)
+            profile = sut.stop()
+        finally:
+            stopped.set()
+            thread.join()
+
+        assert not sut.running
+        busy = [s for s in profile.samples if s[0] == "busy"]
+        assert busy
+        assert any(label.startswith("_busy (profiler_test.py:") for label in busy[0])
+        assert all(stack[0] != "profiler" for stack in profile.samples)
+
+    def test_停止後に再び開始できる(self):
+        sut = SamplingProfiler(0.001)
+        sut.start()
+        sut.start()
+        first = sut.stop()
+        sut.start()
+        second = sut.stop()
+
+        assert first.samples is not second.samples
+
+
+class TestProfilerSwitch:
+
+    def test_停止したら集計を書き出す(self, tempdir: str):
+        sut = ProfilerSwitch(SamplingProfiler(0.001), CollapsedStackFileWriter(tempdir))
+
+        assert sut.stop() is None
+        sut.toggle()
+        assert sut.running
+        time.sleep(0.01)
+        assert not sut.start()
+        path = sut.stop()
+
+        assert path and os.path.dirname(path) == tempdir
+        assert path.endswith(".collapsed")
+        assert not sut.running
+
+
+class TestToCollapsed:
+
+    def test_折りたたみスタック形式に変換する(self):
+        profile = Profile(
+            samples={
+                ("main", "f (a.py:1)", "g;h (a.py:5)"): 3,
+                ("io", "w (b.py:2)"): 1,
+            },
+            interval_in_seconds=0.005,
+            duration_in_seconds=1.0,
+        )
+
+        assert to_collapsed(profile) == (
+            "io;w (b.py:2) 1\nmain;f (a.py:1);g:h (a.py:5) 3\n"
+        )
+        assert profile.total == 4
@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+from cv2.typing import MatLike
+from pytest import mark, raises
+from returns.pipeline import is_successful
+
+from pkscrd.core.screen.service.impl.push import (
+    SCREEN_SIZE,
+    NoFrameError,
+    PushScreenFetcher,
+    fit_to_screen,
+)
+
+
+def _image(value: int) -> MatLike:
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+
+@mark.asyncio
+class TestPushScreenFetcher:
+
+    async def test_与えられた映像を返す(self):
+        sut = PushScreenFetcher()
+        sut.push(_image(1))
+
+        result = await sut.fetch()
+
+        assert int(result.unwrap()[0, 0, 0]) == 1
+
+    async def test_取得されずに上書きされた映像は飛ばす(self):
+        sut = PushScreenFetcher()
+        sut.push(_image(1))
+        sut.push(_image(2))
+
+        result = await sut.fetch()
+
+        assert int(result.unwrap()[0, 0, 0]) == 2
+        assert (sut.pushed, sut.skipped) == (2, 1)
+
+    async def test_新しい映像が与えられるまで待つ(self):
+        sut = PushScreenFetcher()
+        sut.push(_image(1))
+        await sut.fetch()
+
+        fetching = asyncio.create_task(sut.fetch())
+        await asyncio.sleep(0)
+        assert not fetching.done()
+        sut.push(_image(2))
+
+        assert int((await fetching).unwrap()[0, 0, 0]) == 2
+
+    async def test_待っても与えられなければ失敗を返す(self):
+        sut = PushScreenFetcher(timeout_in_seconds=0.01)
+
+        result = await sut.fetch()
+
+        assert not is_successful(result)
+        assert isinstance(result.failure(), NoFrameError)
+
+
+class Test_fit_to_screen:
+
+    def test_16対9の映像は認識が前提とする大きさにする(self):
+        for width, height in ((640, 360), (1366, 768), (3840, 2160)):
+            image = np.full((height, width, 3), 128, dtype=np.uint8)
+
+            fitted = fit_to_screen(image)
+
+            assert (fitted.shape[1], fitted.shape[0]) == SCREEN_SIZE
+            assert int(fitted[540, 960, 0]) == 128
+
+    def test_認識が前提とする大きさの映像はそのまま返す(self):
+        image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+        assert fit_to_screen(image) is image
+
+    def test_縦横比が異なるかBGRでない映像は_ValueError(self):
+        for image in (
+            np.zeros((480, 640, 3), dtype=np.uint8),
+            np.zeros((1080, 1920), dtype=np.uint8),
+            np.zeros((1080, 1920, 4), dtype=np.uint8),
+            np.zeros((1080, 1920, 3), dtype=np.float32),
+        ):
+            with raises(ValueError):
+                fit_to_screen(image)
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+from cv2.typing import MatLike
+
+from pkscrd.core.screen.infra.archive import FrameArchiveReader, FrameArchiveWriter
+from pkscrd.core.screen.service.recorder import ScreenRecorder
+
+
+def _image(value: int) -> MatLike:
+    return np.full((16, 16, 3), value, dtype=np.uint8)
+
+
+class TestFrameArchiveWriter:
+
+    def test_書き込んだチャンクを読み込める(self, tempdir: str):
+        path = os.path.join(tempdir, "archive")
+        with FrameArchiveWriter.create(path) as writer:
+            writer.write_chunk([(0, 1.0, b"ab"), (1, 2.0, b"cde")])
+            writer.write_chunk([])
+            writer.write_chunk([(5, 3.0, b"f")])
+            size = writer.size
+
+        assert os.path.getsize(path) == size
+        with FrameArchiveReader.open(path) as reader:
+            assert [f.sequence for f in reader.frames] == [0, 1, 5]
+            assert [reader.read_bytes(i) for i in range(3)] == [b"ab", b"cde", b"f"]
+            assert reader.find(2.5) == 1
+
+
+class TestScreenRecorder:
+
+    def test_指定間隔ごとにフレームを記録する(self, tempdir: str):
+        path = os.path.join(tempdir, "archive")
+        clock = iter(range(100))
+        sut = ScreenRecorder(
+            FrameArchiveWriter.create(path),
+            every=2,
+            chunk_size=2,
+            clock=lambda: float(next(clock)),
+        )
+        with sut:
+            for value in range(5):
+                sut.record(_image(value * 50))
+
+        assert sut.stats.recorded == 3
+        assert sut.stats.dropped == 0
+        with FrameArchiveReader.open(path) as reader:
+            assert [f.sequence for f in reader.frames] == [0, 2, 4]
+            assert [f.timestamp for f in reader.frames] == [0.0, 1.0, 2.0]
+            image = reader.read(2)
+            assert image is not None
+            assert abs(int(image[0, 0, 0]) - 200) <= 2
+
+    def test_待ち行列があふれたら待たずに捨てる(self, tempdir: str):
+        path = os.path.join(tempdir, "archive")
+        sut = ScreenRecorder(FrameArchiveWriter.create(path), queue_size=2)
+        # 書き込みスレッドを開始する前に積み, 書き込みが追い付かない状況を作る.
+        for value in range(5):
+            sut.record(_image(value))
+        sut.start()
+        sut.close()
+
+        assert sut.stats.recorded == 2
+        assert sut.stats.dropped == 3
+
+    def test_容量の上限を超えるチャンクは書き込まない(self, tempdir: str):
+        path = os.path.join(tempdir, "archive")
+        sut = ScreenRecorder(
+            FrameArchiveWriter.create(path),
+            chunk_size=1,
+            max_bytes=1000,
+        )
+        noise = np.random.default_rng(0).integers(0, 256, (64, 64, 3), np.uint8)
+        with sut:
+            for _ in range(3):
+                sut.record(noise)
+
+        assert sut.stats.recorded == 0
+        assert sut.stats.dropped == 3
+        assert os.path.getsize(path) <= 1000
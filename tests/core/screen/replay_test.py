@@ -0,0 +1,157 @@
+import os
+from datetime import datetime
+from typing import Optional
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+from pytest import fixture, mark
+from returns.pipeline import is_successful
+
+from pkscrd.core.screen.infra.archive import (
+    CHUNK_ENTRY,
+    CHUNK_HEADER,
+    CHUNK_MAGIC,
+    FILE_HEADER,
+    FILE_MAGIC,
+    FORMAT_VERSION,
+)
+from pkscrd.core.screen.infra.replay import (
+    FrameArchiveRecordingReader,
+    ImageDirectoryReader,
+    RecordingReader,
+    VideoReader,
+    open_recording,
+)
+from pkscrd.core.screen.service.impl.replay import (
+    EndOfRecordingError,
+    ReplayMode,
+    ReplayScreenFetcher,
+)
+from pkscrd.usecase.screenshot import save_image
+
+
+def _image(value: int) -> MatLike:
+    return np.full((16, 16, 3), value, dtype=np.uint8)
+
+
+class _ListReader(RecordingReader):
+
+    def __init__(
+        self, timestamps: list[float], unreadable: frozenset[int] = frozenset()
+    ):
+        self._timestamps = timestamps
+        self._unreadable = unreadable
+
+    @property
+    def timestamps(self) -> list[float]:
+        return self._timestamps
+
+    def read(self, index: int) -> Optional[MatLike]:
+        return None if index in self._unreadable else _image(index)
+
+
+async def _fetch_value(sut: ReplayScreenFetcher) -> int | Exception:
+    result = await sut.fetch()
+    if not is_successful(result):
+        return result.failure()
+    return int(result.unwrap()[0, 0, 0])
+
+
+class TestReaders:
+
+    def test_画像ディレクトリはファイル名の時刻順に読み込む(self, tempdir: str):
+        save_image(_image(20), datetime(2024, 1, 1, 0, 0, 1), dir_path=tempdir)
+        save_image(_image(10), datetime(2024, 1, 1, 0, 0, 0), dir_path=tempdir)
+
+        with open_recording(tempdir) as reader:
+            assert isinstance(reader, ImageDirectoryReader)
+            assert reader.timestamps[1] - reader.timestamps[0] == 1.0
+            image = reader.read(0)
+            assert image is not None
+            assert abs(int(image[0, 0, 0]) - 10) <= 2
+
+    def test_動画ファイルを読み込む(self, tempdir: str):
+        path = os.path.join(tempdir, "video.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter.fourcc(*"MJPG"), 10, (16, 16))
+        for value in (0, 100, 200):
+            writer.write(_image(value))
+        writer.release()
+
+        with open_recording(path) as reader:
+            assert isinstance(reader, VideoReader)
+            assert reader.timestamps == [0.0, 0.1, 0.2]
+            image = reader.read(2)
+            assert image is not None
+            assert abs(int(image[0, 0, 0]) - 200) <= 4
+
+    def test_フレームアーカイブは完全なチャンクまで読み込む(self, tempdir: str):
+        frames = [cv2.imencode(".png", _image(v))[1].tobytes() for v in (1, 2, 3)]
+        data = FILE_HEADER.pack(FILE_MAGIC, FORMAT_VERSION)
+        data += CHUNK_HEADER.pack(CHUNK_MAGIC, 2, len(frames[0]) + len(frames[1]))
+        data += CHUNK_ENTRY.pack(0, 10.0, len(frames[0]))
+        data += CHUNK_ENTRY.pack(2, 10.5, len(frames[1]))
+        data += frames[0] + frames[1]
+        # 書き込み途中で中断したチャンク.
+        data += CHUNK_HEADER.pack(CHUNK_MAGIC, 1, len(frames[2]))
+        data += CHUNK_ENTRY.pack(3, 11.0, len(frames[2]))
+        path = os.path.join(tempdir, "session.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        with open_recording(path) as reader:
+            assert isinstance(reader, FrameArchiveRecordingReader)
+            assert reader.timestamps == [10.0, 10.5]
+            image = reader.read(1)
+            assert image is not None
+            assert image[0, 0, 0] == 2
+
+
+@mark.asyncio
+class TestReplayScreenFetcher:
+
+    @fixture
+    def reader(self) -> RecordingReader:
+        return _ListReader([0.0, 0.1, 0.2])
+
+    async def test_最高速再生は取得のたびに次のフレームを返す(self, reader):
+        sut = ReplayScreenFetcher(reader, ReplayMode.MAX_SPEED)
+        assert [await _fetch_value(sut) for _ in range(3)] == [0, 1, 2]
+        assert isinstance(await _fetch_value(sut), EndOfRecordingError)
+
+    async def test_読み込めないフレームは飛ばして次のフレームへ進む(self):
+        reader = _ListReader([0.0, 0.1, 0.2], unreadable=frozenset({1}))
+        sut = ReplayScreenFetcher(reader, ReplayMode.MAX_SPEED)
+
+        values = [await _fetch_value(sut) for _ in range(4)]
+
+        assert values[0] == 0
+        assert isinstance(values[1], RuntimeError)
+        assert not isinstance(values[1], EndOfRecordingError)
+        assert values[2] == 2
+        assert isinstance(values[3], EndOfRecordingError)
+
+    async def test_繰り返し再生は先頭に戻る(self, reader):
+        sut = ReplayScreenFetcher(reader, ReplayMode.MAX_SPEED, loops=True)
+        assert [await _fetch_value(sut) for _ in range(4)] == [0, 1, 2, 0]
+
+    async def test_ステップ再生は進めるまで同じフレームを返す(self, reader):
+        sut = ReplayScreenFetcher(reader, ReplayMode.STEP)
+        assert await _fetch_value(sut) == 0
+        assert await _fetch_value(sut) == 0
+        sut.step()
+        assert await _fetch_value(sut) == 1
+        sut.step(5)
+        assert await _fetch_value(sut) == 2
+
+    async def test_実時間再生は間に合わないフレームを飛ばす(self, reader):
+        now = [100.0]
+        sut = ReplayScreenFetcher(reader, ReplayMode.REALTIME, clock=lambda: now[0])
+        assert await _fetch_value(sut) == 0
+        now[0] += 0.05
+        assert await _fetch_value(sut) == 0
+        now[0] += 0.16
+        assert await _fetch_value(sut) == 2
+        assert sut.timestamp == 0.2
+        now[0] += 1.0
+        assert isinstance(await _fetch_value(sut), EndOfRecordingError)
@@ -0,0 +1,274 @@
+"""
+合成した HUD のフレームを作る.
+
+実際のキャプチャを収録できないため, 検出処理が参照する座標に HUD の部品を描画して代用する.
+座標は各モジュールの定数をそのまま参照し, 検出処理の変更に追従させる.
+文字は Hershey フォントで描くため, 英数字に限られる.
+"""
+
+import enum
+import itertools
+from typing import Iterator, Optional, Sequence
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from pkscrd.core.cursor.model import PokemonCursorScene
+from pkscrd.core.hp.model import HpScene
+from pkscrd.core.hp.service import OcrAllyHpReader, _GAUGE_OFFSET, _GAUGE_POSITIONS
+from pkscrd.core.log.model import LogType
+from pkscrd.core.move.model import MoveScene
+from pkscrd.core.log.service import (
+    _COORDINATES as _LOG_COORDINATES,
+    _GENERAL_LOG_BOX_CORNER_COORDINATES,
+    OcrLogReader,
+)
+
+WIDTH = 1920
+HEIGHT = 1080
+
+Color = tuple[int, int, int]
+"""BGR"""
+
+BACKGROUND: Color = (40, 40, 40)
+WHITE: Color = (255, 255, 255)
+GREY: Color = (200, 200, 200)
+BLACK: Color = (0, 0, 0)
+SELECTED: Color = (0, 200, 248)
+"""選択中の項目の背景."""
+LOG_BOX_CORNER: Color = (0, 200, 240)
+LOG_BOX_BACKGROUND: Color = (16, 16, 16)
+
+
+class GaugeColor(enum.Enum):
+    """HP ゲージの色. 値は BGR."""
+
+    GREEN = (80, 224, 80)
+    YELLOW = (32, 176, 248)
+    RED = (48, 48, 232)
+
+    @staticmethod
+    def of(ratio: float) -> "GaugeColor":
+        """ゲーム中と同じく, 残り HP の割合から色を決める."""
+        if ratio > 0.5:
+            return GaugeColor.GREEN
+        if ratio > 0.2:
+            return GaugeColor.YELLOW
+        return GaugeColor.RED
+
+
+_GAUGE_BORDER: Color = (224, 224, 224)
+_GAUGE_GAP: Color = (24, 24, 24)
+_GAUGE_EMPTY: Color = (48, 48, 48)
+
+
+class HudFrameBuilder:
+    """
+    HUD の部品を描画してフレームを作る.
+    描画のメソッドは自身を返すため, 続けて呼び出せる.
+    """
+
+    def __init__(self, background: Color = BACKGROUND):
+        self._image = np.full((HEIGHT, WIDTH, 3), background, dtype=np.uint8)
+
+    def gauge(
+        self,
+        scene: HpScene,
+        ratio: float,
+        *,
+        is_opponent: bool = True,
+        color: Optional[GaugeColor] = None,
+    ) -> "HudFrameBuilder":
+        """HP ゲージを描く. 外枠, 外枠との隙間, 残り HP の順に塗る."""
+        top, bottom, left, right = _GAUGE_POSITIONS[is_opponent][scene]
+        outer_left = left - _GAUGE_OFFSET
+        outer_right = right + _GAUGE_OFFSET
+        self._fill(top - 4, bottom + 4, outer_left - 4, outer_right + 4, _GAUGE_BORDER)
+        self._fill(top - 2, bottom + 2, outer_left - 2, outer_right + 2, _GAUGE_GAP)
+        self._fill(top, bottom, left, right, _GAUGE_EMPTY)
+
+        filled = round((right - left) * max(0.0, min(1.0, ratio)))
+        if filled:
+            color = color or GaugeColor.of(ratio)
+            self._fill(top, bottom, left, left + filled, color.value)
+        return self
+
+    def ally_hp(self, scene: HpScene, current: int, max_: int) -> "HudFrameBuilder":
+        """味方 HP のゲージと数値を描く."""
+        self.gauge(scene, current / max_ if max_ else 0.0, is_opponent=False)
+        top, bottom, left, right = OcrAllyHpReader._POSITIONS[scene]
+        self._text(f"{current}/{max_}", left, bottom - 6, GREY, scale=1.0)
+        return self
+
+    def selected_background(
+        self,
+        top: int,
+        height: int,
+        left: int,
+        width: int,
+    ) -> "HudFrameBuilder":
+        """選択中の項目の背景を描く."""
+        return self._fill(top, top + height, left, left + width, SELECTED)
+
+    def command_cursor(self, index: int) -> "HudFrameBuilder":
+        """指示 (「たたかう」など) のカーソルを描く."""
+        # 読み取りの座標を参照するため, 使うときだけ読み込む (pnlib に依存する).
+        from pkscrd.core.cursor.service import CommandCursorReader as R
+
+        top = R._TOP + R._ITEM_HEIGHT * index
+        return self.selected_background(top, R._HEIGHT, 1480, 400)
+
+    def pokemon_cursor(
+        self,
+        scene: PokemonCursorScene,
+        index: int,
+    ) -> "HudFrameBuilder":
+        """選出画面やポケモン選択画面のポケモンカーソルを描く."""
+        from pkscrd.core.cursor.service import PokemonCursorReader as R
+
+        top, height, left, width, item_height, _ = R._SCALES[scene]
+        return self.selected_background(top + item_height * index, height, left, width)
+
+    def move_names(
+        self,
+        scene: MoveScene,
+        names: Sequence[str],
+        *,
+        selected: Optional[int] = None,
+    ) -> "HudFrameBuilder":
+        """技名を描く. 選択中の技は背景を塗り, 文字を黒くする."""
+        from pkscrd.core.move.service import _HEIGHTS, OcrMoveReader
+
+        top, bottom, left, right = OcrMoveReader._NAME_COORDINATES[scene]
+        item_height = _HEIGHTS[scene]
+        for index, name in enumerate(names):
+            offset = item_height * index
+            if index == selected:
+                self._fill(top + offset, bottom + offset, left, right, SELECTED)
+            self._text(
+                name,
+                left + 8,
+                bottom + offset - 8,
+                BLACK if index == selected else GREY,
+            )
+        return self
+
+    def general_log_box(self, lines: Sequence[str] = ()) -> "HudFrameBuilder":
+        """汎用ログ表示欄を描く. 四隅の装飾, 背景, 文字の順に描く."""
+        self._fill(780, 980, 480, 1440, LOG_BOX_BACKGROUND)
+        for top, bottom, left, right in _GENERAL_LOG_BOX_CORNER_COORDINATES:
+            self._fill(top, bottom, left, right, LOG_BOX_CORNER)
+        return self._log_lines(LogType.GENERAL, lines, WHITE)
+
+    def battle_log(self, lines: Sequence[str]) -> "HudFrameBuilder":
+        """行動ログを描く."""
+        top, left, right = _LOG_COORDINATES[LogType.BATTLE]
+        self._fill(top, top + OcrLogReader._LINE_HEIGHT * 2, left, right, BLACK)
+        return self._log_lines(LogType.BATTLE, lines, WHITE)
+
+    def build(
+        self,
+        *,
+        noise: float = 0.0,
+        jpeg_quality: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> MatLike:
+        """
+        フレームを作る.
+
+        Args:
+            noise: 画素ごとに加える正規分布の雑音の標準偏差.
+            jpeg_quality: 指定されたとき, JPEG でエンコードし直して圧縮歪みを加える.
+            seed: 雑音の乱数の種.
+        """
+        image = self._image.copy()
+        if noise:
+            rng = np.random.default_rng(seed)
+            # 大量に作れるよう, 単精度で計算する.
+            noised = rng.standard_normal(image.shape, dtype=np.float32)
+            noised *= noise
+            noised += image
+            image = np.clip(noised, 0, 255).astype(np.uint8)
+        if jpeg_quality is not None:
+            _, data = cv2.imencode(
+                ".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+            )
+            decoded = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            assert decoded is not None
+            image = decoded.astype(np.uint8)
+        return image
+
+    def _log_lines(
+        self,
+        type_: LogType,
+        lines: Sequence[str],
+        color: Color,
+    ) -> "HudFrameBuilder":
+        top, left, _ = _LOG_COORDINATES[type_]
+        line_height = OcrLogReader._LINE_HEIGHT
+        ruby_height = OcrLogReader._RUBY_HEIGHT
+        for index, line in enumerate(lines[:2]):
+            # 下端の判定に使われる背景へはみ出さないよう, 文字は行の上寄りに置く.
+            baseline = top + ruby_height + line_height * index + 34
+            self._text(line, left + 8, baseline, color)
+        return self
+
+    def _fill(
+        self,
+        top: int,
+        bottom: int,
+        left: int,
+        right: int,
+        color: Color,
+    ) -> "HudFrameBuilder":
+        self._image[top:bottom, left:right] = color
+        return self
+
+    def _text(
+        self,
+        text: str,
+        left: int,
+        baseline: int,
+        color: Color,
+        *,
+        scale: float = 1.2,
+    ) -> None:
+        cv2.putText(
+            self._image,
+            text,
+            (left, baseline),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            scale,
+            color,
+            thickness=2,
+            lineType=cv2.LINE_AA,
+        )
+
+
+def generate_frames(
+    count: int,
+    *,
+    seed: int = 0,
+    noise: float = 2.0,
+    jpeg_quality: Optional[int] = 90,
+) -> Iterator[MatLike]:
+    """
+    HUD の部品を無作為に組み合わせたフレームを作る. 負荷試験向け.
+    同じ種からは同じフレームの列を作る.
+    """
+    rng = np.random.default_rng(seed)
+    for index in itertools.islice(itertools.count(), count):
+        builder = HudFrameBuilder()
+        for scene in HpScene:
+            if rng.random() < 0.5:
+                builder.gauge(scene, float(rng.random()))
+            if rng.random() < 0.5:
+                max_ = int(rng.integers(100, 400))
+                builder.ally_hp(scene, int(rng.integers(0, max_ + 1)), max_)
+        match rng.integers(3):
+            case 0:
+                builder.general_log_box([f"Log message {index}"])
+            case 1:
+                builder.battle_log([f"Battle log {index}", "It's super effective!"])
+        yield builder.build(noise=noise, jpeg_quality=jpeg_quality, seed=index)
@@ -0,0 +1,109 @@
+from itertools import islice
+
+import numpy as np
+import pytest
+
+from pkscrd.core.hp.model import HpScene
+from pkscrd.core.hp.service import recognize_gauge, recognize_opponent_hps
+from pkscrd.core.log.service import recognize_general_log_box
+from .hud import GaugeColor, HudFrameBuilder, generate_frames
+
+# 検出処理が合成フレームで期待どおりに動くことを確かめる精度試験.
+# 雑音と JPEG の圧縮歪みは, 配信やキャプチャで加わる程度を想定する.
+_DISTORTIONS = {
+    "歪みなし": {},
+    "雑音": {"noise": 4.0, "seed": 0},
+    "JPEG": {"jpeg_quality": 90},
+    "雑音と JPEG": {"noise": 4.0, "seed": 0, "jpeg_quality": 90},
+}
+
+
+class TestGauge:
+
+    @pytest.mark.parametrize(
+        "distortion",
+        _DISTORTIONS.values(),
+        ids=_DISTORTIONS.keys(),
+    )
+    @pytest.mark.parametrize("scene", HpScene)
+    @pytest.mark.parametrize("is_opponent", (True, False))
+    def test_描いたゲージを認識する(
+        self,
+        distortion: dict,
+        scene: HpScene,
+        is_opponent: bool,
+    ):
+        image = (
+            HudFrameBuilder()
+            .gauge(scene, 0.5, is_opponent=is_opponent)
+            .build(**distortion)
+        )
+        assert recognize_gauge(image, scene, is_opponent=is_opponent)
+        assert not recognize_gauge(
+            HudFrameBuilder().build(**distortion),
+            scene,
+            is_opponent=is_opponent,
+        )
+
+    _RATIOS = {
+        "満タン": (1.0, GaugeColor.GREEN),
+        "緑": (0.75, GaugeColor.GREEN),
+        "黄": (0.4, GaugeColor.YELLOW),
+        "赤": (0.1, GaugeColor.RED),
+    }
+
+    # 割合の認識は重いため, 歪みは最も強いものだけ試す.
+    @pytest.mark.parametrize(
+        "distortion",
+        (_DISTORTIONS["歪みなし"], _DISTORTIONS["雑音と JPEG"]),
+        ids=("歪みなし", "雑音と JPEG"),
+    )
+    @pytest.mark.parametrize(("ratio", "color"), _RATIOS.values(), ids=_RATIOS.keys())
+    def test_相手HPの割合を認識する(
+        self,
+        distortion: dict,
+        ratio: float,
+        color: GaugeColor,
+    ):
+        image = (
+            HudFrameBuilder()
+            .gauge(HpScene.COMMAND, ratio, color=color)
+            .gauge(HpScene.MOVE, ratio, color=color)
+            .build(**distortion)
+        )
+        hps = recognize_opponent_hps(image)
+        assert hps.keys() == {HpScene.COMMAND, HpScene.MOVE}
+        assert all(v == pytest.approx(ratio, abs=0.02) for v in hps.values())
+
+
+class TestGeneralLogBox:
+
+    @pytest.mark.parametrize(
+        "distortion",
+        _DISTORTIONS.values(),
+        ids=_DISTORTIONS.keys(),
+    )
+    def test_汎用ログ表示欄を認識する(self, distortion: dict):
+        image = (
+            HudFrameBuilder()
+            .general_log_box(["Pikachu used", "Thunderbolt!"])
+            .build(**distortion)
+        )
+        assert recognize_general_log_box(image)
+
+    def test_行動ログは汎用ログ表示欄と認識しない(self):
+        image = HudFrameBuilder().battle_log(["Pikachu used Thunderbolt!"]).build()
+        assert not recognize_general_log_box(image)
+
+
+class Test_generate_frames:
+
+    def test_同じ種からは同じフレームを作る(self):
+        lhs = list(generate_frames(2, seed=1))
+        rhs = list(generate_frames(2, seed=1))
+        assert len(lhs) == 2
+        assert all(np.array_equal(a, b) for a, b in zip(lhs, rhs))
+        assert all(a.shape == (1080, 1920, 3) for a in lhs)
+
+    def test_必要な分だけ作る(self):
+        assert len(list(islice(generate_frames(1000), 2))) == 2
@@ -0,0 +1,21 @@
+"""
+外部アプリの代役となるローカルサーバ.
+
+OBS Studio, VOICEVOX, 棒読みちゃんを起動できない環境 (ヘッドレスな Linux など) で,
+連携部分を含めた結合試験や負荷試験を行うために用いる.
+いずれも一時的なポートで待ち受け, 非同期コンテキストマネージャとして起動する.
+"""
+
+from .bouyomichan import BouyomichanServer
+from .fault import Fault, FaultInjector, Latency
+from .obs import ObsServer
+from .voicevox import VoiceVoxServer
+
+__all__ = [
+    "BouyomichanServer",
+    "Fault",
+    "FaultInjector",
+    "Latency",
+    "ObsServer",
+    "VoiceVoxServer",
+]
@@ -0,0 +1,72 @@
+import contextlib
+import dataclasses
+from typing import AsyncIterator, Optional
+
+from .fault import FaultInjector, Latency
+from .http import HttpRequest, HttpResponse, HttpServer
+
+
+@dataclasses.dataclass(frozen=True)
+class Talk:
+    text: str
+    speed: Optional[int]
+
+
+class BouyomichanServer:
+    """
+    棒読みちゃんの HTTP 連携 (/talk) の代役.
+    読み上げの代わりに, 受け付けた内容を記録する.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ):
+        self._talks: list[Talk] = []
+        self._http = HttpServer(
+            {("GET", "/talk"): self._talk},
+            latency=latency,
+            faults=faults,
+        )
+
+    @property
+    def port(self) -> int:
+        return self._http.port
+
+    @property
+    def latency(self) -> Latency:
+        return self._http.latency
+
+    @property
+    def faults(self) -> FaultInjector:
+        return self._http.faults
+
+    @property
+    def request_count(self) -> int:
+        return self._http.request_count
+
+    @property
+    def talks(self) -> list[Talk]:
+        """受け付けた読み上げ. 受け付けた順."""
+        return self._talks
+
+    async def _talk(self, request: HttpRequest) -> HttpResponse:
+        text = request.query.get("text")
+        if text is None:
+            return HttpResponse.of_json({"error": "text is required"}, 400)
+        speed = request.query.get("speed")
+        self._talks.append(Talk(text, int(speed) if speed else None))
+        return HttpResponse.of_json({"taskId": len(self._talks)})
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def create(
+        *,
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ) -> AsyncIterator["BouyomichanServer"]:
+        server = BouyomichanServer(latency=latency, faults=faults)
+        async with server._http.serving():
+            yield server
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from pytest import mark, raises
+
+from pkscrd.core.notification.infra.bouyomichan import BouyomichanClient
+from pkscrd.core.notification.service.impl.bouyomichan import BouyomichanTalker
+from pkscrd.core.tolerance.service import Tolerance
+from tests.support.servers import BouyomichanServer, Fault, FaultInjector, Latency
+from tests.support.servers.bouyomichan import Talk
+
+
+@mark.asyncio
+class TestBouyomichanServer:
+
+    async def test_読み上げを記録する(self):
+        async with BouyomichanServer.create() as server:
+            sut = BouyomichanTalker(
+                BouyomichanClient(port=server.port),
+                Tolerance(),
+                speed=120,
+            )
+            await asyncio.to_thread(sut, "こんにちは")
+
+        assert server.talks == [Talk("こんにちは", 120)]
+
+    async def test_応答しなければタイムアウトする(self):
+        faults = FaultInjector()
+        async with BouyomichanServer.create(faults=faults) as server:
+            client = BouyomichanClient(port=server.port)
+            faults.inject(Fault.TIMEOUT)
+            with raises(RuntimeError, match="タイムアウト"):
+                await asyncio.to_thread(client.talk, "こんにちは", timeout=0.2)
+
+        assert server.talks == []
+
+    async def test_応答を遅延させる(self):
+        async with BouyomichanServer.create(latency=Latency(0.2)) as server:
+            client = BouyomichanClient(port=server.port)
+            began_at = time.perf_counter()
+            await asyncio.to_thread(client.talk, "こんにちは")
+
+        assert time.perf_counter() - began_at >= 0.2
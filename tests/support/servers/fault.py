@@ -0,0 +1,69 @@
+import asyncio
+import enum
+import random
+from collections import deque
+from typing import Optional
+
+
+class Fault(enum.Enum):
+    """代役サーバに起こさせる障害."""
+
+    ERROR = "error"
+    """失敗を応答する."""
+    DISCONNECT = "disconnect"
+    """応答せずに接続を切る."""
+    TIMEOUT = "timeout"
+    """接続を保ったまま応答しない."""
+
+
+class FaultInjector:
+    """
+    要求ごとに起こす障害を決める.
+    予約された障害を先に起こし, 予約がなければ一定の確率で rate_fault を起こす.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = 0.0,
+        rate_fault: Fault = Fault.ERROR,
+        seed: Optional[int] = None,
+    ):
+        self.rate = rate
+        self.rate_fault = rate_fault
+        self._scheduled: deque[Fault] = deque()
+        self._random = random.Random(seed)
+
+    def inject(self, fault: Fault, count: int = 1) -> None:
+        """続く count 回の要求で障害を起こす."""
+        self._scheduled.extend([fault] * count)
+
+    def clear(self) -> None:
+        self._scheduled.clear()
+        self.rate = 0.0
+
+    def next(self) -> Optional[Fault]:
+        """次の要求で起こす障害を返す. 障害を起こさないときは None を返す."""
+        if self._scheduled:
+            return self._scheduled.popleft()
+        if self.rate and self._random.random() < self.rate:
+            return self.rate_fault
+        return None
+
+
+class Latency:
+    """応答の遅延. base 秒に, 0 から jitter 秒の一様乱数を加える."""
+
+    def __init__(
+        self, base: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None
+    ):
+        self.base = base
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    async def wait(self) -> None:
+        delay = self.base + (
+            self._random.uniform(0.0, self.jitter) if self.jitter else 0.0
+        )
+        if delay > 0.0:
+            await asyncio.sleep(delay)
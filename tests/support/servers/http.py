@@ -0,0 +1,162 @@
+"""
+代役サーバ向けの最小限の HTTP/1.1 サーバ.
+接続の再利用 (keep-alive) に対応し, 本文は Content-Length で受け渡す.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from .fault import Fault, FaultInjector, Latency
+
+_REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class HttpRequest:
+    method: str
+    path: str
+    query: dict[str, str]
+    body: bytes = b""
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclasses.dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    body: bytes = b""
+    content_type: str = "application/json"
+
+    @staticmethod
+    def of_json(value: Any, status: int = 200) -> "HttpResponse":
+        return HttpResponse(status, json.dumps(value, ensure_ascii=False).encode())
+
+
+Handler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+class HttpServer:
+    """
+    経路ごとのハンドラに要求を振り分ける.
+    遅延と障害は, ハンドラを呼び出す前にすべての要求へ等しく与える.
+    """
+
+    def __init__(
+        self,
+        routes: dict[tuple[str, str], Handler],
+        *,
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ):
+        self.latency = latency or Latency()
+        self.faults = faults or FaultInjector()
+        self._routes = routes
+        self._servers: list[asyncio.Server] = []
+        self._port = 0
+        self._request_count = 0
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def request_count(self) -> int:
+        return self._request_count
+
+    @contextlib.asynccontextmanager
+    async def serving(self) -> AsyncIterator[None]:
+        """
+        一時的なポートで待ち受ける.
+        クライアントは localhost に接続するため, IPv4 と IPv6 の両方で同じポートを使う.
+        """
+        server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        self._servers.append(server)
+        self._port = server.sockets[0].getsockname()[1]
+        with contextlib.suppress(OSError):
+            self._servers.append(
+                await asyncio.start_server(self._handle_connection, "::1", self._port)
+            )
+        try:
+            yield
+        finally:
+            for server in self._servers:
+                server.close()
+                server.close_clients()
+            for server in self._servers:
+                await server.wait_closed()
+            self._servers.clear()
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while request := await _read_request(reader):
+                self._request_count += 1
+                await self.latency.wait()
+                match self.faults.next():
+                    case Fault.DISCONNECT:
+                        return
+                    case Fault.TIMEOUT:
+                        # 切断されるまで応答しない.
+                        await reader.read()
+                        return
+                    case Fault.ERROR:
+                        response = HttpResponse.of_json({"detail": "injected"}, 500)
+                    case None:
+                        response = await self._dispatch(request)
+                writer.write(_serialize(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: HttpRequest) -> HttpResponse:
+        handler = self._routes.get((request.method, request.path))
+        if handler:
+            return await handler(request)
+        if any(path == request.path for _, path in self._routes):
+            return HttpResponse.of_json({"detail": "Method Not Allowed"}, 405)
+        return HttpResponse.of_json({"detail": "Not Found"}, 404)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[HttpRequest]:
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+
+    headers: dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return HttpRequest(method, url.path, dict(parse_qsl(url.query)), body)
+
+
+def _serialize(response: HttpResponse) -> bytes:
+    reason = _REASONS.get(response.status, "")
+    lines = [f"HTTP/1.1 {response.status} {reason}"]
+    if response.status != 204:
+        lines.append(f"Content-Type: {response.content_type}")
+        lines.append(f"Content-Length: {len(response.body)}")
+    head = "\r\n".join(lines) + "\r\n\r\n"
+    return head.encode("latin-1") + (response.body if response.status != 204 else b"")
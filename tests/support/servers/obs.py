@@ -0,0 +1,270 @@
+"""
+OBS Studio の WebSocket サーバ (obs-websocket v5) の代役.
+認証と GetSourceScreenshot の要求だけに応答する.
+"""
+
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import secrets
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
+
+import cv2
+import msgpack  # type: ignore
+from cv2.typing import MatLike
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+from websockets.typing import Subprotocol
+
+from .fault import Fault, FaultInjector, Latency
+
+RPC_VERSION = 1
+
+# obs-websocket のオペコード.
+_OP_HELLO = 0
+_OP_IDENTIFY = 1
+_OP_IDENTIFIED = 2
+_OP_REQUEST = 6
+_OP_REQUEST_RESPONSE = 7
+
+# obs-websocket の要求結果のコード.
+_STATUS_SUCCESS = 100
+_STATUS_UNKNOWN_REQUEST_TYPE = 204
+_STATUS_INVALID_REQUEST_FIELD = 400
+_STATUS_RESOURCE_NOT_FOUND = 600
+_STATUS_REQUEST_PROCESSING_FAILED = 702
+
+# obs-websocket の切断コード.
+_CLOSE_NOT_IDENTIFIED = 4007
+_CLOSE_AUTHENTICATION_FAILED = 4009
+_CLOSE_UNSUPPORTED_RPC_VERSION = 4010
+
+_SUBPROTOCOL_JSON = Subprotocol("obswebsocket.json")
+_SUBPROTOCOL_MSGPACK = Subprotocol("obswebsocket.msgpack")
+
+_IMAGE_FORMATS = {"jpg": ".jpg", "jpeg": ".jpg", "png": ".png", "bmp": ".bmp"}
+
+
+class ObsServer:
+    """
+    映像ソースのスクリーンショットをフレームの列から返す.
+    フレームが尽きたら取得失敗を応答する. 繰り返すときは itertools.cycle を渡す.
+    """
+
+    def __init__(
+        self,
+        frames: Iterable[MatLike],
+        *,
+        source: str = "Capture",
+        password: str = "",
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ):
+        self.latency = latency or Latency()
+        self.faults = faults or FaultInjector()
+        self._frames: Iterator[MatLike] = iter(frames)
+        self._source = source
+        self._password = password
+        self._connections: set[ServerConnection] = set()
+        self._port = 0
+        self._connection_count = 0
+        self._request_count = 0
+        self._screenshot_count = 0
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def password(self) -> str:
+        return self._password
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def connection_count(self) -> int:
+        """これまでに受け付けた接続の数."""
+        return self._connection_count
+
+    @property
+    def request_count(self) -> int:
+        return self._request_count
+
+    @property
+    def screenshot_count(self) -> int:
+        """スクリーンショットを返した回数."""
+        return self._screenshot_count
+
+    async def disconnect_all(self) -> None:
+        """OBS Studio の終了を模して, すべての接続を切る."""
+        await asyncio.gather(*(c.close() for c in list(self._connections)))
+
+    async def _handle_connection(self, connection: ServerConnection) -> None:
+        self._connection_count += 1
+        self._connections.add(connection)
+        tasks: set[asyncio.Task] = set()
+        try:
+            if not await self._identify(connection):
+                return
+            async for message in connection:
+                payload = _unpack(message)
+                if payload.get("op") != _OP_REQUEST:
+                    continue
+                task = asyncio.create_task(self._respond(connection, payload["d"]))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(connection)
+            for task in tasks:
+                task.cancel()
+
+    async def _identify(self, connection: ServerConnection) -> bool:
+        hello: dict[str, Any] = {
+            "obsWebSocketVersion": "5.0.0",
+            "rpcVersion": RPC_VERSION,
+        }
+        expected: Optional[str] = None
+        if self._password:
+            challenge = base64.b64encode(secrets.token_bytes(32)).decode()
+            salt = base64.b64encode(secrets.token_bytes(32)).decode()
+            hello["authentication"] = {"challenge": challenge, "salt": salt}
+            expected = authentication_string(self._password, salt, challenge)
+        await _send(connection, {"op": _OP_HELLO, "d": hello})
+
+        payload = _unpack(await connection.recv())
+        if payload.get("op") != _OP_IDENTIFY:
+            await connection.close(_CLOSE_NOT_IDENTIFIED, "Not identified.")
+            return False
+        data = payload.get("d", {})
+        if data.get("rpcVersion") != RPC_VERSION:
+            await connection.close(_CLOSE_UNSUPPORTED_RPC_VERSION, "Unsupported.")
+            return False
+        if expected is not None and data.get("authentication") != expected:
+            await connection.close(_CLOSE_AUTHENTICATION_FAILED, "Auth failed.")
+            return False
+
+        identified = {"negotiatedRpcVersion": RPC_VERSION}
+        await _send(connection, {"op": _OP_IDENTIFIED, "d": identified})
+        return True
+
+    async def _respond(self, connection: ServerConnection, request: dict) -> None:
+        self._request_count += 1
+        await self.latency.wait()
+        match self.faults.next():
+            case Fault.DISCONNECT:
+                await connection.close()
+                return
+            case Fault.TIMEOUT:
+                return
+            case Fault.ERROR:
+                code, data = _STATUS_REQUEST_PROCESSING_FAILED, None
+            case None:
+                code, data = await self._process(request)
+
+        status: dict[str, Any] = {"result": code == _STATUS_SUCCESS, "code": code}
+        response: dict[str, Any] = {
+            "requestType": request.get("requestType"),
+            "requestId": request.get("requestId"),
+            "requestStatus": status,
+        }
+        if data is not None:
+            response["responseData"] = data
+        with contextlib.suppress(ConnectionClosed):
+            await _send(connection, {"op": _OP_REQUEST_RESPONSE, "d": response})
+
+    async def _process(self, request: dict) -> tuple[int, Optional[dict]]:
+        if request.get("requestType") != "GetSourceScreenshot":
+            return _STATUS_UNKNOWN_REQUEST_TYPE, None
+
+        params = request.get("requestData") or {}
+        if params.get("sourceName") != self._source:
+            return _STATUS_RESOURCE_NOT_FOUND, None
+        image_format = params.get("imageFormat")
+        if image_format not in _IMAGE_FORMATS:
+            return _STATUS_INVALID_REQUEST_FIELD, None
+
+        frame = next(self._frames, None)
+        if frame is None:
+            return _STATUS_REQUEST_PROCESSING_FAILED, None
+        size = (params.get("imageWidth"), params.get("imageHeight"))
+        # エンコードは重いため, 他の接続の応答を妨げないよう別スレッドで行う.
+        data = await asyncio.to_thread(_encode, frame, image_format, size)
+        if data is None:
+            return _STATUS_REQUEST_PROCESSING_FAILED, None
+
+        self._screenshot_count += 1
+        encoded = base64.b64encode(data).decode()
+        return _STATUS_SUCCESS, {
+            "imageData": f"data:image/{image_format};base64,{encoded}"
+        }
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def create(
+        frames: Iterable[MatLike],
+        *,
+        source: str = "Capture",
+        password: str = "",
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ) -> AsyncIterator["ObsServer"]:
+        """
+        一時的なポートで待ち受ける.
+        クライアントは IPv6 のループバックアドレスに接続するため, それで待ち受ける.
+        """
+        server = ObsServer(
+            frames,
+            source=source,
+            password=password,
+            latency=latency,
+            faults=faults,
+        )
+        async with serve(
+            server._handle_connection,
+            "::1",
+            0,
+            subprotocols=[_SUBPROTOCOL_MSGPACK, _SUBPROTOCOL_JSON],
+            max_size=2**24,
+        ) as ws:
+            server._port = next(iter(ws.sockets)).getsockname()[1]
+            yield server
+            await server.disconnect_all()
+
+
+def authentication_string(password: str, salt: str, challenge: str) -> str:
+    """obs-websocket v5 の認証文字列."""
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode()).digest())
+    return base64.b64encode(
+        hashlib.sha256(secret + challenge.encode()).digest()
+    ).decode()
+
+
+def _encode(
+    frame: MatLike,
+    image_format: str,
+    size: tuple[Optional[int], Optional[int]],
+) -> Optional[bytes]:
+    width, height = size
+    if width and height and (frame.shape[1], frame.shape[0]) != (width, height):
+        frame = cv2.resize(frame, (width, height))
+    ok, data = cv2.imencode(_IMAGE_FORMATS[image_format], frame)
+    return data.tobytes() if ok else None
+
+
+async def _send(connection: ServerConnection, payload: dict) -> None:
+    if connection.subprotocol == _SUBPROTOCOL_MSGPACK:
+        await connection.send(msgpack.packb(payload))
+    else:
+        await connection.send(json.dumps(payload))
+
+
+def _unpack(message: str | bytes) -> dict:
+    if isinstance(message, bytes):
+        return msgpack.unpackb(message)
+    return json.loads(message)
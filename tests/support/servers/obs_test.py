@@ -0,0 +1,94 @@
+import itertools
+
+import numpy as np
+from cv2.typing import MatLike
+from pytest import mark, raises
+from returns.pipeline import is_successful
+
+from pkscrd.app.reader.factory.core.screen import using_obs_screen_fetcher
+from pkscrd.app.settings.error import SettingsError
+from pkscrd.app.settings.model import ObsSettings
+from pkscrd.core.screen.infra.obs import ObsClient
+from pkscrd.core.screen.service.impl.obs import ObsRecovery, ObsScreenFetcher
+from pkscrd.core.tolerance.service import AsyncTolerance
+from tests.support.servers import Fault, FaultInjector, ObsServer
+
+
+def _image(value: int) -> MatLike:
+    return np.full((1080, 1920, 3), value, dtype=np.uint8)
+
+
+def _value_of(image: MatLike) -> int:
+    return int(image[540, 960, 0])
+
+
+@mark.asyncio
+class TestObsServer:
+
+    async def test_認証したクライアントにフレームを順に返す(self):
+        frames = [_image(0), _image(128), _image(255)]
+        async with ObsServer.create(frames, password="secret") as server:
+            async with ObsClient.create(server.port, "secret") as obs:
+                assert await obs.ensure_connection()
+                assert await obs.ensure_identified()
+                sut = ObsScreenFetcher(obs, server.source, AsyncTolerance())
+
+                values = [_value_of((await sut.fetch()).unwrap()) for _ in frames]
+
+        # JPEG の圧縮歪みを許す.
+        assert np.allclose(values, [0, 128, 255], atol=2)
+        assert server.screenshot_count == 3
+
+    async def test_パスワードが誤っていれば識別されない(self):
+        async with ObsServer.create([], password="secret") as server:
+            async with ObsClient.create(server.port, "wrong") as obs:
+                assert await obs.ensure_connection()
+                assert not await obs.ensure_identified(timeout=1)
+
+    async def test_映像ソースが誤っていれば取得に失敗する(self):
+        async with ObsServer.create(itertools.repeat(_image(0))) as server:
+            async with ObsClient.create(server.port, "") as obs:
+                await obs.ensure_connection()
+                await obs.ensure_identified()
+                with raises(RuntimeError):
+                    await obs.get_source_screenshot("unknown")
+
+    async def test_注入した失敗は連続エラーとして数えられる(self):
+        faults = FaultInjector()
+        frames = itertools.repeat(_image(0))
+        async with ObsServer.create(frames, faults=faults) as server:
+            async with ObsClient.create(server.port, "") as obs:
+                await obs.ensure_connection()
+                await obs.ensure_identified()
+                sut = ObsScreenFetcher(obs, server.source, AsyncTolerance())
+
+                faults.inject(Fault.ERROR, 2)
+                results = [await sut.fetch() for _ in range(3)]
+
+        assert [is_successful(r) for r in results] == [False, False, True]
+
+    async def test_切断されたら復旧処理で再接続する(self):
+        async with ObsServer.create(itertools.repeat(_image(0))) as server:
+            async with ObsClient.create(server.port, "") as obs:
+                await obs.ensure_connection()
+                await obs.ensure_identified()
+                tolerance = AsyncTolerance(
+                    recovery=ObsRecovery(obs, sleep_in_seconds=0.0),
+                    warning_count=1,
+                )
+                sut = ObsScreenFetcher(obs, server.source, tolerance)
+
+                await server.disconnect_all()
+                first = await sut.fetch()
+                second = await sut.fetch()
+
+        assert not is_successful(first)
+        assert is_successful(second)
+        assert server.connection_count == 2
+
+    async def test_起動時の確認が失敗すれば設定エラーとする(self):
+        async with ObsServer.create(itertools.repeat(_image(0))) as server:
+            settings = ObsSettings(port=server.port, password="", source="unknown")
+            with raises(SettingsError):
+                async with using_obs_screen_fetcher(settings):
+                    pass
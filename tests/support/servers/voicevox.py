@@ -0,0 +1,177 @@
+import contextlib
+import dataclasses
+import io
+import wave
+from typing import AsyncIterator, Optional
+
+from .fault import FaultInjector, Latency
+from .http import HttpRequest, HttpResponse, HttpServer
+
+
+@dataclasses.dataclass(frozen=True)
+class Speaker:
+    name: str
+    styles: dict[int, str]
+    """スタイル ID とスタイル名の対応."""
+
+
+DEFAULT_SPEAKERS = (
+    Speaker("四国めたん", {2: "ノーマル", 0: "あまあま"}),
+    Speaker("ずんだもん", {3: "ノーマル", 1: "あまあま"}),
+)
+
+
+class VoiceVoxServer:
+    """
+    VOICEVOX エンジンの代役.
+    音声合成の代わりに, 文字数と話速に比例した長さの無音の WAV を返す.
+    """
+
+    SECONDS_PER_CHARACTER = 0.1
+    """話速 1.0 のときの 1 文字あたりの秒数."""
+
+    def __init__(
+        self,
+        *,
+        speakers: tuple[Speaker, ...] = DEFAULT_SPEAKERS,
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ):
+        self._speakers = speakers
+        self._style_ids = {i for s in speakers for i in s.styles}
+        self._initialized: set[int] = set()
+        self._texts: list[str] = []
+        self._http = HttpServer(
+            {
+                ("GET", "/speakers"): self._get_speakers,
+                ("POST", "/initialize_speaker"): self._initialize_speaker,
+                ("POST", "/audio_query"): self._audio_query,
+                ("POST", "/synthesis"): self._synthesis,
+            },
+            latency=latency,
+            faults=faults,
+        )
+
+    @property
+    def port(self) -> int:
+        return self._http.port
+
+    @property
+    def latency(self) -> Latency:
+        return self._http.latency
+
+    @property
+    def faults(self) -> FaultInjector:
+        return self._http.faults
+
+    @property
+    def request_count(self) -> int:
+        return self._http.request_count
+
+    @property
+    def initialized_speakers(self) -> set[int]:
+        return self._initialized
+
+    @property
+    def synthesized_texts(self) -> list[str]:
+        """音声合成した文. 合成した順."""
+        return self._texts
+
+    async def _get_speakers(self, _: HttpRequest) -> HttpResponse:
+        return HttpResponse.of_json(
+            [
+                {
+                    "name": s.name,
+                    "speaker_uuid": f"00000000-0000-0000-0000-{index:012d}",
+                    "styles": [{"name": n, "id": i} for i, n in s.styles.items()],
+                    "version": "0.0.0",
+                }
+                for index, s in enumerate(self._speakers)
+            ]
+        )
+
+    async def _initialize_speaker(self, request: HttpRequest) -> HttpResponse:
+        speaker = self._find_speaker(request)
+        if speaker is None:
+            return _validation_error("speaker")
+        self._initialized.add(speaker)
+        return HttpResponse(204)
+
+    async def _audio_query(self, request: HttpRequest) -> HttpResponse:
+        speaker = self._find_speaker(request)
+        text = request.query.get("text")
+        if speaker is None or text is None:
+            return _validation_error("speaker" if speaker is None else "text")
+        return HttpResponse.of_json(
+            {
+                "accent_phrases": [],
+                "speedScale": 1.0,
+                "pitchScale": 0.0,
+                "intonationScale": 1.0,
+                "volumeScale": 1.0,
+                "prePhonemeLength": 0.1,
+                "postPhonemeLength": 0.1,
+                "pauseLength": None,
+                "pauseLengthScale": 1.0,
+                "outputSamplingRate": 24000,
+                "outputStereo": False,
+                # 本来はカナ表記だが, 合成する長さを決めるためにそのまま持たせる.
+                "kana": text,
+            }
+        )
+
+    async def _synthesis(self, request: HttpRequest) -> HttpResponse:
+        if self._find_speaker(request) is None:
+            return _validation_error("speaker")
+        try:
+            query = request.json()
+            text = str(query["kana"])
+            seconds = (
+                len(text) * self.SECONDS_PER_CHARACTER / float(query["speedScale"])
+                + float(query["prePhonemeLength"])
+                + float(query["postPhonemeLength"])
+            )
+            rate = int(query["outputSamplingRate"])
+            channels = 2 if query["outputStereo"] else 1
+        except (ValueError, KeyError, TypeError):
+            return _validation_error("body")
+
+        self._texts.append(text)
+        return HttpResponse(200, silent_wav(seconds, rate, channels), "audio/wav")
+
+    def _find_speaker(self, request: HttpRequest) -> Optional[int]:
+        try:
+            speaker = int(request.query["speaker"])
+        except (KeyError, ValueError):
+            return None
+        return speaker if speaker in self._style_ids else None
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def create(
+        *,
+        speakers: tuple[Speaker, ...] = DEFAULT_SPEAKERS,
+        latency: Optional[Latency] = None,
+        faults: Optional[FaultInjector] = None,
+    ) -> AsyncIterator["VoiceVoxServer"]:
+        server = VoiceVoxServer(speakers=speakers, latency=latency, faults=faults)
+        async with server._http.serving():
+            yield server
+
+
+def silent_wav(seconds: float, rate: int, channels: int) -> bytes:
+    """16 bit PCM の無音の WAV を作る."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(max(0, round(seconds * rate)) * channels * 2))
+    return buffer.getvalue()
+
+
+def _validation_error(name: str) -> HttpResponse:
+    return HttpResponse.of_json(
+        {"detail": [{"loc": ["query", name], "msg": "invalid", "type": "value_error"}]},
+        422,
+    )
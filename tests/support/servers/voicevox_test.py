@@ -0,0 +1,66 @@
+import asyncio
+from queue import Queue
+
+from pytest import mark, raises
+
+from pkscrd.core.notification.infra.voicevox import VoiceVoxClient
+from pkscrd.core.notification.service.impl.voicevox import AudioItem, VoicevoxTalker
+from pkscrd.core.tolerance.service import Tolerance
+from tests.support.servers import Fault, FaultInjector, VoiceVoxServer
+
+
+@mark.asyncio
+class TestVoiceVoxServer:
+
+    async def test_話者一覧を返す(self):
+        async with VoiceVoxServer.create() as server:
+            client = VoiceVoxClient(port=server.port)
+            speakers = await asyncio.to_thread(client.speakers)
+
+        assert [s.name for s in speakers] == ["四国めたん", "ずんだもん"]
+        assert [style.id for style in speakers[1].styles] == [3, 1]
+
+    async def test_文字数と話速に応じた長さの音声を合成する(self):
+        async with VoiceVoxServer.create() as server:
+            client = VoiceVoxClient(port=server.port)
+
+            def synthesize() -> tuple[int, int, int]:
+                client.initialize_speaker(3)
+                query = client.audio_query("あいうえお", speaker=3)
+                query["speedScale"] = 2.0
+                query["prePhonemeLength"] = 0.0
+                query["postPhonemeLength"] = 0.0
+                query["outputSamplingRate"] = 16000
+                query["outputStereo"] = True
+                with client.synthesis(query, speaker=3) as wav:
+                    return wav.getnframes(), wav.getframerate(), wav.getnchannels()
+
+            frames, rate, channels = await asyncio.to_thread(synthesize)
+
+        assert (frames, rate, channels) == (4000, 16000, 2)
+        assert server.initialized_speakers == {3}
+        assert server.synthesized_texts == ["あいうえお"]
+
+    async def test_存在しない話者は受け付けない(self):
+        async with VoiceVoxServer.create() as server:
+            client = VoiceVoxClient(port=server.port)
+            with raises(RuntimeError):
+                await asyncio.to_thread(client.initialize_speaker, 99)
+
+    async def test_注入した障害は読み上げを飛ばす(self):
+        faults = FaultInjector()
+        async with VoiceVoxServer.create(faults=faults) as server:
+            queue: Queue[AudioItem] = Queue()
+            sut = VoicevoxTalker(
+                VoiceVoxClient(port=server.port),
+                queue,
+                Tolerance(),
+            )
+
+            faults.inject(Fault.ERROR)
+            faults.inject(Fault.DISCONNECT)
+            for text in ["いち", "に", "さん"]:
+                await asyncio.to_thread(sut, text)
+
+        assert queue.qsize() == 1
+        assert server.synthesized_texts == ["さん"]
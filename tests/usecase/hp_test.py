@@ -75,7 +75,9 @@ class TestHpUseCase:
         sut: HpUseCase[int],
     ):
         sut.request()
+        assert sut.requested
         assert sut.handle({}) == HpNotification(None)
+        assert not sut.requested
 
         assert sut.handle({HpScene.COMMAND: 1}) is None
 
@@ -125,6 +127,9 @@ async def test_OpponentHpUseCase(mocker: MockerFixture):
     controller.request()
     assert await controller.handle(sentinel.image) == OpponentHpNotification(ratio=0.5)
 
+    # 映像を待たずに, 直近に読み取った HP で答える.
+    assert controller.answer() == OpponentHpNotification(ratio=0.5)
+
     # HP 読み込みや差分判定を inject した部分の確認
     assert await controller.handle(sentinel.image) is None
     assert await controller.handle(sentinel.image) is None
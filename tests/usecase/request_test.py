@@ -0,0 +1,37 @@
+import threading
+
+from pkscrd.usecase.request import RequestFlag
+
+
+class TestRequestFlag:
+
+    def test_要求は1度だけ処理される(self):
+        sut = RequestFlag()
+        assert not sut.is_set
+
+        sut.set()
+        sut.set()
+
+        assert sut.is_set
+        assert sut.consume()
+        assert not sut.consume()
+        assert not sut.is_set
+
+    def test_複数のスレッドで取り下げても_要求を処理するのは1つだけ(self):
+        sut = RequestFlag()
+        barrier = threading.Barrier(8)
+        consumed: list[bool] = []
+
+        def consume() -> None:
+            barrier.wait()
+            consumed.append(sut.consume())
+
+        for _ in range(100):
+            consumed.clear()
+            sut.set()
+            threads = [threading.Thread(target=consume) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert consumed.count(True) == 1
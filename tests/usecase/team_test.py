@@ -43,6 +43,35 @@ class TestTeamUseCase:
             ) == TeamNotification(direction=TeamDirection.OPPONENT, team=[])
             recognize.assert_not_called()
 
+        def test_チームが表示されていない場面では_映像を待たずに現在のチームで答える(
+            self,
+            sut: TeamUseCase,
+            recognize: Mock,
+        ):
+            sut.request_update()
+            sut.handle(ImageScene.SELECTION, sentinel.image)
+
+            assert sut.answer(ImageScene.COMMAND, with_types=True) == TeamNotification(
+                direction=TeamDirection.OPPONENT,
+                team=[PokemonId(1, 2)],
+                with_types=True,
+            )
+            assert not sut.handle(ImageScene.COMMAND, sentinel.image)
+
+        def test_チームが表示されている場面では_読み直すため次の処理で通知する(
+            self,
+            sut: TeamUseCase,
+            recognize: Mock,
+        ):
+            assert sut.answer(ImageScene.SELECTION) is None
+            assert sut.handle(
+                ImageScene.SELECTION,
+                sentinel.image,
+            ) == TeamNotification(
+                direction=TeamDirection.OPPONENT,
+                team=[PokemonId(1, 2)],
+            )
+
         def test_リクエストがなく_更新リクエストがあり_更新可能なシーンではない_更新せず通知もしない(
             self,
             sut: TeamUseCase,
@@ -109,3 +138,17 @@ class TestTeamUseCase:
                 map_func=sentinel.map_func,
             )
             recognize.assert_called_once_with(sentinel.image1, sentinel.map_func)
+
+        def test_自動通知に切り替えると_更新時に通知する(
+            self,
+            sut: TeamUseCase,
+            recognize: Mock,
+        ):
+            sut.set_uses_auto_notification(True)
+            sut.request_update()
+            assert sut.handle(
+                ImageScene.SELECTION, sentinel.image1
+            ) == TeamNotification(
+                direction=TeamDirection.ALLY,
+                team=[PokemonId(1, 2)],
+            )